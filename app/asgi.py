@@ -0,0 +1,299 @@
+"""
+ASGI server, handling the same requests as :mod:`app.server`.
+
+Requests are read, verified and acknowledged on an event loop, and handled by
+the same code as in :mod:`app.server`, in a pool of ``ASGI_HANDLER_THREADS``
+threads instead of a thread per command. The I/O of that code that can wait
+the longest runs on the event loop: the teams of ``team refresh`` are read
+from GitHub with httpx, several at a time, Slack is called through its
+asynchronous client, and responses to commands are posted with httpx (see
+:mod:`utils.aio`). One process can thus take many long commands at once, and
+queue them for the threads, without a thread waiting on each of them.
+
+Run it with an ASGI server, like uvicorn::
+
+    uvicorn --factory app.asgi:make_app --port 5000
+"""
+import asyncio
+import functools
+import json
+import logging
+import time
+
+from app.controller.command import CommandParser
+from app.controller.webhook.github import GitHubWebhookHandler
+from app.controller.webhook.slack import SlackEventsHandler
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from factory import make_async_bot, make_async_github_client, \
+    make_async_github_interface, make_async_poster, make_command_parser, \
+    make_github_interface, make_github_webhook_handler, \
+    make_logging_config, make_slack_events_handler, start_webhook_workers, \
+    warm_up
+from factory.lazy import Lazy
+from interface.slack import SlackDirectory, verify_signature
+from logging.config import dictConfig
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, \
+    Optional, Set, Tuple, TypeVar
+from urllib.parse import parse_qs
+from utils.aio import LoopBridge
+
+T = TypeVar('T')
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+# Handler of a route, given the headers and body of a request
+Handler = Callable[[Dict[str, str], bytes], Awaitable[Tuple[Any, int]]]
+
+# Headers of every response, like those flask_talisman adds in app.server
+SECURITY_HEADERS = [
+    (b'strict-transport-security', b'max-age=31556926; includeSubDomains'),
+    (b'x-frame-options', b'SAMEORIGIN'),
+    (b'x-content-type-options', b'nosniff'),
+    (b'content-security-policy', b"default-src 'self'"),
+    (b'referrer-policy', b'strict-origin-when-cross-origin'),
+]
+
+
+class AsgiApp:
+    """ASGI application routing requests to the handlers of Rocket."""
+
+    def __init__(self,
+                 config: Config,
+                 bridge: LoopBridge,
+                 command_parser: CommandParser,
+                 github_webhook_handler: GitHubWebhookHandler,
+                 slack_events_handler: SlackEventsHandler,
+                 async_clients: Iterable[Any] = ()):
+        """
+        Initialize the application, without starting it.
+
+        :param config: config the handlers were made from
+        :param bridge: bridge the asynchronous clients of the handlers run
+                       their coroutines through, attached to the loop on
+                       startup
+        :param async_clients: clients to close on shutdown, with ``aclose``
+        """
+        self.config = config
+        self.bridge = bridge
+        self.command_parser = command_parser
+        self.github_webhook_handler = github_webhook_handler
+        self.slack_events_handler = slack_events_handler
+        self.async_clients = list(async_clients)
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # Handling started but not awaited by any request
+        self.tasks: Set[asyncio.Future] = set()
+        self.routes: Dict[str, Tuple[str, Handler]] = {
+            '/': ('GET', self.check),
+            '/slack/commands': ('POST', self.handle_commands),
+            '/slack/events': ('POST', self.handle_slack_events),
+            config.github_webhook_endpt: ('POST',
+                                          self.handle_github_webhook),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle an ASGI connection."""
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        route = self.routes.get(scope['path'])
+        if route is None:
+            await self.respond(send, 'Not Found', 404)
+            return
+        method, handler = route
+        if scope['method'] != method:
+            await self.respond(send, 'Method Not Allowed', 405)
+            return
+
+        body = await self.read_body(receive)
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1')
+                   for k, v in scope['headers']}
+        if self.executor is None:
+            # Servers without lifespan events never start the application
+            await self.startup()
+        try:
+            resp, status = await handler(headers, body)
+        except Exception:
+            logging.exception(f"Error handling {scope['path']}")
+            resp, status = 'Internal Server Error', 500
+        await self.respond(send, resp, status)
+
+    async def lifespan(self, receive: Receive, send: Send):
+        """Start the application, and stop it once the server stops."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def startup(self):
+        """Start the threads handling requests and webhooks, and warm up."""
+        self.bridge.attach(asyncio.get_running_loop())
+        threads = int(self.config.asgi_handler_threads)
+        self.executor = ThreadPoolExecutor(max_workers=threads,
+                                           thread_name_prefix='handler')
+        start_webhook_workers(self.github_webhook_handler, self.config)
+        if self.config.warm_up_clients:
+            warm_up(self.config)
+        logging.info(f"ASGI server started with {threads} handler threads")
+
+    async def shutdown(self):
+        """Finish handling requests, and close clients."""
+        if self.tasks:
+            logging.info(f"Waiting for {len(self.tasks)} requests to be "
+                         "handled")
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.executor is not None:
+            # Without blocking the loop, which the threads may still use
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.executor.shutdown)
+            self.executor = None
+        for client in self.async_clients:
+            # Clients never used were never built, and have nothing to close
+            if not isinstance(client, Lazy) or client.client is not None:
+                await client.aclose()
+        self.bridge.detach()
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Call a function in a handler thread, and return its result."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(func, *args))
+
+    def spawn(self, func: Callable[..., Any], *args: Any):
+        """Call a function in a handler thread, without waiting for it."""
+        task = asyncio.ensure_future(self.run(func, *args))
+        self.tasks.add(task)
+        task.add_done_callback(self.finished)
+
+    def finished(self, task: asyncio.Future):
+        """Forget about a finished task, and log its error if it failed."""
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error("Error handling request",
+                          exc_info=task.exception())
+
+    async def check(self, headers: Dict[str, str], body: bytes) \
+            -> Tuple[Any, int]:
+        """Display a Rocket status image."""
+        return "🚀", 200
+
+    async def handle_commands(self, headers: Dict[str, str], body: bytes) \
+            -> Tuple[Any, int]:
+        """Acknowledge rocket slash commands, and handle them later."""
+        logging.info("Slash command received")
+        if not self.verify_slack(headers, body):
+            logging.error("Slack signature could not be verified")
+            return "Slack signature could not be verified", 200
+        form = parse_qs(body.decode())
+
+        def field(name: str) -> str:
+            return form.get(name, [''])[0]
+        txt, uid = field('text'), field('user_id')
+        logging.info(f"@{uid}: {field('command')} {txt}")
+        self.spawn(self.command_parser.handle_app_command,
+                   txt, uid, field('response_url'))
+        return "", 200
+
+    async def handle_slack_events(self,
+                                  headers: Dict[str, str],
+                                  body: bytes) -> Tuple[Any, int]:
+        """Handle Slack events, like users joining the workspace."""
+        if not self.verify_slack(headers, body):
+            logging.error("Slack signature could not be verified")
+            return "Slack signature could not be verified", 403
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return "Payload is not valid JSON", 400
+        if payload.get('type') == 'url_verification':
+            return {'challenge': payload.get('challenge')}, 200
+        event_type = payload.get('event', {}).get('type')
+        if event_type == 'team_join':
+            logging.info("Handled 'team_join' event")
+            self.spawn(self.slack_events_handler.handle_team_join, payload)
+        elif event_type in SlackDirectory.EVENTS:
+            logging.info(f"Handled '{event_type}' event")
+            # Only forgets what the bot remembers, without waiting on anything
+            self.slack_events_handler.handle_directory_event(payload)
+        return "", 200
+
+    async def handle_github_webhook(self,
+                                    headers: Dict[str, str],
+                                    body: bytes) -> Tuple[Any, int]:
+        """Handle GitHub webhooks."""
+        return await self.run(self.github_webhook_handler.handle, body,
+                              headers.get('x-hub-signature', ''), None,
+                              headers.get('x-github-event', ''),
+                              headers.get('x-github-delivery', ''))
+
+    def verify_slack(self, headers: Dict[str, str], body: bytes) -> bool:
+        """Verify that a request comes from Slack."""
+        return verify_signature(self.config.slack_signing_secret,
+                                headers.get('x-slack-request-timestamp'),
+                                body,
+                                headers.get('x-slack-signature'))
+
+    @staticmethod
+    async def read_body(receive: Receive) -> bytes:
+        """Read the whole body of a request."""
+        chunks: List[bytes] = []
+        more = True
+        while more:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            more = message.get('more_body', False)
+        return b''.join(chunks)
+
+    @staticmethod
+    async def respond(send: Send, resp: Any, status: int):
+        """Send a response, as JSON if it is not text."""
+        if isinstance(resp, str):
+            content_type = b'text/html; charset=utf-8'
+            body = resp.encode()
+        else:
+            content_type = b'application/json'
+            body = json.dumps(resp).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', content_type),
+                        (b'content-length', str(len(body)).encode())] +
+            SECURITY_HEADERS,
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def make_app(config: Optional[Config] = None) -> AsgiApp:
+    """
+    Make the ASGI application, and the handlers it routes requests to.
+
+    :param config: config to make everything from; read from the
+                   environment if not given
+    """
+    start_time = time.time()
+    config = config or Config()
+    dictConfig(make_logging_config(config))
+
+    bridge = LoopBridge()
+    github_interface = make_github_interface(config)
+    async_github_interface = make_async_github_interface(
+        config, github_interface, bridge)
+    bot = make_async_bot(config, bridge)
+    poster = make_async_poster(config, bridge)
+    app = AsgiApp(
+        config, bridge,
+        make_command_parser(config, async_github_interface, bot, poster),
+        make_github_webhook_handler(github_interface, config),
+        make_slack_events_handler(config, bot),
+        [make_async_github_client(config), poster])
+    logging.info("ASGI server initialized in "
+                 f"{(time.time() - start_time) * 1000:.0f} ms")
+    return app
@@ -1,7 +1,43 @@
 """Define the abstract base class for a command parser."""
 from abc import ABC, abstractmethod
 from app.controller import ResponseTuple
-from typing import Optional
+from app.controller.command.progress import Progress
+from argparse import ArgumentParser
+from typing import NoReturn, Optional
+
+
+class ArgumentParseError(Exception):
+    """Raised by :class:`CommandArgumentParser` instead of exiting."""
+
+
+class CommandArgumentParser(ArgumentParser):
+    """
+    Argument parser that raises instead of printing and exiting.
+
+    On bad arguments or ``-h``, :class:`argparse.ArgumentParser` formats usage
+    or help text, writes it to stderr and raises ``SystemExit``. Commands
+    respond with their own help text instead, so this parser skips all of
+    that and raises :class:`ArgumentParseError`. Subparsers added to it are of
+    the same class.
+    """
+
+    def print_usage(self, file=None):
+        """Do nothing; usage is never shown."""
+        pass
+
+    def print_help(self, file=None):
+        """Do nothing; commands show help with :meth:`Command.get_help`."""
+        pass
+
+    def exit(self,
+             status: int = 0,
+             message: Optional[str] = None) -> NoReturn:
+        """Raise :class:`ArgumentParseError` instead of exiting."""
+        raise ArgumentParseError(message or '')
+
+    def error(self, message: str) -> NoReturn:
+        """Raise :class:`ArgumentParseError` with the error message."""
+        raise ArgumentParseError(message)
 
 
 class Command(ABC):
@@ -9,6 +45,8 @@ class Command(ABC):
 
     command_name = ""
     desc = ""
+    already_running_error = "This command is already running! Please wait " \
+                            "for it to finish."
 
     def __init__(self):
         self.subparser = None
@@ -16,8 +54,19 @@ class Command(ABC):
     @abstractmethod
     def handle(self,
                _command: str,
-               user_id: str) -> ResponseTuple:
-        """Handle a command."""
+               user_id: str,
+               progress: Optional[Progress] = None) -> ResponseTuple:
+        """
+        Handle a command.
+
+        Commands that can take long should report through ``progress`` (see
+        :class:`app.controller.command.progress.Progress`).
+
+        :param _command: text of the command
+        :param user_id: Slack ID of the user who called the command
+        :param progress: where to report the progress of the command
+        :return: the response to the command
+        """
         pass
 
     def get_help(self, subcommand: Optional[str] = None) -> str:
@@ -1,14 +1,16 @@
 """Command parsing for user events."""
 import logging
-import shlex
 
-from argparse import ArgumentParser, _SubParsersAction
+from argparse import _SubParsersAction
 from app.controller import ResponseTuple
-from app.controller.command.commands.base import Command
+from app.controller.command.commands.base import Command, \
+    CommandArgumentParser, ArgumentParseError
+from app.controller.command.progress import Progress
 from db.facade import DBFacade
 from app.model import User
 from db.utils import get_team_by_name, get_team_members
-from utils.slack_parse import check_permissions
+from utils.slack_parse import check_permissions, split_command
+from typing import Optional
 
 
 class ExportCommand(Command):
@@ -25,11 +27,13 @@ class ExportCommand(Command):
     desc = f"for dealing with {command_name}s"
     # Slack currently allows to send 16000 characters max
     MAX_CHAR_LIMIT = 15950
+    # Only these attributes are read from the database
+    export_fields = ['slack_id', 'email']
 
     def __init__(self, db_facade: DBFacade):
         """Initialize export command."""
         logging.info("Initializing ExportCommand instance")
-        self.parser = ArgumentParser(prog="/rocket")
+        self.parser = CommandArgumentParser(prog="/rocket")
         self.parser.add_argument("export")
         self.subparser = self.init_subparsers()
         self.facade = db_facade
@@ -55,15 +59,16 @@ class ExportCommand(Command):
 
     def handle(self,
                command: str,
-               user_id: str) -> ResponseTuple:
+               user_id: str,
+               progress: Optional[Progress] = None) -> ResponseTuple:
         """Handle command by splitting into substrings and giving to parser."""
         logging.debug("Handling ExportCommand")
-        command_arg = shlex.split(command)
+        command_arg = split_command(command)
         args = None
 
         try:
             args = self.parser.parse_args(command_arg)
-        except SystemExit:
+        except ArgumentParseError:
             all_subcommands = list(self.subparser.choices.keys())
             present_subcommands = [subcommand for subcommand in
                                    all_subcommands
@@ -84,7 +89,8 @@ class ExportCommand(Command):
                     users = self.get_team_users(args.team)
                     return self.export_emails_helper(users)
                 else:  # if team name is not provided, export all emails
-                    users = self.facade.query(User)
+                    users = self.facade.query(User,
+                                              fields=self.export_fields)
                     return self.export_emails_helper(users)
             except LookupError:
                 return self.lookup_error, 200
@@ -93,7 +99,7 @@ class ExportCommand(Command):
 
     def get_team_users(self, team_name):
         team = get_team_by_name(self.facade, team_name)
-        return get_team_members(self.facade, team)
+        return get_team_members(self.facade, team, self.export_fields)
 
     def export_emails_helper(self,
                              users: list) -> ResponseTuple:
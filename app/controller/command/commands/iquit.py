@@ -1,11 +1,12 @@
 """Command parsing for quitting events."""
 import logging
 import random
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from argparse import ArgumentParser
 from app.controller import ResponseTuple
 from app.controller.command.commands.base import Command
+from app.controller.command.progress import Progress
 from db.facade import DBFacade
 from db.utils import get_users_by_ghid
 from app.model import User, Team, Permissions
@@ -25,6 +26,10 @@ class IQuitCommand(Command):
         "and admins:"
     remfromall = "Removing from Github Organization, teams, and projects. " +\
         "Reverting commits you have made."
+    # Only these attributes are read from the database, apart from the user
+    # who is quitting
+    user_fields = ['slack_id', 'permission_level']
+    team_fields = ['github_team_name', 'members', 'team_leads']
 
     def __init__(self, dbf: DBFacade):
         """Initialize iquit command."""
@@ -34,7 +39,10 @@ class IQuitCommand(Command):
         self.parser.add_argument("i-quit")
         self.facade = dbf
 
-    def handle(self, command: str, user_id: str) -> ResponseTuple:
+    def handle(self,
+               command: str,
+               user_id: str,
+               progress: Optional[Progress] = None) -> ResponseTuple:
         """
         Handle the command if it is called in any way shape or form.
 
@@ -71,18 +79,20 @@ class IQuitCommand(Command):
 
     def get_leads(self, user: User) -> List[User]:
         """Return a list of team leads user is in a team with."""
-        teams: List[Team] = self.facade.query(Team)
+        teams: List[Team] = self.facade.query(Team, fields=self.team_fields)
         leads: List[User] = []
         for team in teams:
             if len(team.team_leads) > 0 and team.has_member(user.github_id):
                 leads.extend(get_users_by_ghid(self.facade,
-                                               list(team.team_leads)))
+                                               list(team.team_leads),
+                                               self.user_fields))
             if team.github_team_name != "all" and\
                     team.has_member(user.github_id):
                 # Some teams aren't up to date and don't have team leads, so we
                 # have to add them manually. Just don't add the 'all' team and
                 # we'll be fine.
-                members = get_users_by_ghid(self.facade, list(team.members))
+                members = get_users_by_ghid(self.facade, list(team.members),
+                                            self.user_fields)
                 for m in members:
                     if m.permissions_level == Permissions.team_lead or\
                             m.permissions_level == Permissions.admin:
@@ -92,13 +102,15 @@ class IQuitCommand(Command):
     def get_admins(self) -> List[User]:
         """Return a list of current admins."""
         admins: List[User] = self.facade.query(User, [("permission_level",
-                                                       "admin")])
+                                                       "admin")],
+                                               self.user_fields)
         return admins
 
     def get_teamlead_specialtext(self, user: User) -> str:
         """Return special text for team leads."""
         teams: List[Team] = self.facade.query_or(Team, [("team_leads",
-                                                         user.github_id)])
+                                                         user.github_id)],
+                                                 self.team_fields)
         ctx: Dict[str, str] = {}
         for team in teams:
             # Find a random member in the team and use them to replace you. If
@@ -110,7 +122,8 @@ class IQuitCommand(Command):
                 for gh_id in members:
                     # Try all members until we exhaust the pool and then quit
                     # trying
-                    users = get_users_by_ghid(self.facade, [gh_id])
+                    users = get_users_by_ghid(self.facade, [gh_id],
+                                              self.user_fields)
                     if len(users) == 0:
                         continue
 
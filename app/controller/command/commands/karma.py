@@ -1,10 +1,13 @@
 """Command for parsing karma."""
 import logging
-import shlex
-from app.controller.command.commands.base import Command
-from argparse import ArgumentParser, _SubParsersAction
+from app.controller.command.commands.base import Command, \
+    CommandArgumentParser, ArgumentParseError
+from argparse import _SubParsersAction
 from app.model import User, Permissions
 from app.controller import ResponseTuple
+from app.controller.command.progress import Progress
+from typing import Optional
+from utils.slack_parse import split_command
 
 
 class KarmaCommand(Command):
@@ -19,12 +22,14 @@ class KarmaCommand(Command):
     permission_error = "You do not have the sufficient " \
                        "permission level for this command!"
     karma_default_amount = 1
+    top_default_amount = 10
+    top_max_amount = 50
 
     def __init__(self, db_facade):
         """Initialize karma command."""
         super().__init__()
         logging.info("Starting karma command initializer")
-        self.parser = ArgumentParser(prog="/rocket")
+        self.parser = CommandArgumentParser(prog="/rocket")
         self.parser.add_argument("karma")
         self.subparser = self.init_subparsers()
         self.facade = db_facade
@@ -60,25 +65,36 @@ class KarmaCommand(Command):
         parser_view.add_argument("username", metavar="USERNAME",
                                  type=str, action='store',
                                  help="slack id of user karma to view")
+
+        """Parser for top command."""
+        parser_top = subparsers.add_parser(
+            "top", description="View the users with the most karma")
+        parser_top.add_argument("amount", metavar="N", nargs="?",
+                                type=int, action='store',
+                                default=self.top_default_amount,
+                                help="Number of users to show (at most "
+                                     f"{self.top_max_amount})")
         return subparsers
 
-    def handle(self, command, user_id):
+    def handle(self, command, user_id, progress=None):
         """Handle command by splitting into substrings."""
         logging.info('Handling karma Command')
-        command_arg = shlex.split(command)
+        command_arg = split_command(command)
         args = None
 
         try:
             args = self.parser.parse_args(command_arg)
-        except SystemExit:
+        except ArgumentParseError:
             return self.get_help(), 200
 
         if args.which == "set":
             return self.set_helper(user_id, args.username, args.amount)
         elif args.which == "reset":
-            return self.reset_helper(user_id, args.all)
+            return self.reset_helper(user_id, args.all, progress)
         elif args.which == "view":
             return self.view_helper(user_id, args.username)
+        elif args.which == "top":
+            return self.top_helper(args.amount)
         else:
             return self.get_help(), 200
 
@@ -90,9 +106,8 @@ class KarmaCommand(Command):
         try:
             user = self.facade.retrieve(User, user_id)
             if user.permissions_level == Permissions.admin:
-                user = self.facade.retrieve(User, slack_id)
-                user.karma = amount
-                self.facade.store(user)
+                user = self.facade.update_fields(User, slack_id,
+                                                 {'karma': amount})
                 return f"set {user.name}'s karma to {amount}", 200
             else:
                 return self.permission_error, 200
@@ -101,17 +116,24 @@ class KarmaCommand(Command):
 
     def reset_helper(self,
                      user_id: str,
-                     reset_all: bool) -> ResponseTuple:
+                     reset_all: bool,
+                     progress: Optional[Progress] = None) -> ResponseTuple:
         """Reset all users' karma."""
+        progress = progress or Progress()
         try:
             user = self.facade.retrieve(User, user_id)
             if not user.permissions_level == Permissions.admin:
                 return self.permission_error, 200
             if reset_all:
-                user_list = self.facade.query(User, [])
-                for user in user_list:
-                    user.karma = self.karma_default_amount
-                    self.facade.store(user)
+                if not progress.start('karma reset'):
+                    return self.already_running_error, 200
+                user_list = self.facade.query(User, [], ['karma'])
+                for i, user in enumerate(user_list):
+                    progress.update(i, len(user_list), 'users reset')
+                    if user.karma != self.karma_default_amount:
+                        self.facade.update_fields(
+                            User, user.slack_id,
+                            {'karma': self.karma_default_amount})
                 return (
                     "reset all users karma to"
                     f"{self.karma_default_amount}",
@@ -131,3 +153,14 @@ class KarmaCommand(Command):
             return f"{user.name} has {user.karma} karma", 200
         except LookupError:
             return self.lookup_error, 200
+
+    def top_helper(self, amount: int) -> ResponseTuple:
+        """View the users with the most karma, in decreasing order."""
+        amount = max(1, min(amount, self.top_max_amount))
+        users = self.facade.top(User, 'karma', amount,
+                                ['name', 'karma'])
+        if len(users) == 0:
+            return "No one has any karma yet", 200
+        lines = [f"{i}. {user.name or user.slack_id}: {user.karma} karma"
+                 for i, user in enumerate(users, 1)]
+        return "\n".join(lines), 200
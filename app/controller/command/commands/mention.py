@@ -1,11 +1,13 @@
 """Parser for all direct mentions made using rocket."""
 import argparse
 import logging
-import shlex
 from app.controller.command.commands.base import Command
+from app.controller.command.progress import Progress
 from app.controller import ResponseTuple
 from db.facade import DBFacade
 from app.model import User
+from utils.slack_parse import split_command
+from typing import Optional
 
 
 class MentionCommand(Command):
@@ -25,10 +27,13 @@ class MentionCommand(Command):
         self.parser.add_argument("Mention")
         self.facade = db_facade
 
-    def handle(self, command: str, user_id: str) -> ResponseTuple:
+    def handle(self,
+               command: str,
+               user_id: str,
+               progress: Optional[Progress] = None) -> ResponseTuple:
         """Handle command by splitting into substrings."""
         logging.debug('Handling Mention Command')
-        command_arg = shlex.split(command)
+        command_arg = split_command(command)
         if len(command_arg) <= 1:
             return "invalid command", 200
         elif command_arg[1] == '++':
@@ -42,9 +47,8 @@ class MentionCommand(Command):
         if giver_id == receiver_id:
             return "cannot give karma to self", 200
         try:
-            user = self.facade.retrieve(User, receiver_id)
-            user.karma += self.karma_add_amount
-            self.facade.store(user)
+            user = self.facade.increment(User, receiver_id, 'karma',
+                                         self.karma_add_amount)
             return f"gave {self.karma_add_amount} karma to {user.name}", 200
         except LookupError:
             return self.lookup_error, 200
@@ -1,9 +1,10 @@
 """Command parsing for team events."""
 import logging
-import shlex
-from argparse import ArgumentParser, _SubParsersAction, Namespace
+from argparse import _SubParsersAction, Namespace
 from app.controller import ResponseTuple
-from app.controller.command.commands.base import Command
+from app.controller.command.commands.base import Command, \
+    CommandArgumentParser, ArgumentParseError
+from app.controller.command.progress import Progress
 from app.model import Permissions
 from db.facade import DBFacade
 from db.utils import get_team_by_name, get_team_members
@@ -13,7 +14,7 @@ from interface.gcp import GCPInterface
 from interface.gcp_utils import sync_team_email_perms
 from config import Config
 from app.model import Team, User
-from utils.slack_parse import check_permissions
+from utils.slack_parse import check_permissions, split_command
 from typing import Any, List, Optional
 
 
@@ -50,7 +51,7 @@ class TeamCommand(Command):
         self.sc = sc
         self.gcp = gcp
         self.desc = "for dealing with teams"
-        self.parser = ArgumentParser(prog="/rocket")
+        self.parser = CommandArgumentParser(prog="/rocket")
         self.parser.add_argument("team")
         self.subparser = self.init_subparsers()
 
@@ -157,15 +158,16 @@ class TeamCommand(Command):
 
     def handle(self,
                command: str,
-               user_id: str) -> ResponseTuple:
+               user_id: str,
+               progress: Optional[Progress] = None) -> ResponseTuple:
         """Handle command by splitting into substrings and giving to parser."""
         logging.debug("Handling TeamCommand")
-        command_arg = shlex.split(command)
+        command_arg = split_command(command)
         args = None
 
         try:
             args = self.parser.parse_args(command_arg)
-        except SystemExit:
+        except ArgumentParseError:
             all_subcommands = list(self.subparser.choices.keys())
             present_subcommands = [subcommand for subcommand in
                                    all_subcommands
@@ -185,7 +187,7 @@ class TeamCommand(Command):
             return self.delete_helper(args.team_name, user_id)
 
         elif args.which == "create":
-            return self.create_helper(args, user_id)
+            return self.create_helper(args, user_id, progress)
 
         elif args.which == "add":
             return self.add_helper(args, user_id)
@@ -200,7 +202,7 @@ class TeamCommand(Command):
             return self.lead_helper(args, user_id)
 
         elif args.which == "refresh":
-            return self.refresh_helper(user_id)
+            return self.refresh_helper(user_id, progress)
 
         else:
             return self.get_help(), 200
@@ -250,7 +252,10 @@ class TeamCommand(Command):
         except LookupError:
             return self.lookup_error, 200
 
-    def create_helper(self, args: Namespace, user_id: str) -> ResponseTuple:
+    def create_helper(self,
+                      args: Namespace,
+                      user_id: str,
+                      progress: Optional[Progress] = None) -> ResponseTuple:
         """
         Create team and calls GitHub API to create the team in GitHub.
 
@@ -259,9 +264,11 @@ class TeamCommand(Command):
         which the command was called into the team.
         :param args: Parameters for creating team
         :param user_id: Slack ID of user who called command
+        :param progress: where to report progress of adding channel members
         :return: error message if team created unsuccessfully otherwise returns
                  success message
         """
+        progress = progress or Progress()
         try:
             command_user = self.facade.retrieve(User, user_id)
             if not check_permissions(command_user, None):
@@ -272,6 +279,9 @@ class TeamCommand(Command):
                     f" Register with `/rocket user edit --github username`."
                 logging.error(msg)
                 return msg, 200
+            if args.channel is not None and \
+                    not progress.start(f'team create {args.team_name}'):
+                return self.already_running_error, 200
             msg = f"New team created: {args.team_name}, "
             team_id = str(self.gh.org_create_team(args.team_name))
             team = Team(team_id, args.team_name, "")
@@ -289,7 +299,9 @@ class TeamCommand(Command):
                 channel_users = self.sc.get_channel_users(
                     args.channel)
                 users_no_ghid = []
-                for member_id in channel_users:
+                for i, member_id in enumerate(channel_users):
+                    progress.update(i, len(channel_users),
+                                    'channel members added')
                     try:
                         member = self.facade.retrieve(User, member_id)
                         if not member.github_username:
@@ -360,9 +372,9 @@ class TeamCommand(Command):
             user = self.facade.retrieve(User, args.username)
             if len(user.github_id) == 0:
                 return self.no_ghusername_error, 200
-            team.add_member(user.github_id)
             self.gh.add_team_member(user.github_username, team.github_team_id)
-            self.facade.store(team)
+            team = self.facade.update_sets(
+                Team, team.github_team_id, add={'members': {user.github_id}})
             msg = "Added User to " + command_team
 
             # Update drive shares
@@ -417,12 +429,12 @@ class TeamCommand(Command):
             if not self.gh.has_team_member(user.github_username,
                                            team.github_team_id):
                 return "User not in team!", 200
-            team.discard_member(user.github_id)
-            if team.has_team_lead(user.github_id):
-                team.discard_team_lead(user.github_id)
             self.gh.remove_team_member(user.github_username,
                                        team.github_team_id)
-            self.facade.store(team)
+            team = self.facade.update_sets(
+                Team, team.github_team_id,
+                remove={'members': {user.github_id},
+                        'team_leads': {user.github_id}})
 
             msg = "Removed User from " + command_team
 
@@ -536,18 +548,19 @@ class TeamCommand(Command):
             if args.remove:
                 if not team.has_member(user.github_id):
                     return "User not in team!", 200
-                if team.has_team_lead(user.github_id):
-                    team.discard_team_lead(user.github_id)
-                self.facade.store(team)
+                team = self.facade.update_sets(
+                    Team, team.github_team_id,
+                    remove={'team_leads': {user.github_id}})
                 msg = f"User removed as team lead from" \
                       f" {command_team}"
             else:
                 if not team.has_member(user.github_id):
-                    team.add_member(user.github_id)
                     self.gh.add_team_member(user.github_username,
                                             team.github_team_id)
-                team.add_team_lead(user.github_id)
-                self.facade.store(team)
+                team = self.facade.update_sets(
+                    Team, team.github_team_id,
+                    add={'members': {user.github_id},
+                         'team_leads': {user.github_id}})
                 msg = f"User added as team lead to" \
                       f" {command_team}"
             ret = {'attachments': [team.get_attachment()], 'text': msg}
@@ -583,7 +596,9 @@ class TeamCommand(Command):
             return f"Team delete was unsuccessful with " \
                    f"the following error: {e.data}", 200
 
-    def refresh_helper(self, user_id) -> ResponseTuple:
+    def refresh_helper(self,
+                       user_id,
+                       progress: Optional[Progress] = None) -> ResponseTuple:
         """
         Ensure that the local team database is the same as GitHub's.
 
@@ -591,9 +606,11 @@ class TeamCommand(Command):
         the teams on GitHub, this command can be called to fix these
         inconsistencies.
 
+        :param progress: where to report the number of teams synced
         :return: error message if user has insufficient permission level
                  otherwise returns success messages with # of teams changed
         """
+        progress = progress or Progress()
         num_changed = 0
         num_added = 0
         num_deleted = 0
@@ -602,7 +619,12 @@ class TeamCommand(Command):
             command_user = self.facade.retrieve(User, user_id)
             if not check_permissions(command_user, None):
                 return self.permission_error, 200
-            local_teams: List[Team] = self.facade.query(Team)
+            if not progress.start('team refresh'):
+                return self.already_running_error, 200
+            # Only read what is compared; teams that need to change are
+            # retrieved in full before being deleted or stored
+            local_teams: List[Team] = self.facade.query(
+                Team, fields=['github_team_name', 'members'])
             remote_teams: List[Team] = self.gh.org_get_teams()
             local_team_dict = dict((team.github_team_id, team)
                                    for team in local_teams)
@@ -612,12 +634,14 @@ class TeamCommand(Command):
             # remove teams not in github anymore
             for local_id in local_team_dict:
                 if local_id not in remote_team_dict:
+                    old_team = self.facade.retrieve(Team, local_id)
                     self.facade.delete(Team, local_id)
                     num_deleted += 1
-                    modified.append(local_team_dict[local_id].get_attachment())
+                    modified.append(old_team.get_attachment())
 
             # add teams to db that are in github but not in local database
-            for remote_id in remote_team_dict:
+            for i, remote_id in enumerate(remote_team_dict):
+                progress.update(i, len(remote_team_dict), 'teams synced')
                 if remote_id not in local_team_dict:
                     self.facade.store(remote_team_dict[remote_id])
                     num_added += 1
@@ -630,10 +654,20 @@ class TeamCommand(Command):
                     if old_team.github_team_name != new_team.github_team_name\
                             or old_team.members != new_team.members:
 
-                        # update the old team, to retain additional parameters
-                        old_team.github_team_name = new_team.github_team_name
-                        old_team.members = new_team.members
-                        self.facade.store(old_team)
+                        # only update what changed, to retain additional
+                        # parameters and concurrent membership changes
+                        old_team = self.facade.update_sets(
+                            Team, remote_id,
+                            add={'members':
+                                 new_team.members - old_team.members},
+                            remove={'members':
+                                    old_team.members - new_team.members})
+                        if old_team.github_team_name != \
+                                new_team.github_team_name:
+                            old_team = self.facade.update_fields(
+                                Team, remote_id,
+                                {'github_team_name':
+                                 new_team.github_team_name})
                         num_changed += 1
                         modified.append(old_team.get_attachment())
 
@@ -644,7 +678,7 @@ class TeamCommand(Command):
             self.refresh_all_rocket_permissions()
 
             # enforce Drive permissions
-            self.refresh_all_drive_permissions()
+            self.refresh_all_drive_permissions(progress)
         except GithubAPIException as e:
             logging.error("team refresh unsuccessful due to github error")
             return "Refresh teams was unsuccessful with " \
@@ -674,13 +708,17 @@ class TeamCommand(Command):
         logging.info(f'refreshing all team {all_name}')
         try:
             team_all = get_team_by_name(self.facade, all_name)
+            before = team_all.fingerprint()
         except LookupError:
             t_id = str(self.gh.org_create_team(all_name))
             logging.info(f'team {all_name} created')
             team_all = Team(t_id, all_name, all_name)
+            # A new team has to be stored, even without any members
+            before = ''
 
         if team_all is not None:
-            all_members = self.facade.query(User)
+            all_members = self.facade.query(
+                User, fields=['github', 'github_user_id'])
             for m in all_members:
                 if len(m.github_id) > 0 and\
                         not team_all.has_member(m.github_id):
@@ -691,7 +729,10 @@ class TeamCommand(Command):
                                             team_all.github_team_id)
                     team_all.add_member(m.github_id)
 
-            self.facade.store(team_all)
+            if team_all.fingerprint() != before:
+                self.facade.store(team_all)
+            else:
+                logging.info(f'team {all_name} is up to date')
         else:
             logging.error(f'Could not create {all_name}. Aborting.')
 
@@ -740,16 +781,21 @@ class TeamCommand(Command):
                 else:
                     logging.info('no users updated')
 
-    def refresh_all_drive_permissions(self):
+    def refresh_all_drive_permissions(self,
+                                      progress: Optional[Progress] = None):
         """
         Refresh Google Drive permissions for all teams. If no GCP client
         is provided, this function is a no-op.
+
+        :param progress: where to report the number of teams synced
         """
+        progress = progress or Progress()
 
         if self.gcp is None:
             logging.debug("GCP not enabled, skipping drive permissions")
             return
 
         all_teams: List[Team] = self.facade.query(Team)
-        for t in all_teams:
+        for i, t in enumerate(all_teams):
+            progress.update(i, len(all_teams), 'teams\' Drive folders synced')
             sync_team_email_perms(self.gcp, self.facade, t)
@@ -4,10 +4,12 @@ import logging
 
 from app.controller import ResponseTuple
 from app.controller.command.commands.base import Command
+from app.controller.command.progress import Progress
 from datetime import datetime, timedelta
 from db.facade import DBFacade
 from app.model import User, Permissions
 from utils.slack_msg_fmt import wrap_code_block
+from typing import Optional
 
 
 class TokenCommand(Command):
@@ -39,7 +41,8 @@ class TokenCommand(Command):
 
     def handle(self,
                _command: str,
-               user_id: str) -> ResponseTuple:
+               user_id: str,
+               progress: Optional[Progress] = None) -> ResponseTuple:
         """Handle request for token."""
         logging.debug("Handling token command")
         try:
@@ -1,17 +1,18 @@
 """Command parsing for user events."""
 import logging
-import shlex
 
-from argparse import ArgumentParser, _SubParsersAction, Namespace
+from argparse import _SubParsersAction, Namespace
 from app.controller import ResponseTuple
-from app.controller.command.commands.base import Command
+from app.controller.command.commands.base import Command, \
+    CommandArgumentParser, ArgumentParseError
+from app.controller.command.progress import Progress
 from db.facade import DBFacade
 from interface.github import GithubAPIException, GithubInterface
 from interface.gcp import GCPInterface
 from interface.gcp_utils import sync_user_email_perms
 from app.model import User, Team, Permissions
 from typing import Optional
-from utils.slack_parse import escape_email
+from utils.slack_parse import escape_email, split_command
 
 
 class UserCommand(Command):
@@ -33,7 +34,7 @@ class UserCommand(Command):
         """Initialize user command."""
         super().__init__()
         logging.info("Initializing UserCommand instance")
-        self.parser = ArgumentParser(prog="/rocket")
+        self.parser = CommandArgumentParser(prog="/rocket")
         self.parser.add_argument("user")
         self.subparser = self.init_subparsers()
         self.facade = db_facade
@@ -107,15 +108,16 @@ class UserCommand(Command):
 
     def handle(self,
                command: str,
-               user_id: str) -> ResponseTuple:
+               user_id: str,
+               progress: Optional[Progress] = None) -> ResponseTuple:
         """Handle command by splitting into substrings and giving to parser."""
         logging.debug("Handling UserCommand")
-        command_arg = shlex.split(command)
+        command_arg = split_command(command)
         args = None
 
         try:
             args = self.parser.parse_args(command_arg)
-        except SystemExit:
+        except ArgumentParseError:
             all_subcommands = list(self.subparser.choices.keys())
             present_subcommands = [subcommand for subcommand in
                                    all_subcommands
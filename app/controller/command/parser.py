@@ -5,18 +5,19 @@ from app.controller.command.commands import UserCommand, TeamCommand,\
     MentionCommand, IQuitCommand
 from app.controller.command.commands.base import Command
 from app.controller.command.commands.token import TokenCommandConfig
+from app.controller.command.progress import Progress, RunningCommands
 from db.facade import DBFacade
-from interface.slack import Bot
+from interface.slack import Bot, ResponsePoster
 from interface.github import GithubInterface
 from interface.gcp import GCPInterface
 from interface.cloudwatch_metrics import CWMetrics
 from typing import Dict, Optional
 import utils.slack_parse as util
+import utils.tracing as tracing
 import logging
 import time
 from utils.slack_msg_fmt import wrap_slack_code
 from config import Config
-import requests
 
 
 class CommandParser:
@@ -29,14 +30,19 @@ class CommandParser:
                  gh_interface: GithubInterface,
                  token_config: TokenCommandConfig,
                  metrics: CWMetrics,
-                 gcp: Optional[GCPInterface] = None):
+                 gcp: Optional[GCPInterface] = None,
+                 poster: Optional[ResponsePoster] = None,
+                 running: Optional[RunningCommands] = None):
         """Initialize the dictionary of command handlers."""
         self.commands: Dict[str, Command] = {}
+        self.__poster = poster or ResponsePoster(metrics)
+        self.__running = running or RunningCommands()
         self.__facade = db_facade
         self.__bot = bot
         self.__github = gh_interface
         self.__gcp = gcp
         self.__metrics = metrics
+        self.__trace_format = config.trace_format
         self.commands["user"] = UserCommand(self.__facade,
                                             self.__github,
                                             self.__gcp)
@@ -65,43 +71,50 @@ class CommandParser:
         """
         start_time_ms = time.time() * 1000
 
-        # Slightly hacky way to deal with Apple platform
-        # smart punctuation messing with argparse.
-        cmd_txt = ''.join(map(util.regularize_char, cmd_txt))
-        cmd_txt = util.escaped_id_to_id(cmd_txt)
-        cmd_txt = util.ios_dash(cmd_txt)
-        s = cmd_txt.split(' ', 1)
-        cmd_name = 'help'
-        if s[0] == 'help' or s[0] is None:
-            logging.info('Help command was called')
-            resp, _ = self.get_help()
-        elif s[0] in self.commands:
-            resp, _ = self.commands[s[0]].handle(cmd_txt, user)
+        with tracing.trace() as trace:
+            # Slightly hacky way to deal with Apple platform
+            # smart punctuation messing with argparse.
+            cmd_txt = util.normalize_command(cmd_txt)
+            s = cmd_txt.split(' ', 1)
+            cmd_name = 'help'
+            if s[0] == 'help' or s[0] is None:
+                logging.info('Help command was called')
+                resp, _ = self.get_help()
+            elif s[0] in self.commands:
+                progress = Progress(self.__poster, response_url,
+                                    self.__running)
+                try:
+                    resp, _ = self.commands[s[0]].handle(cmd_txt, user,
+                                                         progress)
+                finally:
+                    progress.finish()
 
-            # Hack to only grab first 2 command/subcommand pair
-            s = cmd_txt.split(' ')
-            if len(s) == 2 and s[1].startswith('-'):
-                cmd_name = s[0]
+                # Hack to only grab first 2 command/subcommand pair
+                s = cmd_txt.split(' ')
+                if len(s) == 2 and s[1].startswith('-'):
+                    cmd_name = s[0]
+                else:
+                    cmd_name = ' '.join(s[0:2])
+            elif util.is_slack_id(s[0]):
+                logging.info('mention command activated')
+                resp, _ = self.commands['mention'].handle(cmd_txt, user)
+                cmd_name = 'mention'
             else:
-                cmd_name = ' '.join(s[0:2])
-        elif util.is_slack_id(s[0]):
-            logging.info('mention command activated')
-            resp, _ = self.commands['mention'].handle(cmd_txt, user)
-            cmd_name = 'mention'
-        else:
-            logging.error("app command triggered incorrectly")
-            resp, _ = self.get_help()
+                logging.error("app command triggered incorrectly")
+                resp, _ = self.get_help()
 
-        if isinstance(resp, str):
-            # Wrap response if response is just some text
-            resp = {'text': resp}
+            if isinstance(resp, str):
+                # Wrap response if response is just some text
+                resp = {'text': resp}
 
         # Submit metrics
         duration_taken_ms = time.time() * 1000 - start_time_ms
         self.__metrics.submit_cmd_mstime(cmd_name, duration_taken_ms)
+        trace.name = cmd_name
+        tracing.export(trace, self.__trace_format)
 
         if response_url != "":
-            requests.post(url=response_url, json=resp)
+            self.__poster.post(response_url, resp, cmd_name)
         else:
             return resp, 200
 
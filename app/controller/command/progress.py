@@ -0,0 +1,204 @@
+"""Report the progress of long commands to the users running them."""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from interface.slack import ResponsePoster
+from typing import Dict, List, Optional
+
+
+class RunningCommands:
+    """
+    Set of the keys of long commands being run.
+
+    Keys are kept in a SQLite file, and shared by every process using it, so
+    that a command cannot run twice at once even when the two requests are
+    handled by different gunicorn workers. Like the webhook delivery log,
+    every process opens its own connection to the file, on first use. Without
+    a file, keys are only shared by the threads of one process.
+
+    Keys are forgotten after ``TTL`` seconds, so that a process dying while
+    running a command does not keep it from ever running again.
+    """
+
+    # Slack only accepts responses to a command for 30 minutes
+    TTL = 30 * 60
+
+    SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS running_commands (
+        key TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL
+    );
+    '''
+
+    def __init__(self, path: str = ''):
+        """
+        Initialize the set.
+
+        :param path: path to the SQLite file of the set; if empty, only this
+                     process knows about the commands it runs
+        """
+        self.path = path or ':memory:'
+        self.lock = threading.Lock()
+        # Expiry of the keys added here, so that only those are discarded
+        self.added: Dict[str, float] = {}
+        # Process the connection belongs to
+        self.pid: Optional[int] = None
+        self.__conn: Optional[sqlite3.Connection] = None
+        self.inherited: List[sqlite3.Connection] = []
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """
+        Get the connection of this process, opening it if needed.
+
+        Must be called with the lock held.
+        """
+        pid = os.getpid()
+        if self.pid != pid or self.__conn is None:
+            if self.__conn is not None:
+                # Opened before a fork: must not be used, nor even closed
+                self.inherited.append(self.__conn)
+            self.__conn = sqlite3.connect(self.path,
+                                          check_same_thread=False,
+                                          isolation_level=None)
+            self.__conn.execute('PRAGMA journal_mode=WAL')
+            self.__conn.executescript(self.SCHEMA)
+            self.pid = pid
+        return self.__conn
+
+    def add(self, key: str) -> bool:
+        """
+        Record that a command started running, unless it already is.
+
+        Checking and recording is atomic, even across processes.
+
+        :param key: key of the command, like ``team refresh``
+        :return: true if the command was not running yet
+        """
+        with self.lock:
+            now = time.time()
+            self.conn.execute(
+                'DELETE FROM running_commands WHERE key = ? '
+                'AND expires_at <= ?', (key, now))
+            cur = self.conn.execute(
+                'INSERT OR IGNORE INTO running_commands VALUES (?, ?)',
+                (key, now + self.TTL))
+            if cur.rowcount == 0:
+                return False
+            self.added[key] = now + self.TTL
+            return True
+
+    def discard(self, key: str):
+        """
+        Record that a command is done running.
+
+        If the key expired and was added again meanwhile, it is left alone.
+
+        :param key: key of the command
+        """
+        with self.lock:
+            expires_at = self.added.pop(key, None)
+            if expires_at is not None:
+                self.conn.execute(
+                    'DELETE FROM running_commands WHERE key = ? '
+                    'AND expires_at = ?', (key, expires_at))
+
+
+class Progress:
+    """
+    Channel for a command to report its progress through its response_url.
+
+    Long commands call :meth:`start` before doing anything slow. It posts an
+    ephemeral acknowledgement right away, so that users know their command was
+    received and do not run it again, and fails if a command with the same
+    key is already running.
+
+    Progress is then reported with :meth:`update`, like ``42/150 teams
+    synced``. Slack only accepts a few posts per response_url, and one is
+    needed for the final response, so updates are posted at most ``INTERVAL``
+    seconds apart and only ``MAX_UPDATES`` times.
+
+    Acknowledgements and updates are only a courtesy, and the command waits
+    for them to be posted: unlike the final response, they are never retried,
+    so that an unavailable Slack does not hold up the command.
+
+    Without a poster and response_url, nothing is ever posted; without a set
+    of running commands, duplicates are not rejected.
+    """
+
+    # Times to try posting an acknowledgement or update
+    MAX_ATTEMPTS = 1
+
+    # Seconds between progress updates
+    INTERVAL = 5.0
+    # Posts left after the acknowledgement and the final response
+    MAX_UPDATES = ResponsePoster.MAX_POSTS - 2
+
+    def __init__(self,
+                 poster: Optional[ResponsePoster] = None,
+                 response_url: str = '',
+                 running: Optional[RunningCommands] = None):
+        """
+        Initialize the progress of a command.
+
+        :param poster: what to post acknowledgements and updates with
+        :param response_url: ``response_url`` of the command
+        :param running: long commands being run
+        """
+        self.poster = poster
+        self.response_url = response_url
+        self.running = running
+        self.key: Optional[str] = None
+        self.num_updates = 0
+        self.last_post = 0.0
+
+    def start(self, key: str, text: str = "Working on it...") -> bool:
+        """
+        Acknowledge a long command, unless the same one is already running.
+
+        :param key: key of the command; commands with the same key cannot run
+                    at the same time
+        :param text: acknowledgement to post
+        :return: false if the command is already running, true otherwise
+        """
+        if self.running is not None and not self.running.add(key):
+            logging.warning(f"{key} is already running")
+            return False
+        self.key = key
+        self.post(text)
+        return True
+
+    def update(self, done: int, total: int, what: str):
+        """
+        Report progress, unless it was reported too recently.
+
+        :param done: number of items done
+        :param total: number of items to do
+        :param what: what is done with the items, like ``teams synced``
+        """
+        if self.num_updates >= self.MAX_UPDATES or \
+                time.time() - self.last_post < self.INTERVAL:
+            return
+        self.num_updates += 1
+        self.post(f"{done}/{total} {what}")
+
+    def finish(self):
+        """Record that the command is done, so that it can run again."""
+        if self.key is not None and self.running is not None:
+            self.running.discard(self.key)
+        self.key = None
+
+    def post(self, text: str):
+        """Post a message replacing the previous one, if possible."""
+        self.last_post = time.time()
+        if self.poster is None or not self.response_url:
+            logging.debug(f"Progress: {text}")
+            return
+        self.poster.post(self.response_url,
+                         {'text': text,
+                          'response_type': 'ephemeral',
+                          'replace_original': True},
+                         'progress', self.MAX_ATTEMPTS)
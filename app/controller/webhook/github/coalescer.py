@@ -0,0 +1,205 @@
+"""Coalesce bursts of GitHub membership events into one update per team."""
+import logging
+import threading
+
+from app.model import Team
+from collections import OrderedDict
+from db.facade import DBFacade
+from db.utils import get_users_by_ghid
+from interface.gcp import GCPInterface
+from interface.gcp_utils import sync_team_email_perms
+from typing import Dict, List, Optional, Set
+from utils import tracing
+
+
+class MembershipCoalescer:
+    """
+    Gather membership changes of a team, and apply them all at once.
+
+    Editing a team on GitHub sends one ``membership`` event per member added
+    or removed, often dozens within seconds. Instead of a user lookup and a
+    team update per event, changes are gathered for ``window`` seconds after
+    the first one, and then:
+
+    - the users involved are looked up in one batched query,
+    - the members of the team are updated in a single write, and
+    - Google Drive permissions of the team are synchronized once.
+
+    If a member is added and removed within the window, only the last change
+    is applied. Changes of members without a registered user are dropped,
+    like they are when handling events one at a time.
+
+    If applying the changes fails (like when the database is throttled),
+    they are gathered again with the changes received meanwhile, for another
+    window, and dropped after ``MAX_ATTEMPTS``.
+
+    Changes are only kept in memory until they are applied, and are lost if
+    the process stops before that.
+    """
+
+    MAX_ATTEMPTS = 3
+
+    def __init__(self,
+                 db_facade: DBFacade,
+                 gcp: Optional[GCPInterface] = None,
+                 window: float = 1.0,
+                 trace_format: str = ''):
+        """
+        Initialize the coalescer.
+
+        :param db_facade: database to update teams in
+        :param gcp: client to synchronize Drive permissions with, if any
+        :param window: seconds to gather changes of a team for
+        :param trace_format: format to export the traces of updates in (see
+                             :func:`utils.tracing.export`)
+        """
+        self.facade = db_facade
+        self.gcp = gcp
+        self.window = window
+        self.trace_format = trace_format
+        self.lock = threading.Lock()
+        # Pending changes by team ID, then by GitHub ID (``True`` to add the
+        # member, ``False`` to remove them), in the order they were received
+        self.pending: Dict[str, 'OrderedDict[str, bool]'] = {}
+        self.timers: Dict[str, threading.Timer] = {}
+        # Failed attempts to apply the pending changes of each team
+        self.attempts: Dict[str, int] = {}
+        # Flushes of the same team must not overlap, to keep changes in order
+        self.team_locks: Dict[str, threading.Lock] = {}
+
+    def add(self, team_id: str, github_id: str, added: bool):
+        """
+        Record that a member was added to or removed from a team.
+
+        The change is applied when the window of the team ends.
+
+        :param team_id: GitHub ID of the team
+        :param github_id: GitHub ID of the member
+        :param added: true if the member was added, false if removed
+        """
+        with self.lock:
+            changes = self.pending.setdefault(team_id, OrderedDict())
+            changes.pop(github_id, None)
+            changes[github_id] = added
+            self.start_timer(team_id)
+
+    def start_timer(self, team_id: str):
+        """
+        Flush the changes of a team once its window ends, unless it started.
+
+        Must be called with the lock held.
+
+        :param team_id: GitHub ID of the team
+        """
+        if team_id not in self.timers:
+            timer = threading.Timer(self.window, self.flush, [team_id])
+            timer.daemon = True
+            self.timers[team_id] = timer
+            timer.start()
+
+    def flush(self, team_id: str) -> Optional[Team]:
+        """
+        Apply the pending changes of a team right away.
+
+        The calls made while applying them are traced, like those made while
+        handling an event. If applying them fails, they are retried later
+        (see :meth:`retry`).
+
+        :param team_id: GitHub ID of the team
+        :return: the team after the update, or ``None`` if there was nothing
+                 to apply, or applying failed
+        """
+        with self.lock:
+            timer = self.timers.pop(team_id, None)
+            changes = self.pending.pop(team_id, None)
+            team_lock = self.team_locks.setdefault(team_id, threading.Lock())
+        if timer is not None:
+            timer.cancel()
+        if not changes:
+            return None
+
+        try:
+            with team_lock, \
+                    tracing.trace('membership.batch', tracing.EVENT) as trace:
+                team = self.apply(team_id, changes)
+        except Exception:
+            logging.exception(f"Could not apply {len(changes)} membership "
+                              f"changes of team {team_id}")
+            self.retry(team_id, changes)
+            return None
+        tracing.export(trace, self.trace_format)
+        with self.lock:
+            self.attempts.pop(team_id, None)
+        return team
+
+    def retry(self, team_id: str, changes: 'OrderedDict[str, bool]'):
+        """
+        Gather changes that failed to be applied again, for another window.
+
+        Changes received since they were taken override them. They are
+        dropped once they failed ``MAX_ATTEMPTS`` times.
+
+        :param team_id: GitHub ID of the team
+        :param changes: the changes that failed to be applied
+        """
+        with self.lock:
+            attempts = self.attempts.get(team_id, 0) + 1
+            if attempts >= self.MAX_ATTEMPTS:
+                self.attempts.pop(team_id, None)
+                logging.error(f"Dropping {len(changes)} membership changes "
+                              f"of team {team_id} after {attempts} attempts")
+                return
+            self.attempts[team_id] = attempts
+            merged = OrderedDict(changes)
+            for github_id, added in self.pending.get(team_id, {}).items():
+                merged.pop(github_id, None)
+                merged[github_id] = added
+            self.pending[team_id] = merged
+            self.start_timer(team_id)
+
+    def flush_all(self):
+        """Apply the pending changes of every team right away."""
+        with self.lock:
+            team_ids = list(self.pending)
+        for team_id in team_ids:
+            self.flush(team_id)
+
+    def apply(self,
+              team_id: str,
+              changes: 'OrderedDict[str, bool]') -> Optional[Team]:
+        """
+        Apply changes to the members of a team, in a single write.
+
+        :param team_id: GitHub ID of the team
+        :param changes: whether to add (or remove) each GitHub ID
+        :return: the team after the update, or ``None`` if it was not found
+        """
+        users = get_users_by_ghid(self.facade, list(changes),
+                                  fields=['github_user_id'])
+        registered = set(u.github_id for u in users)
+        add: Set[str] = set()
+        remove: Set[str] = set()
+        unknown: List[str] = []
+        for github_id, added in changes.items():
+            if github_id not in registered:
+                unknown.append(github_id)
+            elif added:
+                add.add(github_id)
+            else:
+                remove.add(github_id)
+        if unknown:
+            logging.error(f"could not find users {unknown}")
+
+        try:
+            team = self.facade.update_sets(Team, team_id,
+                                           add={'members': add},
+                                           remove={'members': remove})
+        except LookupError:
+            logging.error(f"could not find team {team_id}")
+            return None
+        logging.info(f"team {team.github_team_name}: added {len(add)} and "
+                     f"removed {len(remove)} members in one update")
+
+        if add or remove:
+            sync_team_email_perms(self.gcp, self.facade, team)
+        return team
@@ -1,14 +1,23 @@
 """Handle GitHub webhooks."""
+import json
 import logging
 import hmac
 import hashlib
+import threading
+import utils.tracing as tracing
+from collections import defaultdict
+from contextlib import nullcontext
 from db.facade import DBFacade
 from interface.github import GithubInterface
-from typing import Dict, Any
+from typing import Dict, Any, ContextManager, Optional, Set, Tuple
 from app.controller import ResponseTuple
 from config import Config
 from app.controller.webhook.github.events import MembershipEventHandler, \
     OrganizationEventHandler, TeamEventHandler
+from app.controller.webhook.github.events.base import GitHubEventHandler
+from app.controller.webhook.github.coalescer import MembershipCoalescer
+from app.controller.webhook.github.deliveries import DeliveryLog
+from app.controller.webhook.github.queue import WebhookQueue
 
 
 class GitHubWebhookHandler:
@@ -17,37 +26,192 @@ class GitHubWebhookHandler:
     def __init__(self,
                  db_facade: DBFacade,
                  gh_face: GithubInterface,
-                 config: Config):
-        """Give handlers access to the database."""
+                 config: Config,
+                 queue: Optional[WebhookQueue] = None,
+                 deliveries: Optional[DeliveryLog] = None,
+                 coalescer: Optional[MembershipCoalescer] = None):
+        """
+        Give handlers access to the database.
+
+        If a queue is given, verified events are put in it instead of being
+        handled right away, by the workers :meth:`start_workers` starts. If a
+        delivery log is given, deliveries already received are ignored. If a
+        coalescer is given, membership changes are applied in batches.
+        """
         self.__secret = config.github_webhook_secret
-        self.__event_handlers = [
-            OrganizationEventHandler(db_facade, gh_face, config),
-            TeamEventHandler(db_facade, gh_face, config),
-            MembershipEventHandler(db_facade, gh_face, config)
-        ]
+        self.__trace_format = config.trace_format
+        self.__queue = queue
+        self.__deliveries = deliveries
+        # Serialize events about the same team when they are not queued
+        self.__key_locks: Dict[str, threading.Lock] = \
+            defaultdict(threading.Lock)
+        self.__key_locks_lock = threading.Lock()
+        # Handlers by (event, action), and by ('', action) for callers that
+        # do not know the event; ``None`` if the action alone is ambiguous
+        self.__routes: Dict[Tuple[str, str], Optional[GitHubEventHandler]] = {}
+        self.__events: Set[str] = set()
+        self.register(OrganizationEventHandler(db_facade, gh_face, config))
+        self.register(TeamEventHandler(db_facade, gh_face, config))
+        self.register(MembershipEventHandler(db_facade, gh_face, config,
+                                             coalescer))
+
+    def register(self, event_handler: GitHubEventHandler):
+        """
+        Route the supported actions of the supported event to a handler.
+
+        :param event_handler: handler of a new event (or of new actions of
+                              an event)
+        :raises: RuntimeError if an action of the event is already routed to
+                 another handler
+        """
+        event = event_handler.supported_event
+        for action in event_handler.supported_action_list:
+            if (event, action) in self.__routes:
+                raise RuntimeError(f'{event}.{action} events already have '
+                                   'a handler')
+            self.__routes[(event, action)] = event_handler
+            if ('', action) in self.__routes:
+                self.__routes[('', action)] = None
+            else:
+                self.__routes[('', action)] = event_handler
+        self.__events.add(event)
 
     def handle(self,
                request_body: bytes,
                xhub_signature: str,
-               payload: Dict[str, Any]) -> ResponseTuple:
+               payload: Optional[Dict[str, Any]] = None,
+               event: str = '',
+               delivery: str = '') -> ResponseTuple:
         """
-        Verify and handle the webhook event.
+        Verify and handle (or queue) the webhook event.
 
         :param request_body: Byte string of the request body
         :param xhub_signature: Hashed signature to validate
+        :param payload: Parsed request body; parsed here if not given, and
+                        only if the event is supported
+        :param event: Name of the event (the ``X-GitHub-Event`` header)
+        :param delivery: ID of the delivery (the ``X-GitHub-Delivery``
+                         header)
         :return: appropriate ResponseTuple depending on the validity and type
                  of webhook
         """
-        logging.debug(f"payload: {str(payload)}")
         if self.verify_hash(request_body, xhub_signature):
-            action = payload["action"]
-            for event_handler in self.__event_handlers:
-                if action in event_handler.supported_action_list:
-                    return event_handler.handle(payload)
-            return "Unsupported payload received, ignoring.", 202
+            if event and event not in self.__events:
+                logging.debug(f"Unsupported event {event}, ignoring")
+                return "Unsupported payload received, ignoring.", 202
+            if payload is None:
+                try:
+                    payload = json.loads(request_body)
+                except ValueError:
+                    logging.error("Webhook payload is not valid JSON")
+                    return "Payload is not valid JSON", 400
+            logging.debug(f"payload: {str(payload)}")
+            if self.get_event_handler(payload, event) is None:
+                return "Unsupported payload received, ignoring.", 202
+            if delivery and self.__deliveries is not None and \
+                    not self.__deliveries.add(delivery):
+                logging.info(f"Delivery {delivery} already received")
+                return "Delivery already received, ignoring.", 200
+            key = self.get_ordering_key(payload)
+            try:
+                if self.__queue is not None:
+                    self.__queue.put(f"{event}.{payload['action']}", payload,
+                                     key)
+                    return "Webhook queued", 202
+                with self.get_key_lock(key):
+                    return self.dispatch(payload, event)
+            except Exception:
+                # Let GitHub redeliver events that could not be handled
+                if delivery and self.__deliveries is not None:
+                    self.__deliveries.discard(delivery)
+                raise
         else:
             return "Hashed signature is not valid", 400
 
+    def dispatch(self,
+                 payload: Dict[str, Any],
+                 event: str = '') -> ResponseTuple:
+        """
+        Handle a verified webhook event.
+
+        The calls made while handling the event are traced (see
+        :mod:`utils.tracing`), like those made by commands.
+
+        :param payload: Parsed request body
+        :param event: Name of the event (the ``X-GitHub-Event`` header)
+        :return: the response of the handler of the event
+        """
+        event_handler = self.get_event_handler(payload, event)
+        if event_handler is None:
+            return "Unsupported payload received, ignoring.", 202
+        name = f"{event_handler.supported_event}.{payload.get('action')}"
+        with tracing.trace(name, tracing.EVENT) as trace:
+            resp = event_handler.handle(payload)
+        tracing.export(trace, self.__trace_format)
+        return resp
+
+    def handle_queued(self,
+                      name: str,
+                      payload: Dict[str, Any]) -> ResponseTuple:
+        """
+        Handle an event taken from the queue.
+
+        :param name: Name the event was queued with, like
+                     ``membership.added``
+        :param payload: Parsed request body
+        :return: the response of the handler of the event
+        """
+        return self.dispatch(payload, name.partition('.')[0])
+
+    def start_workers(self, num_workers: int):
+        """
+        Start the threads handling queued events, in this process.
+
+        Threads do not survive a fork, so servers forking their workers must
+        call this in every one of them (see ``gunicorn.conf.py``). Does
+        nothing without a queue, or if they are already started.
+
+        :param num_workers: number of worker threads
+        """
+        if self.__queue is not None:
+            self.__queue.start(self.handle_queued, num_workers)
+
+    def get_ordering_key(self, payload: Dict[str, Any]) -> str:
+        """
+        Return the key of events that must be handled in order.
+
+        Events about the same team (like a member being added, then removed)
+        must be handled one at a time, in the order they were received. Other
+        events can be handled in any order.
+
+        :param payload: Parsed request body
+        :return: ID of the team of the event, or an empty string
+        """
+        team = payload.get('team')
+        if isinstance(team, dict) and 'id' in team:
+            return f"team:{team['id']}"
+        return ''
+
+    def get_key_lock(self, key: str) -> ContextManager[Any]:
+        """Return the lock serializing events with ordering key ``key``."""
+        if not key:
+            return nullcontext()
+        with self.__key_locks_lock:
+            return self.__key_locks[key]
+
+    def get_event_handler(self,
+                          payload: Dict[str, Any],
+                          event: str = '') -> Optional[GitHubEventHandler]:
+        """
+        Return the handler supporting the event and action of ``payload``.
+
+        :param payload: Parsed request body
+        :param event: Name of the event; if empty, the handler is found by
+                      action alone, as long as only one handler supports it
+        :return: the handler, or ``None`` if the event is not supported
+        """
+        return self.__routes.get((event, payload.get("action", '')))
+
     def verify_hash(self, request_body: bytes, xhub_signature: str):
         """
         Verify if a webhook event comes from GitHub.
@@ -0,0 +1,124 @@
+"""Remember which GitHub webhook deliveries were already received."""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class DeliveryLog:
+    """
+    Set of the ``X-GitHub-Delivery`` IDs of received webhooks.
+
+    GitHub redelivers a webhook when it does not get a response in time, and
+    a delivery can be redelivered by hand, so the same event can be received
+    several times. Checking its delivery ID here lets it be handled only once.
+
+    Recent IDs are kept in a bounded LRU cache, so that most checks never
+    touch the disk. Every ID is also kept in a SQLite file for ``RETENTION``
+    seconds, so that they are remembered across restarts and by every process
+    using the same file. Like the webhook queue, every process opens its own
+    connection to the file, on first use.
+    """
+
+    CACHE_SIZE = 4096
+    # GitHub only lets deliveries from the past few days be redelivered
+    RETENTION = 7 * 24 * 60 * 60
+    # Number of new IDs between removals of IDs older than ``RETENTION``
+    PRUNE_EVERY = 1000
+
+    SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS deliveries (
+        id TEXT PRIMARY KEY,
+        received_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS deliveries_received_at
+        ON deliveries(received_at);
+    '''
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the log.
+
+        :param path: path to the SQLite file of the log; use ``:memory:`` to
+                     only remember IDs for as long as the process lives
+        """
+        logging.info(f"Initializing webhook delivery log at {path}")
+        self.path = path
+        self.lock = threading.Lock()
+        self.cache: 'OrderedDict[str, None]' = OrderedDict()
+        self.num_added = 0
+        # Process the connection belongs to
+        self.pid: Optional[int] = None
+        self.__conn: Optional[sqlite3.Connection] = None
+        self.inherited: List[sqlite3.Connection] = []
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """
+        Get the connection of this process, opening it if needed.
+
+        Must be called with the lock held.
+        """
+        pid = os.getpid()
+        if self.pid != pid or self.__conn is None:
+            if self.__conn is not None:
+                # Opened before a fork: must not be used, nor even closed
+                self.inherited.append(self.__conn)
+            self.__conn = sqlite3.connect(self.path,
+                                          check_same_thread=False,
+                                          isolation_level=None)
+            self.__conn.execute('PRAGMA journal_mode=WAL')
+            self.__conn.executescript(self.SCHEMA)
+            self.pid = pid
+        return self.__conn
+
+    def add(self, delivery: str) -> bool:
+        """
+        Record a delivery ID, unless it was already recorded.
+
+        Checking and recording is atomic, even across processes, so that only
+        one of two concurrent deliveries of an event goes through.
+
+        :param delivery: the ``X-GitHub-Delivery`` ID
+        :return: true if the ID is new, and false if it was already recorded
+        """
+        with self.lock:
+            if delivery in self.cache:
+                self.cache.move_to_end(delivery)
+                return False
+
+            now = time.time()
+            cur = self.conn.execute(
+                'INSERT OR IGNORE INTO deliveries VALUES (?, ?)',
+                (delivery, now))
+            # Only cached once recorded, so that a failure to record it does
+            # not make its redelivery look already received
+            self.cache[delivery] = None
+            if len(self.cache) > self.CACHE_SIZE:
+                self.cache.popitem(last=False)
+            if cur.rowcount == 0:
+                return False
+            self.num_added += 1
+            if self.num_added % self.PRUNE_EVERY == 0:
+                try:
+                    self.conn.execute(
+                        'DELETE FROM deliveries WHERE received_at < ?',
+                        (now - self.RETENTION,))
+                except sqlite3.Error:
+                    logging.exception("Could not prune webhook deliveries")
+            return True
+
+    def discard(self, delivery: str):
+        """
+        Forget a delivery ID, so that a redelivery is handled again.
+
+        :param delivery: the ``X-GitHub-Delivery`` ID
+        """
+        with self.lock:
+            self.cache.pop(delivery, None)
+            self.conn.execute('DELETE FROM deliveries WHERE id = ?',
+                              (delivery,))
@@ -18,6 +18,12 @@ class GitHubEventHandler(ABC):
         self._conf = conf
         super().__init__()
 
+    @property
+    @abstractmethod
+    def supported_event(self) -> str:
+        """Provide the name of the event this handler can handle."""
+        pass
+
     @property
     @abstractmethod
     def supported_action_list(self) -> List[str]:
@@ -2,15 +2,34 @@
 import logging
 from app.model import User, Team
 from app.controller import ResponseTuple
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from app.controller.webhook.github.coalescer import MembershipCoalescer
 from app.controller.webhook.github.events.base import GitHubEventHandler
+from config import Config
+from db.facade import DBFacade
+from interface.github import GithubInterface
 
 
 class MembershipEventHandler(GitHubEventHandler):
     """Encapsulate the handler methods for GitHub membership events."""
 
+    supported_event = 'membership'
     supported_action_list = ['removed', 'added']
 
+    def __init__(self,
+                 db_facade: DBFacade,
+                 gh_face: GithubInterface,
+                 conf: Config,
+                 coalescer: Optional[MembershipCoalescer] = None):
+        """
+        Give handler access to the database facade.
+
+        If a coalescer is given, changes are handed to it to be applied in
+        batches, instead of being applied one event at a time.
+        """
+        super().__init__(db_facade, gh_face, conf)
+        self._coalescer = coalescer
+
     def handle(self,
                payload: Dict[str, Any]) -> ResponseTuple:
         """Handle the event where a user is added or removed from a team."""
@@ -25,6 +44,10 @@ class MembershipEventHandler(GitHubEventHandler):
                      f"{{action: {action}, user: {github_username}, "
                      f"user_id: {github_id}, team: {team_name}, "
                      f"team_id: {team_id}}}")
+        if self._coalescer is not None and action in ['removed', 'added']:
+            self._coalescer.add(team_id, github_id, action == 'added')
+            return (f"{action} {github_username} in {team_name}, "
+                    "batching with other changes", 200)
         selected_team = self._facade.retrieve(Team, team_id)
         if action == "removed":
             return self.mem_remove(github_id, selected_team, team_name)
@@ -46,8 +69,9 @@ class MembershipEventHandler(GitHubEventHandler):
         if len(member_list) == 1:
             slack_id = member_list[0].slack_id
             if selected_team.has_member(github_id):
-                selected_team.discard_member(github_id)
-                self._facade.store(selected_team)
+                self._facade.update_sets(
+                    Team, selected_team.github_team_id,
+                    remove={'members': {github_id}})
                 logging.info(f"deleted slack user {slack_id} "
                              f"from {team_name}")
                 slack_ids_string += f" {slack_id}"
@@ -75,8 +99,8 @@ class MembershipEventHandler(GitHubEventHandler):
                                          [('github_user_id', github_id)])
         slack_ids_string = ""
         if len(member_list) > 0:
-            selected_team.add_member(github_id)
-            self._facade.store(selected_team)
+            self._facade.update_sets(Team, selected_team.github_team_id,
+                                     add={'members': {github_id}})
             for member in member_list:
                 slack_id = member.slack_id
                 logging.info(f"user {github_username} added to {team_name}")
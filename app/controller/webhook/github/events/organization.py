@@ -11,6 +11,7 @@ class OrganizationEventHandler(GitHubEventHandler):
     """Encapsulate the handler methods for GitHub organization events."""
 
     invite_text = 'user {} invited to {}'
+    supported_event = 'organization'
     supported_action_list = ['member_removed', 'member_added',
                              'member_invited']
 
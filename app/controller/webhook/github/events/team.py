@@ -9,6 +9,7 @@ from app.controller.webhook.github.events.base import GitHubEventHandler
 class TeamEventHandler(GitHubEventHandler):
     """Encapsulate the handler methods for GitHub team events."""
 
+    supported_event = 'team'
     supported_action_list = ['created', 'deleted', 'edited',
                              'added_to_repository', 'removed_from_repository']
 
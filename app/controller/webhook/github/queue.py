@@ -0,0 +1,295 @@
+"""Durable queue of GitHub webhook events."""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from interface.cloudwatch_metrics import CWMetrics
+from typing import Any, Callable, Dict, List, Optional, cast
+
+
+class WebhookQueue:
+    """
+    Queue webhook payloads in a SQLite file, and handle them in the background.
+
+    GitHub gives up on a delivery after 10 seconds and retries it, so handling
+    events (which can take several GitHub and database calls) inside the
+    request only adds load when things are slow. Instead, payloads are put in
+    this queue, the request is acknowledged right away, and a pool of worker
+    threads drains the queue.
+
+    Events are kept in the file until they are handled, so that none are lost
+    if the server restarts. An event being handled by a worker that died is
+    handed to another worker once its lease expires. An event that fails is
+    retried after ``RETRY_DELAY`` seconds, doubled after every attempt, and
+    is marked as failed after ``MAX_ATTEMPTS`` and left in the file.
+
+    Events put with the same ordering key (like the ID of the team they are
+    about) are handled one at a time, in the order they were queued, while
+    events with different keys are handled in parallel.
+
+    Neither the connection to the file nor the worker threads survive a
+    fork, so every process using the queue opens its own connection on first
+    use, and must start its own workers. A server preloading the app forks
+    its workers after the queue is made: see ``gunicorn.conf.py``.
+
+    The time each event spent queued and being handled is submitted to
+    :class:`interface.cloudwatch_metrics.CWMetrics`.
+    """
+
+    MAX_ATTEMPTS = 3
+    # Seconds before the first retry of a failed event
+    RETRY_DELAY = 5
+    # Seconds before an event being handled can be handed to another worker
+    LEASE = 300
+    # Seconds between checks for events queued by other processes
+    POLL_INTERVAL = 1
+    # Seconds a worker waits after failing to process events
+    ERROR_BACKOFF = 1
+
+    SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        ordering_key TEXT NOT NULL DEFAULT '',
+        state TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        enqueued_at REAL NOT NULL,
+        started_at REAL,
+        retry_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS events_state ON events(state, id);
+    CREATE INDEX IF NOT EXISTS events_ordering_key
+        ON events(ordering_key, state);
+    '''
+
+    def __init__(self, path: str, metrics: Optional[CWMetrics] = None):
+        """
+        Open (or create) the queue.
+
+        :param path: path to the SQLite file of the queue; use ``:memory:``
+                     for a queue that does not outlive the process
+        :param metrics: where to submit event latencies, if anywhere
+        """
+        logging.info(f"Initializing webhook queue at {path}")
+        self.path = path
+        self.metrics = metrics
+        # The connection is shared by the request and worker threads
+        self.lock = threading.RLock()
+        self.cond = threading.Condition(self.lock)
+        self.workers: List[threading.Thread] = []
+        self.stopping = False
+        # Process the connection and the workers belong to
+        self.pid: Optional[int] = None
+        self.__conn: Optional[sqlite3.Connection] = None
+        self.inherited: List[sqlite3.Connection] = []
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Get the connection of this process, opening it if needed."""
+        with self.lock:
+            if self.pid != os.getpid() or self.__conn is None:
+                self.forked()
+                self.__conn = self.connect()
+            return self.__conn
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection to the file, creating the table if needed."""
+        conn = sqlite3.connect(self.path,
+                               check_same_thread=False,
+                               isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        columns = [row['name'] for row in
+                   conn.execute('PRAGMA table_info(events)')]
+        if columns and 'ordering_key' not in columns:
+            # Queues created before events had ordering keys
+            conn.execute("ALTER TABLE events ADD COLUMN "
+                         "ordering_key TEXT NOT NULL DEFAULT ''")
+        if columns and 'retry_at' not in columns:
+            # Queues created before failed events were retried later
+            conn.execute("ALTER TABLE events ADD COLUMN retry_at REAL")
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def forked(self):
+        """Forget the connection and workers of the parent, after a fork."""
+        pid = os.getpid()
+        if self.pid is not None and self.pid != pid:
+            # SQLite connections must not be used by a forked process, nor
+            # even closed, so the one of the parent is kept unused
+            if self.__conn is not None:
+                self.inherited.append(self.__conn)
+                self.__conn = None
+            self.workers = []
+        self.pid = pid
+
+    def put(self,
+            name: str,
+            payload: Dict[str, Any],
+            ordering_key: str = '') -> int:
+        """
+        Add an event to the queue.
+
+        :param name: name of the event, like ``membership.added``
+        :param payload: payload of the event
+        :param ordering_key: events with the same non-empty key are handled
+                             one at a time, in order
+        :return: ID of the queued event
+        """
+        with self.lock:
+            cur = self.conn.execute(
+                'INSERT INTO events (name, payload, ordering_key, '
+                'enqueued_at) VALUES (?, ?, ?, ?)',
+                (name, json.dumps(payload), ordering_key, time.time()))
+            self.cond.notify()
+        event_id = cast(int, cur.lastrowid)
+        logging.info(f"Queued webhook event {name} (id={event_id})")
+        return event_id
+
+    def claim(self) -> Optional[sqlite3.Row]:
+        """
+        Take the oldest event that is waiting to be handled.
+
+        The event is marked as being handled, so that other workers (in this
+        process or others using the same file) skip it. Events waiting to be
+        retried are skipped, and so are events with the same ordering key as
+        an event being handled or retried.
+
+        :return: the row of the event, or ``None`` if there is none
+        """
+        now = time.time()
+        with self.lock:
+            # Lock the file right away, since other processes may be claiming
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                row: Optional[sqlite3.Row] = self.conn.execute(
+                    "SELECT * FROM events e "
+                    "WHERE ((state = 'queued' "
+                    "AND (retry_at IS NULL OR retry_at <= :now)) "
+                    "OR (state = 'running' AND started_at < :expired)) "
+                    "AND (ordering_key = '' OR NOT EXISTS ("
+                    "SELECT 1 FROM events r "
+                    "WHERE r.ordering_key = e.ordering_key AND r.id != e.id "
+                    "AND ((r.state = 'running' AND r.started_at >= :expired) "
+                    "OR (r.state = 'queued' AND r.id < e.id)))) "
+                    "ORDER BY id LIMIT 1",
+                    {'now': now, 'expired': now - self.LEASE}).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE events SET state = 'running', "
+                        "attempts = attempts + 1, started_at = ? "
+                        "WHERE id = ?", (now, row['id']))
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return row
+
+    def process_next(self,
+                     handler: Callable[[str, Dict[str, Any]], Any]) -> bool:
+        """
+        Handle the oldest event waiting in the queue, if any.
+
+        Handled events are removed from the queue. If ``handler`` raises, the
+        event is put back in the queue to be retried later, unless it failed
+        too many times.
+
+        :param handler: function handling the name and payload of an event
+        :return: true if an event was handled (or failed)
+        """
+        row = self.claim()
+        if row is None:
+            return False
+
+        started = time.time()
+        try:
+            handler(row['name'], json.loads(row['payload']))
+        except Exception:
+            logging.exception(f"Webhook event {row['name']} "
+                              f"(id={row['id']}) failed")
+            state = 'failed' if row['attempts'] + 1 >= self.MAX_ATTEMPTS \
+                else 'queued'
+            retry_at = time.time() + self.RETRY_DELAY * 2 ** row['attempts']
+            with self.lock:
+                self.conn.execute(
+                    'UPDATE events SET state = ?, retry_at = ? WHERE id = ?',
+                    (state, retry_at, row['id']))
+            return True
+
+        finished = time.time()
+        with self.lock:
+            self.conn.execute('DELETE FROM events WHERE id = ?', (row['id'],))
+        queued_ms = (started - row['enqueued_at']) * 1000
+        handled_ms = (finished - started) * 1000
+        logging.info(f"Handled webhook event {row['name']} (id={row['id']})"
+                     f" after {queued_ms:.0f} ms queued, "
+                     f"in {handled_ms:.0f} ms")
+        if self.metrics is not None:
+            try:
+                self.metrics.submit_webhook_mstime(row['name'], queued_ms,
+                                                   handled_ms)
+            except Exception:
+                logging.exception("Could not submit webhook event metrics")
+        return True
+
+    def size(self) -> int:
+        """Return the number of events waiting or being handled."""
+        with self.lock:
+            count: int = self.conn.execute(
+                "SELECT COUNT(*) FROM events "
+                "WHERE state IN ('queued', 'running')").fetchone()[0]
+        return count
+
+    def start(self,
+              handler: Callable[[str, Dict[str, Any]], Any],
+              num_workers: int = 2):
+        """
+        Start the worker threads draining the queue.
+
+        Does nothing if the workers of this process are already started.
+
+        :param handler: function handling the name and payload of an event
+        :param num_workers: number of worker threads
+        """
+        def work():
+            while not self.stopping:
+                wait = 0.0
+                try:
+                    if not self.process_next(handler):
+                        wait = self.POLL_INTERVAL
+                except Exception:
+                    # Like a busy file: workers must outlive any error
+                    logging.exception("Webhook worker failed to process "
+                                      "events, retrying")
+                    wait = self.ERROR_BACKOFF
+                if wait:
+                    with self.cond:
+                        if not self.stopping:
+                            self.cond.wait(wait)
+
+        with self.lock:
+            self.forked()
+            if self.workers:
+                return
+            self.stopping = False
+            for i in range(num_workers):
+                worker = threading.Thread(target=work, daemon=True,
+                                          name=f'webhook-worker-{i}')
+                worker.start()
+                self.workers.append(worker)
+        logging.info(f"Started {num_workers} webhook workers in process "
+                     f"{os.getpid()}")
+
+    def stop(self):
+        """Stop the worker threads, once they are done with their event."""
+        with self.cond:
+            self.forked()
+            self.stopping = True
+            self.cond.notify_all()
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
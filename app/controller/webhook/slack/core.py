@@ -34,3 +34,14 @@ class SlackEventsHandler:
             logging.info(f"{new_id} added to database - user notified")
         except SlackAPIError:
             logging.error(f"{new_id} added to database - user not notified")
+
+    def handle_directory_event(self, event_data: Dict[str, Any]):
+        """
+        Handle changes to channels, their members, or users.
+
+        What the bot remembers about them is forgotten, so that it is read
+        from Slack again (see :class:`interface.slack.SlackDirectory`).
+
+        :param event_data: JSON event data
+        """
+        self.__bot.directory.invalidate(event_data["event"])
@@ -1,4 +1,6 @@
 """Define the abstract base class for a data model."""
+import hashlib
+
 from abc import ABC, abstractmethod
 from typing import Dict, Any, TypeVar, Type
 
@@ -8,6 +10,29 @@ T = TypeVar('T', bound='RocketModel')
 class RocketModel(ABC):
     """Define the properties and methods needed for a data model."""
 
+    # Let subclasses be slotted. ``_stored`` may hold the item the model was
+    # read from, for databases that detect concurrent writes (see
+    # :meth:`db.dynamodb.DynamoDB.store`)
+    __slots__ = ('_stored',)
+    _stored: Dict[str, Any]
+
+    def __setstate__(self, state: Any):
+        """
+        Restore the attributes of an unpickled model.
+
+        Models pickled before they were slotted, such as by ``dump-db.py``,
+        hold their ``__dict__`` instead of their slots, which the default
+        unpickling cannot restore.
+
+        :param state: the dictionary of attributes of the model, or the pair
+                      of its dictionary and slots
+        """
+        if isinstance(state, tuple):
+            d, slots = state
+            state = {**(d or {}), **(slots or {})}
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
     @abstractmethod
     def get_attachment(self) -> Dict[str, Any]:
         """Return slack-formatted attachment (dictionary) for data model."""
@@ -28,11 +53,15 @@ class RocketModel(ABC):
 
     @classmethod
     @abstractmethod
-    def from_dict(cls: Type[T], d: Dict[str, Any]) -> T:
+    def from_dict(cls: Type[T],
+                  d: Dict[str, Any],
+                  trusted: bool = False) -> T:
         """
         Convert dict response object to data model object.
 
         :param d: the dictionary representing a data model
+        :param trusted: whether ``d`` comes from a database read, and can be
+                        used without defensive copies
         :return: the converted data model object.
         """
         pass
@@ -47,3 +76,21 @@ class RocketModel(ABC):
         :return: true if this data model has no missing required fields
         """
         pass
+
+    def fingerprint(self) -> str:
+        """
+        Return a digest of everything this data model stores.
+
+        Two models have the same fingerprint if and only if they would be
+        stored the same way, which makes it cheap to tell whether a model
+        changed: keep the fingerprint from before, and compare. Unlike
+        ``hash()``, which only covers the primary key, every attribute is
+        taken into account.
+
+        :return: hex digest of the stored attributes
+        """
+        content = sorted(
+            (k, sorted(v) if isinstance(v, (set, frozenset)) else v)
+            for k, v in self.to_dict(self).items())
+        return hashlib.blake2b(repr(content).encode(),
+                               digest_size=16).hexdigest()
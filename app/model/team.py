@@ -1,4 +1,5 @@
 """Represent a data model for a team."""
+from operator import attrgetter
 from typing import Set, Dict, Any, TypeVar, Type
 from app.model.base import RocketModel
 
@@ -6,7 +7,22 @@ T = TypeVar('T', bound='Team')
 
 
 class Team(RocketModel):
-    """Represent a team with related fields and methods."""
+    """
+    Represent a team with related fields and methods.
+
+    Teams are slotted: they have no ``__dict__``, which makes them smaller
+    and faster to build when loading entire tables.
+    """
+
+    __slots__ = ('github_team_id', 'github_team_name', 'displayname',
+                 'platform', 'team_leads', 'members', 'folder')
+
+    # Optional attributes and the database fields they are stored as, in the
+    # order they are written by ``to_dict``
+    OPTIONAL_FIELDS = ('displayname', 'platform', 'members', 'team_leads',
+                       'folder')
+    get_optional_attrs = attrgetter(*OPTIONAL_FIELDS)
+    get_attrs = attrgetter(*__slots__)
 
     def __init__(self,
                  github_team_id: str,
@@ -57,22 +73,35 @@ class Team(RocketModel):
         return {'fallback': fallback, 'fields': fields}
 
     @classmethod
-    def from_dict(cls: Type[T], d: Dict[str, Any]) -> T:
+    def from_dict(cls: Type[T],
+                  d: Dict[str, Any],
+                  trusted: bool = False) -> T:
         """
         Convert dict response object to team model.
 
+        The team is built directly, without going through ``__init__`` and
+        its defaults first. If ``trusted``, the ``members`` and
+        ``team_leads`` sets of ``d`` are used by the team as they are instead
+        of being copied: only pass dictionaries that nothing else holds on to,
+        like freshly read database items.
+
         :param d: the dictionary representing a team
+        :param trusted: whether ``d`` comes from a database read
         :return: the converted team model.
         """
-        team = cls(d['github_team_id'],
-                   d['github_team_name'],
-                   d.get('displayname', ''))
-        team.platform = d.get('platform', '')
-        team.folder = d.get('folder', '')
-        team.team_leads = set(d.get('team_leads', []))
-        members = set(d.get('members', []))
-        for member in members:
-            team.add_member(member)
+        get = d.get
+        team: T = cls.__new__(cls)
+        team.github_team_id = d['github_team_id']
+        team.github_team_name = get('github_team_name', '')
+        team.displayname = get('displayname', '')
+        team.platform = get('platform', '')
+        team.folder = get('folder', '')
+        leads = get('team_leads', ())
+        members = get('members', ())
+        team.team_leads = leads if trusted and type(leads) is set \
+            else set(leads)
+        team.members = members if trusted and type(members) is set \
+            else set(members)
         return team
 
     @classmethod
@@ -86,20 +115,14 @@ class Team(RocketModel):
         :param team: the team object
         :return: the dictionary representing the team
         """
-        def place_if_filled(name: str, field: Any):
-            """Populate ``tdict`` if ``field`` isn't empty."""
-            if field:
-                tdict[name] = field
-
         tdict = {
             'github_team_id': team.github_team_id,
             'github_team_name': team.github_team_name
         }
-        place_if_filled('displayname', team.displayname)
-        place_if_filled('platform', team.platform)
-        place_if_filled('members', team.members)
-        place_if_filled('team_leads', team.team_leads)
-        place_if_filled('folder', team.folder)
+        for name, field in zip(cls.OPTIONAL_FIELDS,
+                               cls.get_optional_attrs(team)):
+            if field:
+                tdict[name] = field
 
         return tdict
 
@@ -120,7 +143,8 @@ class Team(RocketModel):
 
     def __eq__(self, other: object) -> bool:
         """Return true if this team has the same attributes as the other."""
-        return isinstance(other, Team) and str(self) == str(other)
+        return isinstance(other, Team) and\
+            Team.get_attrs(self) == Team.get_attrs(other)
 
     def __ne__(self, other: object) -> bool:
         """Return the opposite of what is returned in self.__eq__(other)."""
@@ -156,8 +180,13 @@ class Team(RocketModel):
 
     def __str__(self) -> str:
         """Print information on the team class."""
-        return str(self.__dict__)
+        return str({attr: getattr(self, attr) for attr in Team.__slots__})
 
     def __hash__(self) -> int:
-        """Hash the team class using a dictionary."""
-        return self.__str__().__hash__()
+        """
+        Hash the team class using its Github team ID.
+
+        Equal teams always have the same ID, and unlike the other attributes,
+        it does not change while a team sits in a set.
+        """
+        return hash(self.github_team_id)
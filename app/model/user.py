@@ -1,4 +1,5 @@
 """Data model to represent an individual user."""
+from operator import attrgetter
 from typing import Dict, Any, TypeVar, Type
 from app.model.permissions import Permissions
 from app.model.base import RocketModel
@@ -7,7 +8,25 @@ T = TypeVar('T', bound='User')
 
 
 class User(RocketModel):
-    """Represent a user with related fields and methods."""
+    """
+    Represent a user with related fields and methods.
+
+    Users are slotted: they have no ``__dict__``, which makes them smaller
+    and faster to build when loading entire tables.
+    """
+
+    __slots__ = ('slack_id', 'name', 'email', 'github_username', 'github_id',
+                 'major', 'position', 'biography', 'image_url',
+                 'permissions_level', 'karma')
+
+    # Optional string attributes and the database fields they are stored as,
+    # in the order they are written by ``to_dict``
+    STR_FIELDS = ('email', 'name', 'github', 'github_user_id', 'major',
+                  'position', 'bio', 'image_url')
+    get_str_attrs = attrgetter('email', 'name', 'github_username',
+                               'github_id', 'major', 'position', 'biography',
+                               'image_url')
+    get_attrs = attrgetter(*__slots__)
 
     def __init__(self, slack_id: str):
         """Initialize the user with a given Slack ID."""
@@ -57,47 +76,49 @@ class User(RocketModel):
         :param user: the user object
         :return: the dictionary representing the user
         """
-        def place_if_filled(name: str, field: Any):
-            """Populate ``udict`` if ``field`` isn't empty."""
-            if field:
-                udict[name] = field
-
-        udict = {
+        udict: Dict[str, Any] = {
             'slack_id': user.slack_id,
             'permission_level': user.permissions_level.name
         }
-        place_if_filled('email', user.email)
-        place_if_filled('name', user.name)
-        place_if_filled('github', user.github_username)
-        place_if_filled('github_user_id', user.github_id)
-        place_if_filled('major', user.major)
-        place_if_filled('position', user.position)
-        place_if_filled('bio', user.biography)
-        place_if_filled('image_url', user.image_url)
-        place_if_filled('karma', user.karma)
+        for name, field in zip(cls.STR_FIELDS, cls.get_str_attrs(user)):
+            if field:
+                udict[name] = field
+        if user.karma:
+            udict['karma'] = user.karma
 
         return udict
 
     @classmethod
-    def from_dict(cls: Type[T], d: Dict[str, Any]) -> T:
+    def from_dict(cls: Type[T],
+                  d: Dict[str, Any],
+                  trusted: bool = False) -> T:
         """
         Convert dict response object to user model.
 
+        The user is built directly, without going through ``__init__`` and
+        its defaults first. Users have no set attributes, so ``trusted``
+        makes no difference here.
+
         :param d: the dictionary representing a user
+        :param trusted: whether ``d`` comes from a database read
         :return: the converted user model.
         """
-        user = cls(d['slack_id'])
-        user.email = d.get('email', '')
-        user.name = d.get('name', '')
-        user.github_username = d.get('github', '')
-        user.github_id = d.get('github_user_id', '')
-        user.major = d.get('major', '')
-        user.position = d.get('position', '')
-        user.biography = d.get('bio', '')
-        user.image_url = d.get('image_url', '')
+        get = d.get
+        user: T = cls.__new__(cls)
+        user.slack_id = d['slack_id']
+        user.email = get('email', '')
+        user.name = get('name', '')
+        user.github_username = get('github', '')
+        user.github_id = get('github_user_id', '')
+        user.major = get('major', '')
+        user.position = get('position', '')
+        user.biography = get('bio', '')
+        user.image_url = get('image_url', '')
         user.permissions_level =\
-            Permissions[d.get('permission_level', 'member')]
-        user.karma = int(d.get('karma', 1))
+            Permissions[get('permission_level', 'member')]
+        karma = get('karma', 1)
+        # DynamoDB returns numbers as ``Decimal``
+        user.karma = karma if type(karma) is int else int(karma)
         return user
 
     @classmethod
@@ -117,7 +138,7 @@ class User(RocketModel):
     def __eq__(self, other: object) -> bool:
         """Return true if this user has the same attributes as the other."""
         return isinstance(other, User) and\
-            str(self.__dict__) == str(other.__dict__)
+            User.get_attrs(self) == User.get_attrs(other)
 
     def __ne__(self, other: object) -> bool:
         """Return the opposite of what is returned in self.__eq__(other)."""
@@ -125,8 +146,13 @@ class User(RocketModel):
 
     def __str__(self) -> str:
         """Print information on the user class."""
-        return str(self.__dict__)
+        return str({attr: getattr(self, attr) for attr in User.__slots__})
 
     def __hash__(self) -> int:
-        """Hash the user class using a dictionary."""
-        return self.__str__().__hash__()
+        """
+        Hash the user class using its Slack ID.
+
+        Equal users always have the same Slack ID, and unlike the other
+        attributes, it does not change while a user sits in a set.
+        """
+        return hash(self.slack_id)
@@ -1,7 +1,7 @@
 """Scheduler for scheduling."""
 import atexit
 from flask import Flask
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.base import BaseScheduler
 from .modules.random_channel import RandomChannelPromoter
 from .modules.base import ModuleBase
 from typing import Tuple, List
@@ -9,10 +9,16 @@ from config import Config
 
 
 class Scheduler:
-    """The scheduler class for scheduling everything."""
+    """
+    The scheduler class for scheduling everything.
+
+    Jobs must only be scheduled by one process, or they run once per process;
+    run the scheduler on its own with ``python -m app.scheduler``, instead of
+    in the web server (which usually has several workers).
+    """
 
     def __init__(self,
-                 scheduler: BackgroundScheduler,
+                 scheduler: BaseScheduler,
                  args: Tuple[Flask, Config]):
         """Initialize scheduler class."""
         self.scheduler = scheduler
@@ -21,12 +27,21 @@ class Scheduler:
 
         self.__init_periodic_tasks()
 
-        atexit.register(self.scheduler.shutdown)
+        atexit.register(self.shutdown)
 
     def start(self):
-        """Start the scheduler, officially."""
+        """
+        Start the scheduler, officially.
+
+        With a blocking scheduler, this only returns once it is shut down.
+        """
         self.scheduler.start()
 
+    def shutdown(self):
+        """Shut the scheduler down, if it is running."""
+        if self.scheduler.running:
+            self.scheduler.shutdown()
+
     def __add_job(self, module: ModuleBase):
         """Add module as a job."""
         self.scheduler.add_job(func=module.do_it, **module.get_job_args())
@@ -0,0 +1,43 @@
+"""
+Run the scheduler on its own.
+
+The web server runs several worker processes, and every one of them would
+run every scheduled job if they each had a scheduler. Run exactly one of this
+instead, next to the web server::
+
+    python -m app.scheduler
+"""
+import logging
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+from app.scheduler import Scheduler
+from config import Config
+from factory import make_logging_config
+from flask import Flask
+from interface.slack import Bot
+from logging.config import dictConfig
+from slack import WebClient
+
+
+def main():
+    """Schedule every job, and run them until interrupted."""
+    config = Config()
+    dictConfig(make_logging_config(config))
+
+    sched = Scheduler(BlockingScheduler(timezone="America/Los_Angeles"),
+                      (Flask(__name__), config))
+
+    bot = Bot(WebClient(config.slack_api_token),
+              config.slack_notification_channel)
+    bot.send_to_channel('rocket2 has restarted successfully! :clap: :clap:',
+                        config.slack_notification_channel)
+
+    logging.info(f"Running {len(sched.modules)} scheduled jobs")
+    try:
+        sched.start()
+    except (KeyboardInterrupt, SystemExit):
+        logging.info("Scheduler stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -32,7 +32,7 @@ class RandomChannelPromoter(ModuleBase):
     def do_it(self):
         """Select and post random channels to #general."""
         channels = list(filter(lambda c: not c['is_archived'],
-                               self.bot.get_channels()))
+                               self.bot.get_channels(exclude_archived=True)))
         rand_channel = choice(channels)
         channel_id, channel_name = rand_channel['id'], rand_channel['name']
         self.bot.send_to_channel('Featured channel of the week: ' +
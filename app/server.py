@@ -1,74 +1,20 @@
 """Flask server instance."""
 from factory import make_command_parser, make_github_webhook_handler, \
-    make_slack_events_handler, make_github_interface
+    make_slack_events_handler, make_github_interface, make_logging_config
 from flask import Flask, request
 from logging.config import dictConfig
 from slackeventsapi import SlackEventAdapter
-from apscheduler.schedulers.background import BackgroundScheduler
 import logging
-import structlog
 from flask_talisman import Talisman
 from config import Config
-from app.scheduler import Scheduler
-from interface.slack import Bot
-from slack import WebClient
-from boto3.session import Session
+from interface.slack import SlackDirectory
 from threading import Thread
+import time
 
+start_time = time.time()
 config = Config()
 
-# set up logging handlers from config
-loggingHandlers = ['wsgi']
-loggingHandlersConfig = {
-    'wsgi': {
-        'class': 'logging.StreamHandler',
-        'stream': 'ext://flask.logging.wsgi_errors_stream',
-        'formatter': 'colored'
-    },
-}
-if not config.aws_local:
-    # set up logging to AWS cloudwatch when not restricted to local AWS
-    boto3_session = Session(aws_access_key_id=config.aws_access_keyid,
-                            aws_secret_access_key=config.aws_secret_key,
-                            region_name=config.aws_region)
-    loggingHandlers.append('watchtower')
-    loggingHandlersConfig['watchtower'] = {
-        'level': 'DEBUG',
-        'class': 'watchtower.CloudWatchLogHandler',
-        'boto3_session': boto3_session,
-        'log_group': 'watchtower',
-        'stream_name': 'rocket2',
-        'formatter': 'aws',
-    }
-
-# set up logging
-loggingConfig = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'aws': {
-            # No time b.c. CloudWatch logs times
-            'format': u"[%(levelname)-8s] %(message)s "
-                      u"{%(module)s.%(funcName)s():%(lineno)s %(pathname)s}",
-            'datefmt': "%Y-%m-%d %H:%M:%S"
-        },
-        "colored": {
-            'format': '{Time: %(asctime)s, '
-                      'Level: [%(levelname)s], '
-                      'function: %(module)s.%(funcName)s():%(lineno)s, '
-                      'message: %(message)s}',
-            "()": structlog.stdlib.ProcessorFormatter,
-            "processor": structlog.dev.ConsoleRenderer(colors=True),
-            'datefmt': '%Y-%m-%d %H:%M:%S',
-        }},
-    'handlers': loggingHandlersConfig,
-    'root': {
-        'level': 'INFO',
-        'propagate': True,
-        'handlers': loggingHandlers
-    }
-}
-dictConfig(loggingConfig)
+dictConfig(make_logging_config(config))
 
 app = Flask(__name__)
 # HTTP security header middleware for Flask
@@ -81,14 +27,9 @@ slack_events_handler = make_slack_events_handler(config)
 slack_events_adapter = SlackEventAdapter(config.slack_signing_secret,
                                          "/slack/events",
                                          app)
-sched = Scheduler(BackgroundScheduler(timezone="America/Los_Angeles"),
-                  (app, config))
-sched.start()
-
-bot = Bot(WebClient(config.slack_api_token),
-          config.slack_notification_channel)
-bot.send_to_channel('rocket2 has restarted successfully! :clap: :clap:',
-                    config.slack_notification_channel)
+# Clients are built on first use, or by the warm-up in gunicorn.conf.py
+logging.info(f"Server initialized in {(time.time() - start_time) * 1000:.0f} "
+             "ms")
 
 
 @app.route('/')
@@ -124,10 +65,12 @@ def handle_commands():
 def handle_github_webhook():
     """Handle GitHub webhooks."""
     xhub_signature = request.headers.get('X-Hub-Signature')
+    event = request.headers.get('X-GitHub-Event', '')
+    delivery = request.headers.get('X-GitHub-Delivery', '')
     request_data = request.get_data()
-    request_json = request.get_json()
+    # The body is only parsed if the event is supported
     msg = github_webhook_handler.handle(
-        request_data, xhub_signature, request_json)
+        request_data, xhub_signature, None, event, delivery)
     return msg
 
 
@@ -144,3 +87,13 @@ def handle_team_join(event):
         slack_events_handler.handle_team_join(event)
     else:
         logging.error("Slack signature could not be verified")
+
+
+def handle_directory_event(event):
+    """Handle changes to channels, their members, or users."""
+    logging.info(f"Handled '{event['event']['type']}' event")
+    slack_events_handler.handle_directory_event(event)
+
+
+for event_type in SlackDirectory.EVENTS:
+    slack_events_adapter.on(event_type, handle_directory_event)
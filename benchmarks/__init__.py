@@ -0,0 +1 @@
+"""Performance benchmarks; see each module for how to run it."""
@@ -0,0 +1,170 @@
+"""
+Benchmark concurrent reads through the asynchronous database facade.
+
+The same users are retrieved one by one, first in a loop over the
+synchronous facade, then all at once with ``asyncio.gather`` over
+:class:`db.facade_async.ExecutorDBFacade`, with as many threads as given by
+``--threads``. With ``--backend dynamodb``, they are also retrieved through
+:class:`db.dynamodb_async.AsyncDynamoDB`, which needs aiobotocore::
+
+    pipenv run python -m benchmarks.async_db
+    pipenv run python -m benchmarks.async_db --backend dynamodb
+
+The in-memory and SQLite databases never wait on the network, so concurrency
+only adds overhead to them; ``--latency`` makes every call wait as if it
+did. See :mod:`benchmarks.suite` for the backends, and ``--help`` for the
+other options.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+
+from app.model import User
+from benchmarks.suite import BACKENDS, drop_tables, make_config, \
+    make_facade, make_models, run_case, seed
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from db import DBFacade
+from db.facade_async import AsyncDBFacade, ExecutorDBFacade
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Name of a case, and the function it times
+Case = Tuple[str, Callable[[], Any]]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.async_db',
+                                     description=__doc__.split('\n')[1])
+    parser.add_argument('--backend', choices=BACKENDS, default='memory',
+                        help='database to benchmark (default: memory)')
+    parser.add_argument('--retrieves', type=int, default=500,
+                        help='users retrieved by each run (default: 500)')
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=[4, 16, 64],
+                        help='threads of the executors to compare '
+                             '(default: 4 16 64)')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='milliseconds every call waits, as if on the '
+                             'network (default: 0)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='times each case is run (default: 5)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random data (default: 0)')
+    parser.add_argument('--output',
+                        help='where to write the results, as JSON')
+    return parser.parse_args(argv)
+
+
+class Delayed:
+    """Synchronous facade waiting before every call, like over a network."""
+
+    def __init__(self, facade: DBFacade, latency_ms: float):
+        """Delay the calls to ``facade`` by ``latency_ms``."""
+        self.facade = facade
+        self.latency = latency_ms / 1000
+
+    def __getattr__(self, attr: str) -> Any:
+        """Look up a method of the facade, delayed."""
+        method = getattr(self.facade, attr)
+
+        def call(*args, **kwargs):
+            time.sleep(self.latency)
+            return method(*args, **kwargs)
+        return call
+
+
+def gather_retrieves(loop: asyncio.AbstractEventLoop,
+                     facade: AsyncDBFacade,
+                     keys: List[str]) -> Callable[[], Any]:
+    """Make a case retrieving every user at once, on ``loop``."""
+    async def retrieve_all():
+        return await asyncio.gather(*(facade.retrieve(User, k)
+                                      for k in keys))
+    return lambda: loop.run_until_complete(retrieve_all())
+
+
+def make_async_dynamodb(config: Config) -> Optional[AsyncDBFacade]:
+    """Make a DynamoDB facade on aiobotocore, if it is installed."""
+    try:
+        from db.dynamodb_async import AsyncDynamoDB
+    except ImportError as e:
+        print(f'Skipping AsyncDynamoDB: {e}')
+        return None
+    return AsyncDynamoDB(config)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the benchmarks, and print the results."""
+    args = parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    rand = random.Random(args.seed)
+    loop = asyncio.new_event_loop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(os.path.join(tmp, 'bench.db'))
+        facade = make_facade(args.backend, config)
+        executors: List[ThreadPoolExecutor] = []
+        async_facades: List[AsyncDBFacade] = []
+        try:
+            users, teams = make_models(rand, args.retrieves, 0, 0)
+            seed(facade, users, teams)
+            # Leaving out the admin added to the users
+            keys = [u.slack_id for u in users][:args.retrieves]
+            rand.shuffle(keys)
+            sync: Any = facade
+            if args.latency:
+                sync = Delayed(facade, args.latency)
+            print(f'Retrieving {len(keys)} users from {args.backend}, with '
+                  f'{args.latency:g} ms of added latency')
+
+            def loop_retrieves():
+                return [sync.retrieve(User, k) for k in keys]
+            cases: List[Case] = [('sync loop', loop_retrieves)]
+            for threads in args.threads:
+                executor = ThreadPoolExecutor(max_workers=threads)
+                executors.append(executor)
+                async_facades.append(ExecutorDBFacade(sync, executor))
+                cases.append((f'gather, executor ({threads} threads)',
+                              gather_retrieves(loop, async_facades[-1],
+                                               keys)))
+            if args.backend == 'dynamodb':
+                native = make_async_dynamodb(config)
+                if native is not None:
+                    async_facades.append(native)
+                    cases.append(('gather, AsyncDynamoDB',
+                                  gather_retrieves(loop, native, keys)))
+
+            results: Dict[str, Dict[str, Any]] = {}
+            print(f'{"case":<36}{"first":>9}{"mean":>9}{"p50":>9}'
+                  f'{"max":>9}{"speedup":>9}')
+            for name, case in cases:
+                r = results[name] = run_case(case, args.repeat)
+                speedup = results['sync loop']['p50_ms'] / r['p50_ms']
+                print(f'{name:<36}{r["first_ms"]:>9.2f}{r["mean_ms"]:>9.2f}'
+                      f'{r["p50_ms"]:>9.2f}{r["max_ms"]:>9.2f}'
+                      f'{speedup:>8.2f}x')
+        finally:
+            for async_facade in async_facades:
+                loop.run_until_complete(async_facade.aclose())
+            for executor in executors:
+                executor.shutdown()
+            loop.close()
+            drop_tables(facade)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'backend': args.backend,
+                       'retrieves': args.retrieves,
+                       'latency_ms': args.latency,
+                       'results': results}, f, indent=2)
+        print(f'\nWrote results to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Measure how fast the text of commands is normalized, split and parsed.
+
+Every subcommand of ``user``, ``team``, ``karma`` and ``export`` is parsed
+from a typical command line, with and without the tokenization cache. Invalid
+command lines are parsed with :class:`CommandArgumentParser` and with a
+stock :class:`argparse.ArgumentParser`, which formats usage text and exits.
+
+Run with ``pipenv run python -m benchmarks.command_parse``.
+"""
+import io
+import shlex
+import time
+
+import app.controller.command.commands.export as export
+import app.controller.command.commands.karma as karma
+import app.controller.command.commands.team as team
+import app.controller.command.commands.user as user
+import utils.slack_parse as util
+from app.controller.command.commands.base import ArgumentParseError, Command
+from argparse import ArgumentParser
+from config import Config
+from contextlib import redirect_stderr
+from db import DBFacade
+from interface.github import GithubInterface
+from typing import Callable, Dict, List, cast
+from unittest import mock
+
+REPEAT = 2000
+
+# Arguments of a typical call of every subcommand
+SAMPLES: Dict[str, Dict[str, str]] = {
+    'user': {
+        'view': '--username <@U0G9QF9C6|steven> --inspect',
+        'add': '-f',
+        'delete': '<@U0G9QF9C6|steven>',
+        'edit': '—name “Steven Universe” —pos Developer —major "CS"',
+    },
+    'team': {
+        'list': '',
+        'view': 'brussels',
+        'delete': 'brussels',
+        'create': 'brussels —displayname “Brussel Sprouts” '
+                  '—channel <#C0A1B2C3D|general> --lead <@U0G9QF9C6|steven>',
+        'add': 'brussels <@U0G9QF9C6|steven>',
+        'remove': 'brussels <@U0G9QF9C6|steven>',
+        'edit': 'brussels --displayname "Brussel Sprouts" --platform web',
+        'lead': 'brussels <@U0G9QF9C6|steven> --remove',
+        'refresh': '',
+    },
+    'karma': {
+        'set': '<@U0G9QF9C6|steven> 5',
+        'reset': '--all',
+        'view': '<@U0G9QF9C6|steven>',
+        'top': '5',
+    },
+    'export': {
+        'emails': '--team brussels',
+    },
+}
+
+
+def make_commands() -> Dict[str, Command]:
+    """Create the commands, without anything to handle them with."""
+    # Parsing never reaches the database, GitHub or the configuration
+    facade = cast(DBFacade, None)
+    gh = cast(GithubInterface, None)
+    config = cast(Config, None)
+    return {
+        'user': user.UserCommand(facade, gh, None),
+        'team': team.TeamCommand(config, facade, gh, None),
+        'karma': karma.KarmaCommand(facade),
+        'export': export.ExportCommand(facade),
+    }
+
+
+def make_stock_commands() -> Dict[str, Command]:
+    """Create the commands with stock argument parsers."""
+    modules = [user, team, karma, export]
+    patches = [mock.patch.object(m, 'CommandArgumentParser', ArgumentParser)
+               for m in modules]
+    for p in patches:
+        p.start()
+    try:
+        return make_commands()
+    finally:
+        for p in patches:
+            p.stop()
+
+
+def old_normalize(s: str) -> str:
+    """Normalize the text of a command in three passes, like before."""
+    s = ''.join(map(util.regularize_char, s))
+    s = util.escaped_id_to_id(s)
+    return util.ios_dash(s)
+
+
+def parse(cmd: Command,
+          lines: List[str],
+          split: Callable[[str], object]) -> Callable[[], None]:
+    """Return a function normalizing, splitting and parsing ``lines``."""
+    def run():
+        for line in lines:
+            try:
+                cmd.parser.parse_args(split(util.normalize_command(line)))
+            except (ArgumentParseError, SystemExit):
+                pass
+    return run
+
+
+def timeit(f: Callable[[], None], repeat: int) -> float:
+    """Return the mean time taken by ``f`` in microseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        f()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def main():
+    """Run the benchmark and print tables of results."""
+    commands = make_commands()
+    uncached = util.split_command.__wrapped__
+
+    print(f'Parsing every subcommand {REPEAT} times')
+    print(f'{"subcommand":<18}{"uncached (us)":>15}{"cached (us)":>15}'
+          f'{"parses/s":>12}')
+    total_uncached = total_cached = 0.0
+    for name, samples in SAMPLES.items():
+        cmd = commands[name]
+        assert set(samples) == set(cmd.subparser.choices), name
+        for sub, sample in samples.items():
+            lines = [f'{name} {sub} {sample}']
+            t_uncached = timeit(parse(cmd, lines, uncached), REPEAT)
+            t_cached = timeit(parse(cmd, lines, util.split_command), REPEAT)
+            total_uncached += t_uncached
+            total_cached += t_cached
+            print(f'{name + " " + sub:<18}{t_uncached:>15.1f}'
+                  f'{t_cached:>15.1f}{1e6 / t_cached:>12.0f}')
+    print(f'{"total":<18}{total_uncached:>15.1f}{total_cached:>15.1f}')
+
+    lines = [f'{name} {sub} {sample}'
+             for name, samples in SAMPLES.items()
+             for sub, sample in samples.items()]
+    t_old = timeit(lambda: [old_normalize(s) for s in lines], REPEAT)
+    t_new = timeit(lambda: [util.normalize_command(s) for s in lines],
+                   REPEAT)
+    print(f'\nNormalizing {len(lines)} lines: {t_old:.1f} us in three '
+          f'passes, {t_new:.1f} us with a translation table')
+
+    stock = make_stock_commands()
+    print('\nParsing invalid command lines')
+    print(f'{"command":<18}{"stock (us)":>15}{"raising (us)":>15}')
+    with redirect_stderr(io.StringIO()):
+        for name, samples in SAMPLES.items():
+            lines = [f'{name} {sub} --bogus' for sub in samples]
+            t_stock = timeit(parse(stock[name], lines, shlex.split), REPEAT)
+            t_raise = timeit(parse(commands[name], lines, shlex.split),
+                             REPEAT)
+            print(f'{name:<18}{t_stock:>15.1f}{t_raise:>15.1f}')
+
+
+if __name__ == '__main__':
+    main()
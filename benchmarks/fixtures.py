@@ -0,0 +1,234 @@
+"""
+Stand-ins for the GitHub, Google Drive and Slack APIs, and webhook payloads.
+
+The stand-ins answer like the real APIs would, without any network, so that
+benchmarks only measure Rocket. :class:`FakeGithub` replaces
+:class:`interface.github.GithubInterface`, while :class:`FakeDrive` replaces
+the Drive client used by a real :class:`interface.gcp.GCPInterface`, and
+keeps the permissions it is asked to create, so that syncing the same folder
+twice behaves like it would on Drive. :class:`FakeSlack` replaces the Slack
+client used by a real :class:`interface.slack.Bot`. All of them count the
+requests they get.
+"""
+import copy
+
+from app.model import Team, User
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+class FakeGithub:
+    """GitHub organization whose teams are given, instead of fetched."""
+
+    def __init__(self, teams: List[Team]):
+        """
+        Initialize the organization.
+
+        :param teams: teams of the organization, with their members
+        """
+        self.teams = {t.github_team_id: t for t in teams}
+        self.next_id = 1 + max((int(k) for k in self.teams), default=0)
+        self.requests: Counter = Counter()
+
+    def org_get_teams(self) -> List[Team]:
+        """Return copies of the teams, like fresh API responses."""
+        self.requests['org_get_teams'] += 1
+        teams = []
+        for t in self.teams.values():
+            team = Team(t.github_team_id, t.github_team_name, '')
+            team.members = set(t.members)
+            teams.append(team)
+        return teams
+
+    def org_create_team(self, name: str) -> int:
+        """Create an empty team, and return its ID."""
+        self.requests['org_create_team'] += 1
+        team_id = self.next_id
+        self.next_id += 1
+        self.teams[str(team_id)] = Team(str(team_id), name, name)
+        return team_id
+
+    def add_team_member(self, username: str, team_id: str):
+        """Add a member to a team."""
+        self.requests['add_team_member'] += 1
+
+    def org_has_member(self, username: str) -> bool:
+        """Return true for every user."""
+        self.requests['org_has_member'] += 1
+        return True
+
+
+class FakeRequest:
+    """Request of a Drive client, which returns a fixed response."""
+
+    def __init__(self, response: Any):
+        """Initialize the request with its response."""
+        self.response = response
+
+    def execute(self) -> Any:
+        """Return the response."""
+        return self.response
+
+
+class FakeFiles:
+    """``files`` resource of :class:`FakeDrive`."""
+
+    def __init__(self, drive: 'FakeDrive'):
+        """Initialize the resource."""
+        self.drive = drive
+
+    def get(self, fileId: str, fields: str = '') -> FakeRequest:
+        """Get a folder, which is always in the same parent folder."""
+        self.drive.requests['files.get'] += 1
+        return FakeRequest({'parents': [FakeDrive.PARENT]})
+
+
+class FakePermissions:
+    """``permissions`` resource of :class:`FakeDrive`."""
+
+    def __init__(self, drive: 'FakeDrive'):
+        """Initialize the resource."""
+        self.drive = drive
+
+    def list(self, fileId: str, fields: str = '') -> FakeRequest:
+        """List the permissions of a folder, in a single page."""
+        self.drive.requests['permissions.list'] += 1
+        perms = self.drive.shared.get(fileId, {})
+        return FakeRequest({
+            'kind': 'drive#permissionList',
+            'permissions': [dict(p) for p in perms.values()],
+        })
+
+    def list_next(self,
+                  previous_request: FakeRequest,
+                  previous_response: Dict[str, Any]) -> Optional[FakeRequest]:
+        """Return no next page."""
+        return None
+
+    def create(self,
+               fileId: str,
+               body: Dict[str, Any],
+               **kwargs) -> FakeRequest:
+        """Share a folder."""
+        self.drive.requests['permissions.create'] += 1
+        perms = self.drive.shared.setdefault(fileId, {})
+        perm = {
+            'kind': 'drive#permission',
+            'id': str(len(perms) + 1),
+            'type': body['type'],
+            'emailAddress': body['emailAddress'],
+            'role': body['role'],
+        }
+        perms[perm['id']] = perm
+        return FakeRequest(copy.deepcopy(perm))
+
+    def delete(self, fileId: str, permissionId: str) -> FakeRequest:
+        """Stop sharing a folder."""
+        self.drive.requests['permissions.delete'] += 1
+        self.drive.shared.get(fileId, {}).pop(permissionId, None)
+        return FakeRequest('')
+
+
+class FakeDrive:
+    """Drive client keeping the permissions of folders in memory."""
+
+    # Folder every team folder is in, shared with nobody
+    PARENT = 'parent-folder'
+
+    def __init__(self):
+        """Initialize a Drive where no folder is shared."""
+        # Permissions by ID, by folder
+        self.shared: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.requests: Counter = Counter()
+
+    def files(self) -> FakeFiles:
+        """Return the ``files`` resource."""
+        return FakeFiles(self)
+
+    def permissions(self) -> FakePermissions:
+        """Return the ``permissions`` resource."""
+        return FakePermissions(self)
+
+
+class FakeSlack:
+    """Slack web client of a workspace where every call succeeds."""
+
+    def __init__(self):
+        """Initialize a workspace without channels."""
+        self.channels: Dict[str, Dict[str, Any]] = {}
+        self.requests: Counter = Counter()
+
+    def chat_postMessage(self, **kwargs) -> Dict[str, Any]:
+        """Post a message."""
+        self.requests['chat.postMessage'] += 1
+        return {'ok': True, 'channel': kwargs.get('channel')}
+
+    def conversations_members(self, channel: str, **kwargs) \
+            -> Dict[str, Any]:
+        """List the members of a channel, which has none."""
+        self.requests['conversations.members'] += 1
+        return {'ok': True, 'members': []}
+
+    def conversations_list(self, **kwargs) -> Dict[str, Any]:
+        """List the channels created so far, on a single page."""
+        self.requests['conversations.list'] += 1
+        return {'ok': True, 'channels': list(self.channels.values())}
+
+    def channels_create(self, name: str, validate: bool = True) \
+            -> Dict[str, Any]:
+        """Create a channel, unless one has the same name."""
+        self.requests['channels.create'] += 1
+        if name in self.channels:
+            return {'ok': False, 'error': 'name_taken'}
+        self.channels[name] = {'id': f'C{len(self.channels):08}',
+                               'name': name}
+        return {'ok': True, 'name': name}
+
+
+def membership_payload(action: str, user: User, team: Team) -> Dict[str, Any]:
+    """Return the payload of a ``membership`` webhook event."""
+    return {
+        'action': action,
+        'scope': 'team',
+        'member': {
+            'login': user.github_username,
+            'id': int(user.github_id),
+            'type': 'User',
+        },
+        'team': {
+            'name': team.github_team_name,
+            'id': int(team.github_team_id),
+            'slug': team.github_team_name,
+        },
+        'organization': {'login': 'ubclaunchpad'},
+    }
+
+
+def team_payload(action: str, team: Team) -> Dict[str, Any]:
+    """Return the payload of a ``team`` webhook event."""
+    return {
+        'action': action,
+        'team': {
+            'name': team.github_team_name,
+            'id': int(team.github_team_id),
+            'slug': team.github_team_name,
+        },
+        'organization': {'login': 'ubclaunchpad'},
+    }
+
+
+def organization_payload(action: str, user: User) -> Dict[str, Any]:
+    """Return the payload of an ``organization`` webhook event."""
+    return {
+        'action': action,
+        'membership': {
+            'state': 'active',
+            'role': 'member',
+            'user': {
+                'login': user.github_username,
+                'id': int(user.github_id),
+                'type': 'User',
+            },
+        },
+        'organization': {'login': 'ubclaunchpad'},
+    }
@@ -0,0 +1,508 @@
+"""
+Load the web server with a realistic mix of signed Slack and GitHub requests.
+
+Slash commands and webhook events are sent from several threads for a set
+time, signed with the configured Slack signing secret and GitHub webhook
+secret, and the throughput, latency percentiles and error rate of each kind
+of request are reported. Slack only gets an acknowledgement to a command at
+first, and its response later, through the ``response_url``; responses are
+received by a server of this tool, so that the time until a command is
+answered is reported too.
+
+By default, :mod:`app.server` is served in this process, with its database
+seeded with random users and teams, and stand-ins for GitHub and Slack (see
+:mod:`benchmarks.fixtures`)::
+
+    pipenv run python -m benchmarks.load --duration 30 --concurrency 8
+
+Clients and server then share a process, and its interpreter lock. To
+measure what a single gunicorn worker sustains, serve the same stand-ins
+with gunicorn, and load it instead, with the same seed options::
+
+    pipenv run gunicorn -w 1 -b 127.0.0.1:5000 'benchmarks.load:make_app()'
+    pipenv run python -m benchmarks.load --url http://127.0.0.1:5000
+
+Settings missing from the environment are set to placeholders, and local
+AWS is always used, so that nothing but the database is ever called. See
+``--help`` for the other options.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+
+import requests
+from app.model import Team, User
+from benchmarks.fixtures import FakeGithub, FakeSlack, membership_payload, \
+    organization_payload, team_payload
+from benchmarks.suite import BACKENDS, make_config, make_facade, \
+    make_models, seed as store_models
+from config import Config
+from factory import provide_client, start_webhook_workers
+from flask import Flask
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from interface.slack import Bot
+from slack import WebClient
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, \
+    Tuple, cast
+from urllib.parse import urlencode
+from werkzeug.serving import make_server
+
+# Placeholder for settings missing from the environment
+PLACEHOLDER = 'load-test'
+DEFAULTS = {
+    'GITHUB_WEBHOOK_ENDPT': '/webhook',
+    'SLACK_NOTIFICATION_CHANNEL': 'rocket2-notifications',
+}
+
+
+class Request(NamedTuple):
+    """Request to send to the server."""
+
+    kind: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes
+    # Where the response to a command is expected, if it is one
+    response_id: Optional[str] = None
+
+
+class Result(NamedTuple):
+    """Outcome of a request."""
+
+    kind: str
+    sent: float
+    ms: float
+    ok: bool
+    response_id: Optional[str]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.load',
+                                     description=__doc__.split('\n')[1])
+    parser.add_argument('--url',
+                        help='server to load, instead of serving one in '
+                             'this process')
+    parser.add_argument('--backend', choices=BACKENDS, default='memory',
+                        help='database of the served server '
+                             '(default: memory)')
+    parser.add_argument('--duration', type=float, default=30,
+                        help='seconds to send requests for (default: 30)')
+    parser.add_argument('--warmup', type=float, default=2,
+                        help='seconds of requests left out of the results, '
+                             'before the duration (default: 2)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='requests sent at the same time (default: 8)')
+    parser.add_argument('--rate', type=float,
+                        help='requests per second to send in total, instead '
+                             'of as many as the server can take')
+    parser.add_argument('--only', choices=('commands', 'webhooks'),
+                        help='only send one kind of request')
+    parser.add_argument('--users', type=int, default=1000,
+                        help='number of users to seed (default: 1000)')
+    parser.add_argument('--teams', type=int, default=100,
+                        help='number of teams to seed (default: 100)')
+    parser.add_argument('--members', type=int, default=10,
+                        help='members per team (default: 10)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random data (default: 0)')
+    parser.add_argument('--drain', type=float, default=10,
+                        help='seconds to wait for responses to commands, '
+                             'once done sending (default: 10)')
+    parser.add_argument('--output',
+                        help='where to write a JSON report, if anywhere')
+    return parser.parse_args(argv)
+
+
+def load_config() -> Config:
+    """Load the config, with placeholders for missing settings."""
+    for name in Config.ENV_NAMES:
+        if name not in Config.OPTIONALS:
+            os.environ.setdefault(name, DEFAULTS.get(name, PLACEHOLDER))
+    # Only the database is provided by this tool; keep everything else
+    # from reaching AWS or Google
+    os.environ['AWS_LOCAL'] = 'True'
+    os.environ['GCP_SERVICE_ACCOUNT_CREDENTIALS'] = ''
+    return Config()
+
+
+def make_app(backend: str = 'memory',
+             users: int = 1000,
+             teams: int = 100,
+             members: int = 10,
+             seed: int = 0) -> Flask:
+    """
+    Make the Flask app of :mod:`app.server`, with stand-ins for services.
+
+    Its database is seeded with the users and teams of
+    :func:`benchmarks.suite.make_models`, and GitHub reports the same teams.
+
+    :return: the app, for gunicorn or any WSGI server to serve
+    """
+    load_config()
+    # Made on import, from the environment
+    import app.server as server
+
+    rand = random.Random(seed)
+    seeded_users, seeded_teams = make_models(rand, users, teams, members)
+    sqlite_path = os.path.join(tempfile.mkdtemp(), 'load.db')
+    facade = make_facade(backend, make_config(sqlite_path))
+    store_models(facade, seeded_users, seeded_teams)
+
+    provide_client(server.config, 'database', facade)
+    provide_client(server.config, 'GitHub', FakeGithub(seeded_teams))
+    provide_client(server.config, 'Slack',
+                   Bot(cast(WebClient, FakeSlack()),
+                       server.config.slack_notification_channel))
+    # Like gunicorn.conf.py does in every worker
+    start_webhook_workers(server.github_webhook_handler, server.config)
+    return server.app
+
+
+def slack_command(config: Config,
+                  kind: str,
+                  text: str,
+                  user_id: str,
+                  response_url: str) -> Request:
+    """Make a slash command, signed like Slack signs them."""
+    body = urlencode({
+        'token': PLACEHOLDER,
+        'team_id': 'T00000000',
+        'user_id': user_id,
+        'command': '/rocket',
+        'text': text,
+        'response_url': response_url,
+        'trigger_id': uuid.uuid4().hex,
+    }).encode()
+    timestamp = str(int(time.time()))
+    signature = hmac.new(config.slack_signing_secret.encode(),
+                         f'v0:{timestamp}:'.encode() + body,
+                         hashlib.sha256).hexdigest()
+    return Request(kind, '/slack/commands', {
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'X-Slack-Request-Timestamp': timestamp,
+        'X-Slack-Signature': f'v0={signature}',
+    }, body, response_url.rsplit('/', 1)[-1])
+
+
+def github_event(config: Config,
+                 event: str,
+                 payload: Dict[str, Any]) -> Request:
+    """Make a webhook delivery, signed like GitHub signs them."""
+    body = json.dumps(payload).encode()
+    signature = hmac.new(config.github_webhook_secret.encode(), body,
+                         hashlib.sha1).hexdigest()
+    return Request(f'webhook {event}.{payload["action"]}',
+                   config.github_webhook_endpt, {
+                       'Content-Type': 'application/json',
+                       'X-GitHub-Event': event,
+                       'X-GitHub-Delivery': str(uuid.uuid4()),
+                       'X-Hub-Signature': f'sha1={signature}',
+                   }, body)
+
+
+class Mix:
+    """Random requests, in the proportions Rocket gets them."""
+
+    def __init__(self,
+                 config: Config,
+                 users: List[User],
+                 teams: List[Team],
+                 response_url: str,
+                 only: Optional[str] = None):
+        """
+        Initialize the mix.
+
+        :param config: config with the secrets to sign requests with
+        :param users: users in the database of the server
+        :param teams: teams in the database of the server
+        :param response_url: URL under which responses to commands are
+                             expected
+        :param only: ``commands`` or ``webhooks`` to only make those
+        """
+        self.config = config
+        # Users known to Slack, unlike the admin, whose ID is not valid
+        self.users = [u for u in users if u.slack_id.startswith('U0')]
+        self.teams = teams
+        self.response_url = response_url
+        self.next_id = 0
+        self.lock = threading.Lock()
+        commands: List[Tuple[int, Callable[[random.Random], Request]]] = [
+            (20, lambda r: self.command(r, 'user view', 'user view')),
+            (10, lambda r: self.command(
+                r, 'user view --username',
+                f'user view --username {self.mention(r)}')),
+            (10, lambda r: self.command(r, 'team list', 'team list')),
+            (15, lambda r: self.command(
+                r, 'team view',
+                f'team view {r.choice(self.teams).github_team_name}')),
+            (5, lambda r: self.command(
+                r, 'karma view', f'karma view {self.mention(r)}')),
+            (10, lambda r: self.command(
+                r, 'mention ++', f'{r.choice(self.users).slack_id} ++')),
+            (5, lambda r: self.command(
+                r, 'user edit', f'user edit --bio "Bio {r.random()}"')),
+            (5, lambda r: self.command(r, 'help', 'help')),
+        ]
+        webhooks: List[Tuple[int, Callable[[random.Random], Request]]] = [
+            (8, lambda r: github_event(config, 'membership',
+                                       membership_payload(
+                                           'added', r.choice(self.users),
+                                           r.choice(self.teams)))),
+            (4, lambda r: github_event(config, 'membership',
+                                       membership_payload(
+                                           'removed', r.choice(self.users),
+                                           r.choice(self.teams)))),
+            (4, lambda r: github_event(config, 'team', team_payload(
+                'edited', r.choice(self.teams)))),
+            (4, lambda r: github_event(config, 'organization',
+                                       organization_payload(
+                                           'member_added',
+                                           r.choice(self.users)))),
+        ]
+        mix = {None: commands + webhooks,
+               'commands': commands,
+               'webhooks': webhooks}[only]
+        self.weights = [w for w, _ in mix]
+        self.makers = [m for _, m in mix]
+
+    def mention(self, r: random.Random) -> str:
+        """Return a random user, escaped like Slack escapes mentions."""
+        u = r.choice(self.users)
+        return f'<@{u.slack_id}|{u.name.replace(" ", "").lower()}>'
+
+    def command(self, r: random.Random, kind: str, text: str) -> Request:
+        """Make a command of a random user, with its own response URL."""
+        with self.lock:
+            self.next_id += 1
+            response_id = str(self.next_id)
+        return slack_command(self.config, kind, text,
+                             r.choice(self.users).slack_id,
+                             f'{self.response_url}/{response_id}')
+
+    def make(self, r: random.Random) -> Request:
+        """Make a random request."""
+        return r.choices(self.makers, self.weights)[0](r)
+
+
+class ResponseServer(ThreadingHTTPServer):
+    """Server receiving responses to commands, and when they arrive."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        """Listen on a free local port."""
+        super().__init__(('127.0.0.1', 0), ResponseHandler)
+        self.received: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """Return the URL responses are expected under."""
+        return f'http://127.0.0.1:{self.server_port}/responses'
+
+
+class ResponseHandler(BaseHTTPRequestHandler):
+    """Record the arrival of responses, like Slack would show them."""
+
+    server: ResponseServer
+
+    def do_POST(self):
+        """Record when the first part of a response arrives."""
+        now = time.perf_counter()
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.received.setdefault(self.path.rsplit('/', 1)[-1],
+                                            now)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any):
+        """Log nothing."""
+
+
+def send(session: requests.Session, url: str, req: Request) -> Result:
+    """Send a request, and return how it went."""
+    sent = time.perf_counter()
+    try:
+        resp = session.post(url + req.path, data=req.body,
+                            headers=req.headers, timeout=30)
+        # Failed verifications of commands are still responded to with 200
+        ok = resp.status_code < 400 and 'not be verified' not in resp.text
+    except requests.RequestException:
+        ok = False
+    return Result(req.kind, sent, (time.perf_counter() - sent) * 1000, ok,
+                  req.response_id)
+
+
+def run(url: str,
+        mix: Mix,
+        concurrency: int,
+        warmup: float,
+        duration: float,
+        rate: Optional[float],
+        seed: int) -> List[Result]:
+    """
+    Send requests from several threads until the time is up.
+
+    :param rate: requests per second to send in total, if limited
+    :return: results of requests sent after the warm-up
+    """
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop = measure_from + duration
+    results: List[Result] = []
+    lock = threading.Lock()
+
+    def worker(i: int):
+        r = random.Random(seed * 1000 + i)
+        ours = []
+        next_at = start + (i / rate if rate else 0)
+        with requests.Session() as session:
+            while True:
+                now = time.perf_counter()
+                if rate:
+                    if next_at > now:
+                        time.sleep(next_at - now)
+                    next_at += concurrency / rate
+                if time.perf_counter() >= stop:
+                    break
+                result = send(session, url, mix.make(r))
+                if result.sent >= measure_from:
+                    ours.append(result)
+        with lock:
+            results.extend(ours)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True)
+               for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def percentile(sorted_ms: List[float], p: float) -> float:
+    """Return the ``p``th percentile of sorted times, by nearest rank."""
+    if not sorted_ms:
+        return 0.0
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * p / 100))]
+
+
+def summarize(ms: List[float], errors: int, duration: float) \
+        -> Dict[str, Any]:
+    """Return the throughput, error rate and latencies of some requests."""
+    ms = sorted(ms)
+    return {
+        'requests': len(ms),
+        'errors': errors,
+        'error_rate': round(errors / len(ms), 4) if ms else 0.0,
+        'per_second': round(len(ms) / duration, 2),
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p90_ms': round(percentile(ms, 90), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+        'max_ms': round(ms[-1], 3) if ms else 0.0,
+    }
+
+
+def report(results: List[Result],
+           received: Dict[str, float],
+           duration: float) -> Dict[str, Any]:
+    """Summarize the results, in total, by kind, and for responses."""
+    by_kind: Dict[str, List[Result]] = {}
+    for res in results:
+        by_kind.setdefault(res.kind, []).append(res)
+    kinds = {kind: summarize([r.ms for r in rs],
+                             sum(not r.ok for r in rs), duration)
+             for kind, rs in sorted(by_kind.items())}
+    total = summarize([r.ms for r in results],
+                      sum(not r.ok for r in results), duration)
+
+    commands = [r for r in results if r.response_id is not None and r.ok]
+    answered = [(received[r.response_id] - r.sent) * 1000
+                for r in commands if r.response_id in received]
+    responses = summarize(answered, len(commands) - len(answered), duration)
+    responses['unanswered'] = responses.pop('errors')
+    del responses['error_rate']
+    return {'total': total, 'kinds': kinds, 'responses': responses}
+
+
+def print_report(summary: Dict[str, Any]):
+    """Print the summary as a table."""
+    print(f'{"request":<36}{"count":>8}{"err %":>7}{"req/s":>9}'
+          f'{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}')
+    rows = list(summary['kinds'].items()) + [('total', summary['total'])]
+    for name, s in rows:
+        print(f'{name:<36}{s["requests"]:>8}{s["error_rate"] * 100:>7.1f}'
+              f'{s["per_second"]:>9.1f}{s["p50_ms"]:>9.2f}'
+              f'{s["p90_ms"]:>9.2f}{s["p99_ms"]:>9.2f}{s["max_ms"]:>9.2f}')
+    s = summary['responses']
+    print(f'\nResponses to commands: {s["requests"]} received, '
+          f'{s["unanswered"]} missing; p50 {s["p50_ms"]:.2f} ms, '
+          f'p90 {s["p90_ms"]:.2f} ms, p99 {s["p99_ms"]:.2f} ms')
+
+
+def main(argv: Optional[List[str]] = None):
+    """Load the server, and print (and write) the results."""
+    args = parse_args(argv)
+    config = load_config()
+    users, teams = make_models(random.Random(args.seed), args.users,
+                               args.teams, args.members)
+
+    server = None
+    url = args.url
+    if url is None:
+        # Every request logs, which would bury the results
+        logging.disable(logging.CRITICAL)
+        app = make_app(args.backend, args.users, args.teams, args.members,
+                       args.seed)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}'
+    url = url.rstrip('/')
+
+    responses = ResponseServer()
+    threading.Thread(target=responses.serve_forever, daemon=True).start()
+    mix = Mix(config, users, teams, responses.url, args.only)
+
+    print(f'Loading {url} for {args.duration:.0f} s, with '
+          f'{args.concurrency} concurrent requests'
+          f'{f" at {args.rate:.0f} per second" if args.rate else ""}')
+    results = run(url, mix, args.concurrency, args.warmup, args.duration,
+                  args.rate, args.seed)
+
+    # Wait for the responses to the commands
+    expected = {r.response_id for r in results if r.response_id and r.ok}
+    deadline = time.perf_counter() + args.drain
+    while time.perf_counter() < deadline:
+        with responses.lock:
+            if expected <= responses.received.keys():
+                break
+        time.sleep(0.1)
+    with responses.lock:
+        received = dict(responses.received)
+    responses.shutdown()
+    if server is not None:
+        server.shutdown()
+
+    summary = report(results, received, args.duration)
+    print_report(summary)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(summary, url=url, args=vars(args),
+                           timestamp=time.strftime('%Y-%m-%dT%H:%M:%S')),
+                      f, indent=2)
+        print(f'\nWrote report to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
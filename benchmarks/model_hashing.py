@@ -0,0 +1,107 @@
+"""
+Measure set operations on models, hashed by primary key or by contents.
+
+``StrUser`` and ``StrTeam`` hash and compare the way the models did before,
+by formatting every attribute into a string.
+
+Run with ``pipenv run python -m benchmarks.model_hashing``.
+"""
+import time
+
+from app.model import User, Team
+from typing import Callable, List, Sequence, Tuple
+
+NUM_MODELS = 10000
+MEMBERS_PER_TEAM = 20
+
+
+class StrUser(User):
+    """User hashed and compared through ``str``."""
+
+    __slots__ = ()
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the string forms of both users."""
+        return isinstance(other, User) and str(self) == str(other)
+
+    def __hash__(self) -> int:
+        """Hash the string form of the user."""
+        return hash(str(self))
+
+
+class StrTeam(Team):
+    """Team hashed and compared through ``str``."""
+
+    __slots__ = ()
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the string forms of both teams."""
+        return isinstance(other, Team) and str(self) == str(other)
+
+    def __hash__(self) -> int:
+        """Hash the string form of the team."""
+        return hash(str(self))
+
+
+def make_models(UserModel, TeamModel) -> Tuple[List[User], List[Team]]:
+    """Create users, and teams each having a few members."""
+    users = []
+    teams = []
+    for i in range(NUM_MODELS):
+        u = UserModel(f'U{i}')
+        u.github_id = str(i)
+        u.github_username = f'gh{i}'
+        u.email = f'user{i}@ubc.ca'
+        users.append(u)
+
+        t = TeamModel(str(i), f'team{i}', f'Team {i}')
+        t.members = set(str((i + j) % NUM_MODELS)
+                        for j in range(MEMBERS_PER_TEAM))
+        teams.append(t)
+    return users, teams
+
+
+def set_ops(ms: Sequence) -> Callable[[], None]:
+    """Return a function doing typical set operations on ``ms``."""
+    half = len(ms) // 2
+    first, second = list(ms[:half + half // 2]), list(ms[half:])
+
+    def run():
+        # Deduplicate overlapping lists, like ``/rocket i-quit`` does
+        deduped = list(set(first + second))
+        assert len(deduped) == len(ms)
+        s = set(first)
+        for m in second:
+            _ = m in s
+    return run
+
+
+def timeit(f: Callable, repeat: int) -> float:
+    """Return the mean time taken by ``f`` in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        f()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    """Run the benchmark and print a table of results."""
+    old_users, old_teams = make_models(StrUser, StrTeam)
+    users, teams = make_models(User, Team)
+
+    print(f'Set operations on {NUM_MODELS} models')
+    print(f'{"models":<12}{"str hash (ms)":>15}{"key hash (ms)":>15}'
+          f'{"speedup":>10}')
+    for name, old, new in [('users', old_users, users),
+                           ('teams', old_teams, teams)]:
+        t_old = timeit(set_ops(old), 5)
+        t_new = timeit(set_ops(new), 5)
+        print(f'{name:<12}{t_old:>15.1f}{t_new:>15.1f}'
+              f'{t_old / t_new:>9.0f}x')
+
+    t_fingerprint = timeit(lambda: [t.fingerprint() for t in teams], 5)
+    print(f'Fingerprinting {NUM_MODELS} teams: {t_fingerprint:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Measure the memory and time taken to load a full table of users.
+
+Compares the slotted :class:`app.model.User` against ``DictUser``, a copy of
+the model as it was before it had ``__slots__``.
+
+Run with ``pipenv run python -m benchmarks.model_load``.
+"""
+import time
+import tracemalloc
+
+from app.model import User, Permissions
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Tuple
+
+NUM_USERS = 100000
+
+
+class DictUser:
+    """User model backed by an instance ``__dict__``."""
+
+    def __init__(self, slack_id: str):
+        """Initialize the user with a given Slack ID."""
+        self.slack_id = slack_id
+        self.name = ""
+        self.email = ""
+        self.github_username = ""
+        self.github_id = ""
+        self.major = ""
+        self.position = ""
+        self.biography = ""
+        self.image_url = ""
+        self.permissions_level = Permissions.member
+        self.karma = 1
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> 'DictUser':
+        """Convert dict response object to user model, field by field."""
+        user = cls(d['slack_id'])
+        user.email = d.get('email', '')
+        user.name = d.get('name', '')
+        user.github_username = d.get('github', '')
+        user.github_id = d.get('github_user_id', '')
+        user.major = d.get('major', '')
+        user.position = d.get('position', '')
+        user.biography = d.get('bio', '')
+        user.image_url = d.get('image_url', '')
+        user.permissions_level =\
+            Permissions.__getitem__(d.get('permission_level', 'member'))
+        user.karma = int(d.get('karma', 1))
+        return user
+
+    @classmethod
+    def to_dict(cls, user: 'DictUser') -> Dict[str, Any]:
+        """Convert user object to dict object."""
+        def place_if_filled(name: str, field: Any):
+            if field:
+                udict[name] = field
+
+        udict = {
+            'slack_id': user.slack_id,
+            'permission_level': user.permissions_level.name
+        }
+        place_if_filled('email', user.email)
+        place_if_filled('name', user.name)
+        place_if_filled('github', user.github_username)
+        place_if_filled('github_user_id', user.github_id)
+        place_if_filled('major', user.major)
+        place_if_filled('position', user.position)
+        place_if_filled('bio', user.biography)
+        place_if_filled('image_url', user.image_url)
+        place_if_filled('karma', user.karma)
+        return udict
+
+
+def make_items() -> List[Dict[str, Any]]:
+    """Create user items shaped like the ones returned by DynamoDB."""
+    return [{'slack_id': f'U{i}',
+             'permission_level': 'member',
+             'email': f'user{i}@ubc.ca',
+             'name': f'User {i}',
+             'github': f'gh{i}',
+             'github_user_id': str(i),
+             'major': 'Computer Science',
+             'karma': Decimal(i % 10 + 1)}
+            for i in range(NUM_USERS)]
+
+
+def measure(load: Callable[[], List[Any]]) -> Tuple[float, float]:
+    """Return the time (ms) and memory (MiB) taken by ``load``."""
+    start = time.perf_counter()
+    load()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    tracemalloc.start()
+    models = load()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del models
+    return elapsed, size / 2 ** 20
+
+
+def main():
+    """Run the benchmark and print a table of results."""
+    items = make_items()
+    dict_users = [DictUser.from_dict(d) for d in items]
+    users = [User.from_dict(d, trusted=True) for d in items]
+    cases = [
+        ('from_dict', lambda: [DictUser.from_dict(d) for d in items],
+         lambda: [User.from_dict(d, trusted=True) for d in items]),
+        ('to_dict', lambda: [DictUser.to_dict(u) for u in dict_users],
+         lambda: [User.to_dict(u) for u in users]),
+    ]
+
+    print(f'Loading {NUM_USERS} users')
+    print(f'{"operation":<12}{"model":<10}{"time (ms)":>12}'
+          f'{"memory (MiB)":>15}')
+    for name, old, new in cases:
+        for model, load in [('__dict__', old), ('slotted', new)]:
+            elapsed, size = measure(load)
+            print(f'{name:<12}{model:<10}{elapsed:>12.0f}{size:>15.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Compare scanning queries against :class:`db.index.ModelIndex`.
+
+Queries through :class:`db.memory.MemoryDB`, which keeps its index up to date
+with the models it hands out, are timed too. Every query checks whether the
+models the previous one returned were mutated, so queries returning a large
+share of the table (like every admin) cost more there than a scan.
+
+Run with ``pipenv run python -m benchmarks.query_engine``.
+"""
+import random
+import time
+
+from app.model import User, Team, Permissions
+from db.index import ModelIndex
+from db.memory import MemoryDB, field_is_set, field_to_attr
+from typing import Callable, List, Tuple
+
+NUM_USERS = 100000
+NUM_TEAMS = 5000
+MEMBERS_PER_TEAM = 20
+
+
+def make_models() -> Tuple[List[User], List[Team]]:
+    """Create users and teams with random memberships."""
+    rand = random.Random(0)
+    users = []
+    for i in range(NUM_USERS):
+        u = User(f'U{i}')
+        u.github_id = str(i)
+        u.github_username = f'gh{i}'
+        u.email = f'user{i}@ubc.ca'
+        u.permissions_level = rand.choice(list(Permissions))
+        users.append(u)
+    teams = []
+    for i in range(NUM_TEAMS):
+        t = Team(str(i), f'team{i}', f'Team {i}')
+        t.platform = rand.choice(['web', 'iOS', 'android'])
+        t.members = set(str(rand.randrange(NUM_USERS))
+                        for _ in range(MEMBERS_PER_TEAM))
+        t.team_leads = set(rand.sample(sorted(t.members), 2))
+        teams.append(t)
+    return users, teams
+
+
+def scan(ls, Model, params, any_param=False):
+    """Filter models like a scan: one pass over every row per parameter."""
+    def matching(field, v):
+        attr = field_to_attr(Model, field)
+        val = Permissions.__getitem__(v) if attr == 'permissions_level' else v
+        if field_is_set(Model, field):
+            return [m for m in ls if val in getattr(m, attr)]
+        return [m for m in ls if val == getattr(m, attr)]
+
+    if any_param:
+        r = {}
+        for field, v in params:
+            r.update((id(m), m) for m in matching(field, v))
+        return list(r.values())
+    for field, v in params:
+        ls = matching(field, v)
+    return ls
+
+
+def timeit(f: Callable, repeat: int) -> float:
+    """Return the mean time taken by ``f`` in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        f()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    """Run the benchmark and print a table of results."""
+    users, teams = make_models()
+
+    start = time.perf_counter()
+    user_index = ModelIndex(User, users)
+    team_index = ModelIndex(Team, teams)
+    print(f'Indexed {NUM_USERS} users and {NUM_TEAMS} teams in '
+          f'{(time.perf_counter() - start) * 1000:.0f} ms')
+    db = MemoryDB(users, teams)
+
+    team_members = [('github_user_id', m) for m in teams[0].members]
+    cases = [
+        ('user by github id', User, users, user_index,
+         [('github_user_id', '4242')], False),
+        ('admins', User, users, user_index,
+         [('permission_level', 'admin')], False),
+        ('team members (query_or)', User, users, user_index,
+         team_members, True),
+        ('teams containing member', Team, teams, team_index,
+         [('members', '4242')], False),
+        ('member and lead (query_or)', Team, teams, team_index,
+         [('members', '4242'), ('team_leads', '4242')], True),
+        ('team by name and platform', Team, teams, team_index,
+         [('github_team_name', 'team7'), ('platform', 'web')], False),
+    ]
+
+    print(f'{"query":<30}{"scan (ms)":>12}{"index (ms)":>12}'
+          f'{"memorydb (ms)":>15}{"speedup":>10}')
+    for name, Model, ls, index, params, any_param in cases:
+        run = index.query_or if any_param else index.query
+        run_db = db.query_or if any_param else db.query
+        expected = len(scan(ls, Model, params, any_param))
+        assert len(run(params)) == expected
+        # Also syncs the models stored at first
+        assert len(run_db(Model, params)) == expected
+        t_scan = timeit(lambda: scan(ls, Model, params, any_param), 1)
+        t_index = timeit(lambda: run(params), 100)
+        t_db = timeit(lambda: run_db(Model, params), 100)
+        print(f'{name:<30}{t_scan:>12.2f}{t_index:>12.4f}{t_db:>15.4f}'
+              f'{t_scan / t_db:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,415 @@
+"""
+Benchmark the database facade, and the commands and webhooks using it.
+
+A database is seeded with users and teams, then every :class:`db.DBFacade`
+method, ``team refresh``, ``export emails``, ``i-quit`` and the handling of
+GitHub webhook events are timed against it. GitHub and Google Drive are
+replaced by the stand-ins of :mod:`benchmarks.fixtures`, so nothing but the
+database is ever called.
+
+Results are printed, and written as a JSON report that a later run can be
+compared to::
+
+    pipenv run python -m benchmarks.suite --output before.json
+    # ... make changes ...
+    pipenv run python -m benchmarks.suite --baseline before.json
+
+Databases are picked with ``--backend``: ``memory`` (the in-memory database
+used by tests), ``sqlite`` (in a temporary file) or ``dynamodb``, which
+needs DynamoDB Local to be running (see ``scripts/run_local_dynamodb.sh``)
+and uses tables of its own, deleted afterwards. See ``--help`` for the other
+options.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+
+import utils.tracing as tracing
+from app.controller.command.commands import ExportCommand, IQuitCommand, \
+    TeamCommand
+from app.controller.webhook.github import GitHubWebhookHandler
+from app.model import Permissions, Team, User
+from benchmarks.fixtures import FakeDrive, FakeGithub, \
+    membership_payload, organization_payload, team_payload
+from config import Config
+from db import DBFacade
+from db.dynamodb import DynamoDB
+from db.sqlite import SQLiteDB
+from interface.gcp import GCPInterface
+from interface.github import GithubInterface
+from db.memory import MemoryDB
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, \
+    cast
+from unittest import mock
+
+BACKENDS = ('memory', 'sqlite', 'dynamodb')
+USERS_TABLE = 'benchmark_users'
+TEAMS_TABLE = 'benchmark_teams'
+ADMIN_ID = 'UADMIN'
+
+# Name of a case, and the function it times
+Case = Tuple[str, Callable[[], Any]]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite',
+                                     description=__doc__.split('\n')[1])
+    parser.add_argument('--backend', choices=BACKENDS, default='memory',
+                        help='database to benchmark (default: memory)')
+    parser.add_argument('--users', type=int, default=1000,
+                        help='number of users to seed (default: 1000)')
+    parser.add_argument('--teams', type=int, default=100,
+                        help='number of teams to seed (default: 100)')
+    parser.add_argument('--members', type=int, default=10,
+                        help='members per team (default: 10)')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='times each case is run (default: 20)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the random data (default: 0)')
+    parser.add_argument('--output', default='benchmark-report.json',
+                        help='where to write the JSON report')
+    parser.add_argument('--baseline',
+                        help='JSON report of a previous run to compare to')
+    return parser.parse_args(argv)
+
+
+def make_config(sqlite_path: str = '') -> Config:
+    """Make a config for the benchmarks, without reading the environment."""
+    config: Config = Config.__new__(Config)
+    config._set_attrs()
+    config.aws_users_tablename = USERS_TABLE
+    config.aws_teams_tablename = TEAMS_TABLE
+    config.aws_local = True
+    config.aws_billing_mode = 'PAY_PER_REQUEST'
+    config.aws_read_capacity = '1'
+    config.aws_write_capacity = '1'
+    config.sqlite_path = sqlite_path
+    config.github_team_all = 'all'
+    config.github_org_name = 'ubclaunchpad'
+    config.trace_format = 'none'
+    return config
+
+
+def make_facade(backend: str, config: Config) -> DBFacade:
+    """Make an empty database of the given backend."""
+    if backend == 'sqlite':
+        return SQLiteDB(config)
+    if backend == 'dynamodb':
+        return DynamoDB(config)
+    return MemoryDB()
+
+
+def drop_tables(facade: DBFacade):
+    """Delete the tables made for the benchmarks, if in DynamoDB."""
+    if isinstance(facade, DynamoDB):
+        for table in [USERS_TABLE, TEAMS_TABLE]:
+            facade.ddb.Table(table).delete()
+
+
+def make_models(rand: random.Random,
+                num_users: int,
+                num_teams: int,
+                members: int) -> Tuple[List[User], List[Team]]:
+    """Create users and teams with random memberships."""
+    users = []
+    for i in range(num_users):
+        u = User(f'U{i:08}')
+        u.name = f'User {i}'
+        u.email = f'user.{i}@ubc.ca'
+        u.github_id = str(i + 1)
+        u.github_username = f'gh-user-{i}'
+        u.major = rand.choice(['Computer Science', 'Physics', 'Math'])
+        u.karma = rand.randrange(100)
+        u.permissions_level = Permissions.member
+        users.append(u)
+    admin = User(ADMIN_ID)
+    admin.email = 'admin@ubc.ca'
+    admin.github_id = str(num_users + 1)
+    admin.github_username = 'gh-admin'
+    admin.permissions_level = Permissions.admin
+    users.append(admin)
+
+    teams = []
+    for i in range(num_teams):
+        t = Team(str(i + 1), f'team-{i}', f'Team {i}')
+        t.platform = rand.choice(['web', 'iOS', 'android'])
+        t.members = set(u.github_id for u in
+                        rand.sample(users, min(members, len(users))))
+        t.team_leads = set(rand.sample(sorted(t.members),
+                                       min(1, len(t.members))))
+        t.folder = f'folder-{i}'
+        teams.append(t)
+    return users, teams
+
+
+def make_remote_teams(rand: random.Random,
+                      users: List[User],
+                      teams: List[Team]) -> List[Team]:
+    """
+    Make the teams GitHub has, for ``team refresh`` to sync.
+
+    A tenth of the teams have a member more on GitHub, a twentieth are
+    renamed, and a twentieth exist on GitHub only.
+    """
+    remote = []
+    for t in teams:
+        r = Team(t.github_team_id, t.github_team_name, '')
+        r.members = set(t.members)
+        roll = rand.random()
+        if roll < 0.1:
+            r.members.add(rand.choice(users).github_id)
+        elif roll < 0.15:
+            r.github_team_name += '-renamed'
+        remote.append(r)
+    for i in range(len(teams) // 20):
+        r = Team(str(len(teams) + i + 1), f'new-team-{i}', '')
+        r.members = set(u.github_id for u in rand.sample(users, 3))
+        remote.append(r)
+    return remote
+
+
+def db_cases(facade: DBFacade,
+             rand: random.Random,
+             users: List[User],
+             teams: List[Team],
+             repeat: int) -> List[Case]:
+    """Make the cases timing every method of the database facade."""
+    def some_user() -> User:
+        return rand.choice(users)
+
+    def some_team() -> Team:
+        return rand.choice(teams)
+
+    def store_user():
+        u = facade.retrieve(User, some_user().slack_id)
+        u.biography = f'Biography {rand.random()}'
+        facade.store(u)
+
+    def update_sets():
+        t = some_team()
+        member = some_user().github_id
+        facade.update_sets(Team, t.github_team_id, add={'members': {member}})
+        facade.update_sets(Team, t.github_team_id,
+                           remove={'members': {member}})
+
+    doomed = iter([User(f'UDOOMED{i}') for i in range(repeat)])
+
+    def delete():
+        u = next(doomed)
+        facade.store(u)
+        facade.delete(User, u.slack_id)
+
+    github_ids = [u.github_id for u in users]
+    return [
+        ('db store (read, modify, write)', store_user),
+        ('db retrieve user',
+         lambda: facade.retrieve(User, some_user().slack_id)),
+        ('db retrieve team',
+         lambda: facade.retrieve(Team, some_team().github_team_id)),
+        ('db bulk_retrieve 100 users',
+         lambda: facade.bulk_retrieve(
+             User, [u.slack_id for u in rand.sample(users, 100)])),
+        ('db query all users', lambda: facade.query(User)),
+        ('db query all users, 2 fields',
+         lambda: facade.query(User, fields=['email', 'github_user_id'])),
+        ('db query user by github id',
+         lambda: facade.query(User,
+                              [('github_user_id', some_user().github_id)])),
+        ('db query teams by member',
+         lambda: facade.query(Team, [('members', some_user().github_id)])),
+        ('db query_or 50 users',
+         lambda: facade.query_or(User,
+                                 [('github_user_id', i)
+                                  for i in rand.sample(github_ids, 50)])),
+        ('db update_fields',
+         lambda: facade.update_fields(
+             Team, some_team().github_team_id,
+             {'platform': rand.choice(['web', 'iOS', 'android'])})),
+        ('db update_sets (add, remove)', update_sets),
+        ('db increment',
+         lambda: facade.increment(User, some_user().slack_id, 'karma')),
+        ('db top 10 by karma', lambda: facade.top(User, 'karma', 10)),
+        ('db delete (store, delete)', delete),
+    ]
+
+
+def command_cases(config: Config,
+                  facade: DBFacade,
+                  rand: random.Random,
+                  users: List[User],
+                  teams: List[Team]) -> Tuple[List[Case], Dict[str, Any]]:
+    """
+    Make the cases timing commands and webhooks.
+
+    :return: the cases, and the stand-ins of the APIs they call
+    """
+    gh = FakeGithub(make_remote_teams(rand, users, teams))
+    drive = FakeDrive()
+    gcp = GCPInterface(drive, subject='team@ubclaunchpad.com')
+    github = cast(GithubInterface, gh)
+    team_cmd = TeamCommand(config, facade, github, mock.Mock(), gcp=gcp)
+    export_cmd = ExportCommand(facade)
+    iquit_cmd = IQuitCommand(facade)
+    webhooks = GitHubWebhookHandler(facade, github, config)
+
+    users_by_github_id = {u.github_id: u for u in users}
+    memberships = iter(rand.sample(
+        [(users_by_github_id[m], t) for t in teams for m in t.members],
+        sum(len(t.members) for t in teams)))
+
+    def member() -> User:
+        return rand.choice(users[:-1])
+
+    def add_member():
+        payload = membership_payload('added', member(), rand.choice(teams))
+        webhooks.dispatch(payload, 'membership')
+
+    def remove_member():
+        # Every seeded membership is removed at most once
+        payload = membership_payload('removed', *next(memberships))
+        webhooks.dispatch(payload, 'membership')
+
+    cases = [
+        ('team refresh',
+         lambda: team_cmd.handle('team refresh', ADMIN_ID)),
+        ('export emails',
+         lambda: export_cmd.handle('export emails', ADMIN_ID)),
+        ('i-quit', lambda: iquit_cmd.handle('i-quit', member().slack_id)),
+        ('webhook membership.added', add_member),
+        ('webhook membership.removed', remove_member),
+        ('webhook team.edited',
+         lambda: webhooks.dispatch(team_payload('edited', rand.choice(teams)),
+                                   'team')),
+        ('webhook organization.member_added',
+         lambda: webhooks.dispatch(
+             organization_payload('member_added', member()),
+             'organization')),
+    ]
+    return cases, {'github': gh, 'drive': drive}
+
+
+def run_case(f: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Time ``repeat`` runs of ``f``.
+
+    The first run is reported on its own too, since it can differ (like the
+    first ``team refresh``, which has teams to sync). Calls to the database
+    are counted during the last run.
+
+    :return: statistics of the runs, in milliseconds
+    """
+    times = []
+    for _ in range(repeat):
+        with tracing.trace() as trace:
+            start = time.perf_counter()
+            f()
+            times.append((time.perf_counter() - start) * 1000)
+    spans = trace.to_dict()['spans']
+    times_sorted = sorted(times)
+    return {
+        'runs': repeat,
+        'first_ms': round(times[0], 3),
+        'mean_ms': round(statistics.mean(times), 3),
+        'p50_ms': round(times_sorted[len(times) // 2], 3),
+        'p95_ms': round(times_sorted[min(len(times) - 1,
+                                         int(len(times) * 0.95))], 3),
+        'min_ms': round(times_sorted[0], 3),
+        'max_ms': round(times_sorted[-1], 3),
+        'db_calls': sum(s['count'] for name, s in spans.items()
+                        if name.startswith('db.')),
+    }
+
+
+def seed(facade: DBFacade, users: List[User], teams: List[Team]) -> float:
+    """Store every user and team, and return how long it took in ms."""
+    start = time.perf_counter()
+    for u in users:
+        facade.store(u)
+    for t in teams:
+        facade.store(t)
+    return (time.perf_counter() - start) * 1000
+
+
+def compare(results: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Any]) -> Iterator[str]:
+    """Yield lines comparing mean times to those of a previous report."""
+    before = baseline.get('results', {})
+    yield f'\nCompared to {baseline.get("timestamp", "baseline")} ' \
+        f'({baseline.get("backend", "?")})'
+    yield f'{"case":<36}{"before (ms)":>13}{"after (ms)":>13}{"change":>9}'
+    for name, r in results.items():
+        if name not in before:
+            continue
+        old, new = before[name]['mean_ms'], r['mean_ms']
+        change = f'{(new - old) / old * 100:+.0f}%' if old else 'n/a'
+        yield f'{name:<36}{old:>13.2f}{new:>13.2f}{change:>9}'
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the benchmarks, print the results, and write the report."""
+    args = parse_args(argv)
+    # Commands log (and sometimes log errors) all the time
+    logging.disable(logging.CRITICAL)
+    rand = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(os.path.join(tmp, 'bench.db'))
+        facade = make_facade(args.backend, config)
+        try:
+            users, teams = make_models(rand, args.users, args.teams,
+                                       args.members)
+            seed_ms = seed(facade, users, teams)
+            print(f'Seeded {len(users)} users and {len(teams)} teams into '
+                  f'{args.backend} in {seed_ms:.0f} ms')
+
+            cases = db_cases(facade, rand, users, teams, args.repeat)
+            more_cases, fakes = command_cases(config, facade, rand, users,
+                                              teams)
+            cases += more_cases
+
+            results: Dict[str, Dict[str, Any]] = {}
+            print(f'{"case":<36}{"first":>9}{"mean":>9}{"p50":>9}'
+                  f'{"p95":>9}{"max":>9}{"db calls":>10}')
+            for name, case in cases:
+                r = results[name] = run_case(case, args.repeat)
+                print(f'{name:<36}{r["first_ms"]:>9.2f}{r["mean_ms"]:>9.2f}'
+                      f'{r["p50_ms"]:>9.2f}{r["p95_ms"]:>9.2f}'
+                      f'{r["max_ms"]:>9.2f}{r["db_calls"]:>10}')
+        finally:
+            drop_tables(facade)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'backend': args.backend,
+        'python': platform.python_version(),
+        'seed': {
+            'users': args.users,
+            'teams': args.teams,
+            'members': args.members,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'seed_ms': round(seed_ms, 3),
+        'results': results,
+        'api_requests': {name: dict(fake.requests)
+                         for name, fake in fakes.items()},
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nWrote report to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            for line in compare(results, json.load(f)):
+                print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Measure the overhead of tracing calls to external services.
+
+A method doing nothing is called bare, wrapped in a span outside of any
+trace, and wrapped in a span inside a trace. The overhead is then compared
+to a typical command, which makes tens of calls to DynamoDB, GitHub and
+Slack, each taking milliseconds.
+
+Run with ``pipenv run python -m benchmarks.tracing``.
+"""
+import time
+
+import utils.tracing as tracing
+from typing import Callable
+
+REPEAT = 200000
+# Calls made to external services by a typical command
+CALLS_PER_COMMAND = 50
+
+
+class Client:
+    """Client doing nothing, with and without a span."""
+
+    def bare(self):
+        """Do nothing."""
+
+    @tracing.span('client.traced')
+    def traced(self):
+        """Do nothing, in a span."""
+
+
+def timeit(f: Callable[[], None], repeat: int) -> float:
+    """Return the mean time taken by ``f`` in nanoseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        f()
+    return (time.perf_counter() - start) * 1e9 / repeat
+
+
+def main():
+    """Run the benchmark and print a table of results."""
+    client = Client()
+    t_bare = timeit(client.bare, REPEAT)
+    t_untraced = timeit(client.traced, REPEAT)
+    with tracing.trace('benchmark') as t:
+        t_traced = timeit(client.traced, REPEAT)
+
+    print(f'Calling a method {REPEAT} times')
+    print(f'{"call":<24}{"time (ns)":>12}{"overhead (ns)":>16}')
+    print(f'{"bare":<24}{t_bare:>12.0f}{0:>16.0f}')
+    print(f'{"span, no trace":<24}{t_untraced:>12.0f}'
+          f'{t_untraced - t_bare:>16.0f}')
+    print(f'{"span, in trace":<24}{t_traced:>12.0f}'
+          f'{t_traced - t_bare:>16.0f}')
+
+    per_command_us = (t_traced - t_bare) * CALLS_PER_COMMAND / 1000
+    start = time.perf_counter()
+    tracing.export(t, 'none')
+    t.to_emf()
+    export_us = (time.perf_counter() - start) * 1e6
+    print(f'\nTracing {CALLS_PER_COMMAND} calls adds {per_command_us:.1f} us '
+          f'to a command, and exporting its trace {export_us:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
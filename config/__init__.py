@@ -17,6 +17,7 @@ class Config:
         'SLACK_API_TOKEN': 'slack_api_token',
         'SLACK_NOTIFICATION_CHANNEL': 'slack_notification_channel',
         'SLACK_ANNOUNCEMENT_CHANNEL': 'slack_announcement_channel',
+        'SLACK_DIRECTORY_TTL': 'slack_directory_ttl',
 
         'GITHUB_APP_ID': 'github_app_id',
         'GITHUB_ORG_NAME': 'github_org_name',
@@ -25,6 +26,9 @@ class Config:
         'GITHUB_LEADS_TEAM_NAME': 'github_team_leads',
         'GITHUB_WEBHOOK_ENDPT': 'github_webhook_endpt',
         'GITHUB_WEBHOOK_SECRET': 'github_webhook_secret',
+        'GITHUB_WEBHOOK_QUEUE_PATH': 'github_webhook_queue_path',
+        'GITHUB_WEBHOOK_WORKERS': 'github_webhook_workers',
+        'GITHUB_WEBHOOK_BATCH_WINDOW': 'github_webhook_batch_window',
         'GITHUB_KEY': 'github_key',
 
         'AWS_ACCESS_KEYID': 'aws_access_keyid',
@@ -33,17 +37,40 @@ class Config:
         'AWS_TEAMS_TABLE': 'aws_teams_tablename',
         'AWS_REGION': 'aws_region',
         'AWS_LOCAL': 'aws_local',
+        'AWS_BILLING_MODE': 'aws_billing_mode',
+        'AWS_READ_CAPACITY': 'aws_read_capacity',
+        'AWS_WRITE_CAPACITY': 'aws_write_capacity',
+
+        'SQLITE_PATH': 'sqlite_path',
+        'RUNNING_COMMANDS_PATH': 'running_commands_path',
 
         'GCP_SERVICE_ACCOUNT_CREDENTIALS': 'gcp_service_account_credentials',
-        'GCP_SERVICE_ACCOUNT_SUBJECT': 'gcp_service_account_subject'
+        'GCP_SERVICE_ACCOUNT_SUBJECT': 'gcp_service_account_subject',
+
+        'WARM_UP_CLIENTS': 'warm_up_clients',
+        'TRACE_FORMAT': 'trace_format',
+
+        'ASGI_HANDLER_THREADS': 'asgi_handler_threads'
     }
     OPTIONALS = {
         'AWS_LOCAL': 'False',
+        'AWS_BILLING_MODE': 'PROVISIONED',
+        'AWS_READ_CAPACITY': '1',
+        'AWS_WRITE_CAPACITY': '1',
+        'SQLITE_PATH': '',
+        'RUNNING_COMMANDS_PATH': '',
         'GITHUB_DEFAULT_TEAM_NAME': 'all',
         'GITHUB_ADMIN_TEAM_NAME': '',
         'GITHUB_LEADS_TEAM_NAME': '',
+        'GITHUB_WEBHOOK_QUEUE_PATH': '',
+        'GITHUB_WEBHOOK_WORKERS': '2',
+        'GITHUB_WEBHOOK_BATCH_WINDOW': '0',
         'GCP_SERVICE_ACCOUNT_CREDENTIALS': '',
         'GCP_SERVICE_ACCOUNT_SUBJECT': '',
+        'WARM_UP_CLIENTS': 'True',
+        'TRACE_FORMAT': 'json',
+        'ASGI_HANDLER_THREADS': '4',
+        'SLACK_DIRECTORY_TTL': '300',
     }
 
     def __init__(self):
@@ -76,6 +103,7 @@ class Config:
             raise MissingConfigError(missing_config_fields)
 
         self.aws_local = self.aws_local == 'True'
+        self.warm_up_clients = self.warm_up_clients == 'True'
         self.github_key = self.github_key\
             .replace('\\n', '\n')\
             .replace('\\-', '-')
@@ -88,6 +116,7 @@ class Config:
         self.slack_api_token = ''
         self.slack_notification_channel = ''
         self.slack_announcement_channel = ''
+        self.slack_directory_ttl = ''
 
         self.github_app_id = ''
         self.github_org_name = ''
@@ -96,6 +125,9 @@ class Config:
         self.github_team_leads = ''
         self.github_webhook_endpt = ''
         self.github_webhook_secret = ''
+        self.github_webhook_queue_path = ''
+        self.github_webhook_workers = ''
+        self.github_webhook_batch_window = ''
         self.github_key = ''
 
         self.aws_access_keyid = ''
@@ -104,10 +136,21 @@ class Config:
         self.aws_teams_tablename = ''
         self.aws_region = ''
         self.aws_local: bool = False
+        self.aws_billing_mode = ''
+        self.aws_read_capacity = ''
+        self.aws_write_capacity = ''
+
+        self.sqlite_path = ''
+        self.running_commands_path = ''
 
         self.gcp_service_account_credentials = ''
         self.gcp_service_account_subject = ''
 
+        self.warm_up_clients: bool = True
+        self.trace_format = ''
+
+        self.asgi_handler_threads = ''
+
 
 class MissingConfigError(Exception):
     """Exception representing an error while loading credentials."""
@@ -1,7 +1,9 @@
 """Pack the modules contained in the db directory."""
 import db.dynamodb as ddb
 import db.facade as dbf
+import db.sqlite as sqlite
 
 
 DynamoDB = ddb.DynamoDB
 DBFacade = dbf.DBFacade
+SQLiteDB = sqlite.SQLiteDB
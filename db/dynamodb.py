@@ -1,12 +1,16 @@
 import boto3
 import logging
 
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
 from functools import reduce, wraps
 from app.model import User, Team
-from typing import Tuple, List, Type, TypeVar
+from typing import Any, Dict, Optional, Set, Tuple, List, Type, TypeVar
 from config import Config
 from db.facade import DBFacade
+from db.utils import get_field_default
+import utils.tracing as tracing
+from utils.tracing import trace_methods
 
 T = TypeVar('T', User, Team)
 
@@ -14,27 +18,78 @@ T = TypeVar('T', User, Team)
 def fragment(items_per_call=100):
     def decor_fragment(func):
         @wraps(func)
-        def wrapper_fragment(*args, **kwargs):
+        def wrapper_fragment(self, Model, params=[], *args, **kwargs):
+            if len(params) == 0:
+                return func(self, Model, params, *args, **kwargs)
             results = []
-            for i in range(0, len(args[2]), items_per_call):
+            for i in range(0, len(params), items_per_call):
                 results.extend(
-                    func(args[0],
-                         args[1],
-                         args[2][i: i + items_per_call])
+                    func(self,
+                         Model,
+                         params[i: i + items_per_call],
+                         *args,
+                         **kwargs)
                 )
             return results
         return wrapper_fragment
     return decor_fragment
 
 
-class DynamoDB(DBFacade):
+def merge_items(base: Dict[str, Any],
+                ours: Dict[str, Any],
+                theirs: Dict[str, Any],
+                set_attrs: List[str]) -> Dict[str, Any]:
     """
-    Handles calls to database through API.
+    Merge two items written concurrently from the same item ``base``.
+
+    Attributes changed in ``ours`` are taken from it, and the others from
+    ``theirs``. Elements added to and removed from sets in ``ours`` are added
+    to and removed from the sets in ``theirs``, so that changes to the same set
+    are merged too.
+
+    :param base: the item both were changed from
+    :param ours: the item we are writing
+    :param theirs: the item written since ``base`` was read
+    :param set_attrs: attributes that are sets
+    :return: the merged item
+    """
+    merged = {}
+    for attr in base.keys() | ours.keys() | theirs.keys():
+        if attr in set_attrs:
+            b = base.get(attr, set())
+            o = ours.get(attr, set())
+            v = (theirs.get(attr, set()) - (b - o)) | (o - b)
+        elif ours.get(attr) != base.get(attr):
+            v = ours.get(attr)
+        else:
+            v = theirs.get(attr)
+        if v:
+            merged[attr] = v
+    return merged
 
-    Please do not use this class, and instead use :class:`db.facade.DBFacade`.
-    This class only works on DynamoDB, and should not be used outside of the
-    facade class.
+
+class DynamoItems:
     """
+    Conversions between models and DynamoDB items.
+
+    Shared by :class:`DynamoDB` and
+    :class:`db.dynamodb_async.AsyncDynamoDB`, so that both read and
+    write the same items.
+    """
+
+    # Sorted indexes put every item in one partition, so that a single query
+    # reads items in order of the sort key
+    SORT_PARTITION_ATTR = 'sort_partition'
+    SORT_PARTITION = 'all'
+
+    # Every write changes the version of an item, so that storing a model
+    # fails if the item changed since the model was read
+    VERSION_ATTR = 'version'
+    STORE_ATTEMPTS = 5
+
+    # Operations consuming read capacity; all others consume write capacity
+    READ_OPERATIONS = {'GetItem', 'BatchGetItem', 'Query', 'Scan',
+                       'TransactGetItems'}
 
     class Const:
         """
@@ -79,6 +134,25 @@ class DynamoDB(DBFacade):
             else:
                 raise TypeError('Table name does not correspond to anything')
 
+        def get_sorted_attrs(self, table_name: str) -> List[str]:
+            """
+            Get numeric attributes kept sorted by a secondary index.
+
+            :param table_name: the table name
+            :raises: TypeError if table does not exist
+            :return: sorted attributes
+            """
+            if table_name == self.users_table:
+                return ['karma']
+            elif table_name == self.teams_table:
+                return []
+            else:
+                raise TypeError('Table name does not correspond to anything')
+
+        def get_index_name(self, attr: str) -> str:
+            """Get the name of the index sorting items by ``attr``."""
+            return f'{attr}-sorted'
+
         def get_set_attrs(self, table_name: str) -> List[str]:
             """
             Get class attributes that are sets.
@@ -94,6 +168,185 @@ class DynamoDB(DBFacade):
             else:
                 raise TypeError('Table name does not correspond to anything')
 
+    # Constants of the tables, set by subclasses
+    CONST: Const
+
+    def request_consumed_capacity(self,
+                                  params: Dict[str, Any],
+                                  model: Any,
+                                  **kwargs):
+        """
+        Ask for the total capacity consumed by a request, if it can tell.
+
+        Called by botocore before every request.
+
+        :param params: parameters of the request
+        :param model: model of the operation requested
+        """
+        if 'ReturnConsumedCapacity' in model.input_shape.members:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+    def count_consumed_capacity(self,
+                                parsed: Dict[str, Any],
+                                model: Any,
+                                **kwargs):
+        """
+        Add the capacity consumed by a request to the current trace.
+
+        Called by botocore after every request. Capacity is counted in
+        ``Read Capacity Units`` or ``Write Capacity Units``, depending on
+        the operation (see :mod:`utils.tracing`).
+
+        :param parsed: parsed response
+        :param model: model of the operation requested
+        """
+        consumed = parsed.get('ConsumedCapacity')
+        if not consumed:
+            return
+        if isinstance(consumed, dict):
+            # Batch operations report the capacity consumed on each table
+            consumed = [consumed]
+        units = sum(c.get('CapacityUnits', 0) for c in consumed)
+        if model.name in self.READ_OPERATIONS:
+            tracing.count('Read Capacity Units', units)
+        else:
+            tracing.count('Write Capacity Units', units)
+
+    def strip(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Remove the attributes that are not part of the model."""
+        return {attr: v for attr, v in item.items()
+                if attr not in (self.VERSION_ATTR, self.SORT_PARTITION_ATTR)}
+
+    def snapshot(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy the sets of an item, so that changes to a model spare it."""
+        return {attr: set(v) if isinstance(v, set) else v
+                for attr, v in item.items()}
+
+    def load(self,
+             Model: Type[T],
+             item: Dict[str, Any],
+             fields: Optional[List[str]] = None) -> T:
+        """
+        Convert a read item into a model, remembering the item.
+
+        The item is kept in the model so that :meth:`store` knows what the
+        model was read as. Models read with ``fields`` are never stored, so
+        they do not keep it.
+
+        :param Model: type of the model read
+        :param item: the item read
+        :param fields: the attributes read, if not all of them
+        :return: the model
+        """
+        if fields is not None:
+            return Model.from_dict(item, trusted=True)
+        # The sets of the item must not be shared with the model, since they
+        # would change with it
+        model = Model.from_dict(item, trusted=Model is not Team)
+        model._stored = item
+        return model
+
+    def projection(self,
+                   table_name: str,
+                   fields: Optional[List[str]]) -> Dict[str, Any]:
+        """
+        Build the request arguments to only read ``fields``.
+
+        Attribute names go through placeholders, since some of them (like
+        ``name``) are reserved words in DynamoDB.
+
+        :param table_name: name of the table being read
+        :param fields: attributes to read, or ``None`` to read everything
+        :return: arguments to add to the request
+        """
+        if fields is None:
+            return {}
+        attrs = sorted(set(fields) | {self.CONST.get_key(table_name)})
+        names = {f'#p{i}': attr for i, attr in enumerate(attrs)}
+        return {
+            'ProjectionExpression': ', '.join(names),
+            'ExpressionAttributeNames': names
+        }
+
+    def versioned_put(self,
+                      table_name: str,
+                      ours: Dict[str, Any],
+                      base: Optional[Dict[str, Any]],
+                      theirs: Optional[Dict[str, Any]]) \
+            -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Build the item to put, and the condition it is put on.
+
+        The item is ``ours`` with the next version, merged with ``theirs`` if
+        the item changed since it was read as ``base`` (see
+        :func:`merge_items`). It is only put if it is still at the version
+        it was last read at.
+
+        :param table_name: name of the table to put the item in
+        :param ours: the model being stored, as a dict
+        :param base: the item the model was read as, if it was read
+        :param theirs: the item last read, if it exists
+        :return: the item, and the other arguments of the request
+        """
+        key = self.CONST.get_key(table_name)
+        if base is None or theirs is None or theirs is base:
+            d = dict(ours)
+        else:
+            d = merge_items(self.strip(base), ours, self.strip(theirs),
+                            self.CONST.get_set_attrs(table_name))
+        if self.CONST.get_sorted_attrs(table_name):
+            d[self.SORT_PARTITION_ATTR] = self.SORT_PARTITION
+
+        names = {}
+        values = {}
+        if theirs is None:
+            d[self.VERSION_ATTR] = 1
+            names['#key'] = key
+            cond = 'attribute_not_exists(#key)'
+        elif self.VERSION_ATTR in theirs:
+            d[self.VERSION_ATTR] = theirs[self.VERSION_ATTR] + 1
+            names['#v'] = self.VERSION_ATTR
+            values[':v'] = theirs[self.VERSION_ATTR]
+            cond = '#v = :v'
+        else:
+            # Stored before items had versions
+            d[self.VERSION_ATTR] = 1
+            names['#key'] = key
+            names['#v'] = self.VERSION_ATTR
+            cond = 'attribute_exists(#key) AND attribute_not_exists(#v)'
+
+        kwargs: Dict[str, Any] = {'ConditionExpression': cond,
+                                  'ExpressionAttributeNames': names}
+        if values:
+            kwargs['ExpressionAttributeValues'] = values
+        return d, kwargs
+
+    def stored(self, obj: T, item: Dict[str, Any]):
+        """
+        Update a model once it is stored as ``item``.
+
+        :param obj: the model stored
+        :param item: the item put, possibly merged with concurrent changes
+        """
+        Model = obj.__class__
+        if self.strip(item) != Model.to_dict(obj):
+            # Let the object see the changes it was merged with
+            merged = Model.from_dict(self.strip(item))
+            for attr in Model.__slots__:
+                setattr(obj, attr, getattr(merged, attr))
+        obj._stored = self.snapshot(item)
+
+
+@trace_methods('db', DBFacade.__abstractmethods__)  # type: ignore
+class DynamoDB(DynamoItems, DBFacade):
+    """
+    Handles calls to database through API.
+
+    Please do not use this class, and instead use :class:`db.facade.DBFacade`.
+    This class only works on DynamoDB, and should not be used outside of the
+    facade class.
+    """
+
     def __init__(self, config: Config):
         """
         Initialize facade using DynamoDB settings.
@@ -116,6 +369,11 @@ class DynamoDB(DBFacade):
         self.users_table = config.aws_users_tablename
         self.teams_table = config.aws_teams_tablename
         self.CONST = DynamoDB.Const(config)
+        self.on_demand = config.aws_billing_mode == 'PAY_PER_REQUEST'
+        self.throughput = {
+            'ReadCapacityUnits': int(config.aws_read_capacity),
+            'WriteCapacityUnits': int(config.aws_write_capacity)
+        }
 
         if config.aws_local:
             logging.info("Connecting to local DynamoDb")
@@ -134,16 +392,32 @@ class DynamoDB(DBFacade):
                                       aws_access_key_id=access_key_id,
                                       aws_secret_access_key=secret_access_key)
 
-        # Check for missing tables
+        # Have every request report the capacity it consumed
+        events = self.ddb.meta.client.meta.events
+        events.register('provide-client-params.dynamodb.*',
+                        self.request_consumed_capacity)
+        events.register('after-call.dynamodb.*',
+                        self.count_consumed_capacity)
+
+        # Check for missing tables. Every server process does so when it
+        # starts, so others may be creating them at the same time
         if not self.check_valid_table(self.users_table):
             self.__create_table(self.users_table)
         if not self.check_valid_table(self.teams_table):
             self.__create_table(self.teams_table)
 
+        # Check for missing indexes
+        for table_name in [self.users_table, self.teams_table]:
+            for attr in self.CONST.get_sorted_attrs(table_name):
+                if not self.check_valid_index(table_name, attr):
+                    self.__create_sorted_index(table_name, attr)
+
     def __create_table(self, table_name: str, key_type: str = 'S'):
         """
         Create a table.
 
+        If another process created it first, it is left as is.
+
         **Note**: This function should **not** be called externally, and should
         only be called on initialization.
 
@@ -153,25 +427,135 @@ class DynamoDB(DBFacade):
         """
         logging.info(f"Creating table '{table_name}'")
         primary_key = self.CONST.get_key(table_name)
-        self.ddb.create_table(
-            TableName=table_name,
-            AttributeDefinitions=[
+        sorted_attrs = self.CONST.get_sorted_attrs(table_name)
+        attr_defs = [
+            {
+                'AttributeName': primary_key,
+                'AttributeType': key_type
+            },
+        ]
+        kwargs: Dict[str, Any] = {}
+        if self.on_demand:
+            kwargs['BillingMode'] = 'PAY_PER_REQUEST'
+        else:
+            kwargs['ProvisionedThroughput'] = self.throughput
+        if sorted_attrs:
+            attr_defs.extend(self.sorted_index_attr_defs(sorted_attrs))
+            kwargs['GlobalSecondaryIndexes'] = \
+                [self.sorted_index(attr, self.on_demand)
+                 for attr in sorted_attrs]
+        try:
+            self.ddb.create_table(
+                TableName=table_name,
+                AttributeDefinitions=attr_defs,
+                KeySchema=[
+                    {
+                        'AttributeName': primary_key,
+                        'KeyType': 'HASH'
+                    },
+                ],
+                **kwargs
+            )
+        except self.ddb.meta.client.exceptions.ResourceInUseException:
+            logging.info(f"Table '{table_name}' was created by another "
+                         "process")
+
+    def __create_sorted_index(self, table_name: str, attr: str):
+        """
+        Add the index sorting by ``attr`` to an existing table.
+
+        Items stored before the index existed lack the partition attribute
+        of the index, so it is added to all of them. If another process added
+        the index first, it is left to that process to do so.
+
+        **Note**: This function should **not** be called externally, and should
+        only be called on initialization.
+
+        :param table_name: name of the table to add the index to
+        :param attr: numeric attribute to sort by
+        """
+        logging.info(f"Creating index '{self.CONST.get_index_name(attr)}' "
+                     f"on table '{table_name}'")
+        table = self.ddb.Table(table_name)
+        # Indexes of on-demand tables cannot have provisioned throughput,
+        # whatever the billing mode tables are created with
+        billing = table.billing_mode_summary or {}
+        on_demand = billing.get('BillingMode') == 'PAY_PER_REQUEST'
+        try:
+            table.update(
+                AttributeDefinitions=self.sorted_index_attr_defs([attr]),
+                GlobalSecondaryIndexUpdates=[
+                    {'Create': self.sorted_index(attr, on_demand)}
+                ]
+            )
+        except ClientError:
+            if not self.check_valid_index(table_name, attr):
+                raise
+            logging.info(f"Index '{self.CONST.get_index_name(attr)}' was "
+                         "created by another process")
+            return
+
+        key = self.CONST.get_key(table_name)
+        scan_args = {'ProjectionExpression': '#k',
+                     'ExpressionAttributeNames': {'#k': key}}
+        while True:
+            resp = table.scan(**scan_args)
+            for item in resp['Items']:
+                table.update_item(
+                    Key={key: item[key]},
+                    UpdateExpression='SET #p = :p',
+                    ExpressionAttributeNames={'#p': self.SORT_PARTITION_ATTR},
+                    ExpressionAttributeValues={':p': self.SORT_PARTITION})
+            if 'LastEvaluatedKey' not in resp:
+                break
+            scan_args['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+
+    def sorted_index_attr_defs(self,
+                               attrs: List[str]) -> List[Dict[str, str]]:
+        """Get the attribute definitions needed by sorted indexes."""
+        return [{'AttributeName': self.SORT_PARTITION_ATTR,
+                 'AttributeType': 'S'}] + \
+            [{'AttributeName': attr, 'AttributeType': 'N'} for attr in attrs]
+
+    def sorted_index(self,
+                     attr: str,
+                     on_demand: bool = False) -> Dict[str, Any]:
+        """
+        Get the definition of the index sorting items by ``attr``.
+
+        :param attr: numeric attribute to sort by
+        :param on_demand: whether the table of the index is billed on demand
+        :return: definition of the index
+        """
+        index: Dict[str, Any] = {
+            'IndexName': self.CONST.get_index_name(attr),
+            'KeySchema': [
                 {
-                    'AttributeName': primary_key,
-                    'AttributeType': key_type
+                    'AttributeName': self.SORT_PARTITION_ATTR,
+                    'KeyType': 'HASH'
                 },
-            ],
-            KeySchema=[
                 {
-                    'AttributeName': primary_key,
-                    'KeyType': 'HASH'
+                    'AttributeName': attr,
+                    'KeyType': 'RANGE'
                 },
             ],
-            ProvisionedThroughput={
-                'ReadCapacityUnits': 1,
-                'WriteCapacityUnits': 1
-            }
-        )
+            'Projection': {'ProjectionType': 'ALL'}
+        }
+        if not on_demand:
+            index['ProvisionedThroughput'] = self.throughput
+        return index
+
+    def check_valid_index(self, table_name: str, attr: str) -> bool:
+        """
+        Check if the index sorting ``table_name`` by ``attr`` exists.
+
+        :param table_name: table identifier
+        :param attr: sorted attribute
+        :return: true if the index exists (even if it is still being built)
+        """
+        indexes = self.ddb.Table(table_name).global_secondary_indexes or []
+        return any(i['IndexName'] == self.CONST.get_index_name(attr)
+                   for i in indexes)
 
     def check_valid_table(self, table_name: str) -> bool:
         """
@@ -185,45 +569,197 @@ class DynamoDB(DBFacade):
                        existing_tables))
 
     def store(self, obj: T) -> bool:
+        """
+        Store object into the correct table.
+
+        Writes are conditional on the version of the item, so that they never
+        undo a concurrent write. If the item changed since ``obj`` was read,
+        it is read again, and the changes made to ``obj`` are merged into it
+        (see :func:`merge_items`) before trying again. Objects that were not
+        read from the database overwrite the item, like before versioning.
+
+        :param obj: Object to store in database
+        :return: True if object was stored, and false if it is invalid or
+                 could not be stored despite retrying
+        """
         Model = obj.__class__
         if Model not in [User, Team]:
             logging.error(f"Cannot store object {str(obj)}")
             raise RuntimeError(f'Cannot store object{str(obj)}')
 
         # Check if object is valid
-        if Model.is_valid(obj):
-            table_name = self.CONST.get_table_name(Model)
-            table = self.ddb.Table(table_name)
-            d = Model.to_dict(obj)
+        if not Model.is_valid(obj):
+            return False
 
-            logging.info(f"Storing obj {obj} in table {table_name}")
-            table.put_item(Item=d)
+        table_name = self.CONST.get_table_name(Model)
+        table = self.ddb.Table(table_name)
+        key = self.CONST.get_key(table_name)
+        ours = Model.to_dict(obj)
+        base = getattr(obj, '_stored', None)
+        theirs = base
+        logging.info(f"Storing obj {obj} in table {table_name}")
+        for _ in range(self.STORE_ATTEMPTS):
+            d, kwargs = self.versioned_put(table_name, ours, base, theirs)
+            try:
+                table.put_item(Item=d, **kwargs)
+            except self.ddb.meta.client.exceptions.\
+                    ConditionalCheckFailedException:
+                logging.info(f"{Model.__name__}(id={ours[key]}) changed "
+                             "while storing, merging")
+                resp = table.get_item(Key={key: ours[key]},
+                                      ConsistentRead=True)
+                theirs = resp.get('Item')
+                continue
+            self.stored(obj, d)
             return True
+
+        logging.error(f"Could not store {Model.__name__}(id={ours[key]}) "
+                      f"after {self.STORE_ATTEMPTS} attempts")
         return False
 
-    def retrieve(self, Model: Type[T], k: str) -> T:
+    def update_fields(self,
+                      Model: Type[T],
+                      k: str,
+                      fields: Dict[str, Any]) -> T:
+        if len(fields) == 0:
+            return self.retrieve(Model, k)
+
+        names = {}
+        values = {}
+        updates = []
+        removals = []
+        for i, (field, v) in enumerate(fields.items()):
+            names[f'#f{i}'] = field
+            if v:
+                values[f':v{i}'] = v
+                updates.append(f'#f{i} = :v{i}')
+            else:
+                removals.append(f'#f{i}')
+        return self.update(Model, k,
+                           {'SET': updates, 'REMOVE': removals},
+                           names, values)
+
+    def update_sets(self,
+                    Model: Type[T],
+                    k: str,
+                    add: Dict[str, Set[str]] = {},
+                    remove: Dict[str, Set[str]] = {}) -> T:
+        set_attrs = self.CONST.get_set_attrs(self.CONST.get_table_name(Model))
+        for field in add.keys() | remove.keys():
+            if field not in set_attrs:
+                raise RuntimeError(f'{Model.__name__} attribute {field} '
+                                   'is not a set')
+
+        # DynamoDB has no empty sets
+        add = {field: v for field, v in add.items() if v}
+        remove = {field: v for field, v in remove.items() if v}
+        if not add and not remove:
+            return self.retrieve(Model, k)
+        if add.keys() & remove.keys():
+            # An update expression can only use an attribute once
+            self.update_sets(Model, k, add=add)
+            return self.update_sets(Model, k, remove=remove)
+
+        names: Dict[str, str] = {}
+        values: Dict[str, Any] = {}
+        clauses: Dict[str, List[str]] = {'ADD': [], 'DELETE': []}
+        for op, sets in [('ADD', add), ('DELETE', remove)]:
+            for field, v in sets.items():
+                i = len(names)
+                names[f'#f{i}'] = field
+                values[f':v{i}'] = set(v)
+                clauses[op].append(f'#f{i} :v{i}')
+        return self.update(Model, k, clauses, names, values)
+
+    def increment(self,
+                  Model: Type[T],
+                  k: str,
+                  field: str,
+                  amount: int = 1) -> T:
+        # ``ADD`` would count a missing attribute as 0 instead of its default
+        return self.update(
+            Model, k, {'SET': ['#f = if_not_exists(#f, :default) + :amount']},
+            {'#f': field},
+            {':default': get_field_default(Model, field), ':amount': amount})
+
+    def update(self,
+               Model: Type[T],
+               k: str,
+               clauses: Dict[str, List[str]],
+               names: Dict[str, str],
+               values: Dict[str, Any]) -> T:
+        """
+        Apply an update expression to an existing item, in a single write.
+
+        The version of the item is incremented as well, so that models read
+        before the update cannot be stored without merging it.
+
+        :param Model: type of the model to update
+        :param k: key (or ID) of the item to update
+        :param clauses: actions of the ``UpdateExpression``, by clause (like
+                        ``SET`` or ``ADD``)
+        :param names: placeholders for attribute names used in ``clauses``
+        :param values: placeholders for values used in ``clauses``
+        :raises: LookupError if the item does not exist
+        :return: the model, after the update
+        """
+        table_name = self.CONST.get_table_name(Model)
+        table = self.ddb.Table(table_name)
+        key = self.CONST.get_key(table_name)
+        clauses = {**clauses,
+                   'ADD': clauses.get('ADD', []) + ['#version :one']}
+        expr = ' '.join(f'{clause} ' + ', '.join(actions)
+                        for clause, actions in clauses.items() if actions)
+        logging.info(f"Updating {Model.__name__}(id={k}): {expr}")
+        try:
+            resp = table.update_item(
+                Key={key: k},
+                UpdateExpression=expr,
+                ConditionExpression='attribute_exists(#key)',
+                ExpressionAttributeNames={'#key': key,
+                                          '#version': self.VERSION_ATTR,
+                                          **names},
+                ExpressionAttributeValues={':one': 1, **values},
+                ReturnValues='ALL_NEW'
+            )
+        except self.ddb.meta.client.exceptions.\
+                ConditionalCheckFailedException:
+            err_msg = f'{Model.__name__}(id={k}) not found'
+            logging.info(err_msg)
+            raise LookupError(err_msg)
+        return self.load(Model, resp['Attributes'])
+
+    def retrieve(self,
+                 Model: Type[T],
+                 k: str,
+                 fields: Optional[List[str]] = None) -> T:
         table_name = self.CONST.get_table_name(Model)
         table = self.ddb.Table(table_name)
         resp = table.get_item(
             TableName=table_name,
             Key={
                 self.CONST.get_key(table_name): k
-            }
+            },
+            **self.projection(table_name, fields)
         )
 
         if 'Item' in resp.keys():
-            return Model.from_dict(resp['Item'])
+            return self.load(Model, resp['Item'], fields)
         else:
             err_msg = f'{Model.__name__}(id={k}) not found'
             logging.info(err_msg)
             raise LookupError(err_msg)
 
-    def bulk_retrieve(self, Model: Type[T], ks: List[str]) -> List[T]:
+    def bulk_retrieve(self,
+                      Model: Type[T],
+                      ks: List[str],
+                      fields: Optional[List[str]] = None) -> List[T]:
         table_name = self.CONST.get_table_name(Model)
         resp = self.ddb.batch_get_item(
             RequestItems={
                 table_name: {
-                    'Keys': [{self.CONST.get_key(table_name): k} for k in ks]
+                    'Keys': [{self.CONST.get_key(table_name): k} for k in ks],
+                    **self.projection(table_name, fields)
                 }
             }
         )
@@ -232,15 +768,17 @@ class DynamoDB(DBFacade):
             return []
 
         resp_models = resp['Responses'].get(table_name, [])
-        return list(map(Model.from_dict, resp_models))
+        return [self.load(Model, d, fields) for d in resp_models]
 
     def query(self,
               Model: Type[T],
-              params: List[Tuple[str, str]] = []) -> List[T]:
+              params: List[Tuple[str, str]] = [],
+              fields: Optional[List[str]] = None) -> List[T]:
 
         table_name = self.CONST.get_table_name(Model)
         table = self.ddb.Table(table_name)
         set_attrs = self.CONST.get_set_attrs(table_name)
+        projection = self.projection(table_name, fields)
         if len(params) > 0:
             def f(x):
                 if x[0] in set_attrs:
@@ -249,20 +787,22 @@ class DynamoDB(DBFacade):
                     return Attr(x[0]).eq(x[1])
 
             filter_expr = reduce(lambda a, x: a & x, map(f, params))
-            resp = table.scan(FilterExpression=filter_expr)
+            resp = table.scan(FilterExpression=filter_expr, **projection)
         else:
-            resp = table.scan()
+            resp = table.scan(**projection)
 
-        return list(map(Model.from_dict, resp['Items']))
+        return [self.load(Model, d, fields) for d in resp['Items']]
 
     @fragment(100)
     def query_or(self,
                  Model: Type[T],
-                 params: List[Tuple[str, str]] = []) -> List[T]:
+                 params: List[Tuple[str, str]] = [],
+                 fields: Optional[List[str]] = None) -> List[T]:
 
         table_name = self.CONST.get_table_name(Model)
         table = self.ddb.Table(table_name)
         set_attrs = self.CONST.get_set_attrs(table_name)
+        projection = self.projection(table_name, fields)
         if len(params) > 0:
             def f(x):
                 if x[0] in set_attrs:
@@ -271,11 +811,40 @@ class DynamoDB(DBFacade):
                     return Attr(x[0]).eq(x[1])
 
             filter_expr = reduce(lambda a, x: a | x, map(f, params))
-            resp = table.scan(FilterExpression=filter_expr)
+            resp = table.scan(FilterExpression=filter_expr, **projection)
         else:
-            resp = table.scan()
+            resp = table.scan(**projection)
+
+        return [self.load(Model, d, fields) for d in resp['Items']]
 
-        return list(map(Model.from_dict, resp['Items']))
+    def top(self,
+            Model: Type[T],
+            field: str,
+            n: int,
+            fields: Optional[List[str]] = None) -> List[T]:
+        table_name = self.CONST.get_table_name(Model)
+        if field not in self.CONST.get_sorted_attrs(table_name):
+            raise RuntimeError(f'{Model.__name__} attribute {field} '
+                               'is not kept sorted')
+
+        table = self.ddb.Table(table_name)
+        try:
+            resp = table.query(
+                IndexName=self.CONST.get_index_name(field),
+                KeyConditionExpression=Key(self.SORT_PARTITION_ATTR)
+                .eq(self.SORT_PARTITION),
+                ScanIndexForward=False,
+                Limit=n,
+                **self.projection(table_name, fields))
+        except ClientError as e:
+            # The index cannot be queried until it is done being built
+            logging.warning(f'Could not query index of {field}, '
+                            f'scanning instead: {e}')
+            models = self.query(
+                Model, fields=None if fields is None else fields + [field])
+            return sorted(models, key=lambda m: Model.to_dict(m).get(field, 0),
+                          reverse=True)[:n]
+        return [self.load(Model, d, fields) for d in resp['Items']]
 
     def delete(self, Model: Type[T], k: str):
         logging.info(f"Deleting {Model.__name__}(id={k})")
@@ -0,0 +1,270 @@
+import asyncio
+import logging
+
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from app.model import User, Team
+from boto3.dynamodb.conditions import Attr, ConditionBase, \
+    ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from contextlib import AsyncExitStack
+from functools import reduce
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+from config import Config
+from db.dynamodb import DynamoItems
+from db.facade_async import AsyncDBFacade
+from utils.tracing import trace_methods
+
+T = TypeVar('T', User, Team)
+
+
+@trace_methods('db', AsyncDBFacade.__abstractmethods__)  # type: ignore
+class AsyncDynamoDB(DynamoItems, AsyncDBFacade):
+    """
+    Handles calls to DynamoDB on the event loop, through aiobotocore.
+
+    Reads and writes the same items as :class:`db.dynamodb.DynamoDB`, which
+    must have created the tables first: this class never creates them.
+
+    The client is created on first use, on the loop using it, and must be
+    closed with :meth:`aclose` on that same loop.
+    """
+
+    # Requests sent at once, over as many connections
+    MAX_CONNECTIONS = 50
+
+    def __init__(self, config: Config):
+        """
+        Initialize facade using DynamoDB settings.
+
+        :param config: configuration used to initialize
+        """
+        self.CONST = DynamoItems.Const(config)
+        self.config = config
+        self.serializer = TypeSerializer()
+        self.deserializer = TypeDeserializer()
+        self.exit_stack = AsyncExitStack()
+        self.client: Any = None
+        # Created on the loop, when first needed
+        self.lock: Optional[asyncio.Lock] = None
+
+    async def get_client(self) -> Any:
+        """Get the aiobotocore client, creating it if needed."""
+        if self.client is not None:
+            return self.client
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if self.client is None:
+                self.client = await self.create_client()
+        return self.client
+
+    async def create_client(self) -> Any:
+        """Create the aiobotocore client, closed by :meth:`aclose`."""
+        config = self.config
+        if config.aws_local:
+            logging.info("Connecting to local DynamoDb (async)")
+            kwargs = {'region_name': '',
+                      'aws_access_key_id': '',
+                      'aws_secret_access_key': '',
+                      'endpoint_url': 'http://localhost:8000'}
+        else:
+            logging.info("Connecting to remote DynamoDb (async)")
+            kwargs = {'region_name': config.aws_region,
+                      'aws_access_key_id': config.aws_access_keyid,
+                      'aws_secret_access_key': config.aws_secret_key}
+        client = await self.exit_stack.enter_async_context(
+            get_session().create_client(
+                'dynamodb',
+                config=AioConfig(max_pool_connections=self.MAX_CONNECTIONS),
+                **kwargs))
+
+        # Have every request report the capacity it consumed
+        events = client.meta.events
+        events.register('provide-client-params.dynamodb.*',
+                        self.request_consumed_capacity)
+        events.register('after-call.dynamodb.*',
+                        self.count_consumed_capacity)
+        return client
+
+    async def aclose(self):
+        """Close the client, if it was created."""
+        self.client = None
+        await self.exit_stack.aclose()
+
+    def serialize(self, d: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert Python values to DynamoDB attribute values."""
+        return {k: self.serializer.serialize(v) for k, v in d.items()}
+
+    def deserialize(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert DynamoDB attribute values to Python values."""
+        return {k: self.deserializer.deserialize(v) for k, v in item.items()}
+
+    def scan_args(self,
+                  table_name: str,
+                  params: List[Tuple[str, str]],
+                  fields: Optional[List[str]],
+                  any_param: bool) -> Dict[str, Any]:
+        """
+        Build the arguments of a scan matching ``params``.
+
+        :param table_name: name of the table to scan
+        :param params: list of tuples to match
+        :param fields: if given, only read these attributes
+        :param any_param: match items having one of the attributes, instead
+                          of all of them
+        :return: arguments of the scan
+        """
+        kwargs: Dict[str, Any] = {'TableName': table_name,
+                                  **self.projection(table_name, fields)}
+        if len(params) == 0:
+            return kwargs
+        set_attrs = self.CONST.get_set_attrs(table_name)
+
+        def f(x: Tuple[str, str]) -> ConditionBase:
+            if x[0] in set_attrs:
+                return Attr(x[0]).contains(x[1])
+            else:
+                return Attr(x[0]).eq(x[1])
+
+        filter_expr = reduce(lambda a, x: a | x if any_param else a & x,
+                             map(f, params))
+        expr = ConditionExpressionBuilder().build_expression(filter_expr)
+        kwargs['FilterExpression'] = expr.condition_expression
+        kwargs['ExpressionAttributeNames'] = {
+            **kwargs.get('ExpressionAttributeNames', {}),
+            **expr.attribute_name_placeholders}
+        kwargs['ExpressionAttributeValues'] = \
+            self.serialize(expr.attribute_value_placeholders)
+        return kwargs
+
+    async def store(self, obj: T) -> bool:
+        """
+        Store object into the correct table.
+
+        Like :meth:`db.dynamodb.DynamoDB.store`, writes never undo concurrent
+        writes, and are merged with them instead.
+
+        :param obj: Object to store in database
+        :return: True if object was stored, and false if it is invalid or
+                 could not be stored despite retrying
+        """
+        Model = obj.__class__
+        if Model not in [User, Team]:
+            logging.error(f"Cannot store object {str(obj)}")
+            raise RuntimeError(f'Cannot store object{str(obj)}')
+
+        # Check if object is valid
+        if not Model.is_valid(obj):
+            return False
+
+        client = await self.get_client()
+        table_name = self.CONST.get_table_name(Model)
+        key = self.CONST.get_key(table_name)
+        ours = Model.to_dict(obj)
+        base = getattr(obj, '_stored', None)
+        theirs = base
+        logging.info(f"Storing obj {obj} in table {table_name}")
+        for _ in range(self.STORE_ATTEMPTS):
+            d, kwargs = self.versioned_put(table_name, ours, base, theirs)
+            if 'ExpressionAttributeValues' in kwargs:
+                kwargs['ExpressionAttributeValues'] = \
+                    self.serialize(kwargs['ExpressionAttributeValues'])
+            try:
+                await client.put_item(TableName=table_name,
+                                      Item=self.serialize(d),
+                                      **kwargs)
+            except client.exceptions.ConditionalCheckFailedException:
+                logging.info(f"{Model.__name__}(id={ours[key]}) changed "
+                             "while storing, merging")
+                resp = await client.get_item(
+                    TableName=table_name,
+                    Key=self.serialize({key: ours[key]}),
+                    ConsistentRead=True)
+                theirs = self.deserialize(resp['Item']) \
+                    if 'Item' in resp else None
+                continue
+            self.stored(obj, d)
+            return True
+
+        logging.error(f"Could not store {Model.__name__}(id={ours[key]}) "
+                      f"after {self.STORE_ATTEMPTS} attempts")
+        return False
+
+    async def retrieve(self,
+                       Model: Type[T],
+                       k: str,
+                       fields: Optional[List[str]] = None) -> T:
+        client = await self.get_client()
+        table_name = self.CONST.get_table_name(Model)
+        resp = await client.get_item(
+            TableName=table_name,
+            Key=self.serialize({self.CONST.get_key(table_name): k}),
+            **self.projection(table_name, fields)
+        )
+
+        if 'Item' in resp.keys():
+            return self.load(Model, self.deserialize(resp['Item']), fields)
+        else:
+            err_msg = f'{Model.__name__}(id={k}) not found'
+            logging.info(err_msg)
+            raise LookupError(err_msg)
+
+    async def bulk_retrieve(self,
+                            Model: Type[T],
+                            ks: List[str],
+                            fields: Optional[List[str]] = None) -> List[T]:
+        client = await self.get_client()
+        table_name = self.CONST.get_table_name(Model)
+        key = self.CONST.get_key(table_name)
+        resp = await client.batch_get_item(
+            RequestItems={
+                table_name: {
+                    'Keys': [self.serialize({key: k}) for k in ks],
+                    **self.projection(table_name, fields)
+                }
+            }
+        )
+
+        if 'Responses' not in resp:
+            return []
+
+        resp_models = resp['Responses'].get(table_name, [])
+        return [self.load(Model, self.deserialize(d), fields)
+                for d in resp_models]
+
+    async def query(self,
+                    Model: Type[T],
+                    params: List[Tuple[str, str]] = [],
+                    fields: Optional[List[str]] = None) -> List[T]:
+        client = await self.get_client()
+        table_name = self.CONST.get_table_name(Model)
+        resp = await client.scan(
+            **self.scan_args(table_name, params, fields, any_param=False))
+        return [self.load(Model, self.deserialize(d), fields)
+                for d in resp['Items']]
+
+    async def query_or(self,
+                       Model: Type[T],
+                       params: List[Tuple[str, str]] = [],
+                       fields: Optional[List[str]] = None) -> List[T]:
+        client = await self.get_client()
+        table_name = self.CONST.get_table_name(Model)
+        results: List[T] = []
+        # Like :func:`db.dynamodb.fragment`, to keep filters small enough
+        chunks = [params[i: i + 100] for i in range(0, len(params), 100)]
+        for chunk in chunks or [[]]:
+            resp = await client.scan(
+                **self.scan_args(table_name, chunk, fields, any_param=True))
+            results.extend(self.load(Model, self.deserialize(d), fields)
+                           for d in resp['Items'])
+        return results
+
+    async def delete(self, Model: Type[T], k: str):
+        logging.info(f"Deleting {Model.__name__}(id={k})")
+        client = await self.get_client()
+        table_name = self.CONST.get_table_name(Model)
+        await client.delete_item(
+            TableName=table_name,
+            Key=self.serialize({self.CONST.get_key(table_name): k})
+        )
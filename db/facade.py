@@ -1,6 +1,6 @@
 """Database Facade."""
 from app.model import User, Team
-from typing import List, Tuple, TypeVar, Type
+from typing import Any, Dict, List, Optional, Set, Tuple, TypeVar, Type
 from abc import ABC, abstractmethod
 
 T = TypeVar('T', User, Team)
@@ -14,6 +14,16 @@ class DBFacade(ABC):
     or Postgres are also being considered. Please use this class instead of
     ``db/dynamodb.py``, because we might change the databases, but the facade
     would stay the same.
+
+    Reads can be narrowed down to a few attributes by passing ``fields``, a
+    list of attribute names as they are stored (see
+    :meth:`app.model.User.to_dict`)::
+
+        users = ddb.query(User, fields=['slack_id', 'email'])
+
+    The primary key is always read. Every other attribute of the returned
+    models is left at its default value, so **models read with** ``fields``
+    **must never be stored**; retrieve the full model first instead.
     """
 
     @abstractmethod
@@ -30,19 +40,109 @@ class DBFacade(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def retrieve(self, Model: Type[T], k: str) -> T:
+    def update_fields(self,
+                      Model: Type[T],
+                      k: str,
+                      fields: Dict[str, Any]) -> T:
+        """
+        Update some attributes of a stored model, leaving the others as is.
+
+        Unlike retrieving a model, modifying it and storing it back, this is a
+        single write that cannot undo a concurrent update of other attributes.
+
+        Attributes are given as they are stored (see
+        :meth:`app.model.User.to_dict`), e.g. ``{'permission_level':
+        'admin'}``. Like with :meth:`store`, empty values remove the
+        attribute, so that it reads back as its default.
+
+        :param Model: type of the model to update
+        :param k: key (or ID) of the model to update
+        :param fields: new values of the attributes to update
+        :raises: LookupError if key is not found
+        :return: the model, after the update
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_sets(self,
+                    Model: Type[T],
+                    k: str,
+                    add: Dict[str, Set[str]] = {},
+                    remove: Dict[str, Set[str]] = {}) -> T:
+        """
+        Add and remove elements of set attributes of a stored model.
+
+        Use this instead of storing the whole model to change team membership:
+        concurrent changes to the same set, like two users being added at
+        once, are never lost.
+
+        Example::
+
+            team = ddb.update_sets(Team, '12345',
+                                   add={'members': {'abc123'}},
+                                   remove={'team_leads': {'abc123'}})
+
+        Elements are added before others are removed, so elements both added
+        and removed end up removed. Adding elements already in a set, or
+        removing elements not in it, does nothing.
+
+        :param Model: type of the model to update
+        :param k: key (or ID) of the model to update
+        :param add: elements to add, by stored name of the set attribute
+        :param remove: elements to remove, by stored name of the set attribute
+        :raises: LookupError if key is not found
+        :raises: RuntimeError if an attribute is not a set
+        :return: the model, after the update
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def increment(self,
+                  Model: Type[T],
+                  k: str,
+                  field: str,
+                  amount: int = 1) -> T:
+        """
+        Atomically add to a numeric attribute of a stored model.
+
+        Concurrent increments of the same attribute are never lost. If the
+        attribute is missing, ``amount`` is added to its default value (see
+        :func:`db.utils.get_field_default`).
+
+        Example::
+
+            user = ddb.increment(User, 'U12345', 'karma')
+
+        :param Model: type of the model to update
+        :param k: key (or ID) of the model to update
+        :param field: stored name of the attribute to add to
+        :param amount: how much to add (can be negative)
+        :raises: LookupError if key is not found
+        :return: the model, after the update
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def retrieve(self,
+                 Model: Type[T],
+                 k: str,
+                 fields: Optional[List[str]] = None) -> T:
         """
         Retrieve a model from the database.
 
         :param Model: the actual class you want to retrieve
         :param k: retrieve based on this key (or ID)
+        :param fields: if given, only read these attributes
         :raises: LookupError if key is not found
         :return: a model ``Model`` if key is found
         """
         raise NotImplementedError
 
     @abstractmethod
-    def bulk_retrieve(self, Model: Type[T], ks: List[str]) -> List[T]:
+    def bulk_retrieve(self,
+                      Model: Type[T],
+                      ks: List[str],
+                      fields: Optional[List[str]] = None) -> List[T]:
         """
         Retrieve a list of models from the database.
 
@@ -51,6 +151,7 @@ class DBFacade(ABC):
 
         :param Model: the actual class you want to retrieve
         :param ks: retrieve based on this key (or ID)
+        :param fields: if given, only read these attributes
         :return: a list of models ``Model``
         """
         raise NotImplementedError
@@ -58,7 +159,8 @@ class DBFacade(ABC):
     @abstractmethod
     def query(self,
               Model: Type[T],
-              params: List[Tuple[str, str]] = []) -> List[T]:
+              params: List[Tuple[str, str]] = [],
+              fields: Optional[List[str]] = None) -> List[T]:
         """
         Query a table using a list of parameters.
 
@@ -86,6 +188,7 @@ class DBFacade(ABC):
 
         :param Model: type of list elements you'd want
         :param params: list of tuples to match
+        :param fields: if given, only read these attributes
         :return: a list of ``Model`` that fit the query parameters
         """
         raise NotImplementedError
@@ -93,7 +196,8 @@ class DBFacade(ABC):
     @abstractmethod
     def query_or(self,
                  Model: Type[T],
-                 params: List[Tuple[str, str]] = []) -> List[T]:
+                 params: List[Tuple[str, str]] = [],
+                 fields: Optional[List[str]] = None) -> List[T]:
         """
         Query a table using a list of parameters.
 
@@ -125,10 +229,38 @@ class DBFacade(ABC):
 
         :param Model: type of list elements you'd want
         :param params: list of tuples to match
+        :param fields: if given, only read these attributes
         :return: a list of ``Model`` that fit the query parameters
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def top(self,
+            Model: Type[T],
+            field: str,
+            n: int,
+            fields: Optional[List[str]] = None) -> List[T]:
+        """
+        Get the models with the largest values of a numeric attribute.
+
+        The attribute is kept sorted by the database, so this only reads the
+        ``n`` models returned, however large the table. Only ``karma`` of
+        users is guaranteed to be kept sorted. Models where the attribute is
+        not stored may be left out.
+
+        Example::
+
+            leaders = ddb.top(User, 'karma', 10)
+
+        :param Model: type of list elements you'd want
+        :param field: stored name of the attribute to sort by
+        :param n: maximum number of models to return
+        :param fields: if given, only read these attributes
+        :raises: RuntimeError if the attribute is not kept sorted
+        :return: up to ``n`` models, in decreasing order of ``field``
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def delete(self, Model: Type[T], k: str):
         """
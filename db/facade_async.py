@@ -0,0 +1,182 @@
+"""
+Asynchronous database facade.
+
+Code running on an event loop (see :mod:`app.asgi`) cannot call
+:class:`db.facade.DBFacade` without blocking the loop for every request.
+:class:`AsyncDBFacade` gives it the same API as coroutines instead, so that
+many reads can wait on the database at once::
+
+    users = await asyncio.gather(*(db.retrieve(User, k) for k in ks))
+
+Any synchronous facade can be used this way through
+:class:`ExecutorDBFacade`, which runs its calls in threads, while
+:class:`db.dynamodb_async.AsyncDynamoDB` does its I/O on the loop itself.
+"""
+import asyncio
+import contextvars
+
+from abc import ABC, abstractmethod
+from app.model import User, Team
+from concurrent.futures import Executor
+from db.facade import DBFacade
+from typing import Any, Callable, List, Optional, Tuple, Type, TypeVar
+
+T = TypeVar('T', User, Team)
+R = TypeVar('R')
+
+
+class AsyncDBFacade(ABC):
+    """
+    A database facade whose methods are coroutines.
+
+    Methods behave like those of :class:`db.facade.DBFacade` with the same
+    name; see the latter for their documentation.
+    """
+
+    @abstractmethod
+    async def store(self, obj: T) -> bool:
+        """
+        Store object into the correct table.
+
+        :param obj: Object to store in database
+        :return: True if object was stored, and false otherwise
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def retrieve(self,
+                       Model: Type[T],
+                       k: str,
+                       fields: Optional[List[str]] = None) -> T:
+        """
+        Retrieve a model from the database.
+
+        :param Model: the actual class you want to retrieve
+        :param k: retrieve based on this key (or ID)
+        :param fields: if given, only read these attributes
+        :raises: LookupError if key is not found
+        :return: a model ``Model`` if key is found
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_retrieve(self,
+                            Model: Type[T],
+                            ks: List[str],
+                            fields: Optional[List[str]] = None) -> List[T]:
+        """
+        Retrieve a list of models from the database.
+
+        Keys not found in the database will be skipped.
+
+        :param Model: the actual class you want to retrieve
+        :param ks: retrieve based on this key (or ID)
+        :param fields: if given, only read these attributes
+        :return: a list of models ``Model``
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def query(self,
+                    Model: Type[T],
+                    params: List[Tuple[str, str]] = [],
+                    fields: Optional[List[str]] = None) -> List[T]:
+        """
+        Query a table for models having **all** of the given attributes.
+
+        :param Model: type of list elements you'd want
+        :param params: list of tuples to match
+        :param fields: if given, only read these attributes
+        :return: a list of ``Model`` that fit the query parameters
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def query_or(self,
+                       Model: Type[T],
+                       params: List[Tuple[str, str]] = [],
+                       fields: Optional[List[str]] = None) -> List[T]:
+        """
+        Query a table for models having **one** of the given attributes.
+
+        :param Model: type of list elements you'd want
+        :param params: list of tuples to match
+        :param fields: if given, only read these attributes
+        :return: a list of ``Model`` that fit the query parameters
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, Model: Type[T], k: str):
+        """
+        Remove an object from a table.
+
+        :param Model: table type to remove the object from
+        :param k: ID or key of the object to remove (must be primary key)
+        """
+        raise NotImplementedError
+
+    async def aclose(self):
+        """Release the connections of the facade, if it holds any."""
+
+
+class ExecutorDBFacade(AsyncDBFacade):
+    """
+    Asynchronous stand-in for a synchronous facade.
+
+    Calls are run in the threads of an executor, so that the loop keeps
+    running while they wait on the database. Concurrency is bounded by the
+    number of threads: each call still holds one for as long as it waits.
+
+    Calls are not traced here, since the facade wrapped already is; they see
+    the trace of the coroutine awaiting them.
+    """
+
+    def __init__(self, facade: DBFacade, executor: Optional[Executor] = None):
+        """
+        Initialize the stand-in.
+
+        :param facade: the synchronous facade to call
+        :param executor: executor to call it in, or ``None`` for the default
+                         executor of the loop
+        """
+        self.facade = facade
+        self.executor = executor
+
+    async def call(self, func: Callable[..., R], *args: Any) -> R:
+        """Call a method of the facade in the executor."""
+        # Threads of the executor do not see the context of the coroutine,
+        # such as its trace, unless given a copy of it
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, lambda: context.run(func, *args))
+
+    async def store(self, obj: T) -> bool:
+        return await self.call(self.facade.store, obj)
+
+    async def retrieve(self,
+                       Model: Type[T],
+                       k: str,
+                       fields: Optional[List[str]] = None) -> T:
+        return await self.call(self.facade.retrieve, Model, k, fields)
+
+    async def bulk_retrieve(self,
+                            Model: Type[T],
+                            ks: List[str],
+                            fields: Optional[List[str]] = None) -> List[T]:
+        return await self.call(self.facade.bulk_retrieve, Model, ks, fields)
+
+    async def query(self,
+                    Model: Type[T],
+                    params: List[Tuple[str, str]] = [],
+                    fields: Optional[List[str]] = None) -> List[T]:
+        return await self.call(self.facade.query, Model, params, fields)
+
+    async def query_or(self,
+                       Model: Type[T],
+                       params: List[Tuple[str, str]] = [],
+                       fields: Optional[List[str]] = None) -> List[T]:
+        return await self.call(self.facade.query_or, Model, params, fields)
+
+    async def delete(self, Model: Type[T], k: str):
+        await self.call(self.facade.delete, Model, k)
@@ -0,0 +1,151 @@
+"""In-memory query engine for models held by in-process backends."""
+from app.model import User, Team
+from typing import Any, Dict, Generic, Iterable, List, Optional, Set, \
+    Tuple, Type, TypeVar
+
+T = TypeVar('T', User, Team)
+
+
+class ModelIndex(Generic[T]):
+    """
+    Answer :class:`db.facade.DBFacade` style queries without scanning.
+
+    Every stored attribute gets a hash index mapping each value to the set of
+    primary keys having that value. Set attributes (e.g. ``team.members``)
+    get an inverted index instead, mapping each **element** to the keys of
+    the models containing it. A query then becomes an intersection (for
+    :meth:`query`) or a union (for :meth:`query_or`) of key sets, and only
+    the matching models are ever touched.
+
+    Attributes are indexed under their database field names (as given by
+    ``Model.to_dict``), so the parameters are the same as the ones passed to
+    :meth:`db.facade.DBFacade.query`::
+
+        index = ModelIndex(Team)
+        index.add(team)
+        teams = index.query([('members', 'abc123'), ('platform', 'iOS')])
+
+    **The index is only updated through** :meth:`add` **and**
+    :meth:`remove`; mutating a model after adding it requires adding it
+    again.
+    """
+
+    def __init__(self, Model: Type[T], models: Iterable[T] = []):
+        """
+        Initialize an empty index for ``Model``.
+
+        :param Model: either ``User`` or ``Team``
+        :param models: models to add to the index right away
+        """
+        self.Model: Type[T] = Model
+        self.key_field = 'slack_id' if Model is User else 'github_team_id'
+        self.models: Dict[str, T] = {}
+        self.order: Dict[str, int] = {}
+        self.fields: Dict[str, Dict[Any, Set[str]]] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.counter = 0
+        for m in models:
+            self.add(m)
+
+    def __len__(self) -> int:
+        """Return the number of indexed models."""
+        return len(self.models)
+
+    def __contains__(self, k: object) -> bool:
+        """Return true if a model with primary key ``k`` is indexed."""
+        return k in self.models
+
+    def get(self, k: str) -> Optional[T]:
+        """Return the model with primary key ``k``, or ``None``."""
+        return self.models.get(k)
+
+    def add(self, m: T):
+        """Add ``m`` to the index, replacing any model with the same key."""
+        # Sets are copied, so that mutating the model can't desynchronize the
+        # index from what it has to unindex later
+        d: Dict[str, Any] = {
+            field: frozenset(v) if isinstance(v, set) else v
+            for field, v in self.Model.to_dict(m).items()}
+        k = d[self.key_field]
+        if k in self.models:
+            if self.entries[k] == d:
+                # Nothing the index cares about changed
+                self.models[k] = m
+                return
+            self.__unindex(k)
+        else:
+            self.order[k] = self.counter
+            self.counter += 1
+        self.models[k] = m
+        self.entries[k] = d
+        for field, v in d.items():
+            index = self.fields.setdefault(field, {})
+            for e in self.__elements(v):
+                index.setdefault(e, set()).add(k)
+
+    def remove(self, k: str) -> Optional[T]:
+        """Remove the model with primary key ``k`` and return it."""
+        if k not in self.models:
+            return None
+        self.__unindex(k)
+        del self.entries[k]
+        del self.order[k]
+        return self.models.pop(k)
+
+    def all(self) -> List[T]:
+        """Return every indexed model, in the order they were added."""
+        return list(self.models.values())
+
+    def query(self, params: List[Tuple[str, str]] = []) -> List[T]:
+        """
+        Return the models matching **all** of the parameters.
+
+        Key sets are intersected from the smallest one up, so the cost
+        depends on the most selective parameter rather than the table size.
+        """
+        if len(params) == 0:
+            return self.all()
+
+        matches = sorted((self.__lookup(field, v) for field, v in params),
+                         key=len)
+        ks = set(matches[0])
+        for s in matches[1:]:
+            if not ks:
+                break
+            ks &= s
+        return self.__models(ks)
+
+    def query_or(self, params: List[Tuple[str, str]] = []) -> List[T]:
+        """Return the models matching **any** of the parameters."""
+        if len(params) == 0:
+            return self.all()
+
+        ks: Set[str] = set()
+        for field, v in params:
+            ks |= self.__lookup(field, v)
+        return self.__models(ks)
+
+    def __lookup(self, field: str, v: Any) -> Set[str]:
+        return self.fields.get(field, {}).get(v, set())
+
+    def __models(self, ks: Set[str]) -> List[T]:
+        # Keep results in insertion order, like a scan would. Sorting a large
+        # result is slower than walking the (already ordered) models once.
+        if len(ks) > len(self.models) // 8:
+            return [m for k, m in self.models.items() if k in ks]
+        return [self.models[k] for k in sorted(ks, key=self.order.__getitem__)]
+
+    def __unindex(self, k: str):
+        for field, v in self.entries[k].items():
+            index = self.fields[field]
+            for e in self.__elements(v):
+                ks = index[e]
+                ks.discard(k)
+                if not ks:
+                    del index[e]
+
+    @staticmethod
+    def __elements(v: Any) -> Iterable[Any]:
+        if isinstance(v, (set, frozenset, list)):
+            return v
+        return (v,)
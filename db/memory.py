@@ -0,0 +1,341 @@
+from db.facade import DBFacade
+from db.index import ModelIndex
+from db.utils import get_field_default
+from utils.tracing import trace_methods
+from app.model import User, Team
+from typing import Any, TypeVar, List, Optional, Set, Type, Tuple, cast, Dict
+import heapq
+import threading
+
+T = TypeVar('T', User, Team)
+
+
+# Convert DB field names to python attribute names
+USER_ATTRS = {
+    'slack_id': 'slack_id',
+    'permission_level': 'permissions_level',
+    'email': 'email',
+    'name': 'name',
+    'github': 'github_username',
+    'github_user_id': 'github_id',
+    'major': 'major',
+    'position': 'position',
+    'bio': 'biography',
+    'image_url': 'image_url',
+    'karma': 'karma'
+}
+
+
+TEAM_ATTRS = {
+    'github_team_id': 'github_team_id',
+    'github_team_name': 'github_team_name',
+    'displayname': 'displayname',
+    'platform': 'platform',
+    'members': 'members',
+    'team_leads': 'team_leads'
+}
+
+
+def field_is_set(Model: Type[T], field: str) -> bool:
+    if Model is Team:
+        return field in ['team_leads', 'members']
+    else:
+        return False
+
+
+def field_to_attr(Model: Type[T], field: str) -> str:
+    if Model is User:
+        return USER_ATTRS[field]
+    elif Model is Team:
+        return TEAM_ATTRS[field]
+    return field
+
+
+def get_key(m: T) -> str:
+    if isinstance(m, User):
+        return cast(User, m).slack_id
+    elif isinstance(m, Team):
+        return cast(Team, m).github_team_id
+
+
+def project(m: T, fields: Optional[List[str]]) -> T:
+    """
+    Copy the attributes of ``m`` listed in ``fields``, plus its primary key.
+
+    Like the real databases, the rest of the copy is left at its defaults.
+    If ``fields`` is ``None``, ``m`` itself is returned.
+    """
+    if fields is None:
+        return m
+    Model = m.__class__
+    key = 'slack_id' if Model is User else 'github_team_id'
+    return Model.from_dict({field: v for field, v in Model.to_dict(m).items()
+                            if field == key or field in fields})
+
+
+class IndexedTable(dict):
+    """
+    A dictionary of models, keyed by primary key, with a query index.
+
+    Behaves like a normal ``dict`` (tests freely assign, pop and replace
+    entries), except that every write also updates a
+    :class:`db.index.ModelIndex`, so that queries never scan the table.
+
+    Stored models can also be mutated in place, like the models returned by
+    :meth:`MemoryDB.retrieve`. Models whose references were handed out (by
+    storing them, reading them from the table, or :meth:`hand_out`) are
+    marked dirty, and :meth:`sync` re-indexes the dirty ones whose attributes
+    changed. Models mutated through a reference kept since before the last
+    :meth:`sync` must be stored again for queries to see the change.
+    """
+
+    def __init__(self, Model: Type[T], models: Dict[str, T] = {}):
+        """Initialize the table with a dictionary of models."""
+        super().__init__()
+        self.index: ModelIndex = ModelIndex(Model)
+        self.get_attrs = Model.get_attrs
+        # Primary key and attributes of the models, when they were indexed
+        self.indexed_keys: Dict[str, str] = {}
+        self.states: Dict[str, Tuple[Any, ...]] = {}
+        # Keys of the models, by identity, and of those that may have changed
+        self.keys_by_id: Dict[int, str] = {}
+        self.dirty: Set[str] = set()
+        for k, m in models.items():
+            self[k] = m
+
+    def __getitem__(self, k: str) -> Any:
+        """Get the model under ``k``, which may then be mutated."""
+        m = super().__getitem__(k)
+        self.dirty.add(k)
+        return m
+
+    def __setitem__(self, k: str, m: T):
+        """Store ``m`` under ``k`` and index it."""
+        # The primary key of the model indexed under ``k`` may have changed
+        indexed = self.indexed_keys.get(k)
+        if indexed is not None and indexed != get_key(m):
+            self.index.remove(indexed)
+        old = self.get(k)
+        if old is not None:
+            self.keys_by_id.pop(id(old), None)
+        super().__setitem__(k, m)
+        self.index.add(m)
+        self.indexed_keys[k] = get_key(m)
+        self.states[k] = self.state(m)
+        self.keys_by_id[id(m)] = k
+        self.dirty.add(k)
+
+    def __delitem__(self, k: str):
+        """Remove the model under ``k`` from the table and the index."""
+        self.keys_by_id.pop(id(self.get(k)), None)
+        super().__delitem__(k)
+        self.index.remove(self.indexed_keys.pop(k))
+        del self.states[k]
+        self.dirty.discard(k)
+
+    def pop(self, k: str, *default):
+        """Remove and return the model under ``k``."""
+        if k not in self:
+            return super().pop(k, *default)
+        m = self[k]
+        del self[k]
+        return m
+
+    def state(self, m: T) -> Tuple[Any, ...]:
+        """Return the attributes of ``m``, with sets copied."""
+        return tuple(frozenset(v) if isinstance(v, set) else v
+                     for v in self.get_attrs(m))
+
+    def hand_out(self, ms: List[T]) -> List[T]:
+        """Mark models of the table as dirty, and return them."""
+        self.dirty.update(map(self.keys_by_id.__getitem__, map(id, ms)))
+        return ms
+
+    def sync(self) -> ModelIndex:
+        """
+        Re-index the dirty models mutated since they were indexed.
+
+        Only dirty models are compared, so queries stay proportional to the
+        number of models handed out since the last one.
+
+        :return: the up-to-date index
+        """
+        dirty, self.dirty = self.dirty, set()
+        get, get_attrs, states = self.get, self.get_attrs, self.states
+        changed = [k for k in dirty
+                   if k in states and get_attrs(get(k)) != states[k]]
+        for k in changed:
+            self[k] = super().__getitem__(k)
+        return self.index
+
+
+@trace_methods('db', DBFacade.__abstractmethods__)  # type: ignore
+class MemoryDB(DBFacade):
+    """
+    An in-memory database.
+
+    To be used only in tests and benchmarks. **Do not attempt to use it in
+    production.** Used when a test requires a database, but when we aren't
+    specifically testing database functionalities.
+
+    **Stored objects can be mutated by external references if you don't drop
+    the reference after storing.** Queries see these mutations too, like
+    :meth:`retrieve` does, as long as the reference was stored or read since
+    the last query (see :meth:`IndexedTable.sync`).
+    """
+
+    def __init__(self,
+                 users: List[User] = [],
+                 teams: List[Team] = []):
+        """
+        Initialize with lists of objects.
+
+        :param users: list of users to initialize the db
+        :param teams: list of teams to initialize the db
+        """
+        self.__users = IndexedTable(User, {u.slack_id: u for u in users})
+        self.__teams = IndexedTable(Team,
+                                    {t.github_team_id: t for t in teams})
+        self.lock = threading.Lock()
+
+    @property
+    def users(self) -> IndexedTable:
+        """Table of users, indexed by Slack ID."""
+        return self.__users
+
+    @users.setter
+    def users(self, users: Dict[str, User]):
+        self.__users = IndexedTable(User, users)
+
+    @property
+    def teams(self) -> IndexedTable:
+        """Table of teams, indexed by Github team ID."""
+        return self.__teams
+
+    @teams.setter
+    def teams(self, teams: Dict[str, Team]):
+        self.__teams = IndexedTable(Team, teams)
+
+    def get_db(self, Model: Type[T]) -> IndexedTable:
+        if Model is User:
+            return self.users
+        elif Model is Team:
+            return self.teams
+        raise LookupError(f'Unknown model {Model}')
+
+    def store(self, obj: T) -> bool:
+        Model = obj.__class__
+        if Model.is_valid(obj):
+            key = get_key(obj)
+            self.get_db(Model)[key] = obj
+            return True
+        return False
+
+    def update_fields(self,
+                      Model: Type[T],
+                      k: str,
+                      fields: Dict[str, Any]) -> T:
+        with self.lock:
+            m = self.retrieve(Model, k)
+            d = Model.to_dict(m)
+            d.update(fields)
+            self.replace_attrs(m, d)
+            return m
+
+    def update_sets(self,
+                    Model: Type[T],
+                    k: str,
+                    add: Dict[str, Set[str]] = {},
+                    remove: Dict[str, Set[str]] = {}) -> T:
+        for field in add.keys() | remove.keys():
+            if not field_is_set(Model, field):
+                raise RuntimeError(f'{Model.__name__} attribute {field} '
+                                   'is not a set')
+        with self.lock:
+            m = self.retrieve(Model, k)
+            for field, v in add.items():
+                getattr(m, field_to_attr(Model, field)).update(v)
+            for field, v in remove.items():
+                getattr(m, field_to_attr(Model, field)).difference_update(v)
+            self.store(m)
+            return m
+
+    def increment(self,
+                  Model: Type[T],
+                  k: str,
+                  field: str,
+                  amount: int = 1) -> T:
+        with self.lock:
+            m = self.retrieve(Model, k)
+            d = Model.to_dict(m)
+            d[field] = d.get(field, get_field_default(Model, field)) + amount
+            self.replace_attrs(m, d)
+            return m
+
+    def replace_attrs(self, m: T, d: Dict[str, Any]):
+        """
+        Set the attributes of stored model ``m`` to the ones in ``d``.
+
+        The model is updated in place, so that references to it see the
+        update, like references to stored models see any change.
+        """
+        Model = m.__class__
+        updated = Model.from_dict({field: v for field, v in d.items() if v})
+        for attr in Model.__slots__:
+            setattr(m, attr, getattr(updated, attr))
+        self.store(m)
+
+    def retrieve(self,
+                 Model: Type[T],
+                 k: str,
+                 fields: Optional[List[str]] = None) -> T:
+        d = self.get_db(Model)
+        if k in d:
+            return project(cast(T, d[k]), fields)
+        else:
+            raise LookupError(f'{Model.__name__}(id={k}) not found')
+
+    def bulk_retrieve(self,
+                      Model: Type[T],
+                      ks: List[str],
+                      fields: Optional[List[str]] = None) -> List[T]:
+        r = []
+        for k in ks:
+            try:
+                m = self.retrieve(Model, k, fields)
+                r.append(m)
+            except LookupError:
+                pass
+        return r
+
+    def query(self,
+              Model: Type[T],
+              params: List[Tuple[str, str]] = [],
+              fields: Optional[List[str]] = None) -> List[T]:
+        table = self.get_db(Model)
+        return [project(m, fields)
+                for m in table.hand_out(table.sync().query(params))]
+
+    def query_or(self,
+                 Model: Type[T],
+                 params: List[Tuple[str, str]] = [],
+                 fields: Optional[List[str]] = None) -> List[T]:
+        table = self.get_db(Model)
+        return [project(m, fields)
+                for m in table.hand_out(table.sync().query_or(params))]
+
+    def top(self,
+            Model: Type[T],
+            field: str,
+            n: int,
+            fields: Optional[List[str]] = None) -> List[T]:
+        attr = field_to_attr(Model, field)
+        table = self.get_db(Model)
+        ms = heapq.nlargest(n, table.values(),
+                            key=lambda m: getattr(m, attr))
+        return [project(m, fields) for m in table.hand_out(ms)]
+
+    def delete(self, Model: Type[T], k: str):
+        d = self.get_db(Model)
+        if k in d:
+            d.pop(k)
@@ -0,0 +1,431 @@
+"""Embedded database facade backed by SQLite."""
+import logging
+import sqlite3
+import threading
+
+from app.model import User, Team
+from config import Config
+from db.facade import DBFacade
+from db.utils import get_field_default
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, \
+    Type, TypeVar
+from utils.tracing import trace_methods
+
+T = TypeVar('T', User, Team)
+
+# SQLite caps the number of host parameters in a single statement, so long
+# lists of values are split into chunks of this size.
+MAX_VARS_PER_QUERY = 500
+
+
+def chunks(ls: List[Any], n: int = MAX_VARS_PER_QUERY) -> Iterable[List[Any]]:
+    """Split ``ls`` into lists of at most ``n`` elements."""
+    for i in range(0, len(ls), n):
+        yield ls[i: i + n]
+
+
+@trace_methods('db', DBFacade.__abstractmethods__)  # type: ignore
+class SQLiteDB(DBFacade):
+    """
+    Handles calls to an embedded SQLite database.
+
+    Meant for small deployments, local development and benchmarks, where the
+    latency of a remote DynamoDB is not worth paying. The database runs in
+    WAL mode so that readers never block the writer.
+
+    Team membership is kept in a separate, normalized table so that queries
+    checking whether a set **contains** an element (e.g.
+    ``('members', 'abc123')``) are answered with an index lookup instead of a
+    scan over every team.
+
+    Please do not use this class directly, and instead use
+    :class:`db.facade.DBFacade`.
+    """
+
+    USER_COLUMNS = ['slack_id', 'permission_level', 'email', 'name',
+                    'github', 'github_user_id', 'major', 'position', 'bio',
+                    'image_url', 'karma']
+    TEAM_COLUMNS = ['github_team_id', 'github_team_name', 'displayname',
+                    'platform', 'folder']
+    TEAM_SET_ATTRS = ['members', 'team_leads']
+
+    SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS users (
+        slack_id TEXT PRIMARY KEY,
+        permission_level TEXT NOT NULL,
+        email TEXT,
+        name TEXT,
+        github TEXT,
+        github_user_id TEXT,
+        major TEXT,
+        position TEXT,
+        bio TEXT,
+        image_url TEXT,
+        karma INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS users_github_user_id ON users(github_user_id);
+    CREATE INDEX IF NOT EXISTS users_email ON users(email);
+    CREATE INDEX IF NOT EXISTS users_karma ON users(karma);
+
+    CREATE TABLE IF NOT EXISTS teams (
+        github_team_id TEXT PRIMARY KEY,
+        github_team_name TEXT NOT NULL,
+        displayname TEXT,
+        platform TEXT,
+        folder TEXT
+    );
+    CREATE INDEX IF NOT EXISTS teams_github_team_name
+        ON teams(github_team_name);
+
+    CREATE TABLE IF NOT EXISTS team_members (
+        github_team_id TEXT NOT NULL
+            REFERENCES teams(github_team_id) ON DELETE CASCADE,
+        role TEXT NOT NULL,
+        github_user_id TEXT NOT NULL,
+        PRIMARY KEY (github_team_id, role, github_user_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS team_members_user
+        ON team_members(role, github_user_id);
+    '''
+
+    def __init__(self, config: Config):
+        """
+        Initialize facade using SQLite settings.
+
+        The database file is read from ``config.sqlite_path``; use
+        ``:memory:`` for a throwaway in-memory database. Tables and indexes
+        are created if they do not exist yet.
+
+        :param config: configuration used to initialize
+        """
+        logging.info(f"Initializing SQLite database at {config.sqlite_path}")
+        self.conn = sqlite3.connect(config.sqlite_path,
+                                    check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        # A single connection is shared by the command threads, so every use
+        # of it is serialized through this lock.
+        self.lock = threading.RLock()
+        with self.lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute('PRAGMA foreign_keys=ON')
+            self.conn.executescript(self.SCHEMA)
+
+    def get_table_name(self, Model: Type[T]) -> str:
+        """
+        Convert class into corresponding table name.
+
+        :param Model: Either ``User`` or ``Team``
+        :raises: TypeError if it is not either User or Team
+        :return: table name string
+        """
+        if Model is User:
+            return 'users'
+        elif Model is Team:
+            return 'teams'
+        else:
+            raise TypeError('Type of class one of [User, Team]')
+
+    def get_key(self, Model: Type[T]) -> str:
+        """Get primary key of the table of ``Model``."""
+        return 'slack_id' if Model is User else 'github_team_id'
+
+    def get_columns(self, Model: Type[T]) -> List[str]:
+        """Get the scalar columns of the table of ``Model``."""
+        return self.USER_COLUMNS if Model is User else self.TEAM_COLUMNS
+
+    def store(self, obj: T) -> bool:
+        Model = obj.__class__
+        if Model not in [User, Team]:
+            logging.error(f"Cannot store object {str(obj)}")
+            raise RuntimeError(f'Cannot store object{str(obj)}')
+
+        if not Model.is_valid(obj):
+            return False
+
+        table_name = self.get_table_name(Model)
+        key = self.get_key(Model)
+        columns = self.get_columns(Model)
+        d = Model.to_dict(obj)
+        updates = ', '.join(f'{c} = excluded.{c}'
+                            for c in columns if c != key)
+        logging.info(f"Storing obj {obj} in table {table_name}")
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.execute(
+                f'INSERT INTO {table_name} ({", ".join(columns)}) '
+                f'VALUES ({", ".join("?" for _ in columns)}) '
+                f'ON CONFLICT({key}) DO UPDATE SET {updates}',
+                [d.get(c) for c in columns])
+            if Model is Team:
+                self.conn.execute(
+                    'DELETE FROM team_members WHERE github_team_id = ?',
+                    (d[key],))
+                self.conn.executemany(
+                    'INSERT INTO team_members VALUES (?, ?, ?)',
+                    [(d[key], role, gh_id)
+                     for role in self.TEAM_SET_ATTRS
+                     for gh_id in d.get(role, [])])
+        return True
+
+    def update_fields(self,
+                      Model: Type[T],
+                      k: str,
+                      fields: Dict[str, Any]) -> T:
+        table_name = self.get_table_name(Model)
+        key = self.get_key(Model)
+        columns = [f for f in fields if f not in self.TEAM_SET_ATTRS]
+        roles = [f for f in fields if f in self.TEAM_SET_ATTRS]
+        for field in columns:
+            if field not in self.get_columns(Model) or field == key:
+                raise RuntimeError(f'Cannot update {Model.__name__} '
+                                   f'attribute {field}')
+        if roles and Model is not Team:
+            raise RuntimeError(f'Cannot update {Model.__name__} '
+                               f'attributes {roles}')
+
+        logging.info(f"Updating {Model.__name__}(id={k}): {fields}")
+        with self.lock:
+            with self.conn:
+                self.conn.execute('BEGIN')
+                # Updating the key onto itself finds out if the row exists
+                cur = self.conn.execute(
+                    f'UPDATE {table_name} SET {key} = {key}' +
+                    ''.join(f', {c} = ?' for c in columns) +
+                    f' WHERE {key} = ?',
+                    [fields[c] or None for c in columns] + [k])
+                if cur.rowcount == 0:
+                    raise LookupError(f'{Model.__name__}(id={k}) not found')
+                for role in roles:
+                    self.conn.execute(
+                        'DELETE FROM team_members '
+                        'WHERE github_team_id = ? AND role = ?', (k, role))
+                    self.conn.executemany(
+                        'INSERT INTO team_members VALUES (?, ?, ?)',
+                        [(k, role, gh_id) for gh_id in fields[role] or []])
+            return self.retrieve(Model, k)
+
+    def update_sets(self,
+                    Model: Type[T],
+                    k: str,
+                    add: Dict[str, Set[str]] = {},
+                    remove: Dict[str, Set[str]] = {}) -> T:
+        for field in add.keys() | remove.keys():
+            if Model is not Team or field not in self.TEAM_SET_ATTRS:
+                raise RuntimeError(f'{Model.__name__} attribute {field} '
+                                   'is not a set')
+
+        logging.info(f"Updating {Model.__name__}(id={k}): "
+                     f"add {add}, remove {remove}")
+        with self.lock:
+            with self.conn:
+                self.conn.execute('BEGIN')
+                cur = self.conn.execute(
+                    'SELECT 1 FROM teams WHERE github_team_id = ?', (k,))
+                if cur.fetchone() is None:
+                    raise LookupError(f'{Model.__name__}(id={k}) not found')
+                for role, gh_ids in add.items():
+                    self.conn.executemany(
+                        'INSERT OR IGNORE INTO team_members VALUES (?, ?, ?)',
+                        [(k, role, gh_id) for gh_id in gh_ids])
+                for role, gh_ids in remove.items():
+                    self.conn.executemany(
+                        'DELETE FROM team_members WHERE github_team_id = ? '
+                        'AND role = ? AND github_user_id = ?',
+                        [(k, role, gh_id) for gh_id in gh_ids])
+            return self.retrieve(Model, k)
+
+    def increment(self,
+                  Model: Type[T],
+                  k: str,
+                  field: str,
+                  amount: int = 1) -> T:
+        table_name = self.get_table_name(Model)
+        key = self.get_key(Model)
+        if field not in self.get_columns(Model) or field == key:
+            raise RuntimeError(f'Cannot increment {Model.__name__} '
+                               f'attribute {field}')
+
+        with self.lock:
+            cur = self.conn.execute(
+                f'UPDATE {table_name} '
+                f'SET {field} = COALESCE({field}, ?) + ? WHERE {key} = ?',
+                (get_field_default(Model, field), amount, k))
+            if cur.rowcount == 0:
+                raise LookupError(f'{Model.__name__}(id={k}) not found')
+            return self.retrieve(Model, k)
+
+    def retrieve(self,
+                 Model: Type[T],
+                 k: str,
+                 fields: Optional[List[str]] = None) -> T:
+        models = self.bulk_retrieve(Model, [k], fields)
+        if len(models) == 0:
+            err_msg = f'{Model.__name__}(id={k}) not found'
+            logging.info(err_msg)
+            raise LookupError(err_msg)
+        return models[0]
+
+    def bulk_retrieve(self,
+                      Model: Type[T],
+                      ks: List[str],
+                      fields: Optional[List[str]] = None) -> List[T]:
+        table_name = self.get_table_name(Model)
+        key = self.get_key(Model)
+        columns = self.select_columns(Model, fields)
+        rows: List[sqlite3.Row] = []
+        with self.lock:
+            for ks_chunk in chunks(list(ks)):
+                rows.extend(self.conn.execute(
+                    f'SELECT {columns} FROM {table_name} WHERE {key} IN '
+                    f'({", ".join("?" for _ in ks_chunk)})',
+                    ks_chunk))
+            return self.rows_to_models(Model, rows, fields)
+
+    def query(self,
+              Model: Type[T],
+              params: List[Tuple[str, str]] = [],
+              fields: Optional[List[str]] = None) -> List[T]:
+        table_name = self.get_table_name(Model)
+        conditions = []
+        values: List[str] = []
+        for field, v in params:
+            cond = self.condition(Model, field, 1)
+            if cond is None:
+                # Unknown attributes never match anything
+                return []
+            conditions.append(cond)
+            values.extend(self.condition_values(Model, field, [v]))
+
+        sql = f'SELECT {self.select_columns(Model, fields)} FROM {table_name}'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        with self.lock:
+            rows = list(self.conn.execute(sql, values))
+            return self.rows_to_models(Model, rows, fields)
+
+    def query_or(self,
+                 Model: Type[T],
+                 params: List[Tuple[str, str]] = [],
+                 fields: Optional[List[str]] = None) -> List[T]:
+        if len(params) == 0:
+            return self.query(Model, fields=fields)
+
+        # Group values by field, so that each field becomes a single indexed
+        # ``IN (...)`` lookup rather than one comparison per parameter
+        by_field: Dict[str, List[str]] = {}
+        for field, v in params:
+            by_field.setdefault(field, []).append(v)
+
+        table_name = self.get_table_name(Model)
+        key = self.get_key(Model)
+        columns = self.select_columns(Model, fields)
+        rows: Dict[str, sqlite3.Row] = {}
+        with self.lock:
+            for field, vs in by_field.items():
+                for vs_chunk in chunks(vs):
+                    cond = self.condition(Model, field, len(vs_chunk))
+                    if cond is None:
+                        continue
+                    for row in self.conn.execute(
+                            f'SELECT {columns} FROM {table_name} '
+                            f'WHERE {cond}',
+                            self.condition_values(Model, field, vs_chunk)):
+                        rows[row[key]] = row
+            return self.rows_to_models(Model, list(rows.values()), fields)
+
+    def top(self,
+            Model: Type[T],
+            field: str,
+            n: int,
+            fields: Optional[List[str]] = None) -> List[T]:
+        if field not in self.get_columns(Model):
+            raise RuntimeError(f'{Model.__name__} attribute {field} '
+                               'is not kept sorted')
+
+        table_name = self.get_table_name(Model)
+        with self.lock:
+            rows = list(self.conn.execute(
+                f'SELECT {self.select_columns(Model, fields)} '
+                f'FROM {table_name} WHERE {field} IS NOT NULL '
+                f'ORDER BY {field} DESC LIMIT ?', (n,)))
+            return self.rows_to_models(Model, rows, fields)
+
+    def delete(self, Model: Type[T], k: str):
+        logging.info(f"Deleting {Model.__name__}(id={k})")
+        table_name = self.get_table_name(Model)
+        with self.lock, self.conn:
+            self.conn.execute(
+                f'DELETE FROM {table_name} WHERE {self.get_key(Model)} = ?',
+                (k,))
+
+    def condition(self, Model: Type[T], field: str, n: int):
+        """
+        Build an SQL condition matching ``field`` against ``n`` values.
+
+        Set attributes are matched through the membership table, where the
+        condition is true if the set **contains** any of the values.
+
+        :return: the condition, or ``None`` if ``field`` is not an attribute
+                 of ``Model``
+        """
+        placeholders = ', '.join('?' for _ in range(n))
+        if Model is Team and field in self.TEAM_SET_ATTRS:
+            return 'github_team_id IN (SELECT github_team_id FROM ' \
+                'team_members WHERE role = ? AND github_user_id IN ' \
+                f'({placeholders}))'
+        elif field in self.get_columns(Model):
+            return f'{field} IN ({placeholders})'
+        return None
+
+    def condition_values(self,
+                         Model: Type[T],
+                         field: str,
+                         vs: List[str]) -> List[str]:
+        """Return the values bound to :meth:`condition`'s placeholders."""
+        if Model is Team and field in self.TEAM_SET_ATTRS:
+            return [field] + vs
+        return vs
+
+    def select_columns(self,
+                       Model: Type[T],
+                       fields: Optional[List[str]]) -> str:
+        """
+        Build the list of columns to select to read ``fields``.
+
+        :return: comma-separated columns, always including the primary key
+        """
+        if fields is None:
+            return '*'
+        key = self.get_key(Model)
+        return ', '.join(c for c in self.get_columns(Model)
+                         if c == key or c in fields)
+
+    def rows_to_models(self,
+                       Model: Type[T],
+                       rows: List[sqlite3.Row],
+                       fields: Optional[List[str]] = None) -> List[T]:
+        """
+        Convert table rows into models.
+
+        For teams, the members and team leads of all rows are loaded with one
+        query per chunk of teams, unless ``fields`` leaves them out.
+
+        **Note**: must be called with ``self.lock`` held.
+        """
+        ds = [{k: row[k] for k in row.keys() if row[k] is not None}
+              for row in rows]
+        roles = [r for r in self.TEAM_SET_ATTRS
+                 if fields is None or r in fields]
+        if Model is Team and ds and roles:
+            teams = {d['github_team_id']: d for d in ds}
+            role_params = ', '.join('?' for _ in roles)
+            for ids in chunks(list(teams.keys())):
+                for tid, role, gh_id in self.conn.execute(
+                        'SELECT github_team_id, role, github_user_id FROM '
+                        'team_members WHERE github_team_id IN '
+                        f'({", ".join("?" for _ in ids)}) '
+                        f'AND role IN ({role_params})', ids + roles):
+                    teams[tid].setdefault(role, set()).add(gh_id)
+        return [Model.from_dict(d, trusted=True) for d in ds]
@@ -1,9 +1,11 @@
 """Database utilities, for functions that you use all the time."""
 from db.facade import DBFacade
 from app.model import Team, User
-from typing import List
+from typing import Any, List, Optional, Type, TypeVar
 import logging
 
+T = TypeVar('T', User, Team)
+
 
 def get_team_by_name(dbf: DBFacade, gh_team_name: str) -> Team:
     """
@@ -35,24 +37,42 @@ def get_team_by_name(dbf: DBFacade, gh_team_name: str) -> Team:
         return teams[0]
 
 
-def get_team_members(dbf: DBFacade, team: Team) -> List[User]:
+def get_team_members(dbf: DBFacade,
+                     team: Team,
+                     fields: Optional[List[str]] = None) -> List[User]:
     """
     Query users that are members of the given team.
 
+    :param fields: if given, only read these attributes of the users
     :return: Users that belong to the team
     """
-    return get_users_by_ghid(dbf, list(team.members))
+    return get_users_by_ghid(dbf, list(team.members), fields)
 
 
-def get_users_by_ghid(dbf: DBFacade, gh_ids: List[str]) -> List[User]:
+def get_users_by_ghid(dbf: DBFacade,
+                      gh_ids: List[str],
+                      fields: Optional[List[str]] = None) -> List[User]:
     """
     Query users by github user id.
 
+    :param fields: if given, only read these attributes of the users
     :return: List of users if found
     """
     if len(gh_ids) == 0:
         return []
 
     q = [('github_user_id', gh_id) for gh_id in gh_ids]
-    users = dbf.query_or(User, q)
+    users = dbf.query_or(User, q, fields)
     return users
+
+
+def get_field_default(Model: Type[T], field: str) -> Any:
+    """
+    Get the value an attribute reads back as when it is not stored.
+
+    :param Model: either ``User`` or ``Team``
+    :param field: stored name of the attribute
+    :return: the default value, or ``0`` if the attribute has no default
+    """
+    key = 'slack_id' if Model is User else 'github_team_id'
+    return Model.to_dict(Model.from_dict({key: ''})).get(field, 0)
@@ -1,65 +1,232 @@
-"""All necessary class initializations."""
+"""
+All necessary class initializations.
+
+Clients of external services (databases, GitHub, Google, Slack, CloudWatch)
+are built lazily (see :class:`factory.lazy.Lazy`), and shared by everything
+made from the same config, so that servers start without waiting for, or
+depending on, any of these services. Call :func:`warm_up` to build them in
+the background ahead of their first use.
+"""
 import random
 import string
 import json
 import logging
+import threading
+import time
 
 from app.controller.command import CommandParser
 from app.controller.command.commands.token import TokenCommandConfig
+from app.controller.command.progress import RunningCommands
 from datetime import timedelta
 from db import DBFacade
 from db.dynamodb import DynamoDB
+from db.sqlite import SQLiteDB
 from interface.github import GithubInterface, DefaultGithubFactory
-from interface.slack import Bot
-from interface.gcp import GCPInterface
+from interface.github_app import GithubAppInterface, \
+    DefaultGithubAppAuthFactory
+from interface.github_async import AsyncGithubInterface, LoopGithubInterface
+from interface.slack import Bot, ResponsePoster
+from interface.slack_async import AsyncResponsePoster
+from interface.gcp import GCPInterface, build_drive_client
 from interface.cloudwatch_metrics import CWMetrics
-from slack import WebClient
+from slack import AsyncWebClient, WebClient
+from boto3.session import Session
+import structlog
 from app.controller.webhook.github import GitHubWebhookHandler
+from app.controller.webhook.github.coalescer import MembershipCoalescer
+from app.controller.webhook.github.deliveries import DeliveryLog
+from app.controller.webhook.github.queue import WebhookQueue
 from app.controller.webhook.slack import SlackEventsHandler
 from config import Config
 from google.oauth2 import service_account as gcp_service_account
-from googleapiclient.discovery import build as gcp_build
-from typing import Optional
+from factory.lazy import Lazy
+from typing import Any, Callable, Dict, Optional, TypeVar, cast
+from utils.aio import LoopBridge, SyncProxy
+from weakref import WeakKeyDictionary
+
+T = TypeVar('T')
+
+# Clients made so far, by config and name
+_clients: 'WeakKeyDictionary[Config, Dict[str, Lazy]]' = WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def lazy_client(config: Config, name: str, build: Callable[[], T]) -> T:
+    """
+    Return the client named ``name``, which is built on first use.
+
+    The same client is returned for every call with the same config and name.
+
+    :param config: config the client is built from
+    :param name: name of the client
+    :param build: function building the client
+    :return: a stand-in for the client
+    """
+    with _clients_lock:
+        clients = _clients.setdefault(config, {})
+        if name not in clients:
+            clients[name] = Lazy(name, build)
+        return cast(T, clients[name])
+
+
+def provide_client(config: Config, name: str, client: Any):
+    """
+    Use ``client`` as the client named ``name``, instead of building one.
+
+    Lets tools run a server against stand-ins of external services, by
+    providing them after the server is made, but before it gets requests.
+
+    :param config: config the client would be built from
+    :param name: name of the client, like ``database``
+    :param client: the client to use
+    :raises: RuntimeError if another client was already built
+    """
+    with _clients_lock:
+        clients = _clients.setdefault(config, {})
+        lazy = clients.setdefault(name, Lazy(name, lambda: client))
+    with lazy.lock:
+        if lazy.client is not None and lazy.client is not client:
+            raise RuntimeError(f"{name} was already initialized")
+        lazy.client = client
+
+
+def warm_up(config: Config) -> threading.Thread:
+    """
+    Build every client made so far for ``config``, in the background.
+
+    Failures are logged, and the client is built again on its first use.
+
+    :param config: config the clients were made from
+    :return: the thread building the clients
+    """
+    with _clients_lock:
+        clients = list(_clients.get(config, {}).values())
+
+    def run():
+        start = time.time()
+        for client in clients:
+            try:
+                client.get()
+            except Exception:
+                logging.exception(f"Could not initialize {client.name}")
+        logging.info(f"Warmed up {len(clients)} clients in "
+                     f"{(time.time() - start) * 1000:.0f} ms")
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    thread.start()
+    return thread
 
 
 def make_dbfacade(config: Config) -> DBFacade:
-    return DynamoDB(config)
+    def build() -> DBFacade:
+        if len(config.sqlite_path) > 0:
+            return SQLiteDB(config)
+        return DynamoDB(config)
+    return lazy_client(config, 'database', build)
 
 
 def make_github_interface(config: Config) -> GithubInterface:
-    return GithubInterface(DefaultGithubFactory(config.github_app_id,
-                                                config.github_key),
-                           config.github_org_name)
+    return lazy_client(config, 'GitHub', lambda: GithubInterface(
+        DefaultGithubFactory(config.github_app_id, config.github_key),
+        config.github_org_name))
+
 
+def make_bot(config: Config) -> Bot:
+    return lazy_client(config, 'Slack', lambda: Bot(
+        WebClient(config.slack_api_token),
+        config.slack_notification_channel,
+        float(config.slack_directory_ttl)))
 
-def make_command_parser(config: Config, gh: GithubInterface) \
+
+def make_metrics(config: Config) -> CWMetrics:
+    return lazy_client(config, 'CloudWatch', lambda: CWMetrics(config))
+
+
+def make_async_github_client(config: Config) -> AsyncGithubInterface:
+    return lazy_client(config, 'GitHub (async)', lambda: AsyncGithubInterface(
+        GithubAppInterface(DefaultGithubAppAuthFactory(config.github_app_id,
+                                                       config.github_key)),
+        config.github_org_name))
+
+
+def make_async_github_interface(config: Config,
+                                gh: GithubInterface,
+                                bridge: LoopBridge) -> GithubInterface:
+    # Teams are read on the loop of the bridge, the rest through ``gh``
+    return cast(GithubInterface, LoopGithubInterface(
+        gh, make_async_github_client(config), bridge))
+
+
+def make_async_bot(config: Config, bridge: LoopBridge) -> Bot:
+    return lazy_client(config, 'Slack (async)', lambda: Bot(
+        cast(WebClient, SyncProxy(AsyncWebClient(config.slack_api_token),
+                                  bridge)),
+        config.slack_notification_channel,
+        float(config.slack_directory_ttl)))
+
+
+def make_async_poster(config: Config,
+                      bridge: LoopBridge) -> AsyncResponsePoster:
+    return AsyncResponsePoster(bridge, make_metrics(config))
+
+
+def make_command_parser(config: Config,
+                        gh: GithubInterface,
+                        bot: Optional[Bot] = None,
+                        poster: Optional[ResponsePoster] = None) \
         -> CommandParser:
     # Initialize database
     facade = make_dbfacade(config)
     # Create Slack bot
-    bot = Bot(WebClient(config.slack_api_token),
-              config.slack_notification_channel)
+    if bot is None:
+        bot = make_bot(config)
     # TODO: make token config expiry configurable
     token_config = TokenCommandConfig(timedelta(days=7), config.github_key)
     # Metrics
-    metrics = CWMetrics(config)
+    metrics = make_metrics(config)
     # Create GCP client (optional)
     gcp_client = make_gcp_client(config)
+    # Long commands being run, by any server process
+    running = RunningCommands(config.running_commands_path)
     return CommandParser(config, facade, bot, gh, token_config, metrics,
-                         gcp=gcp_client)
+                         gcp=gcp_client, poster=poster, running=running)
 
 
 def make_github_webhook_handler(gh: GithubInterface,
                                 config: Config) -> GitHubWebhookHandler:
     facade = make_dbfacade(config)
-    return GitHubWebhookHandler(facade, gh, config)
+    coalescer = None
+    window = float(config.github_webhook_batch_window)
+    if window > 0:
+        coalescer = MembershipCoalescer(facade, make_gcp_client(config),
+                                        window, config.trace_format)
+    if len(config.github_webhook_queue_path) == 0:
+        # Without a file to keep them in, deliveries are only remembered for
+        # as long as the process lives
+        return GitHubWebhookHandler(facade, gh, config,
+                                    deliveries=DeliveryLog(':memory:'),
+                                    coalescer=coalescer)
+
+    # Nothing is opened or started yet, since the handler may be made before
+    # the server forks its workers: see :func:`start_webhook_workers`
+    queue = WebhookQueue(config.github_webhook_queue_path,
+                         make_metrics(config))
+    deliveries = DeliveryLog(config.github_webhook_queue_path)
+    return GitHubWebhookHandler(facade, gh, config, queue=queue,
+                                deliveries=deliveries, coalescer=coalescer)
+
 
+def start_webhook_workers(handler: GitHubWebhookHandler, config: Config):
+    """Start the threads handling queued webhook events, in this process."""
+    handler.start_workers(int(config.github_webhook_workers))
 
-def make_slack_events_handler(config: Config) -> SlackEventsHandler:
+
+def make_slack_events_handler(config: Config,
+                              bot: Optional[Bot] = None) \
+        -> SlackEventsHandler:
     facade = make_dbfacade(config)
-    bot = Bot(WebClient(config.slack_api_token),
-              config.slack_notification_channel)
-    return SlackEventsHandler(facade, bot)
+    return SlackEventsHandler(facade,
+                              bot if bot is not None else make_bot(config))
 
 
 def make_gcp_client(config: Config) -> Optional[GCPInterface]:
@@ -80,10 +247,90 @@ def make_gcp_client(config: Config) -> Optional[GCPInterface]:
         logging.error(f"Unable to load GCP credentials, disabling: {e}")
         return None
 
-    # Build appropriate service clients.
+    # Build a Drive client for each thread, from the discovery document
+    # shipped with Rocket, so that building them does not fetch anything.
     # See https://github.com/googleapis/google-api-python-client/blob/master/docs/dyn/index.md # noqa
-    drive = gcp_build('drive', 'v3', credentials=credentials)
-    return GCPInterface(drive, subject=config.gcp_service_account_subject)
+    return GCPInterface(
+        subject=config.gcp_service_account_subject,
+        new_drive_client=lambda: build_drive_client(credentials))
+
+
+def make_logging_config(config: Config) -> Dict[str, Any]:
+    # set up logging handlers from config
+    loggingHandlers = ['wsgi']
+    traceHandlers = ['wsgi']
+    loggingHandlersConfig: Dict[str, Dict[str, Any]] = {
+        'wsgi': {
+            'class': 'logging.StreamHandler',
+            'stream': 'ext://flask.logging.wsgi_errors_stream',
+            'formatter': 'colored'
+        },
+    }
+    if not config.aws_local:
+        # set up logging to AWS cloudwatch when not restricted to local AWS
+        boto3_session = Session(aws_access_key_id=config.aws_access_keyid,
+                                aws_secret_access_key=config.aws_secret_key,
+                                region_name=config.aws_region)
+        loggingHandlers.append('watchtower')
+        loggingHandlersConfig['watchtower'] = {
+            'level': 'DEBUG',
+            'class': 'watchtower.CloudWatchLogHandler',
+            'boto3_session': boto3_session,
+            'log_group': 'watchtower',
+            'stream_name': 'rocket2',
+            'formatter': 'aws',
+        }
+        # Traces are logged on their own, so that each log event is only a
+        # line of JSON, as required by the embedded metric format
+        traceHandlers.append('watchtower-traces')
+        loggingHandlersConfig['watchtower-traces'] = {
+            'level': 'INFO',
+            'class': 'watchtower.CloudWatchLogHandler',
+            'boto3_session': boto3_session,
+            'log_group': 'watchtower',
+            'stream_name': 'rocket2-traces',
+            'formatter': 'message',
+        }
+
+    # set up logging
+    loggingConfig: Dict[str, Any] = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'aws': {
+                # No time b.c. CloudWatch logs times
+                'format': u"[%(levelname)-8s] %(message)s "
+                          u"{%(module)s.%(funcName)s():%(lineno)s "
+                          u"%(pathname)s}",
+                'datefmt': "%Y-%m-%d %H:%M:%S"
+            },
+            'message': {
+                'format': '%(message)s'
+            },
+            "colored": {
+                'format': '{Time: %(asctime)s, '
+                          'Level: [%(levelname)s], '
+                          'function: %(module)s.%(funcName)s():%(lineno)s, '
+                          'message: %(message)s}',
+                "()": structlog.stdlib.ProcessorFormatter,
+                "processor": structlog.dev.ConsoleRenderer(colors=True),
+                'datefmt': '%Y-%m-%d %H:%M:%S',
+            }},
+        'handlers': loggingHandlersConfig,
+        'loggers': {
+            'rocket2.trace': {
+                'level': 'INFO',
+                'propagate': False,
+                'handlers': traceHandlers
+            }
+        },
+        'root': {
+            'level': 'INFO',
+            'propagate': True,
+            'handlers': loggingHandlers
+        }
+    }
+    return loggingConfig
 
 
 def create_signing_token() -> str:
@@ -0,0 +1,57 @@
+"""Build clients of external services when they are first used."""
+import logging
+import threading
+import time
+
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class Lazy(Generic[T]):
+    """
+    Stand-in for a client, which only builds it when it is first used.
+
+    Building clients can take seconds (fetching tokens, listing tables,
+    downloading discovery documents), and fails if the service is down. A
+    ``Lazy`` lets a server start without waiting for any of that.
+
+    Attributes are looked up on the client, so a ``Lazy`` can be passed
+    wherever the client is expected. The client is built at most once, even
+    if several threads use it at the same time; if building fails, the error
+    is raised to the caller and building is tried again on the next use.
+    """
+
+    def __init__(self, name: str, build: Callable[[], T]):
+        """
+        Initialize without building the client.
+
+        :param name: name of the client, for logs
+        :param build: function building the client
+        """
+        self.name = name
+        self.build = build
+        self.lock = threading.Lock()
+        self.client: Optional[T] = None
+        self.build_ms: Optional[float] = None
+
+    def get(self) -> T:
+        """Return the client, building it if it was not built yet."""
+        client = self.client
+        if client is None:
+            with self.lock:
+                if self.client is None:
+                    start = time.time()
+                    self.client = self.build()
+                    self.build_ms = (time.time() - start) * 1000
+                    logging.info(f"Initialized {self.name} in "
+                                 f"{self.build_ms:.0f} ms")
+                client = self.client
+        return client
+
+    def __getattr__(self, attr: str):
+        """Look up attributes missing from this object on the client."""
+        if attr in ('name', 'build', 'lock', 'client', 'build_ms'):
+            # Only missing while the object is being copied or unpickled
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
@@ -0,0 +1,17 @@
+"""Gunicorn settings, loaded from the directory gunicorn is started in."""
+
+
+def post_worker_init(worker):
+    """
+    Start the webhook workers of a new worker process.
+
+    With ``--preload``, the app is made once in the master, and its threads
+    and SQLite connections would not survive the fork of the workers: each
+    worker starts its own here. Clients are also built in the background, if
+    configured.
+    """
+    from app.server import config, github_webhook_handler
+    from factory import start_webhook_workers, warm_up
+    start_webhook_workers(github_webhook_handler, config)
+    if config.warm_up_clients:
+        warm_up(config)
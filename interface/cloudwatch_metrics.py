@@ -38,3 +38,73 @@ class CWMetrics:
                 }
             ]
         )
+
+    def submit_webhook_mstime(self,
+                              event_name: str,
+                              queued_ms: float,
+                              handled_ms: float):
+        if self.cw is None:
+            logging.info(
+                f'Webhook Latency [{event_name}@Rocket 2]: '
+                f'{queued_ms} ms queued, {handled_ms} ms handling'
+            )
+            return
+
+        dimensions = [
+            {
+                'Name': 'Event type',
+                'Value': event_name
+            }
+        ]
+        self.cw.put_metric_data(
+            Namespace='Rocket 2',
+            MetricData=[
+                {
+                    'MetricName': 'Webhook Queue Time',
+                    'Dimensions': dimensions,
+                    'Value': queued_ms,
+                    'Unit': 'Milliseconds'
+                },
+                {
+                    'MetricName': 'Webhook Handling Time',
+                    'Dimensions': dimensions,
+                    'Value': handled_ms,
+                    'Unit': 'Milliseconds'
+                }
+            ]
+        )
+
+    def submit_response_mstime(self,
+                               cmd_name: str,
+                               ms: float,
+                               delivered: bool):
+        if self.cw is None:
+            logging.info(
+                f'Response Delivery Time [{cmd_name}@Rocket 2]: {ms} ms'
+                f'{"" if delivered else " (failed)"}'
+            )
+            return
+
+        dimensions = [
+            {
+                'Name': 'Command type',
+                'Value': cmd_name
+            }
+        ]
+        self.cw.put_metric_data(
+            Namespace='Rocket 2',
+            MetricData=[
+                {
+                    'MetricName': 'Response Delivery Time',
+                    'Dimensions': dimensions,
+                    'Value': ms,
+                    'Unit': 'Milliseconds'
+                },
+                {
+                    'MetricName': 'Response Delivery Failures',
+                    'Dimensions': dimensions,
+                    'Value': 0 if delivered else 1,
+                    'Unit': 'Count'
+                }
+            ]
+        )
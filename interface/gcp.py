@@ -1,7 +1,17 @@
 """Utility classes for interacting with Google APIs"""
-from typing import List, Iterator
-from googleapiclient.discovery import Resource
+from functools import lru_cache
+from typing import Callable, List, Iterator, Optional
+from googleapiclient.discovery import Resource, build_from_document
 import logging
+import os
+import threading
+from utils.tracing import trace_methods
+
+# Discovery document of the Drive API, trimmed to the methods used here. To
+# use another method, copy it (and the schemas it refers to) over from
+# https://www.googleapis.com/discovery/v1/apis/drive/v3/rest
+DRIVE_DISCOVERY_DOCUMENT = os.path.join(os.path.dirname(__file__),
+                                        'discovery', 'drive.v3.json')
 
 
 class GCPDrivePermission:
@@ -12,14 +22,51 @@ class GCPDrivePermission:
         self.email = standardize_email(email)
 
 
+@trace_methods('gcp')
 class GCPInterface:
-    """Utility class for calling Google Cloud Platform (GCP) APIs."""
+    """
+    Utility class for calling Google Cloud Platform (GCP) APIs.
+
+    Drive clients are not thread-safe, since each one makes its requests
+    through a single HTTP connection. Given a function building Drive
+    clients, every thread using this interface gets its own client, built on
+    its first call.
+    """
 
-    def __init__(self, drive_client: Resource, subject=None):
+    def __init__(self,
+                 drive_client: Optional[Resource] = None,
+                 subject=None,
+                 new_drive_client: Optional[Callable[[], Resource]] = None):
+        """
+        Initialize the interface.
+
+        :param drive_client: Drive client shared by every thread, if
+                             ``new_drive_client`` is not given
+        :param subject: email of the account acting on Drive items
+        :param new_drive_client: function building a Drive client for each
+                                 thread
+        """
         logging.info("Initializing Google client interface")
-        self.drive = drive_client
+        if drive_client is None and new_drive_client is None:
+            raise ValueError("Either a Drive client or a function building "
+                             "one is required")
+        self.drive_client = drive_client
+        self.new_drive_client = new_drive_client
+        self.local = threading.local()
         self.subject = subject
 
+    @property
+    def drive(self) -> Resource:
+        """Drive client of the calling thread."""
+        if self.new_drive_client is None:
+            return self.drive_client
+        drive = getattr(self.local, 'drive', None)
+        if drive is None:
+            drive = self.local.drive = self.new_drive_client()
+            logging.debug("Built Drive client for thread "
+                          f"{threading.current_thread().name}")
+        return drive
+
     def get_drive_parents(self, drive_id: str) -> List[str]:
         """
         Retrieves list of parents of the given Drive folder, returned as ID
@@ -178,6 +225,28 @@ class GCPInterface:
                      + f"{team_name} ({', '.join(deleted_shares)})")
 
 
+@lru_cache(maxsize=None)
+def read_discovery_document(path: str) -> str:
+    """Read a discovery document once, and return its contents."""
+    with open(path) as f:
+        return f.read()
+
+
+def build_drive_client(credentials) -> Resource:
+    """
+    Build a Drive client from the discovery document shipped with Rocket.
+
+    Unlike ``googleapiclient.discovery.build``, this does not fetch the
+    document from Google, so it is cheap and works offline.
+
+    :param credentials: credentials to authorize requests with
+    :return: a new Drive client, with its own HTTP connection
+    """
+    return build_from_document(
+        read_discovery_document(DRIVE_DISCOVERY_DOCUMENT),
+        credentials=credentials)
+
+
 def new_share_message(team_name):
     return f"Rocket has shared a folder with you for team '{team_name}'!"
 
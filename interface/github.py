@@ -7,6 +7,7 @@ from interface.github_app import GithubAppInterface, \
     DefaultGithubAppAuthFactory
 from app.model import Team as ModelTeam
 from typing import cast, List
+from utils.tracing import trace_methods
 from functools import wraps
 import logging
 
@@ -61,6 +62,7 @@ class DefaultGithubFactory:
         return self.github(self.auth.create_api_token())
 
 
+@trace_methods('github')
 class GithubInterface:
     """Utility class for interacting with Github API."""
 
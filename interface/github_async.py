@@ -0,0 +1,172 @@
+"""
+Read GitHub teams asynchronously, through httpx.
+
+Syncing teams (see ``/rocket team refresh``) reads every team of the
+organization, then the members of each of them: with PyGithub, that is one
+request after the other, and a thread waiting on each of them. Here, the
+members of several teams are read at the same time, on an event loop.
+"""
+import asyncio
+import httpx
+import logging
+
+from app.model import Team
+from interface.exceptions.github import GithubAPIException
+from interface.github import GithubInterface
+from interface.github_app import GithubAppInterface
+from typing import Any, Dict, List, Optional
+from utils.aio import LoopBridge
+from utils.tracing import span
+
+
+class AsyncGithubInterface:
+    """Asynchronous client of the GitHub API, for an organization."""
+
+    API_URL = 'https://api.github.com'
+    PAGE_SIZE = 100
+    # Requests sent at the same time, at most
+    MAX_CONCURRENT_REQUESTS = 10
+    TIMEOUT = 10
+
+    def __init__(self,
+                 auth: GithubAppInterface,
+                 org: str,
+                 client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the client, without requesting anything yet.
+
+        :param auth: GitHub App to get installation tokens from
+        :param org: name of the organization
+        :param client: HTTP client to send requests with
+        """
+        self.auth = auth
+        self.org_name = org
+        self.client = client or httpx.AsyncClient(base_url=self.API_URL,
+                                                  timeout=self.TIMEOUT)
+        self.token: Optional[str] = None
+        self.token_lock: Optional[asyncio.Lock] = None
+        self.requests: Optional[asyncio.Semaphore] = None
+
+    async def get_token(self, renew: bool = False) -> str:
+        """
+        Return an installation token, getting one if needed.
+
+        Tokens are got with the synchronous :class:`GithubAppInterface`, in a
+        thread, only once for all requests waiting for one.
+
+        :param renew: whether to replace the current token, if rejected
+        """
+        if self.token_lock is None:
+            # Locks are bound to the loop they are made in, from Python 3.10
+            self.token_lock = asyncio.Lock()
+        stale = self.token
+        async with self.token_lock:
+            if self.token is None or (renew and self.token == stale):
+                logging.info("Creating new GitHub installation token")
+                loop = asyncio.get_running_loop()
+                self.token = await loop.run_in_executor(
+                    None, self.auth.create_api_token)
+            return str(self.token)
+
+    async def get(self,
+                  url: str,
+                  params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """
+        Send a GET request, with a token renewed if it was rejected.
+
+        :raises: GithubAPIException if GitHub responds with an error
+        """
+        if self.requests is None:
+            self.requests = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        async with self.requests:
+            for renew in (False, True):
+                token = await self.get_token(renew)
+                resp = await self.client.get(url, params=params, headers={
+                    'Authorization': f'token {token}',
+                    'Accept': 'application/vnd.github.v3+json',
+                })
+                if resp.status_code != 401:
+                    break
+                logging.warning("GitHub rejected installation token")
+        if resp.status_code >= 400:
+            logging.error(f"GitHub request to {url} failed with status "
+                          f"{resp.status_code}: {resp.text}")
+            try:
+                data = resp.json()
+            except ValueError:
+                data = resp.text
+            raise GithubAPIException(data)
+        return resp
+
+    async def get_all(self, url: str) -> List[Dict[str, Any]]:
+        """Return every item of a paginated list."""
+        items: List[Dict[str, Any]] = []
+        params: Optional[Dict[str, Any]] = {'per_page': self.PAGE_SIZE}
+        next_url: Optional[str] = url
+        while next_url is not None:
+            resp = await self.get(next_url, params)
+            items.extend(resp.json())
+            # Links to the next page already have every parameter, which
+            # any parameters given would replace
+            next_url = resp.links.get('next', {}).get('url')
+            params = None
+        return items
+
+    async def org_get_teams(self) -> List[Team]:
+        """
+        Return the teams of the organization, with their members.
+
+        Like :meth:`interface.github.GithubInterface.org_get_teams`, but the
+        members of several teams are read at the same time.
+        """
+        teams = await self.get_all(f'/orgs/{self.org_name}/teams')
+        members = await asyncio.gather(*(
+            self.get_all(f'/orgs/{self.org_name}/teams/{t["slug"]}/members')
+            for t in teams))
+        team_models = []
+        for team, team_members in zip(teams, members):
+            model = Team(str(team['id']), team['name'], '')
+            model.members = set(str(user['id']) for user in team_members)
+            team_models.append(model)
+        return team_models
+
+    async def aclose(self):
+        """Close the connections of the client."""
+        await self.client.aclose()
+
+
+class LoopGithubInterface:
+    """
+    :class:`GithubInterface` reading teams on an event loop.
+
+    Reading every team is left to an :class:`AsyncGithubInterface`, run on the
+    loop of a bridge; every other method is that of a
+    :class:`GithubInterface`.
+    """
+
+    def __init__(self,
+                 gh: GithubInterface,
+                 async_gh: AsyncGithubInterface,
+                 bridge: LoopBridge):
+        """
+        Initialize the interface.
+
+        :param gh: interface to use for everything but reading teams
+        :param async_gh: interface to read teams with
+        :param bridge: bridge to the loop to read teams on
+        """
+        self.gh = gh
+        self.async_gh = async_gh
+        self.bridge = bridge
+
+    @span('github.org_get_teams')
+    def org_get_teams(self) -> List[Team]:
+        """Return the teams of the organization, with their members."""
+        return self.bridge.run(self.async_gh.org_get_teams())
+
+    def __getattr__(self, attr: str) -> Any:
+        """Look up every other attribute on the synchronous interface."""
+        if attr in ('gh', 'async_gh', 'bridge'):
+            # Only missing while the object is being copied or unpickled
+            raise AttributeError(attr)
+        return getattr(self.gh, attr)
@@ -1,18 +1,133 @@
 """Utility classes for interacting with Slack API."""
+from collections import OrderedDict
+from interface.cloudwatch_metrics import CWMetrics
+from requests.adapters import HTTPAdapter
 from slack import WebClient
 from slack.web.base_client import SlackResponse
-from typing import Dict, Any, List, cast
+from typing import Callable, Dict, Any, List, Optional, Tuple, cast
+from urllib3.exceptions import ConnectTimeoutError
+from utils.slack_msg_fmt import split_message
+from utils.tracing import trace_methods
+import hashlib
+import hmac
 import logging
+import requests
+import threading
+import time
 
+# Key of an entry of a directory, like ``('members', channel_id)``
+Key = Tuple[str, Any]
 
+
+class SlackDirectory:
+    """
+    Channels and channel members read from Slack, kept for a while.
+
+    Entries are kept for ``ttl`` seconds, and at most :attr:`SIZE` of them,
+    forgetting the least recently used first. Slack events changing them
+    forget them sooner (see :meth:`invalidate`).
+
+    Every server process has its own directory, and Slack sends each event to
+    only one of them: the others keep their entries until they expire. Reads
+    may thus be up to ``ttl`` seconds out of date, even with events.
+    """
+
+    SIZE = 4096
+
+    # Events changing the list of channels
+    CHANNEL_EVENTS = {'channel_created', 'channel_deleted', 'channel_rename',
+                      'channel_archive', 'channel_unarchive'}
+    # Events changing the members of a channel
+    MEMBER_EVENTS = {'member_joined_channel', 'member_left_channel'}
+    EVENTS = CHANNEL_EVENTS | MEMBER_EVENTS
+
+    def __init__(self, ttl: float):
+        """
+        Initialize an empty directory.
+
+        :param ttl: seconds entries are kept for, or 0 to keep none
+        """
+        self.ttl = ttl
+        self.entries: 'OrderedDict[Key, Tuple[float, Any]]' = \
+            OrderedDict()
+        # Incremented whenever entries are forgotten, so that values fetched
+        # before are not kept
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Key, fetch: Callable[[], Any]) -> Any:
+        """
+        Get an entry, fetching it from Slack if missing or too old.
+
+        :param key: key of the entry
+        :param fetch: function reading the entry from Slack
+        :return: the entry
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                return entry[1]
+            generation = self.generation
+        value = fetch()
+        with self.lock:
+            if self.ttl > 0 and generation == self.generation:
+                self.entries[key] = (now + self.ttl, value)
+                self.entries.move_to_end(key)
+                if len(self.entries) > self.SIZE:
+                    self.entries.popitem(last=False)
+        return value
+
+    def forget(self, match: Callable[[Key], bool]):
+        """Forget the entries whose key matches."""
+        with self.lock:
+            self.generation += 1
+            for key in [k for k in self.entries if match(k)]:
+                del self.entries[key]
+
+    def invalidate(self, event: Dict[str, Any]):
+        """
+        Forget the entries changed by a Slack event.
+
+        :param event: the event, as in the ``event`` of its payload
+        """
+        event_type = event.get('type')
+        if event_type in self.CHANNEL_EVENTS:
+            logging.debug(f"Forgetting channels after {event_type}")
+            channel = event.get('channel')
+            if isinstance(channel, dict):
+                channel = channel.get('id')
+            self.forget(lambda k: k[0] == 'channels' or
+                        k == ('members', channel))
+        elif event_type in self.MEMBER_EVENTS:
+            channel = event.get('channel')
+            logging.debug(f"Forgetting members of {channel} after "
+                          f"{event_type}")
+            self.forget(lambda k: k == ('members', channel))
+
+
+@trace_methods('slack')
 class Bot:
-    """Utility class for calling Slack APIs."""
+    """
+    Utility class for calling Slack APIs.
+
+    Channels and channel members are read from every page of results, and
+    kept in a :class:`SlackDirectory` for ``directory_ttl`` seconds.
+    """
 
-    def __init__(self, sc: WebClient, slack_channel: str = ''):
+    # Results per page of paginated methods
+    PAGE_SIZE = 200
+
+    def __init__(self,
+                 sc: WebClient,
+                 slack_channel: str = '',
+                 directory_ttl: float = 300):
         """Initialize Bot by creating a WebClient Object."""
         logging.info("Initializing Slack client interface")
         self.sc = sc
         self.slack_channel = slack_channel
+        self.directory = SlackDirectory(directory_ttl)
 
     def send_dm(self, message: str, slack_user_id: str):
         """Send direct message to user with id of slack_user_id."""
@@ -43,33 +158,55 @@ class Bot:
                           f"error: {response['error']}")
             raise SlackAPIError(response['error'])
 
-    def get_channel_users(self, channel_id: str) -> Dict[str, Any]:
+    def get_channel_users(self, channel_id: str) -> List[str]:
         """Retrieve list of user IDs from channel with channel_id."""
-        logging.debug(f"Retrieving user IDs from channel {channel_id}")
-        response = cast(SlackResponse, self.sc.conversations_members(
-            channel=channel_id
-        ))
-        if not response['ok']:
-            logging.error("User retrieval "
-                          f"from channel {channel_id} failed with "
-                          f"error: {response['error']}")
-            raise SlackAPIError(response['error'])
-        else:
-            return cast(Dict[str, Any], response["members"])
+        def fetch() -> List[str]:
+            logging.debug(f"Retrieving user IDs from channel {channel_id}")
+            return self.__paginate('conversations_members', 'members',
+                                   channel=channel_id)
+        return list(self.directory.get(('members', channel_id), fetch))
 
     def get_channel_names(self) -> List[str]:
         """Retrieve list of channel names."""
         return list(map(lambda c: str(c['name']), self.get_channels()))
 
-    def get_channels(self) -> List[Any]:
-        """Retrieve list of channel objects."""
-        resp = cast(SlackResponse, self.sc.conversations_list())
-        if not resp['ok']:
-            logging.error(f"Channel retrieval failed with "
-                          f"error: {resp['error']}")
-            raise SlackAPIError(resp['error'])
-        else:
-            return cast(List[Any], resp['channels'])
+    def get_channels(self, exclude_archived: bool = False) -> List[Any]:
+        """
+        Retrieve list of channel objects.
+
+        :param exclude_archived: leave archived channels out
+        """
+        def fetch() -> List[Any]:
+            kwargs = {'exclude_archived': True} if exclude_archived else {}
+            return self.__paginate('conversations_list', 'channels',
+                                   **kwargs)
+        return list(self.directory.get(('channels', exclude_archived),
+                                       fetch))
+
+    def __paginate(self, method: str, key: str, **kwargs) -> List[Any]:
+        """
+        Call a paginated API method, and return the results of every page.
+
+        :param method: name of the method of the web client
+        :param key: key of the results in responses, like ``channels``
+        :raises: SlackAPIError if any call fails
+        """
+        results: List[Any] = []
+        cursor = None
+        while True:
+            if cursor:
+                kwargs['cursor'] = cursor
+            resp = cast(SlackResponse, getattr(self.sc, method)(
+                limit=self.PAGE_SIZE, **kwargs))
+            if not resp['ok']:
+                logging.error(f"Call to {method} failed with "
+                              f"error: {resp['error']}")
+                raise SlackAPIError(resp['error'])
+            results.extend(resp[key])
+            metadata = resp.get('response_metadata') or {}
+            cursor = metadata.get('next_cursor')
+            if not cursor:
+                return results
 
     def create_channel(self, channel_name):
         """
@@ -95,6 +232,7 @@ class Bot:
                               format(channel_name, response['error']))
                 raise SlackAPIError(response['error'])
         else:
+            self.directory.forget(lambda k: k[0] == 'channels')
             return response["name"]
 
     def send_event_notif(self, message):
@@ -112,6 +250,185 @@ class Bot:
                           format(se.error))
 
 
+class ResponsePoster:
+    """
+    Deliver responses to commands through their ``response_url``.
+
+    Responses are posted through a shared :class:`requests.Session`, so that
+    connections to Slack are pooled and reused instead of opening a new TLS
+    connection per command. Every post has a timeout, and is retried with
+    exponential backoff if Slack cannot be connected to or responds with a
+    5xx or 429 status (waiting for as long as its ``Retry-After`` header
+    says). Posts failing once sent, like when Slack takes too long to
+    respond, are not retried, since Slack may have shown them already.
+
+    Slack cuts off long messages, so a response with more than
+    ``MAX_TEXT_LENGTH`` characters of text is split across several posts;
+    Slack only accepts ``MAX_POSTS`` posts per ``response_url``.
+    """
+
+    POOL_SIZE = 10
+    # Seconds to wait to connect, then to wait for a response
+    TIMEOUT = (3.05, 10)
+    MAX_ATTEMPTS = 4
+    # Seconds before the first retry, doubled before every retry after it
+    BACKOFF = 0.5
+    # Longest wait before a retry, whatever ``Retry-After`` says
+    MAX_BACKOFF = 10
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    MAX_POSTS = 5
+    MAX_TEXT_LENGTH = 15000
+
+    def __init__(self, metrics: Optional[CWMetrics] = None):
+        """
+        Initialize the session and its connection pool.
+
+        :param metrics: where to submit delivery latencies, if anywhere
+        """
+        self.metrics = metrics
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def post(self,
+             response_url: str,
+             resp: Dict[str, Any],
+             cmd_name: str = '',
+             max_attempts: Optional[int] = None) -> bool:
+        """
+        Post the response to a command, in as many parts as needed.
+
+        :param response_url: ``response_url`` of the command
+        :param resp: message to respond with
+        :param cmd_name: name of the command, for metrics
+        :param max_attempts: times to try posting each part, if not
+                             ``MAX_ATTEMPTS``
+        :return: true if every part was delivered
+        """
+        start = time.time()
+        messages = self.split(resp)
+        if len(messages) > self.MAX_POSTS:
+            logging.warning(f"Response to {cmd_name} needs {len(messages)} "
+                            f"posts, only sending {self.MAX_POSTS}")
+            messages = messages[:self.MAX_POSTS]
+
+        delivered = True
+        for message in messages:
+            if not self.post_message(response_url, message,
+                                     max_attempts or self.MAX_ATTEMPTS):
+                delivered = False
+                break
+
+        ms = (time.time() - start) * 1000
+        if self.metrics is not None:
+            self.metrics.submit_response_mstime(cmd_name, ms, delivered)
+        return delivered
+
+    def split(self, resp: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Split a message with long text into several messages.
+
+        Other fields of the message are kept in the first message, apart from
+        ``response_type``, which is kept in all of them.
+
+        :param resp: message to split
+        :return: list of messages, in order
+        """
+        text = resp.get('text')
+        if not isinstance(text, str) or len(text) <= self.MAX_TEXT_LENGTH:
+            return [resp]
+
+        parts = split_message(text, self.MAX_TEXT_LENGTH)
+        messages = [dict(resp, text=parts[0])]
+        for part in parts[1:]:
+            message = {'text': part}
+            if 'response_type' in resp:
+                message['response_type'] = resp['response_type']
+            messages.append(message)
+        return messages
+
+    def post_message(self,
+                     response_url: str,
+                     message: Dict[str, Any],
+                     max_attempts: int) -> bool:
+        """
+        Post a single message, retrying if Slack is unavailable.
+
+        :param response_url: ``response_url`` of the command
+        :param message: message to post
+        :param max_attempts: times to try posting it
+        :return: true if the message was delivered
+        """
+        for attempt in range(max_attempts):
+            wait = self.BACKOFF * 2 ** attempt
+            try:
+                r = self.session.post(response_url, json=message,
+                                      timeout=self.TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not self.unsent(e):
+                    logging.error(f"Posting response failed, not retrying "
+                                  f"in case it was delivered: {e}")
+                    return False
+                logging.warning(f"Posting response failed: {e}")
+            else:
+                if r.ok:
+                    return True
+                if r.status_code not in self.RETRY_STATUSES:
+                    logging.error(f"Response rejected with status "
+                                  f"{r.status_code}: {r.text}")
+                    return False
+                logging.warning(f"Posting response failed with status "
+                                f"{r.status_code}")
+                retry_after = r.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    wait = float(retry_after)
+            if attempt + 1 < max_attempts:
+                time.sleep(min(wait, self.MAX_BACKOFF))
+        logging.error(f"Giving up posting response after "
+                      f"{max_attempts} attempts")
+        return False
+
+    @staticmethod
+    def unsent(e: requests.RequestException) -> bool:
+        """Check if a post failed before it was sent, when connecting."""
+        if isinstance(e, requests.exceptions.ConnectTimeout):
+            return True
+        # Connection errors wrap the error of urllib3, with its cause
+        reason = getattr(e.args[0], 'reason', None) if e.args else None
+        return isinstance(reason, ConnectTimeoutError)
+
+
+def verify_signature(signing_secret: str,
+                     timestamp: Optional[str],
+                     body: bytes,
+                     signature: Optional[str],
+                     max_age: float = 5 * 60) -> bool:
+    """
+    Verify that a request comes from Slack.
+
+    See https://api.slack.com/authentication/verifying-requests-from-slack
+
+    :param signing_secret: signing secret of the Slack app
+    :param timestamp: the ``X-Slack-Request-Timestamp`` header
+    :param body: body of the request, as received
+    :param signature: the ``X-Slack-Signature`` header
+    :param max_age: seconds after which a request could be a replay
+    :return: true if the request is signed, and recent
+    """
+    if not timestamp or not signature:
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > max_age:
+            return False
+    except ValueError:
+        return False
+    expected = 'v0=' + hmac.new(signing_secret.encode(),
+                                f'v0:{timestamp}:'.encode() + body,
+                                hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
 class SlackAPIError(Exception):
     """Exception representing an error while calling Slack API."""
 
@@ -0,0 +1,94 @@
+"""Deliver responses to commands on an event loop, through httpx."""
+import asyncio
+import httpx
+import logging
+
+from interface.cloudwatch_metrics import CWMetrics
+from interface.slack import ResponsePoster
+from typing import Any, Dict, Optional
+from utils.aio import LoopBridge
+
+
+class AsyncResponsePoster(ResponsePoster):
+    """
+    :class:`ResponsePoster` posting on the event loop of a bridge.
+
+    Responses are split and retried like :class:`ResponsePoster` does, but
+    every post is sent by a shared :class:`httpx.AsyncClient`, and waiting to
+    retry does not take up a thread.
+    """
+
+    # Errors raised before a post is sent, which can be retried
+    UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout,
+                     httpx.PoolTimeout)
+
+    def __init__(self,
+                 bridge: LoopBridge,
+                 metrics: Optional[CWMetrics] = None,
+                 client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the poster.
+
+        :param bridge: bridge to the loop to post on
+        :param metrics: where to submit delivery latencies, if anywhere
+        :param client: HTTP client to post with
+        """
+        self.metrics = metrics
+        self.bridge = bridge
+        connect, read = self.TIMEOUT
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=self.POOL_SIZE))
+
+    def post_message(self,
+                     response_url: str,
+                     message: Dict[str, Any],
+                     max_attempts: int) -> bool:
+        """
+        Post a single message, retrying if Slack is unavailable.
+
+        :param response_url: ``response_url`` of the command
+        :param message: message to post
+        :param max_attempts: times to try posting it
+        :return: true if the message was delivered
+        """
+        return self.bridge.run(self.post_message_async(response_url,
+                                                       message,
+                                                       max_attempts))
+
+    async def post_message_async(self,
+                                 response_url: str,
+                                 message: Dict[str, Any],
+                                 max_attempts: int) -> bool:
+        """Post a single message, like :meth:`post_message`."""
+        for attempt in range(max_attempts):
+            wait = self.BACKOFF * 2 ** attempt
+            try:
+                r = await self.client.post(response_url, json=message)
+            except self.UNSENT_ERRORS as e:
+                logging.warning(f"Posting response failed: {e}")
+            except httpx.TransportError as e:
+                logging.error(f"Posting response failed, not retrying in "
+                              f"case it was delivered: {e}")
+                return False
+            else:
+                if r.status_code < 400:
+                    return True
+                if r.status_code not in self.RETRY_STATUSES:
+                    logging.error(f"Response rejected with status "
+                                  f"{r.status_code}: {r.text}")
+                    return False
+                logging.warning(f"Posting response failed with status "
+                                f"{r.status_code}")
+                retry_after = r.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    wait = float(retry_after)
+            if attempt + 1 < max_attempts:
+                await asyncio.sleep(min(wait, self.MAX_BACKOFF))
+        logging.error(f"Giving up posting response after "
+                      f"{max_attempts} attempts")
+        return False
+
+    async def aclose(self):
+        """Close the connections of the client."""
+        await self.client.aclose()
@@ -0,0 +1,154 @@
+"""Test the ASGI server."""
+import asyncio
+import json
+import threading
+
+from app.asgi import AsgiApp
+from typing import Any, Dict, List, Tuple
+from unittest import mock, TestCase
+from utils.aio import LoopBridge
+
+
+class TestAsgiApp(TestCase):
+    """Test the routing and handling of requests."""
+
+    def setUp(self):
+        """Set up an app with mock handlers."""
+        self.config = mock.Mock()
+        self.config.github_webhook_endpt = '/webhook'
+        self.config.slack_signing_secret = 'secret'
+        self.config.asgi_handler_threads = '2'
+        self.config.github_webhook_workers = '2'
+        self.config.warm_up_clients = False
+        self.parser = mock.Mock()
+        self.webhooks = mock.Mock()
+        self.events = mock.Mock()
+        self.client = mock.Mock()
+        self.client.aclose = mock.AsyncMock()
+        self.bridge = LoopBridge()
+        self.app = AsgiApp(self.config, self.bridge, self.parser,
+                           self.webhooks, self.events, [self.client])
+        verify = mock.patch('app.asgi.verify_signature', return_value=True)
+        self.verify = verify.start()
+        self.addCleanup(verify.stop)
+
+    async def call(self,
+                   method: str,
+                   path: str,
+                   body: bytes = b'',
+                   headers: List[Tuple[bytes, bytes]] = []) \
+            -> Tuple[int, Dict[bytes, bytes], bytes]:
+        """Send a request to the app, and return its response."""
+        messages = [{'type': 'http.request', 'body': body[:3],
+                     'more_body': True},
+                    {'type': 'http.request', 'body': body[3:]}]
+        sent: List[Dict[str, Any]] = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+        await self.app({'type': 'http', 'method': method, 'path': path,
+                        'headers': headers}, receive, send)
+        return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+    def request(self, *args, **kwargs) \
+            -> Tuple[int, Dict[bytes, bytes], bytes]:
+        """Send a request, and shut the app down once it is handled."""
+        async def run() -> Tuple[int, Dict[bytes, bytes], bytes]:
+            response = await self.call(*args, **kwargs)
+            await self.app.shutdown()
+            return response
+        return asyncio.run(run())
+
+    def test_check(self):
+        """Test the status page, and security headers."""
+        status, headers, body = self.request('GET', '/')
+        self.assertEqual(status, 200)
+        self.assertEqual(body.decode(), '🚀')
+        self.assertEqual(headers[b'x-content-type-options'], b'nosniff')
+
+    def test_not_found(self):
+        """Test requests to unknown paths and with the wrong method."""
+        self.assertEqual(self.request('GET', '/nothing')[0], 404)
+        self.assertEqual(self.request('GET', '/slack/commands')[0], 405)
+
+    def test_command(self):
+        """Test that commands are acknowledged, then handled in a thread."""
+        threads = []
+        self.parser.handle_app_command.side_effect = \
+            lambda *args: threads.append(threading.current_thread().name)
+        body = b'text=team+list&user_id=U123&command=%2Frocket&' \
+            b'response_url=https%3A%2F%2Fhooks.slack.com%2F1'
+        status, _, resp = self.request('POST', '/slack/commands', body, [
+            (b'X-Slack-Request-Timestamp', b'1'),
+            (b'X-Slack-Signature', b'v0=abc')])
+        self.assertEqual((status, resp), (200, b''))
+        self.verify.assert_called_once_with('secret', '1', body, 'v0=abc')
+        self.parser.handle_app_command.assert_called_once_with(
+            'team list', 'U123', 'https://hooks.slack.com/1')
+        self.assertTrue(threads[0].startswith('handler'))
+        self.client.aclose.assert_awaited_once_with()
+
+    def test_command_not_verified(self):
+        """Test that unsigned commands are not handled."""
+        self.verify.return_value = False
+        status, _, resp = self.request('POST', '/slack/commands', b'text=a')
+        self.assertEqual(resp, b'Slack signature could not be verified')
+        self.parser.handle_app_command.assert_not_called()
+
+    def test_github_webhook(self):
+        """Test that webhooks are handled, and their response returned."""
+        self.webhooks.handle.return_value = ('Webhook queued', 202)
+        status, _, resp = self.request('POST', '/webhook', b'{}', [
+            (b'X-Hub-Signature', b'sha1=abc'),
+            (b'X-GitHub-Event', b'team'),
+            (b'X-GitHub-Delivery', b'1')])
+        self.assertEqual((status, resp), (202, b'Webhook queued'))
+        self.webhooks.handle.assert_called_once_with(
+            b'{}', 'sha1=abc', None, 'team', '1')
+
+    def test_handler_error(self):
+        """Test that errors while handling become server errors."""
+        self.webhooks.handle.side_effect = Exception
+        self.assertEqual(self.request('POST', '/webhook', b'{}')[0], 500)
+
+    def test_slack_events(self):
+        """Test answering URL verifications, and handling events."""
+        status, headers, resp = self.request(
+            'POST', '/slack/events',
+            json.dumps({'type': 'url_verification',
+                        'challenge': 'abc'}).encode())
+        self.assertEqual(json.loads(resp), {'challenge': 'abc'})
+        self.assertEqual(headers[b'content-type'], b'application/json')
+
+        event = {'type': 'event_callback',
+                 'event': {'type': 'team_join', 'user': {'id': 'U123'}}}
+        self.request('POST', '/slack/events', json.dumps(event).encode())
+        self.events.handle_team_join.assert_called_once_with(event)
+
+        event = {'type': 'event_callback',
+                 'event': {'type': 'member_left_channel', 'user': 'U123',
+                           'channel': 'C123'}}
+        self.request('POST', '/slack/events', json.dumps(event).encode())
+        self.events.handle_directory_event.assert_called_once_with(event)
+
+    def test_lifespan(self):
+        """Test starting the app, and stopping it."""
+        messages = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+            if message['type'] == 'lifespan.startup.complete':
+                self.assertIsNotNone(self.bridge.loop)
+        asyncio.run(self.app({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete',
+                                'lifespan.shutdown.complete'])
+        self.assertIsNone(self.bridge.loop)
+        self.webhooks.start_workers.assert_called_once_with(2)
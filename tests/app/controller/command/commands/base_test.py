@@ -0,0 +1,42 @@
+"""Test the argument parser of commands."""
+import io
+from app.controller.command.commands.base import CommandArgumentParser, \
+    ArgumentParseError
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import TestCase
+
+
+class TestCommandArgumentParser(TestCase):
+    """Test that parsing errors raise instead of exiting."""
+
+    def setUp(self):
+        """Set up a parser with a subcommand."""
+        self.parser = CommandArgumentParser(prog="/rocket")
+        self.parser.add_argument("karma")
+        subparsers = self.parser.add_subparsers(dest="which")
+        parser_view = subparsers.add_parser("view")
+        parser_view.add_argument("username")
+
+    def test_parse(self):
+        """Test parsing valid arguments."""
+        args = self.parser.parse_args(('karma', 'view', 'U1'))
+        self.assertEqual(args.which, 'view')
+        self.assertEqual(args.username, 'U1')
+
+    def test_error(self):
+        """Test that invalid arguments raise without writing anything."""
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            with self.assertRaises(ArgumentParseError):
+                self.parser.parse_args(['karma', 'view'])
+            with self.assertRaises(ArgumentParseError):
+                self.parser.parse_args(['karma', 'nope'])
+        self.assertEqual(stderr.getvalue(), '')
+
+    def test_help(self):
+        """Test that asking for help raises without writing anything."""
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            with self.assertRaises(ArgumentParseError):
+                self.parser.parse_args(['karma', 'view', '-h'])
+        self.assertEqual(stdout.getvalue(), '')
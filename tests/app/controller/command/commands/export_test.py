@@ -1,7 +1,7 @@
 from app.controller.command.commands import ExportCommand
 from unittest import TestCase
 from app.model import User, Team, Permissions
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 from tests.util import create_test_admin
 
 
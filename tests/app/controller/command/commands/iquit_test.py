@@ -1,7 +1,7 @@
 from app.controller.command.commands import IQuitCommand
 from app.model import User, Team, Permissions
 from unittest import TestCase
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 
 
 def make_user(slack, gid, guser, perm):
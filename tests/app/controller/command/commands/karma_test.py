@@ -1,5 +1,6 @@
 from app.controller.command.commands.karma import KarmaCommand
-from tests.memorydb import MemoryDB
+from app.controller.command.progress import Progress, RunningCommands
+from db.memory import MemoryDB
 from tests.util import create_test_admin
 from flask import Flask
 from app.model import User
@@ -46,6 +47,17 @@ class KarmaCommandTest(TestCase):
         self.assertEqual(self.u0.karma, KarmaCommand.karma_default_amount)
         self.assertEqual(self.u1.karma, KarmaCommand.karma_default_amount)
 
+    def test_handle_reset_all_already_running(self):
+        self.u0.karma = 2019
+        running = RunningCommands()
+        running.add('karma reset')
+        with self.app.app_context():
+            resp, _ = self.testcommand.handle(
+                'karma reset --all', self.admin.slack_id,
+                Progress(running=running))
+        self.assertEqual(resp, KarmaCommand.already_running_error)
+        self.assertEqual(self.u0.karma, 2019)
+
     def test_handle_reset_all_not_as_admin(self):
         self.u1.karma = 20
         with self.app.app_context():
@@ -70,3 +82,25 @@ class KarmaCommandTest(TestCase):
         cmd = 'karma set rando.id 10'
         self.assertEqual(self.testcommand.handle(cmd, self.admin.slack_id),
                          (KarmaCommand.lookup_error, 200))
+
+    def test_handle_top(self):
+        self.u1.name = 'maria'
+        self.u1.karma = 15
+        self.admin.karma = 20
+        resp, _ = self.testcommand.handle('karma top', self.u0.slack_id)
+        self.assertEqual(resp, f'1. {self.admin.name}: 20 karma\n'
+                               '2. maria: 15 karma\n'
+                               f'3. {self.u0.slack_id}: 1 karma')
+
+    def test_handle_top_amount(self):
+        self.u1.karma = 15
+        resp, _ = self.testcommand.handle('karma top 1', self.u0.slack_id)
+        self.assertEqual(resp, f'1. {self.u1.slack_id}: 15 karma')
+        resp, _ = self.testcommand.handle('karma top -3', self.u0.slack_id)
+        self.assertEqual(resp, f'1. {self.u1.slack_id}: 15 karma')
+
+    def test_handle_top_no_users(self):
+        self.db.users = {}
+        self.assertEqual(self.testcommand.handle('karma top',
+                                                 self.u0.slack_id),
+                         ('No one has any karma yet', 200))
@@ -1,8 +1,9 @@
 from app.controller.command.commands.mention import MentionCommand
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 from flask import Flask
 from app.model import User
 from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
 
 
 class MentionCommandTest(TestCase):
@@ -42,3 +43,16 @@ class MentionCommandTest(TestCase):
         self.assertEqual(self.testcommand.handle('rando.id ++',
                                                  self.u0.slack_id),
                          (self.testcommand.lookup_error, 200))
+
+    def test_handle_parallel_add_karma(self):
+        """Test that no karma is lost to concurrent mentions."""
+        def mention(_):
+            return self.testcommand.handle(f'{self.u0.slack_id} ++',
+                                           self.u1.slack_id)
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            resps = list(executor.map(mention, range(1000)))
+        self.assertEqual(resps.count((f'gave 1 karma to {self.u0.name}',
+                                      200)),
+                         1000)
+        self.assertEqual(self.db.retrieve(User, self.u0.slack_id).karma, 1001)
@@ -1,7 +1,8 @@
 from app.controller.command.commands import TeamCommand
+from app.controller.command.progress import Progress, RunningCommands
 from unittest import TestCase, mock
 from app.model import User, Team, Permissions
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 from tests.util import create_test_admin
 from interface.exceptions.github import GithubAPIException
 from flask import Flask
@@ -200,7 +201,6 @@ class TestTeamCommand(TestCase):
                               (self.cmd.lookup_error, 200))
 
     def test_handle_add(self):
-        self.t0.github_team_id = 'githubid'
         self.u0.github_username = 'myuser'
         self.u0.github_id = 'otherID'
         with self.app.app_context():
@@ -211,7 +211,7 @@ class TestTeamCommand(TestCase):
                       'text': 'Added User to brs'}
             self.assertDictEqual(resp, expect)
         self.assertTrue(self.t0.has_member("otherID"))
-        self.gh.add_team_member.assert_called_once_with('myuser', 'githubid')
+        self.gh.add_team_member.assert_called_once_with('myuser', 'BRS')
 
     def test_handle_add_but_forgot_githubid(self):
         self.t0.github_team_id = 'githubid'
@@ -246,7 +246,6 @@ class TestTeamCommand(TestCase):
     def test_handle_add_promote(self):
         self.u0.github_username = 'myuser'
         self.u0.github_id = 'otherID'
-        self.t2.github_team_id = 'githubid'
         with self.app.app_context():
             resp, _ = self.cmd.handle(
                 f'team add leads {self.u0.slack_id}',
@@ -257,12 +256,11 @@ class TestTeamCommand(TestCase):
             self.assertDictEqual(resp, expect)
         self.assertTrue(self.t2.has_member('otherID'))
         self.assertEqual(self.u0.permissions_level, Permissions.team_lead)
-        self.gh.add_team_member.assert_called_once_with('myuser', 'githubid')
+        self.gh.add_team_member.assert_called_once_with('myuser', 'LEADS')
 
     def test_handle_add_promote_current_admin(self):
         self.u0.github_username = 'myuser'
         self.u0.github_id = 'otherID'
-        self.t2.github_team_id = 'githubid'
         # existing admin member should not be "promoted" to lead
         self.u0.permissions_level = Permissions.admin
         self.t3.add_member(self.u0.github_id)
@@ -276,7 +274,7 @@ class TestTeamCommand(TestCase):
             self.assertDictEqual(resp, expect)
         self.assertTrue(self.t2.has_member('otherID'))
         self.assertEqual(self.u0.permissions_level, Permissions.admin)
-        self.gh.add_team_member.assert_called_once_with('myuser', 'githubid')
+        self.gh.add_team_member.assert_called_once_with('myuser', 'LEADS')
 
     def test_handle_remove(self):
         self.u0.github_id = 'githubID'
@@ -480,6 +478,26 @@ class TestTeamCommand(TestCase):
                                   ('Refresh teams was unsuccessful with '
                                    'the following error: error', 200))
 
+    def test_handle_refresh_already_running(self):
+        running = RunningCommands()
+        running.add('team refresh')
+        progress = Progress(running=running)
+        with self.app.app_context():
+            self.assertTupleEqual(
+                self.cmd.handle('team refresh', self.admin.slack_id,
+                                progress),
+                (self.cmd.already_running_error, 200))
+        self.gh.org_get_teams.assert_not_called()
+
+    def test_handle_refresh_progress(self):
+        self.gh.org_get_teams.return_value = [self.t0, self.t1]
+        progress = mock.Mock()
+        progress.start.return_value = True
+        with self.app.app_context():
+            self.cmd.handle('team refresh', self.admin.slack_id, progress)
+        progress.start.assert_called_once_with('team refresh')
+        progress.update.assert_any_call(1, 2, 'teams synced')
+
     def test_handle_refresh_team_edited_on_github(self):
         team = Team('TeamID', 'TeamName', 'android')
         team_update = Team('TeamID', 'new team name', 'android')
@@ -501,6 +519,27 @@ class TestTeamCommand(TestCase):
             self.assertEqual(resp['text'], status)
             self.assertEqual(team, team_update)
 
+    def test_refresh_all_team_up_to_date(self):
+        """Test that an unchanged 'all' team is not stored again."""
+        team_all = Team('ALL', 'all', 'all')
+        team_all.add_member(self.admin.github_id)
+        self.db.teams['ALL'] = team_all
+        self.u0.github_id = ''
+        self.u1.github_id = ''
+        with mock.patch.object(self.db, 'store') as store:
+            self.cmd.refresh_all_team()
+            store.assert_not_called()
+
+    def test_refresh_all_team_adds_missing_members(self):
+        """Test that the 'all' team is stored if a member was added."""
+        team_all = Team('ALL', 'all', 'all')
+        self.db.teams['ALL'] = team_all
+        self.cmd.refresh_all_team()
+        self.gh.add_team_member.assert_called_once_with(
+            self.admin.github_username, 'ALL')
+        self.assertEqual(self.db.retrieve(Team, 'ALL').members,
+                         {self.admin.github_id})
+
     def test_handle_refresh_addition_and_deletion(self):
         """Test team command refresh parser if local differs from github."""
         team = Team('TeamID', 'TeamName', '')
@@ -3,7 +3,7 @@ import jwt
 from app.controller.command.commands import TokenCommand
 from app.controller.command.commands.token import TokenCommandConfig
 from datetime import timedelta
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 from tests.util import create_test_admin
 from app.model import User, Permissions
 from unittest import TestCase
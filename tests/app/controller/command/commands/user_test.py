@@ -1,5 +1,5 @@
 from app.controller.command.commands import UserCommand
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 from tests.util import create_test_admin
 from flask import Flask
 from interface.github import GithubInterface, GithubAPIException
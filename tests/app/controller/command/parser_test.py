@@ -39,7 +39,7 @@ class TestParser(TestCase):
         self.usercmd.handle.return_value = ('', 200)
         self.parser.handle_app_command('user name', 'U061F7AUR', '')
         self.usercmd.handle.\
-            assert_called_once_with("user name", "U061F7AUR")
+            assert_called_once_with("user name", "U061F7AUR", mock.ANY)
         mock_logging_error.assert_not_called()
 
     @mock.patch('logging.error')
@@ -67,8 +67,32 @@ class TestParser(TestCase):
         self.metrics.submit_cmd_mstime.assert_called_once_with(
             'i-quit', mock.ANY)
 
-    @mock.patch('requests.post')
+    @mock.patch('interface.slack.ResponsePoster.post')
     def test_handle_make_post_req(self, post):
         self.parser.handle_app_command('i-quit', 'UFJ43EU67',
                                        'https://google.com')
-        post.assert_called_once_with(url='https://google.com', json=mock.ANY)
+        post.assert_called_once_with('https://google.com', mock.ANY,
+                                     'i-quit')
+
+    def test_handle_command_progress(self):
+        def handle(cmd_txt, user, progress):
+            self.assertTrue(progress.start('user slow'))
+            return '', 200
+        self.usercmd.handle.side_effect = handle
+        # The same long command can run again once it is done
+        self.parser.handle_app_command('user slow', 'U061F7AUR', '')
+        self.parser.handle_app_command('user slow', 'U061F7AUR', '')
+        self.assertEqual(self.usercmd.handle.call_count, 2)
+
+    @mock.patch('utils.tracing.export')
+    def test_handle_app_command_traced(self, mock_export):
+        self.conf.trace_format = 'json'
+        parser = CommandParser(self.conf, self.dbf, self.bot, self.gh,
+                               self.token_conf, self.metrics)
+        parser.commands['user'] = self.usercmd
+        self.usercmd.handle.return_value = ('', 200)
+        parser.handle_app_command('user view', 'U061F7AUR', '')
+        trace, fmt = mock_export.call_args[0]
+        self.assertEqual(trace.name, 'user view')
+        self.assertIsNotNone(trace.duration_ms)
+        self.assertEqual(fmt, 'json')
@@ -0,0 +1,110 @@
+"""Test reporting the progress of long commands."""
+import os
+import tempfile
+
+from app.controller.command.progress import Progress, RunningCommands
+from unittest import mock, TestCase
+
+
+class TestRunningCommands(TestCase):
+    """Test the RunningCommands class."""
+
+    def setUp(self):
+        """Set up two sets sharing a file, like two server processes."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'commands.db')
+        self.a = RunningCommands(path)
+        self.b = RunningCommands(path)
+        time = mock.patch('app.controller.command.progress.time.time')
+        self.time = time.start()
+        self.time.return_value = 1000.0
+        self.addCleanup(time.stop)
+
+    def test_shared(self):
+        """Test that a command run by a process is rejected by the other."""
+        self.assertTrue(self.a.add('team refresh'))
+        self.assertFalse(self.b.add('team refresh'))
+        self.assertTrue(self.b.add('karma reset'))
+        self.a.discard('team refresh')
+        self.assertTrue(self.b.add('team refresh'))
+
+    def test_expired(self):
+        """Test that commands are forgotten after TTL seconds."""
+        self.assertTrue(self.a.add('team refresh'))
+        self.time.return_value += RunningCommands.TTL
+        self.assertTrue(self.b.add('team refresh'))
+        # The key is now the other process's
+        self.a.discard('team refresh')
+        self.assertFalse(self.a.add('team refresh'))
+
+    def test_in_process(self):
+        """Test that without a file, processes do not share commands."""
+        a = RunningCommands()
+        self.assertTrue(a.add('team refresh'))
+        self.assertFalse(a.add('team refresh'))
+        self.assertTrue(RunningCommands().add('team refresh'))
+
+
+class TestProgress(TestCase):
+    """Test the Progress class."""
+
+    def setUp(self):
+        """Set up a progress posting to a mock poster."""
+        self.poster = mock.Mock()
+        self.running = RunningCommands()
+        self.progress = Progress(self.poster, 'https://hooks.slack.com/1',
+                                 self.running)
+        time = mock.patch('app.controller.command.progress.time.time')
+        self.time = time.start()
+        self.time.return_value = 1000.0
+        self.addCleanup(time.stop)
+
+    def posted(self):
+        """Return the texts posted so far."""
+        return [c[0][1]['text'] for c in self.poster.post.call_args_list]
+
+    def test_start(self):
+        """Test that starting posts an ephemeral acknowledgement."""
+        self.assertTrue(self.progress.start('team refresh'))
+        self.poster.post.assert_called_once_with(
+            'https://hooks.slack.com/1',
+            {'text': 'Working on it...',
+             'response_type': 'ephemeral',
+             'replace_original': True},
+            'progress', Progress.MAX_ATTEMPTS)
+
+    def test_reject_duplicate(self):
+        """Test that the same command cannot run twice at once."""
+        other = Progress(self.poster, 'https://hooks.slack.com/2',
+                         self.running)
+        self.assertTrue(self.progress.start('team refresh'))
+        self.assertFalse(other.start('team refresh'))
+        self.assertTrue(other.start('karma reset'))
+        self.progress.finish()
+        self.assertTrue(Progress(running=self.running).start('team refresh'))
+
+    def test_update_throttled(self):
+        """Test that updates are posted at most every INTERVAL seconds."""
+        self.progress.start('team refresh')
+        self.progress.update(1, 10, 'teams synced')
+        self.time.return_value += Progress.INTERVAL
+        self.progress.update(2, 10, 'teams synced')
+        self.progress.update(3, 10, 'teams synced')
+        self.assertEqual(self.posted(), ['Working on it...',
+                                         '2/10 teams synced'])
+
+    def test_update_limited(self):
+        """Test that posts are left for the final response."""
+        self.progress.start('team refresh')
+        for i in range(10):
+            self.time.return_value += Progress.INTERVAL
+            self.progress.update(i, 10, 'teams synced')
+        self.assertEqual(len(self.posted()), 1 + Progress.MAX_UPDATES)
+
+    def test_no_response_url(self):
+        """Test that nothing is posted without a response_url."""
+        progress = Progress(self.poster, '', self.running)
+        self.assertTrue(progress.start('team refresh'))
+        progress.update(1, 10, 'teams synced')
+        self.poster.post.assert_not_called()
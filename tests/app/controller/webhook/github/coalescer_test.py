@@ -0,0 +1,135 @@
+"""Test coalescing GitHub membership events."""
+import threading
+from app.model import User, Team
+from unittest import mock, TestCase
+from app.controller.webhook.github.coalescer import MembershipCoalescer
+from db.memory import MemoryDB
+
+
+class TestMembershipCoalescer(TestCase):
+    """Test gathering membership changes of teams."""
+
+    def setUp(self):
+        """Set up a team and registered users."""
+        self.users = []
+        for i in range(5):
+            u = User(f'U{i}')
+            u.github_id = str(i)
+            u.email = f'user{i}@ubc.ca'
+            self.users.append(u)
+        self.t = Team('1', 'rocket', 'Rocket')
+        self.t.folder = 'folder'
+        self.t.add_member('0')
+        self.db = MemoryDB(users=self.users, teams=[self.t])
+        self.gcp = mock.Mock()
+        self.coalescer = MembershipCoalescer(self.db, self.gcp, window=60)
+
+    def tearDown(self):
+        """Cancel the timers of the test."""
+        with self.coalescer.lock:
+            for timer in self.coalescer.timers.values():
+                timer.cancel()
+
+    def test_single_update(self):
+        """Test that changes of a team are applied in one write."""
+        with mock.patch.object(self.db, 'update_sets',
+                               wraps=self.db.update_sets) as update_sets, \
+                mock.patch.object(self.db, 'query_or',
+                                  wraps=self.db.query_or) as query_or:
+            for i in range(1, 5):
+                self.coalescer.add('1', str(i), True)
+            self.coalescer.add('1', '0', False)
+            self.assertEqual(self.t.members, {'0'})
+
+            team = self.coalescer.flush('1')
+            update_sets.assert_called_once()
+            # Once to look up the changed users, once for Drive permissions
+            self.assertEqual(query_or.call_count, 2)
+        self.assertEqual(team.members, {'1', '2', '3', '4'})
+        self.assertEqual(self.t.members, {'1', '2', '3', '4'})
+        self.gcp.ensure_drive_permissions.assert_called_once()
+        self.assertIsNone(self.coalescer.flush('1'))
+
+    def test_last_change_wins(self):
+        """Test that only the last change of a member is applied."""
+        self.coalescer.add('1', '1', True)
+        self.coalescer.add('1', '1', False)
+        self.coalescer.add('1', '0', False)
+        self.coalescer.add('1', '0', True)
+        team = self.coalescer.flush('1')
+        self.assertEqual(team.members, {'0'})
+
+    def test_unregistered_users_dropped(self):
+        """Test that changes of members without a user are dropped."""
+        self.coalescer.add('1', 'rando', True)
+        self.coalescer.add('1', '1', True)
+        team = self.coalescer.flush('1')
+        self.assertEqual(team.members, {'0', '1'})
+
+    def test_missing_team(self):
+        """Test that changes of teams not in the database are dropped."""
+        self.coalescer.add('2', '1', True)
+        self.assertIsNone(self.coalescer.flush('2'))
+        self.gcp.ensure_drive_permissions.assert_not_called()
+
+    def test_retry_failed_flush(self):
+        """Test that changes failing to be applied are applied later."""
+        update_sets = self.db.update_sets
+        with mock.patch.object(self.db, 'update_sets',
+                               side_effect=Exception('throttled')):
+            self.coalescer.add('1', '1', True)
+            self.coalescer.add('1', '2', True)
+            self.assertIsNone(self.coalescer.flush('1'))
+            self.assertIn('1', self.coalescer.timers)
+            self.coalescer.add('1', '2', False)
+            self.coalescer.add('1', '3', True)
+            self.db.update_sets.side_effect = update_sets
+            team = self.coalescer.flush('1')
+        self.assertEqual(team.members, {'0', '1', '3'})
+        self.assertEqual(self.coalescer.attempts, {})
+
+    def test_drop_after_max_attempts(self):
+        """Test that changes failing too many times are dropped."""
+        self.coalescer.add('1', '1', True)
+        with mock.patch.object(self.db, 'update_sets',
+                               side_effect=Exception('throttled')):
+            for _ in range(MembershipCoalescer.MAX_ATTEMPTS):
+                self.assertIsNone(self.coalescer.flush('1'))
+        self.assertEqual(self.coalescer.pending, {})
+        self.assertEqual(self.coalescer.timers, {})
+        self.assertEqual(self.t.members, {'0'})
+
+    def test_flush_after_window(self):
+        """Test that changes are applied once the window ends."""
+        self.coalescer.window = 0.01
+        flushed = threading.Event()
+        flush = self.coalescer.flush
+
+        def flush_and_signal(team_id):
+            team = flush(team_id)
+            flushed.set()
+            return team
+
+        with mock.patch.object(self.coalescer, 'flush', flush_and_signal):
+            self.coalescer.add('1', '1', True)
+            self.assertTrue(flushed.wait(10))
+        self.assertEqual(self.t.members, {'0', '1'})
+
+    @mock.patch('utils.tracing.export')
+    def test_flush_traced(self, mock_export):
+        """Test that applying changes is traced."""
+        self.coalescer.trace_format = 'emf'
+        self.coalescer.add('1', '1', True)
+        self.coalescer.flush('1')
+        trace, fmt = mock_export.call_args[0]
+        self.assertEqual(trace.name, 'membership.batch')
+        self.assertEqual(trace.dimension, 'Event type')
+        self.assertEqual(trace.spans['db.update_sets'].count, 1)
+        self.assertEqual(fmt, 'emf')
+
+    def test_flush_all(self):
+        """Test applying the changes of every team."""
+        self.coalescer.add('1', '1', True)
+        self.coalescer.flush_all()
+        self.assertEqual(self.t.members, {'0', '1'})
+        self.assertEqual(self.coalescer.pending, {})
@@ -1,6 +1,8 @@
 """Test the GitHub webhook handler."""
 from unittest import mock, TestCase
+from app.controller.webhook.github.events.base import GitHubEventHandler
 from app.controller.webhook.github import GitHubWebhookHandler
+from app.controller.webhook.github.deliveries import DeliveryLog
 
 
 class TestGithubWebhookCore(TestCase):
@@ -104,3 +106,160 @@ class TestGithubWebhookCore(TestCase):
                                                 {"action": "member_added"})
         self.assertEqual(rsp, 'Hashed signature is not valid')
         self.assertEqual(code, 400)
+
+    @mock.patch('app.controller.webhook.github.'
+                'core.GitHubWebhookHandler.verify_hash')
+    @mock.patch('app.controller.webhook.github.'
+                'core.MembershipEventHandler.handle')
+    def test_verify_and_queue_event(self, mock_handle_mem_event,
+                                    mock_verify_hash):
+        """Test that events are queued instead of handled, if possible."""
+        mock_verify_hash.return_value = True
+        queue = mock.Mock()
+        webhook_handler = GitHubWebhookHandler(self.dbf, self.gh,
+                                               self.config, queue=queue)
+        payload = {"action": "added"}
+        rsp, code = webhook_handler.handle(None, None, payload, 'membership')
+        self.assertEqual(code, 202)
+        queue.put.assert_called_once_with('membership.added', payload, '')
+        mock_handle_mem_event.assert_not_called()
+
+        webhook_handler.handle_queued('membership.added', payload)
+        mock_handle_mem_event.assert_called_once_with(payload)
+
+    @mock.patch('app.controller.webhook.github.'
+                'core.GitHubWebhookHandler.verify_hash')
+    def test_unsupported_event_not_queued(self, mock_verify_hash):
+        """Test that unsupported events are not queued."""
+        mock_verify_hash.return_value = True
+        queue = mock.Mock()
+        webhook_handler = GitHubWebhookHandler(self.dbf, self.gh,
+                                               self.config, queue=queue)
+        rsp, code = webhook_handler.handle(None, None, {"action": "nope"})
+        self.assertEqual(code, 202)
+        queue.put.assert_not_called()
+
+    @mock.patch('app.controller.webhook.github.'
+                'core.GitHubWebhookHandler.verify_hash')
+    @mock.patch('app.controller.webhook.github.'
+                'core.MembershipEventHandler.handle')
+    def test_duplicate_delivery(self, mock_handle_mem_event,
+                                mock_verify_hash):
+        """Test that deliveries are only handled once."""
+        mock_verify_hash.return_value = True
+        mock_handle_mem_event.return_value = ("rsp", 200)
+        webhook_handler = GitHubWebhookHandler(
+            self.dbf, self.gh, self.config,
+            deliveries=DeliveryLog(':memory:'))
+        payload = {"action": "added"}
+        webhook_handler.handle(None, None, payload, 'membership', 'abc')
+        rsp, code = webhook_handler.handle(None, None, payload,
+                                           'membership', 'abc')
+        self.assertEqual(code, 200)
+        webhook_handler.handle(None, None, payload, 'membership', 'def')
+        self.assertEqual(mock_handle_mem_event.call_count, 2)
+
+    @mock.patch('app.controller.webhook.github.'
+                'core.GitHubWebhookHandler.verify_hash')
+    @mock.patch('app.controller.webhook.github.'
+                'core.MembershipEventHandler.handle')
+    def test_failed_delivery_redelivered(self, mock_handle_mem_event,
+                                         mock_verify_hash):
+        """Test that deliveries that failed are handled when redelivered."""
+        mock_verify_hash.return_value = True
+        mock_handle_mem_event.side_effect = [Exception('oops'), ("rsp", 200)]
+        webhook_handler = GitHubWebhookHandler(
+            self.dbf, self.gh, self.config,
+            deliveries=DeliveryLog(':memory:'))
+        payload = {"action": "added"}
+        with self.assertRaises(Exception):
+            webhook_handler.handle(None, None, payload, 'membership', 'abc')
+        rsp, _ = webhook_handler.handle(None, None, payload,
+                                        'membership', 'abc')
+        self.assertEqual(rsp, 'rsp')
+
+    def test_ordering_key(self):
+        """Test that events are ordered by team."""
+        self.assertEqual(self.webhook_handler.get_ordering_key(
+            {"action": "added", "team": {"id": 42}}), 'team:42')
+        self.assertEqual(self.webhook_handler.get_ordering_key(
+            {"action": "member_added"}), '')
+
+    def test_routing_by_event(self):
+        """Test that the event is used to pick the handler."""
+        self.assertIsNone(self.webhook_handler.get_event_handler(
+            {"action": "added"}, 'team'))
+        self.assertEqual(self.webhook_handler.get_event_handler(
+            {"action": "added"}, 'membership').supported_event, 'membership')
+        self.assertEqual(self.webhook_handler.get_event_handler(
+            {"action": "created"}).supported_event, 'team')
+        self.assertIsNone(self.webhook_handler.get_event_handler({}))
+
+    def test_register(self):
+        """Test that handlers of new events can be registered."""
+        class StarEventHandler(GitHubEventHandler):
+            supported_event = 'star'
+            supported_action_list = ['created', 'starred']
+
+            def handle(self, payload):
+                return "starred", 200
+
+        star_handler = StarEventHandler(self.dbf, self.gh, self.config)
+        self.webhook_handler.register(star_handler)
+        self.assertIs(self.webhook_handler.get_event_handler(
+            {"action": "created"}, 'star'), star_handler)
+        self.assertEqual(self.webhook_handler.get_event_handler(
+            {"action": "created"}, 'team').supported_event, 'team')
+        # ``created`` alone no longer says which handler to use
+        self.assertIsNone(self.webhook_handler.get_event_handler(
+            {"action": "created"}))
+        # ``starred`` is not an action of any other event
+        self.assertIs(self.webhook_handler.get_event_handler(
+            {"action": "starred"}), star_handler)
+
+        with self.assertRaises(RuntimeError):
+            self.webhook_handler.register(star_handler)
+
+    @mock.patch('app.controller.webhook.github.'
+                'core.GitHubWebhookHandler.verify_hash')
+    @mock.patch('app.controller.webhook.github.core.json.loads')
+    def test_unsupported_event_not_parsed(self, mock_loads,
+                                          mock_verify_hash):
+        """Test that bodies of unsupported events are never parsed."""
+        mock_verify_hash.return_value = True
+        rsp, code = self.webhook_handler.handle(b'{"action": "opened"}',
+                                                None, None, 'pull_request')
+        self.assertEqual(code, 202)
+        mock_loads.assert_not_called()
+
+    @mock.patch('app.controller.webhook.github.'
+                'core.GitHubWebhookHandler.verify_hash')
+    @mock.patch('app.controller.webhook.github.'
+                'core.MembershipEventHandler.handle')
+    def test_parse_supported_event(self, mock_handle_mem_event,
+                                   mock_verify_hash):
+        """Test that bodies of supported events are parsed when needed."""
+        mock_verify_hash.return_value = True
+        mock_handle_mem_event.return_value = ("rsp", 200)
+        rsp, code = self.webhook_handler.handle(b'{"action": "added"}',
+                                                None, None, 'membership')
+        self.assertEqual(code, 200)
+        mock_handle_mem_event.assert_called_once_with({"action": "added"})
+
+        rsp, code = self.webhook_handler.handle(b'{"action": ',
+                                                None, None, 'membership')
+        self.assertEqual(code, 400)
+
+    @mock.patch('utils.tracing.export')
+    @mock.patch('app.controller.webhook.github.'
+                'core.MembershipEventHandler.handle')
+    def test_dispatch_traced(self, mock_handle_mem_event, mock_export):
+        """Test that handling events is traced."""
+        self.config.trace_format = 'emf'
+        webhook_handler = GitHubWebhookHandler(self.dbf, self.gh, self.config)
+        mock_handle_mem_event.return_value = ("rsp", 200)
+        webhook_handler.dispatch({"action": "added"}, 'membership')
+        trace, fmt = mock_export.call_args[0]
+        self.assertEqual(trace.name, 'membership.added')
+        self.assertEqual(trace.dimension, 'Event type')
+        self.assertEqual(fmt, 'emf')
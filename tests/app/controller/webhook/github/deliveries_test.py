@@ -0,0 +1,66 @@
+"""Test the GitHub webhook delivery log."""
+import os
+import sqlite3
+import tempfile
+from unittest import mock, TestCase
+from app.controller.webhook.github.deliveries import DeliveryLog
+
+
+class TestDeliveryLog(TestCase):
+    """Test remembering received deliveries."""
+
+    def setUp(self):
+        """Set up a log in a temporary file."""
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'webhooks.db')
+        self.log = DeliveryLog(self.path)
+
+    def tearDown(self):
+        """Delete the log."""
+        self.log.conn.close()
+        self.dir.cleanup()
+
+    def test_add(self):
+        """Test that IDs are only new once."""
+        self.assertTrue(self.log.add('a'))
+        self.assertFalse(self.log.add('a'))
+        self.assertTrue(self.log.add('b'))
+
+    def test_discard(self):
+        """Test that discarded IDs are new again."""
+        self.log.add('a')
+        self.log.discard('a')
+        self.assertTrue(self.log.add('a'))
+
+    def test_add_failed(self):
+        """Test that IDs failing to be recorded are still new."""
+        conn = mock.Mock()
+        conn.execute.side_effect = sqlite3.OperationalError('locked')
+        with mock.patch.object(DeliveryLog, 'conn', conn):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.log.add('a')
+        self.assertTrue(self.log.add('a'))
+
+    def test_evicted_from_cache(self):
+        """Test that IDs evicted from the cache are still remembered."""
+        with mock.patch.object(DeliveryLog, 'CACHE_SIZE', 2):
+            for d in ['a', 'b', 'c']:
+                self.assertTrue(self.log.add(d))
+            self.assertNotIn('a', self.log.cache)
+            self.assertFalse(self.log.add('a'))
+
+    def test_shared_file(self):
+        """Test that IDs are remembered across restarts and processes."""
+        self.log.add('a')
+        other = DeliveryLog(self.path)
+        self.assertFalse(other.add('a'))
+        other.conn.close()
+
+    def test_prune(self):
+        """Test that old IDs are eventually forgotten."""
+        with mock.patch.object(DeliveryLog, 'RETENTION', -1), \
+                mock.patch.object(DeliveryLog, 'PRUNE_EVERY', 2):
+            self.log.add('a')
+            self.log.add('b')
+            self.log.cache.clear()
+            self.assertTrue(self.log.add('a'))
@@ -2,7 +2,7 @@
 from app.model import User, Team
 from unittest import mock, TestCase
 from app.controller.webhook.github.events import MembershipEventHandler
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 
 
 def mem_default_payload(teamname: str, teamid: int,
@@ -160,3 +160,15 @@ class TestMembershipHandles(TestCase):
         rsp, code = self.webhook_handler.handle(self.empty_payload)
         self.assertEqual(rsp, 'Unsupported action triggered, ignoring.')
         self.assertEqual(code, 202)
+
+    def test_handle_mem_event_coalesced(self):
+        coalescer = mock.Mock()
+        handler = MembershipEventHandler(self.db, self.gh, self.conf,
+                                         coalescer)
+        rsp, code = handler.handle(self.add_payload)
+        self.assertEqual(code, 200)
+        handler.handle(self.rm_payload)
+        coalescer.add.assert_has_calls([
+            mock.call(str(self.teamid), str(self.memberid), True),
+            mock.call(str(self.teamid), str(self.memberid), False)])
+        self.assertFalse(self.t.has_member(str(self.memberid)))
@@ -1,7 +1,7 @@
 from app.model import User, Team
 from unittest import mock, TestCase
 from app.controller.webhook.github.events import OrganizationEventHandler
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 
 
 def org_default_payload(login: str, uid: int):
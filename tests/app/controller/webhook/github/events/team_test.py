@@ -2,7 +2,7 @@
 from app.model import Team
 from unittest import mock, TestCase
 from app.controller.webhook.github.events import TeamEventHandler
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 
 
 def team_default_payload(team: str, teamid: int):
@@ -0,0 +1,201 @@
+"""Test the GitHub webhook queue."""
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless, TestCase
+from app.controller.webhook.github.queue import WebhookQueue
+
+
+class TestWebhookQueue(TestCase):
+    """Test queuing and draining webhook events."""
+
+    def setUp(self):
+        """Set up a queue in a temporary file."""
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'webhooks.db')
+        self.metrics = mock.Mock()
+        self.queue = WebhookQueue(self.path, self.metrics)
+
+    def tearDown(self):
+        """Stop the workers and delete the queue."""
+        self.queue.stop()
+        self.queue.conn.close()
+        self.dir.cleanup()
+
+    def test_process_in_order(self):
+        """Test that events are handled oldest first, then removed."""
+        self.queue.put('team.created', {'action': 'created', 'n': 1})
+        self.queue.put('team.deleted', {'action': 'deleted', 'n': 2})
+        self.assertEqual(self.queue.size(), 2)
+        handler = mock.Mock()
+        self.assertTrue(self.queue.process_next(handler))
+        self.assertTrue(self.queue.process_next(handler))
+        self.assertFalse(self.queue.process_next(handler))
+        self.assertEqual([c[0][1]['n'] for c in handler.call_args_list],
+                         [1, 2])
+        self.assertEqual(self.queue.size(), 0)
+
+    def test_latency_metrics(self):
+        """Test that the latency of every handled event is submitted."""
+        self.queue.put('team.created', {'action': 'created'})
+        self.queue.process_next(mock.Mock())
+        self.metrics.submit_webhook_mstime.assert_called_once()
+        name, queued_ms, handled_ms = \
+            self.metrics.submit_webhook_mstime.call_args[0]
+        self.assertEqual(name, 'team.created')
+        self.assertGreaterEqual(queued_ms, 0)
+        self.assertGreaterEqual(handled_ms, 0)
+
+    def test_retry_failed_event(self):
+        """Test that failing events are retried, then given up on."""
+        self.queue.put('team.created', {'action': 'created'})
+        handler = mock.Mock(side_effect=Exception('oops'))
+        with mock.patch.object(WebhookQueue, 'RETRY_DELAY', 0):
+            for _ in range(WebhookQueue.MAX_ATTEMPTS):
+                self.assertTrue(self.queue.process_next(handler))
+            self.assertFalse(self.queue.process_next(handler))
+        self.assertEqual(handler.call_count, WebhookQueue.MAX_ATTEMPTS)
+        self.assertEqual(self.queue.size(), 0)
+        self.metrics.submit_webhook_mstime.assert_not_called()
+
+    def test_retry_delay(self):
+        """Test that failed events, and those after them, wait to retry."""
+        self.queue.put('membership.added', {'n': 1}, 'team:1')
+        self.queue.put('membership.removed', {'n': 2}, 'team:1')
+        self.queue.put('team.created', {'n': 3})
+        handler = mock.Mock(side_effect=[Exception('oops'), None, None, None])
+        self.assertTrue(self.queue.process_next(handler))
+        self.assertTrue(self.queue.process_next(handler))
+        self.assertFalse(self.queue.process_next(handler))
+        self.assertEqual([c[0][1]['n'] for c in handler.call_args_list],
+                         [1, 3])
+
+        later = time.time() + WebhookQueue.RETRY_DELAY
+        with mock.patch('app.controller.webhook.github.queue.time.time',
+                        return_value=later):
+            self.assertTrue(self.queue.process_next(handler))
+            self.assertTrue(self.queue.process_next(handler))
+        self.assertEqual([c[0][1]['n'] for c in handler.call_args_list],
+                         [1, 3, 1, 2])
+
+    def test_metrics_failure(self):
+        """Test that workers keep handling events if metrics fail."""
+        self.metrics.submit_webhook_mstime.side_effect = Exception('down')
+        done = threading.Event()
+        handled = []
+
+        def handler(name, payload):
+            handled.append(payload['n'])
+            if len(handled) == 2:
+                done.set()
+
+        self.queue.start(handler, num_workers=1)
+        self.queue.put('team.created', {'action': 'created', 'n': 1})
+        self.queue.put('team.created', {'action': 'created', 'n': 2})
+        self.assertTrue(done.wait(10))
+        self.assertEqual(handled, [1, 2])
+
+    def test_worker_survives_errors(self):
+        """Test that workers keep going after failing to claim events."""
+        done = threading.Event()
+        claim = self.queue.claim
+        calls = []
+
+        def flaky_claim():
+            calls.append(None)
+            if len(calls) == 1:
+                raise Exception('database is locked')
+            return claim()
+        self.queue.claim = flaky_claim  # type: ignore
+        self.queue.put('team.created', {'action': 'created'})
+        with mock.patch.object(WebhookQueue, 'ERROR_BACKOFF', 0.01):
+            self.queue.start(lambda name, payload: done.set(),
+                             num_workers=1)
+            self.assertTrue(done.wait(10))
+
+    @skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    def test_fork(self):
+        """Test that a forked process handles events with its own workers."""
+        # Like the master of a server preloading the app, which forks workers
+        # after using the queue
+        self.queue.put('team.created', {'action': 'created', 'n': 1})
+        conn = self.queue.conn
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                if self.queue.conn is conn:
+                    raise RuntimeError('connection used across a fork')
+                handled = []
+                self.queue.start(lambda name, payload:
+                                 handled.append(payload['n']))
+                self.queue.put('team.created', {'action': 'created', 'n': 2})
+                deadline = time.time() + 10
+                while len(handled) < 2 and time.time() < deadline:
+                    time.sleep(0.01)
+                self.queue.stop()
+                status = 0 if sorted(handled) == [1, 2] else 1
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.WEXITSTATUS(status), 0)
+        self.assertEqual(self.queue.size(), 0)
+        self.assertEqual(self.queue.workers, [])
+
+    def test_start_once(self):
+        """Test that workers are only started once per process."""
+        self.queue.start(mock.Mock(), num_workers=2)
+        self.queue.start(mock.Mock(), num_workers=2)
+        self.assertEqual(len(self.queue.workers), 2)
+
+    def test_survives_restart(self):
+        """Test that events queued before a restart are handled after."""
+        self.queue.put('team.created', {'action': 'created'})
+        self.queue.conn.close()
+        self.queue = WebhookQueue(self.path)
+        handler = mock.Mock()
+        self.assertTrue(self.queue.process_next(handler))
+        handler.assert_called_once_with('team.created',
+                                        {'action': 'created'})
+
+    def test_expired_lease(self):
+        """Test that events left by a dead worker are handled again."""
+        self.queue.put('team.created', {'action': 'created'})
+        self.assertIsNotNone(self.queue.claim())
+        self.assertIsNone(self.queue.claim())
+        with mock.patch.object(WebhookQueue, 'LEASE', -1):
+            self.assertIsNotNone(self.queue.claim())
+
+    def test_ordering_key(self):
+        """Test that events with the same key are handled one at a time."""
+        self.queue.put('membership.added', {'n': 1}, 'team:1')
+        self.queue.put('membership.removed', {'n': 2}, 'team:1')
+        self.queue.put('membership.added', {'n': 3}, 'team:2')
+        self.queue.put('organization.member_added', {'n': 4})
+        claimed = [self.queue.claim() for _ in range(3)]
+        self.assertEqual([json.loads(r['payload'])['n'] for r in claimed],
+                         [1, 3, 4])
+        self.assertIsNone(self.queue.claim())
+
+        # Once the first event of the team is done, the next one can go
+        self.queue.conn.execute('DELETE FROM events WHERE id = ?',
+                                (claimed[0]['id'],))
+        self.assertEqual(json.loads(self.queue.claim()['payload'])['n'], 2)
+
+    def test_workers(self):
+        """Test that worker threads drain the queue."""
+        done = threading.Event()
+        handled = []
+
+        def handler(name, payload):
+            handled.append(payload['n'])
+            if len(handled) == 10:
+                done.set()
+
+        self.queue.start(handler, num_workers=3)
+        for i in range(10):
+            self.queue.put('team.created', {'action': 'created', 'n': i})
+        self.assertTrue(done.wait(10))
+        self.assertEqual(sorted(handled), list(range(10)))
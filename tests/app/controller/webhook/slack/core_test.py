@@ -2,7 +2,7 @@ from app.controller.webhook.slack import SlackEventsHandler
 from app.model import User
 from interface.slack import SlackAPIError
 from unittest import mock, TestCase
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 
 
 class TestSlackWebhookCore(TestCase):
@@ -71,6 +71,13 @@ class TestSlackWebhookCore(TestCase):
         u = self.db.retrieve(User, self.u_id)
         self.assertEqual(u.slack_id, self.u_id)
 
+    def test_handle_directory_event(self):
+        event = {'event': {'type': 'member_joined_channel',
+                           'user': self.u_id, 'channel': 'C123'}}
+        self.handler.handle_directory_event(event)
+        self.bot.directory.invalidate.assert_called_once_with(
+            event['event'])
+
     def test_handle_team_join_slack_error(self):
         self.bot.send_dm.side_effect = SlackAPIError(None)
         self.handler.handle_team_join(self.event)
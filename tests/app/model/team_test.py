@@ -1,3 +1,5 @@
+import pickle
+
 from app.model import Team
 from unittest import TestCase
 
@@ -67,3 +69,83 @@ class TestTeamModel(TestCase):
             " 'members': {'U0G9QF9C6'}," \
             " 'folder': ''}"
         self.assertEqual(str(self.brussel_sprouts), expected)
+
+    def test_slotted(self):
+        """Test that teams do not carry a ``__dict__``."""
+        self.assertFalse(hasattr(self.brussel_sprouts, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.brussel_sprouts.nickname = 'sprouts'
+
+    def test_pickle(self):
+        """Test that teams survive pickling."""
+        self.brussel_sprouts.add_member('abc')
+        team = pickle.loads(pickle.dumps(self.brussel_sprouts))
+        self.assertEqual(Team.to_dict(team),
+                         Team.to_dict(self.brussel_sprouts))
+
+    def test_unpickle_unslotted(self):
+        """Test loading a team pickled before teams were slotted."""
+        team = pickle.loads(
+            b'\x80\x04\x95\xaa\x00\x00\x00\x00\x00\x00\x00\x8c\x0eapp.model.te'
+            b'am\x94\x8c\x04Team\x94\x93\x94)\x81\x94}\x94(\x8c\x0egithub_team'
+            b'_id\x94\x8c\x011\x94\x8c\x10github_team_name\x94\x8c\x08brussels'
+            b'\x94\x8c\x0bdisplayname\x94\x8c\x08Brussels\x94\x8c\x08platform'
+            b'\x94\x8c\x00\x94\x8c\nteam_leads\x94\x8f\x94\x8c\x07members\x94'
+            b'\x8f\x94(\x8c\x02U1\x94\x90\x8c\x06folder\x94h\x0cub.')
+        expected = Team('1', 'brussels', 'Brussels')
+        expected.add_member('U1')
+        self.assertEqual(Team.to_dict(team), Team.to_dict(expected))
+
+    def test_dict_round_trip(self):
+        """Test the Team class methods to_dict() and from_dict()."""
+        self.brussel_sprouts.add_member('abc')
+        self.brussel_sprouts.add_team_lead('abc')
+        d = Team.to_dict(self.brussel_sprouts)
+        self.assertEqual(d, {'github_team_id': '1',
+                             'github_team_name': 'brussel-sprouts',
+                             'displayname': 'Brussel Sprouts',
+                             'members': {'abc'},
+                             'team_leads': {'abc'}})
+        self.assertEqual(Team.from_dict(d), self.brussel_sprouts)
+        self.assertEqual(Team.from_dict({'github_team_id': '1',
+                                         'github_team_name': 'brussel-sprouts',
+                                         'displayname': 'Brussel Sprouts'}),
+                         self.brussel_sprouts_copy)
+
+    def test_from_dict_copies_sets(self):
+        """Test that untrusted dictionaries do not share their sets."""
+        d = {'github_team_id': '1', 'github_team_name': 'brussel-sprouts',
+             'members': {'abc'}, 'team_leads': ['abc']}
+        team = Team.from_dict(d)
+        team.add_member('def')
+        self.assertEqual(d['members'], {'abc'})
+        self.assertEqual(team.team_leads, {'abc'})
+
+    def test_from_dict_trusted_adopts_sets(self):
+        """Test that trusted dictionaries give their sets to the team."""
+        d = {'github_team_id': '1', 'github_team_name': 'brussel-sprouts',
+             'members': {'abc'}, 'team_leads': ['abc']}
+        team = Team.from_dict(d, trusted=True)
+        self.assertIs(team.members, d['members'])
+        self.assertEqual(team.team_leads, {'abc'})
+
+    def test_hash_by_team_id(self):
+        """Test that teams hash the same as long as their ID does."""
+        before = hash(self.brussel_sprouts)
+        self.brussel_sprouts.add_member('abc')
+        self.assertEqual(hash(self.brussel_sprouts), before)
+        self.assertEqual(hash(self.brussel_trouts), before)
+        self.assertEqual(len({self.brussel_sprouts,
+                              self.brussel_sprouts_copy}), 2)
+
+    def test_fingerprint(self):
+        """Test that the fingerprint ignores the order of set elements."""
+        for i in range(20):
+            self.brussel_sprouts.add_member(str(i))
+        for i in reversed(range(20)):
+            self.brussel_sprouts_copy.add_member(str(i))
+        self.assertEqual(self.brussel_sprouts.fingerprint(),
+                         self.brussel_sprouts_copy.fingerprint())
+        self.brussel_sprouts.discard_member('3')
+        self.assertNotEqual(self.brussel_sprouts.fingerprint(),
+                            self.brussel_sprouts_copy.fingerprint())
@@ -1,5 +1,8 @@
 """Test the data model for a user."""
+import pickle
+
 from app.model import User, Permissions
+from decimal import Decimal
 from unittest import TestCase
 
 
@@ -42,3 +45,76 @@ class TestUserModel(TestCase):
             " 'permissions_level': <Permissions.admin: 3>,"\
             " 'karma': 1}"
         self.assertEqual(str(self.admin), expected)
+
+    def test_slotted(self):
+        """Test that users do not carry a ``__dict__``."""
+        self.assertFalse(hasattr(self.admin, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.admin.nickname = 'sprouts'
+
+    def test_pickle(self):
+        """Test that users survive pickling."""
+        self.admin.karma = 7
+        user = pickle.loads(pickle.dumps(self.admin))
+        self.assertEqual(User.to_dict(user), User.to_dict(self.admin))
+
+    def test_unpickle_unslotted(self):
+        """Test loading a user pickled before users were slotted."""
+        user = pickle.loads(
+            b'\x80\x04\x95\xef\x00\x00\x00\x00\x00\x00\x00\x8c\x0eapp.model.us'
+            b'er\x94\x8c\x04User\x94\x93\x94)\x81\x94}\x94(\x8c\x08slack_id'
+            b'\x94\x8c\x02U1\x94\x8c\x04name\x94\x8c\x06Steven\x94\x8c\x05emai'
+            b'l\x94\x8c\x00\x94\x8c\x0fgithub_username\x94h\n\x8c\tgithub_id'
+            b'\x94h\n\x8c\x05major\x94h\n\x8c\x08position\x94h\n\x8c\tbiograph'
+            b'y\x94h\n\x8c\timage_url\x94h\n\x8c\x11permissions_level\x94\x8c'
+            b'\x15app.model.permissions\x94\x8c\x0bPermissions\x94\x93\x94K'
+            b'\x03\x85\x94R\x94\x8c\x05karma\x94K\x01ub.')
+        expected = User('U1')
+        expected.name = 'Steven'
+        expected.permissions_level = Permissions.admin
+        self.assertEqual(User.to_dict(user), User.to_dict(expected))
+
+    def test_dict_round_trip(self):
+        """Test the User class methods to_dict() and from_dict()."""
+        self.admin.github_username = 'sprouts'
+        self.admin.karma = 7
+        d = User.to_dict(self.admin)
+        self.assertEqual(d, {'slack_id': 'U0G9QF9C6',
+                             'permission_level': 'admin',
+                             'email': 'email@email.com',
+                             'github': 'sprouts',
+                             'bio': 'bio test',
+                             'karma': 7})
+        self.assertEqual(User.from_dict(d), self.admin)
+        self.assertEqual(User.from_dict(d, trusted=True), self.admin)
+
+    def test_from_dict_defaults(self):
+        """Test that from_dict() fills in missing fields like __init__."""
+        self.assertEqual(User.from_dict({'slack_id': 'brussel-sprouts'}),
+                         self.brussel_sprouts)
+
+    def test_from_dict_decimal_karma(self):
+        """Test that numbers read from DynamoDB become integers."""
+        user = User.from_dict({'slack_id': 'U1', 'karma': Decimal(5)})
+        self.assertIs(type(user.karma), int)
+        self.assertEqual(user.karma, 5)
+
+    def test_hash_by_slack_id(self):
+        """Test that users hash the same as long as the Slack ID does."""
+        before = hash(self.admin)
+        self.admin.name = 'Sprouts'
+        self.assertEqual(hash(self.admin), before)
+        self.assertEqual(hash(self.brussel_sprouts),
+                         hash(self.brussel_sprouts2))
+        self.assertEqual(len({self.brussel_sprouts, self.brussel_sprouts2,
+                              self.brussel_trouts}), 2)
+
+    def test_fingerprint(self):
+        """Test that the fingerprint changes with any stored attribute."""
+        self.assertEqual(self.brussel_sprouts.fingerprint(),
+                         self.brussel_sprouts2.fingerprint())
+        before = self.admin.fingerprint()
+        self.admin.karma += 1
+        self.assertNotEqual(self.admin.fingerprint(), before)
+        self.admin.karma -= 1
+        self.assertEqual(self.admin.fingerprint(), before)
@@ -27,3 +27,14 @@ class TestScheduler(TestCase):
 
         self.assertEqual(self.bgsched.add_job.call_count, 1)
         self.assertEqual(len(s.modules), 1)
+
+    def test_shutdown_only_if_running(self):
+        """Test shutting down only schedulers that are running."""
+        s = Scheduler(self.bgsched, self.args)
+        self.bgsched.running = False
+        s.shutdown()
+        self.bgsched.shutdown.assert_not_called()
+
+        self.bgsched.running = True
+        s.shutdown()
+        self.bgsched.shutdown.assert_called_once_with()
@@ -0,0 +1,22 @@
+"""Test running the scheduler on its own."""
+from unittest import mock, TestCase
+from app.scheduler.__main__ import main
+
+
+class TestMain(TestCase):
+    """Test the entry point of the scheduler."""
+
+    @mock.patch('app.scheduler.__main__.dictConfig')
+    @mock.patch('app.scheduler.__main__.make_logging_config')
+    @mock.patch('app.scheduler.__main__.Config')
+    @mock.patch('app.scheduler.__main__.Bot')
+    @mock.patch('app.scheduler.__main__.BlockingScheduler')
+    def test_main(self, mock_sched, mock_bot, mock_config, *_):
+        """Test that jobs are scheduled, and restarts announced once."""
+        mock_config.return_value.slack_notification_channel = '#rocket2'
+        mock_sched.return_value.start.side_effect = KeyboardInterrupt
+        main()
+        self.assertEqual(mock_sched.return_value.add_job.call_count, 1)
+        mock_sched.return_value.start.assert_called_once_with()
+        mock_bot.return_value.send_to_channel.assert_called_once_with(
+            mock.ANY, '#rocket2')
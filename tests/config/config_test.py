@@ -52,6 +52,13 @@ class TestConfig(TestCase):
         self.assertTrue(conf.aws_local)
         self.assertEqual(conf.gcp_service_account_credentials,
                          '{"hello":"world"}')
+        self.assertTrue(conf.warm_up_clients)
+        self.assertEqual(conf.trace_format, 'json')
+        self.assertEqual(conf.asgi_handler_threads, '4')
+        self.assertEqual(conf.slack_directory_ttl, '300')
+        # Batching loses events the server stops before applying
+        self.assertEqual(conf.github_webhook_batch_window, '0')
+        self.assertEqual(conf.running_commands_path, '')
 
     def test_incomplete_config(self):
         """Test a few things from an incompleted config object."""
@@ -1,13 +1,15 @@
 """Test the dynamodb interface (requires dynamodb running)."""
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from unittest import TestCase
 import pytest
 import boto3
+from botocore.exceptions import ClientError
 
 from app.model import User, Team, Permissions
 from config import Config
 from tests.util import create_test_team, create_test_admin
-from db.dynamodb import DynamoDB
+from db.dynamodb import DynamoDB, merge_items
+from utils import tracing
 
 
 class TestDDBConstants(TestCase):
@@ -36,12 +38,43 @@ class TestDDBConstants(TestCase):
             self.const.get_set_attrs('non-existent-table-name')
 
 
+class TestMergeItems(TestCase):
+    """Test merging items written concurrently."""
+
+    def test_merge_attributes(self):
+        base = {'github_team_id': '1', 'displayname': 'a', 'platform': 'b'}
+        ours = {'github_team_id': '1', 'displayname': 'c', 'platform': 'b'}
+        theirs = {'github_team_id': '1', 'displayname': 'a', 'folder': 'd'}
+        self.assertEqual(merge_items(base, ours, theirs, []),
+                         {'github_team_id': '1', 'displayname': 'c',
+                          'folder': 'd'})
+
+    def test_merge_sets(self):
+        base = {'github_team_id': '1', 'members': {'a', 'b'}}
+        ours = {'github_team_id': '1', 'members': {'a', 'c'}}
+        theirs = {'github_team_id': '1', 'members': {'a', 'b', 'd'},
+                  'team_leads': {'d'}}
+        self.assertEqual(
+            merge_items(base, ours, theirs, ['members', 'team_leads']),
+            {'github_team_id': '1', 'members': {'a', 'c', 'd'},
+             'team_leads': {'d'}})
+
+    def test_merge_removes_emptied_sets(self):
+        base = {'github_team_id': '1', 'members': {'a'}}
+        ours = {'github_team_id': '1'}
+        self.assertEqual(merge_items(base, ours, base, ['members']),
+                         {'github_team_id': '1'})
+
+
 class TestDynamoDB(TestCase):
     def setUp(self):
         self.config = MagicMock(Config)
         self.config.aws_users_tablename = 'users_test'
         self.config.aws_teams_tablename = 'teams_test'
         self.config.aws_local = True
+        self.config.aws_billing_mode = 'PROVISIONED'
+        self.config.aws_read_capacity = '2'
+        self.config.aws_write_capacity = '1'
         self.ddb = DynamoDB(self.config)
 
     def tearDown(self):
@@ -242,6 +275,114 @@ class TestDynamoDB(TestCase):
         self.assertEqual(team, multi_queries[0])
         self.assertEqual(team2, member_team[0])
 
+    @pytest.mark.db
+    def test_projection(self):
+        """Test that only the requested attributes are read."""
+        user = create_test_admin('abc_123')
+        self.assertTrue(self.ddb.store(user))
+
+        partial = User('abc_123')
+        partial.name = user.name
+        self.assertEqual(self.ddb.retrieve(User, 'abc_123', ['name']),
+                         partial)
+        self.assertEqual(self.ddb.bulk_retrieve(User, ['abc_123'], ['name']),
+                         [partial])
+        self.assertEqual(self.ddb.query(User, [('permission_level', 'admin')],
+                                        ['name']),
+                         [partial])
+        self.assertEqual(self.ddb.query_or(User, [('slack_id', 'abc_123')],
+                                           ['name']),
+                         [partial])
+
+    @pytest.mark.db
+    def test_update_fields(self):
+        user = create_test_admin('abc_123')
+        self.assertTrue(self.ddb.store(user))
+        updated = self.ddb.update_fields(User, 'abc_123',
+                                         {'name': 'Sprouts', 'bio': ''})
+        user.name = 'Sprouts'
+        user.biography = ''
+        self.assertEqual(updated, user)
+        self.assertEqual(self.ddb.retrieve(User, 'abc_123'), user)
+
+        with self.assertRaises(LookupError):
+            self.ddb.update_fields(User, 'rando', {'name': 'Sprouts'})
+
+    @pytest.mark.db
+    def test_update_sets(self):
+        team = create_test_team('1', 'rocket2.0', 'Rocket 2.0')
+        team.add_member('abc_123')
+        self.assertTrue(self.ddb.store(team))
+        updated = self.ddb.update_sets(
+            Team, '1', add={'members': {'apple'}, 'team_leads': {'apple'}},
+            remove={'members': {'abc_123'}})
+        self.assertEqual(updated.members, {'apple'})
+        self.assertEqual(updated.team_leads, {'apple'})
+        self.assertEqual(self.ddb.retrieve(Team, '1'), updated)
+
+        with self.assertRaises(LookupError):
+            self.ddb.update_sets(Team, 'rando', add={'members': {'apple'}})
+        with self.assertRaises(RuntimeError):
+            self.ddb.update_sets(Team, '1', add={'platform': {'web'}})
+
+    @pytest.mark.db
+    def test_store_concurrent_changes(self):
+        team = create_test_team('1', 'rocket2.0', 'Rocket 2.0')
+        self.assertTrue(self.ddb.store(team))
+        first = self.ddb.retrieve(Team, '1')
+        second = self.ddb.retrieve(Team, '1')
+        first.add_member('apple')
+        first.displayname = 'Rocket'
+        second.add_member('banana')
+        second.platform = 'web'
+        self.assertTrue(self.ddb.store(first))
+        self.assertTrue(self.ddb.store(second))
+
+        stored = self.ddb.retrieve(Team, '1')
+        self.assertEqual(stored.members, {'abc_123', 'apple', 'banana'})
+        self.assertEqual(stored.displayname, 'Rocket')
+        self.assertEqual(stored.platform, 'web')
+        # The stored object sees what it was merged with
+        self.assertEqual(second, stored)
+
+    @pytest.mark.db
+    def test_store_after_update(self):
+        self.assertTrue(self.ddb.store(create_test_admin('abc_123')))
+        user = self.ddb.retrieve(User, 'abc_123')
+        self.ddb.increment(User, 'abc_123', 'karma', 10)
+        user.name = 'Sprouts'
+        self.assertTrue(self.ddb.store(user))
+
+        stored = self.ddb.retrieve(User, 'abc_123')
+        self.assertEqual(stored.karma, user.karma)
+        self.assertEqual(stored.name, 'Sprouts')
+
+    @pytest.mark.db
+    def test_increment(self):
+        user = create_test_admin('abc_123')
+        user.karma = 0
+        self.assertTrue(self.ddb.store(user))
+        # Karma of 0 is not stored, and reads back as the default
+        self.assertEqual(self.ddb.increment(User, 'abc_123', 'karma').karma,
+                         2)
+        self.assertEqual(
+            self.ddb.increment(User, 'abc_123', 'karma', -5).karma, -3)
+        with self.assertRaises(LookupError):
+            self.ddb.increment(User, 'rando', 'karma')
+
+    @pytest.mark.db
+    def test_top(self):
+        users = [create_test_admin(str(i)) for i in range(10)]
+        for i, user in enumerate(users):
+            user.karma = (i * 7) % 10
+            self.assertTrue(self.ddb.store(user))
+
+        top = self.ddb.top(User, 'karma', 3)
+        self.assertEqual([u.karma for u in top], [9, 8, 7])
+        self.assertEqual(top[0], users[7])
+        with self.assertRaises(RuntimeError):
+            self.ddb.top(User, 'members', 3)
+
     @pytest.mark.db
     def test_delete_user(self):
         user = create_test_admin('abc_123')
@@ -259,3 +400,56 @@ class TestDynamoDB(TestCase):
         self.assertEqual(len(self.ddb.query(Team)), 1)
         self.ddb.delete(Team, '1')
         self.assertEqual(len(self.ddb.query(Team)), 0)
+
+    @pytest.mark.db
+    def test_provisioned_throughput(self):
+        table = self.ddb.ddb.Table('users_test')
+        self.assertEqual(table.provisioned_throughput['ReadCapacityUnits'],
+                         2)
+        self.assertEqual(table.provisioned_throughput['WriteCapacityUnits'],
+                         1)
+
+    @pytest.mark.db
+    def test_on_demand(self):
+        self.config.aws_users_tablename = 'users_on_demand'
+        self.config.aws_teams_tablename = 'teams_on_demand'
+        self.config.aws_billing_mode = 'PAY_PER_REQUEST'
+        ddb = DynamoDB(self.config)
+        table = ddb.ddb.Table('users_on_demand')
+        self.assertEqual(table.billing_mode_summary['BillingMode'],
+                         'PAY_PER_REQUEST')
+        self.assertTrue(ddb.store(create_test_admin('abc_123')))
+        self.assertEqual(ddb.top(User, 'karma', 1)[0].slack_id, 'abc_123')
+
+    @pytest.mark.db
+    def test_tables_created_concurrently(self):
+        """Test starting while another process creates the tables."""
+        with patch.object(DynamoDB, 'check_valid_table', return_value=False):
+            ddb = DynamoDB(self.config)
+        self.assertTrue(ddb.store(create_test_admin('abc_123')))
+
+    @pytest.mark.db
+    def test_index_created_concurrently(self):
+        """Test that only the process creating an index fills it."""
+        table = MagicMock()
+        table.update.side_effect = ClientError(
+            {'Error': {'Code': 'ValidationException'}}, 'UpdateTable')
+        with patch.object(self.ddb.ddb, 'Table', return_value=table), \
+                patch.object(DynamoDB, 'check_valid_index',
+                             return_value=True):
+            self.ddb._DynamoDB__create_sorted_index('users_test', 'karma')
+        table.scan.assert_not_called()
+        with patch.object(self.ddb.ddb, 'Table', return_value=table), \
+                patch.object(DynamoDB, 'check_valid_index',
+                             return_value=False), \
+                self.assertRaises(ClientError):
+            self.ddb._DynamoDB__create_sorted_index('users_test', 'karma')
+
+    @pytest.mark.db
+    def test_consumed_capacity(self):
+        with tracing.trace('user add') as t:
+            self.assertTrue(self.ddb.store(create_test_admin('abc_123')))
+            self.ddb.retrieve(User, 'abc_123')
+            self.ddb.query(User)
+        self.assertGreater(t.counters['Write Capacity Units'], 0)
+        self.assertGreater(t.counters['Read Capacity Units'], 0)
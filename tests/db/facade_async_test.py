@@ -0,0 +1,69 @@
+"""Test the asynchronous database facade."""
+import asyncio
+import threading
+
+from app.model import User, Team
+from concurrent.futures import ThreadPoolExecutor
+from db.facade_async import ExecutorDBFacade
+from db.memory import MemoryDB
+from unittest import TestCase
+from utils import tracing
+
+
+class TestExecutorDBFacade(TestCase):
+    """Test Case for ExecutorDBFacade class."""
+
+    def setUp(self):
+        """Set up a facade over an in-memory database."""
+        self.users = [User(f'U{i}') for i in range(5)]
+        team = Team('1', 'brussels', 'Brussels')
+        team.members = {'U0', 'U1'}
+        self.db = MemoryDB(users=self.users, teams=[team])
+        self.executor = ThreadPoolExecutor(max_workers=2,
+                                           thread_name_prefix='db')
+        self.addCleanup(self.executor.shutdown)
+        self.facade = ExecutorDBFacade(self.db, self.executor)
+
+    def test_read(self):
+        """Test reading models concurrently."""
+        async def run():
+            return await asyncio.gather(
+                *(self.facade.retrieve(User, u.slack_id) for u in self.users),
+                self.facade.bulk_retrieve(User, ['U1', 'U2', 'nope']),
+                self.facade.query(Team, [('members', 'U0')]),
+                self.facade.query_or(Team, [('members', 'nope'),
+                                            ('members', 'U1')]))
+        *users, bulk, teams, teams_or = asyncio.run(run())
+        self.assertEqual(users, self.users)
+        self.assertEqual(len(bulk), 2)
+        self.assertEqual([t.github_team_id for t in teams], ['1'])
+        self.assertEqual([t.github_team_id for t in teams_or], ['1'])
+
+    def test_errors(self):
+        """Test that errors of the facade are raised."""
+        with self.assertRaises(LookupError):
+            asyncio.run(self.facade.retrieve(User, 'nope'))
+
+    def test_write(self):
+        """Test storing and deleting models, in threads of the executor."""
+        threads = []
+        store = self.db.store
+
+        def spy(obj):
+            threads.append(threading.current_thread().name)
+            return store(obj)
+        self.db.store = spy  # type: ignore
+        self.assertTrue(asyncio.run(self.facade.store(User('U9'))))
+        self.assertTrue(threads[0].startswith('db'))
+        asyncio.run(self.facade.delete(User, 'U9'))
+        with self.assertRaises(LookupError):
+            self.db.retrieve(User, 'U9')
+
+    def test_trace(self):
+        """Test that calls are traced in the trace of their caller."""
+        async def run():
+            with tracing.trace('team list') as t:
+                await self.facade.retrieve(User, 'U0')
+            return t
+        t = asyncio.run(run())
+        self.assertEqual(t.spans['db.retrieve'].count, 1)
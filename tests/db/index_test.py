@@ -0,0 +1,83 @@
+"""Test the in-memory query index."""
+from unittest import TestCase
+
+from app.model import User, Team, Permissions
+from db.index import ModelIndex
+from tests.util import create_test_admin, create_test_team
+
+
+class TestModelIndex(TestCase):
+    def setUp(self):
+        self.admin = create_test_admin('Uadmin')
+        self.u0 = User('U0')
+        self.u0.github_id = '100'
+        self.u1 = User('U1')
+        self.u1.github_id = '101'
+        self.users = ModelIndex(User, [self.admin, self.u0, self.u1])
+
+        self.t0 = create_test_team('t0', 'zero', 'Team Zero')
+        self.t0.add_member('100')
+        self.t0.add_team_lead('100')
+        self.t1 = create_test_team('t1', 'one', 'Team One')
+        self.t1.platform = 'iOS'
+        self.t1.add_member('101')
+        self.teams = ModelIndex(Team, [self.t0, self.t1])
+
+    def test_len_contains_get(self):
+        self.assertEqual(len(self.users), 3)
+        self.assertIn('U0', self.users)
+        self.assertEqual(self.users.get('U1'), self.u1)
+        self.assertIsNone(self.users.get('nope'))
+
+    def test_query_no_params(self):
+        self.assertEqual(self.users.query(), [self.admin, self.u0, self.u1])
+        self.assertEqual(self.teams.query_or(), [self.t0, self.t1])
+
+    def test_query_scalar(self):
+        self.assertEqual(self.users.query([('github_user_id', '101')]),
+                         [self.u1])
+        self.assertEqual(self.users.query([('permission_level', 'member')]),
+                         [self.u0, self.u1])
+        self.assertEqual(self.users.query([('permission_level', 'member'),
+                                           ('github_user_id', '123453')]),
+                         [])
+
+    def test_query_set_contains(self):
+        self.assertEqual(self.teams.query([('members', 'abc_123')]),
+                         [self.t0, self.t1])
+        self.assertEqual(self.teams.query([('members', 'abc_123'),
+                                           ('members', '101')]),
+                         [self.t1])
+        self.assertEqual(self.teams.query([('team_leads', '101')]), [])
+
+    def test_query_or(self):
+        self.assertEqual(
+            self.teams.query_or([('team_leads', '100'),
+                                 ('platform', 'iOS')]),
+            [self.t0, self.t1])
+        self.assertEqual(self.users.query_or([('github_user_id', '101'),
+                                              ('github_user_id', '100'),
+                                              ('unknown', 'field')]),
+                         [self.u0, self.u1])
+
+    def test_add_replaces(self):
+        self.u0.permissions_level = Permissions.admin
+        self.users.add(self.u0)
+        self.assertEqual(self.users.query([('permission_level', 'admin')]),
+                         [self.admin, self.u0])
+        self.assertEqual(self.users.query([('permission_level', 'member')]),
+                         [self.u1])
+
+    def test_mutated_sets_are_unindexed(self):
+        self.t0.add_member('999')
+        self.t0.discard_member('100')
+        self.teams.add(self.t0)
+        self.assertEqual(self.teams.query([('members', '100')]), [])
+        self.assertEqual(self.teams.query([('members', '999')]), [self.t0])
+
+    def test_remove(self):
+        self.assertEqual(self.teams.remove('t0'), self.t0)
+        self.assertIsNone(self.teams.remove('t0'))
+        self.assertEqual(self.teams.query([('members', 'abc_123')]),
+                         [self.t1])
+        self.assertEqual(self.teams.query([('team_leads', '100')]), [])
@@ -2,7 +2,7 @@ from unittest import TestCase
 from uuid import uuid4
 from typing import List
 import random
-from tests.memorydb import MemoryDB, field_to_attr
+from db.memory import MemoryDB, field_to_attr
 from app.model import User, Team
 import tests.util as util
 
@@ -112,6 +112,28 @@ class TestMemoryDB(TestCase):
         ts = self.db.query(Team, [('members', 'u0')])
         self.assertCountEqual(ts, [self.teams['t0'], self.teams['t1']])
 
+    def test_query_mutated(self):
+        """Test that queries see models mutated after they were stored."""
+        t = self.db.retrieve(Team, 't1')
+        t.add_member('u9')
+        t.discard_member('u0')
+        self.assertEqual(self.db.query(Team, [('members', 'u9')]), [t])
+        self.assertEqual(self.db.query_or(Team, [('members', 'u0')]),
+                         [self.teams['t0']])
+        self.teams['t0'].platform = 'web'
+        self.assertEqual(self.db.query(Team, [('platform', 'web')]),
+                         [self.teams['t0']])
+
+    def test_query_syncs_dirty_only(self):
+        """Test that queries only compare models handed out since the last."""
+        table = self.db.users
+        u = next(iter(self.users.values()))
+        self.db.query(User, [('github', 'nope')])
+        self.assertEqual(table.dirty, set())
+        self.assertEqual(self.db.query(User, [('github', u.slack_id)]), [u])
+        self.db.retrieve(User, 'Uadmin')
+        self.assertEqual(table.dirty, {u.slack_id, 'Uadmin'})
+
     def test_scan_query(self):
         us = self.db.query(User)
         self.assertCountEqual(us, list(self.users.values()))
@@ -142,3 +164,45 @@ class TestMemoryDB(TestCase):
         ts = self.db.query(Team, [('displayname', 'T Zero Blasters')])
         self.assertEqual(len(ts), 1)
         self.assertEqual(ts[0], self.teams['t0'])
+
+    def test_projection(self):
+        u = self.db.retrieve(User, 'Uadmin', ['permission_level'])
+        self.assertIsNot(u, self.admin)
+        self.assertEqual(u.permissions_level, self.admin.permissions_level)
+        self.assertEqual(u.email, '')
+        ts = self.db.query(Team, [('members', 'u3')], ['github_team_name'])
+        self.assertEqual(ts, [Team('t1', 'T1', '')])
+
+    def test_update_fields(self):
+        t = self.db.update_fields(Team, 't0', {'platform': '',
+                                               'members': {'u9'}})
+        self.assertIs(t, self.teams['t0'])
+        self.assertEqual(t.platform, '')
+        self.assertEqual(t.members, {'u9'})
+        self.assertEqual(self.db.query(Team, [('members', 'u9')]), [t])
+        with self.assertRaises(LookupError):
+            self.db.update_fields(Team, 'rando', {'platform': 'web'})
+
+    def test_update_sets(self):
+        t = self.db.update_sets(Team, 't0', add={'members': {'u9'}},
+                                remove={'members': {'u0'}})
+        self.assertIs(t, self.teams['t0'])
+        self.assertIn('u9', t.members)
+        self.assertNotIn('u0', t.members)
+        self.assertEqual(self.db.query(Team, [('members', 'u9')]), [t])
+        with self.assertRaises(LookupError):
+            self.db.update_sets(Team, 'rando', add={'members': {'u9'}})
+        with self.assertRaises(RuntimeError):
+            self.db.update_sets(Team, 't0', add={'platform': {'web'}})
+
+    def test_increment(self):
+        u = self.db.increment(User, 'Uadmin', 'karma', 10)
+        self.assertIs(u, self.admin)
+        self.assertEqual(u.karma, 11)
+        with self.assertRaises(LookupError):
+            self.db.increment(User, 'rando', 'karma')
+
+    def test_top(self):
+        self.admin.karma = 100
+        self.assertEqual(self.db.top(User, 'karma', 1), [self.admin])
+        self.assertEqual(len(self.db.top(User, 'karma', 5)), 5)
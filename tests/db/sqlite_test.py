@@ -0,0 +1,267 @@
+"""Test the SQLite database facade."""
+from unittest.mock import MagicMock
+from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+
+from app.model import User, Team, Permissions
+from config import Config
+from tests.util import create_test_team, create_test_admin
+from db.sqlite import SQLiteDB
+
+
+class TestSQLiteDB(TestCase):
+    def setUp(self):
+        self.config = MagicMock(Config)
+        self.config.sqlite_path = ':memory:'
+        self.db = SQLiteDB(self.config)
+
+    def test_get_bad_table_name(self):
+        """Test getting a bad table name by a bad type."""
+        with self.assertRaises(TypeError):
+            self.db.get_table_name(SQLiteDB)
+
+    def test_store_invalid_type(self):
+        """Test that we cannot store an object that isn't one of the types."""
+        with self.assertRaises(RuntimeError):
+            self.db.store(30)
+
+    def test_store_invalid_user(self):
+        self.assertFalse(self.db.store(User('')))
+
+    def test_store_invalid_team(self):
+        self.assertFalse(self.db.store(Team('1', '', 'Brussel Sprouts')))
+
+    def test_store_retrieve_user(self):
+        user = create_test_admin('abc_123')
+        self.assertTrue(self.db.store(user))
+        self.assertEqual(user, self.db.retrieve(User, 'abc_123'))
+
+    def test_store_same_users(self):
+        """Test how database handles overwriting same user (same slack_id)."""
+        user = create_test_admin('abc_123')
+        user2 = create_test_admin('abc_123')
+        user2.name = 'Sprouts'
+        self.assertTrue(self.db.store(user))
+        self.assertTrue(self.db.store(user2))
+        self.assertEqual(self.db.retrieve(User, 'abc_123'), user2)
+
+    def test_retrieve_invalid_user(self):
+        with self.assertRaises(LookupError):
+            self.db.retrieve(User, 'abc_123')
+
+    def test_store_retrieve_team(self):
+        team = create_test_team('1', 'rocket2.0', 'Rocket 2.0')
+        team.add_team_lead('abc_123')
+        self.assertTrue(self.db.store(team))
+        self.assertEqual(team, self.db.retrieve(Team, '1'))
+
+    def test_update_team_members(self):
+        t = Team('1', 'brussel-sprouts', 'Brussel Sprouts')
+        t.add_member('abc_123')
+        t.add_member('123_abc')
+        self.assertTrue(self.db.store(t))
+
+        t.discard_member('abc_123')
+        self.assertTrue(self.db.store(t))
+
+        self.assertEqual(self.db.retrieve(Team, '1').members, {'123_abc'})
+        self.assertEqual(self.db.query(Team, [('members', 'abc_123')]), [])
+
+    def test_bulk_retrieve_users(self):
+        uids = list(map(str, range(1200)))
+        users = [create_test_admin(i) for i in uids]
+        for user in users:
+            self.assertTrue(self.db.store(user))
+
+        self.assertCountEqual(self.db.bulk_retrieve(User, uids + ['nope']),
+                              users)
+
+    def test_query_user(self):
+        user = create_test_admin('abc_123')
+        user.karma = 5
+        member = User('def_456')
+        self.assertTrue(self.db.store(user))
+        self.assertTrue(self.db.store(member))
+
+        self.assertEqual(self.db.query(User, [('permission_level', 'admin')]),
+                         [user])
+        self.assertEqual(self.db.query(User, [('permission_level', 'admin'),
+                                              ('email', 'admin@ubc.ca')]),
+                         [user])
+        self.assertEqual(self.db.query(User, [('karma', '5')]), [user])
+        self.assertCountEqual(self.db.query(User), [user, member])
+
+    def test_query_unknown_field(self):
+        self.assertTrue(self.db.store(create_test_admin('abc_123')))
+        self.assertEqual(self.db.query(User, [('nonsense', 'x')]), [])
+        self.assertEqual(self.db.query_or(User, [('nonsense', 'x')]), [])
+
+    def test_query_team(self):
+        team = create_test_team('1', 'rocket2.0', 'Rocket 2.0')
+        team2 = create_test_team('2', 'lame-o', 'Lame-O Team')
+        team2.add_member('apple')
+        self.assertTrue(self.db.store(team))
+        self.assertTrue(self.db.store(team2))
+
+        self.assertEqual(self.db.query(Team, [('displayname', 'Rocket 2.0')]),
+                         [team])
+        self.assertEqual(self.db.query(Team, [('members', 'abc_123'),
+                                              ('members', 'apple')]),
+                         [team2])
+        self.assertEqual(self.db.query(Team,
+                                       [('github_team_name', 'lame-o')]),
+                         [team2])
+        self.assertCountEqual(self.db.query(Team, [('platform', 'slack')]),
+                              [team, team2])
+
+    def test_query_or_teams(self):
+        team = create_test_team('1', 'rocket2.0', 'Rocket 2.0')
+        team2 = create_test_team('2', 'lame-o', 'Lame-O Team')
+        team2.add_team_lead('apple')
+        team3 = Team('3', 'empty', 'Empty')
+        for t in [team, team2, team3]:
+            self.assertTrue(self.db.store(t))
+
+        self.assertCountEqual(
+            self.db.query_or(Team, [('team_leads', 'apple'),
+                                    ('github_team_name', 'rocket2.0')]),
+            [team, team2])
+        self.assertCountEqual(self.db.query_or(Team), [team, team2, team3])
+
+    def test_query_or_lotsa_users(self):
+        uids = list(map(str, range(1200)))
+        users = [create_test_admin(i) for i in uids]
+        for user in users[:600]:
+            user.permissions_level = Permissions.member
+        for user in users:
+            self.assertTrue(self.db.store(user))
+
+        params = [('slack_id', uid) for uid in uids]
+        self.assertCountEqual(self.db.query_or(User, params), users)
+
+        params = [('permission_level', 'member'), ('slack_id', '1100')]
+        self.assertEqual(len(self.db.query_or(User, params)), 601)
+
+    def test_projection_user(self):
+        user = create_test_admin('abc_123')
+        self.assertTrue(self.db.store(user))
+
+        partial = User('abc_123')
+        partial.email = user.email
+        self.assertEqual(self.db.retrieve(User, 'abc_123', ['email']),
+                         partial)
+        self.assertEqual(self.db.bulk_retrieve(User, ['abc_123'], ['email']),
+                         [partial])
+        self.assertEqual(self.db.query(User, [('permission_level', 'admin')],
+                                       ['email']),
+                         [partial])
+        self.assertEqual(self.db.query_or(User, [('slack_id', 'abc_123')],
+                                          ['email']),
+                         [partial])
+
+    def test_projection_team(self):
+        team = create_test_team('1', 'rocket2.0', 'Rocket 2.0')
+        team.add_team_lead('abc_123')
+        self.assertTrue(self.db.store(team))
+
+        partial = Team('1', 'rocket2.0', '')
+        partial.members = team.members
+        self.assertEqual(self.db.query(Team, [('team_leads', 'abc_123')],
+                                       ['github_team_name', 'members']),
+                         [partial])
+        names = self.db.query(Team, fields=['github_team_name'])
+        self.assertEqual(names, [Team('1', 'rocket2.0', '')])
+
+    def test_update_fields(self):
+        user = create_test_admin('abc_123')
+        self.assertTrue(self.db.store(user))
+        updated = self.db.update_fields(User, 'abc_123',
+                                        {'name': 'Sprouts', 'bio': ''})
+        user.name = 'Sprouts'
+        user.biography = ''
+        self.assertEqual(updated, user)
+        self.assertEqual(self.db.retrieve(User, 'abc_123'), user)
+
+    def test_update_fields_team_members(self):
+        team = create_test_team('1', 'rocket2.0', 'Rocket 2.0')
+        team.add_team_lead('abc_123')
+        self.assertTrue(self.db.store(team))
+        updated = self.db.update_fields(Team, '1', {'members': {'apple'},
+                                                    'platform': 'web'})
+        self.assertEqual(updated.members, {'apple'})
+        self.assertEqual(updated.team_leads, {'abc_123'})
+        self.assertEqual(updated.platform, 'web')
+
+    def test_update_fields_errors(self):
+        with self.assertRaises(LookupError):
+            self.db.update_fields(User, 'abc_123', {'name': 'Sprouts'})
+        self.assertTrue(self.db.store(create_test_admin('abc_123')))
+        with self.assertRaises(RuntimeError):
+            self.db.update_fields(User, 'abc_123', {'members': {'apple'}})
+
+    def test_update_sets(self):
+        team = create_test_team('1', 'rocket2.0', 'Rocket 2.0')
+        team.add_member('abc_123')
+        self.assertTrue(self.db.store(team))
+        updated = self.db.update_sets(
+            Team, '1', add={'members': {'apple', 'abc_123'},
+                            'team_leads': {'apple'}},
+            remove={'members': {'abc_123'}, 'team_leads': {'rando'}})
+        self.assertEqual(updated.members, {'apple'})
+        self.assertEqual(updated.team_leads, {'apple'})
+        self.assertEqual(self.db.retrieve(Team, '1'), updated)
+
+    def test_update_sets_errors(self):
+        with self.assertRaises(LookupError):
+            self.db.update_sets(Team, '1', add={'members': {'apple'}})
+        self.assertTrue(self.db.store(create_test_admin('abc_123')))
+        with self.assertRaises(RuntimeError):
+            self.db.update_sets(User, 'abc_123', add={'members': {'apple'}})
+
+    def test_increment(self):
+        user = create_test_admin('abc_123')
+        user.karma = 0
+        self.assertTrue(self.db.store(user))
+        # Karma of 0 is not stored, and reads back as the default
+        self.assertEqual(self.db.increment(User, 'abc_123', 'karma').karma, 2)
+        self.assertEqual(
+            self.db.increment(User, 'abc_123', 'karma', -5).karma, -3)
+        with self.assertRaises(LookupError):
+            self.db.increment(User, 'rando', 'karma')
+
+    def test_parallel_increments(self):
+        self.assertTrue(self.db.store(create_test_admin('abc_123')))
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            list(executor.map(
+                lambda _: self.db.increment(User, 'abc_123', 'karma'),
+                range(1000)))
+        self.assertEqual(self.db.retrieve(User, 'abc_123').karma, 1001)
+
+    def test_top(self):
+        users = [create_test_admin(str(i)) for i in range(10)]
+        for i, user in enumerate(users):
+            user.karma = (i * 7) % 10
+            self.assertTrue(self.db.store(user))
+
+        top = self.db.top(User, 'karma', 3)
+        self.assertEqual([u.karma for u in top], [9, 8, 7])
+        self.assertEqual(top[0], users[7])
+        # Users without karma stored are left out
+        self.assertEqual(len(self.db.top(User, 'karma', 20)), 9)
+        partial = User('7')
+        partial.name = users[7].name
+        self.assertEqual(self.db.top(User, 'karma', 1, ['name']), [partial])
+        with self.assertRaises(RuntimeError):
+            self.db.top(User, 'members', 3)
+
+    def test_delete_user(self):
+        self.assertTrue(self.db.store(create_test_admin('abc_123')))
+        self.db.delete(User, 'abc_123')
+        self.assertEqual(self.db.query(User), [])
+
+    def test_delete_team(self):
+        team = create_test_team('1', 'rocket-2.0', 'Rocket 2.0')
+        self.assertTrue(self.db.store(team))
+        self.db.delete(Team, '1')
+        self.assertEqual(self.db.query(Team), [])
+        self.assertEqual(self.db.query(Team, [('members', 'abc_123')]), [])
@@ -1,5 +1,5 @@
 from db.utils import get_team_members, get_users_by_ghid, get_team_by_name
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 from app.model import User, Team
 from unittest import TestCase
 
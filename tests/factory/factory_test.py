@@ -0,0 +1,53 @@
+"""Test sharing and warming up clients."""
+from config import Config
+from factory import lazy_client, make_dbfacade, provide_client, warm_up
+from unittest import mock, TestCase
+
+
+class TestFactory(TestCase):
+    """Test the clients made by factories."""
+
+    def setUp(self):
+        """Set up a config."""
+        self.config = mock.MagicMock(Config)
+
+    def test_lazy_client_shared(self):
+        """Test that clients are shared by name and config."""
+        build = mock.Mock()
+        a = lazy_client(self.config, 'client', build)
+        self.assertIs(lazy_client(self.config, 'client', build), a)
+        self.assertIsNot(lazy_client(mock.MagicMock(Config), 'client', build),
+                         a)
+        build.assert_not_called()
+
+    @mock.patch('factory.DynamoDB')
+    def test_make_dbfacade_lazy(self, mock_dynamodb):
+        """Test that databases are not connected to until used."""
+        self.config.sqlite_path = ''
+        facade = make_dbfacade(self.config)
+        self.assertIs(make_dbfacade(self.config), facade)
+        mock_dynamodb.assert_not_called()
+        facade.query('User')
+        mock_dynamodb.assert_called_once_with(self.config)
+
+    @mock.patch('factory.DynamoDB')
+    def test_provide_client(self, mock_dynamodb):
+        """Test that provided clients are used instead of built ones."""
+        self.config.sqlite_path = ''
+        facade = make_dbfacade(self.config)
+        db = mock.Mock()
+        provide_client(self.config, 'database', db)
+        facade.query('User')
+        db.query.assert_called_once_with('User')
+        mock_dynamodb.assert_not_called()
+        provide_client(self.config, 'database', db)
+        with self.assertRaises(RuntimeError):
+            provide_client(self.config, 'database', mock.Mock())
+
+    def test_warm_up(self):
+        """Test that warming up builds every client, despite failures."""
+        good = mock.Mock()
+        lazy_client(self.config, 'bad', mock.Mock(side_effect=Exception))
+        lazy_client(self.config, 'good', good)
+        warm_up(self.config).join()
+        good.assert_called_once_with()
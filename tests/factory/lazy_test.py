@@ -0,0 +1,48 @@
+"""Test building clients on first use."""
+import threading
+import time
+from factory.lazy import Lazy
+from unittest import mock, TestCase
+
+
+class TestLazy(TestCase):
+    """Test the Lazy class."""
+
+    def test_not_built_until_used(self):
+        """Test that the client is built on first use, once."""
+        build = mock.Mock()
+        lazy = Lazy('client', build)
+        build.assert_not_called()
+        self.assertIsNone(lazy.build_ms)
+
+        lazy.do_it(1)
+        lazy.do_it(2)
+        build.assert_called_once_with()
+        self.assertEqual(build.return_value.do_it.call_count, 2)
+        self.assertIs(lazy.get(), build.return_value)
+        self.assertIsNotNone(lazy.build_ms)
+
+    def test_built_once_across_threads(self):
+        """Test that concurrent first uses build a single client."""
+        built = []
+
+        def build():
+            time.sleep(0.01)
+            built.append(object())
+            return built[-1]
+
+        lazy = Lazy('client', build)
+        threads = [threading.Thread(target=lazy.get) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(built), 1)
+
+    def test_retry_after_failure(self):
+        """Test that a client failing to build is built on next use."""
+        build = mock.Mock(side_effect=[Exception('down'), 'client'])
+        lazy = Lazy('client', build)
+        with self.assertRaises(Exception):
+            lazy.get()
+        self.assertEqual(lazy.get(), 'client')
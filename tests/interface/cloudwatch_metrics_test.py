@@ -39,3 +39,41 @@ class TestCWMetrics(TestCase):
 
         cwm.submit_cmd_mstime('team', 30)
         client.put_metric_data.assert_called_once()
+
+    @mock.patch('logging.info')
+    @mock.patch('boto3.client')
+    def test_disabled_webhook_metrics(self, b3client, log):
+        cwm = CWMetrics(self.conf_disable_metrics)
+        cwm.submit_webhook_mstime('membership.added', 5, 30)
+        log.assert_called_with(
+            'Webhook Latency [membership.added@Rocket 2]: '
+            '5 ms queued, 30 ms handling')
+
+    @mock.patch('boto3.client')
+    def test_enabled_webhook_metrics(self, b3client):
+        client = mock.Mock()
+        b3client.return_value = client
+
+        cwm = CWMetrics(self.conf_enable_metrics)
+        cwm.submit_webhook_mstime('membership.added', 5, 30)
+        client.put_metric_data.assert_called_once()
+        data = client.put_metric_data.call_args[1]['MetricData']
+        self.assertEqual([d['Value'] for d in data], [5, 30])
+
+    @mock.patch('logging.info')
+    @mock.patch('boto3.client')
+    def test_disabled_response_metrics(self, b3client, log):
+        cwm = CWMetrics(self.conf_disable_metrics)
+        cwm.submit_response_mstime('team list', 30, False)
+        log.assert_called_with(
+            'Response Delivery Time [team list@Rocket 2]: 30 ms (failed)')
+
+    @mock.patch('boto3.client')
+    def test_enabled_response_metrics(self, b3client):
+        client = mock.Mock()
+        b3client.return_value = client
+
+        cwm = CWMetrics(self.conf_enable_metrics)
+        cwm.submit_response_mstime('team list', 30, True)
+        data = client.put_metric_data.call_args[1]['MetricData']
+        self.assertEqual([d['Value'] for d in data], [30, 0])
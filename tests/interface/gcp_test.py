@@ -1,5 +1,7 @@
 """Test GCPInterface Class."""
-from interface.gcp import GCPInterface, \
+import threading
+from google.auth.credentials import AnonymousCredentials
+from interface.gcp import GCPInterface, build_drive_client, \
     new_create_permission_body, new_share_message
 from googleapiclient.discovery import Resource
 from unittest import mock, TestCase
@@ -112,3 +114,48 @@ class TestGCPInterface(TestCase):
         mock_perms.delete.assert_called_with(
             fileId='target-drive', permissionId='2')
         mock_perms_delete.execute.assert_called()
+
+    def test_drive_client_per_thread(self):
+        new_drive_client = mock.Mock(side_effect=lambda: mock.Mock())
+        gcp = GCPInterface(new_drive_client=new_drive_client)
+        self.assertIs(gcp.drive, gcp.drive)
+
+        drives = []
+        thread = threading.Thread(target=lambda: drives.append(gcp.drive))
+        thread.start()
+        thread.join()
+        self.assertIsNot(drives[0], gcp.drive)
+        self.assertEqual(new_drive_client.call_count, 2)
+
+    def test_drive_client_required(self):
+        with self.assertRaises(ValueError):
+            GCPInterface(subject="team@ubclaunchpad.com")
+
+
+class TestBuildDriveClient(TestCase):
+    """Test building Drive clients from the shipped discovery document."""
+
+    @mock.patch('googleapiclient.discovery.build')
+    def test_build_drive_client(self, mock_build):
+        drive = build_drive_client(AnonymousCredentials())
+        mock_build.assert_not_called()
+
+        req = drive.files().get(fileId='drive', fields='parents')
+        self.assertEqual(req.method, 'GET')
+        self.assertTrue(req.uri.startswith(
+            'https://www.googleapis.com/drive/v3/files/drive?'))
+        req = drive.permissions().create(fileId='drive',
+                                         body=new_create_permission_body(
+                                             'robert@bobheadxi.dev'),
+                                         emailMessage='hi',
+                                         sendNotificationEmail=True)
+        self.assertEqual(req.method, 'POST')
+        req = drive.permissions().delete(fileId='drive', permissionId='2')
+        self.assertEqual(req.method, 'DELETE')
+        self.assertTrue(req.uri.startswith(
+            'https://www.googleapis.com/drive/v3/files/drive/permissions/2'))
+
+        req = drive.permissions().list(fileId='drive', fields='permissions')
+        next_req = drive.permissions().list_next(
+            req, {'nextPageToken': 'token', 'permissions': []})
+        self.assertIn('pageToken=token', next_req.uri)
@@ -1,7 +1,7 @@
 from unittest import mock, TestCase
 from interface.gcp_utils import sync_user_email_perms, sync_team_email_perms
 from app.model import User, Team
-from tests.memorydb import MemoryDB
+from db.memory import MemoryDB
 from interface.gcp import GCPInterface
 
 
@@ -0,0 +1,98 @@
+"""Test reading GitHub teams asynchronously."""
+import asyncio
+import httpx
+
+from interface.exceptions.github import GithubAPIException
+from interface.github_async import AsyncGithubInterface, LoopGithubInterface
+from tests.util import start_loop
+from unittest import mock, TestCase
+
+TEAMS = [
+    {'id': 1, 'name': 'Brussels', 'slug': 'brussels'},
+    {'id': 2, 'name': 'Rocket', 'slug': 'rocket'},
+]
+MEMBERS = {
+    'brussels': [{'id': 11}, {'id': 12}],
+    'rocket': [{'id': 12}, {'id': 13}, {'id': 14}],
+}
+
+
+class TestAsyncGithubInterface(TestCase):
+    """Test Case for AsyncGithubInterface class."""
+
+    def setUp(self):
+        """Set up a client of a fake GitHub."""
+        self.auth = mock.Mock()
+        self.auth.create_api_token.side_effect = ['token-1', 'token-2']
+        self.requests = []
+        self.reject = set()
+
+        def handle(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            token = request.headers['Authorization']
+            if token in self.reject:
+                return httpx.Response(401, json={'message': 'Bad creds'})
+            path = request.url.path
+            if path == '/orgs/ubclaunchpad/teams':
+                # One team per page
+                page = int(request.url.params.get('page', '1'))
+                headers = {}
+                if page < len(TEAMS):
+                    headers['Link'] = \
+                        f'<{request.url.copy_set_param("page", page + 1)}>; ' \
+                        'rel="next"'
+                return httpx.Response(200, json=[TEAMS[page - 1]],
+                                      headers=headers)
+            slug = path.split('/')[-2]
+            if slug in MEMBERS:
+                return httpx.Response(200, json=MEMBERS[slug])
+            return httpx.Response(404, json={'message': 'Not Found'})
+
+        self.gh = AsyncGithubInterface(
+            self.auth, 'ubclaunchpad',
+            httpx.AsyncClient(base_url=AsyncGithubInterface.API_URL,
+                              transport=httpx.MockTransport(handle)))
+        self.addCleanup(lambda: asyncio.run(self.gh.aclose()))
+
+    def test_org_get_teams(self):
+        """Test reading every team, with their members."""
+        teams = asyncio.run(self.gh.org_get_teams())
+        self.assertEqual([t.github_team_id for t in teams], ['1', '2'])
+        self.assertEqual([t.github_team_name for t in teams],
+                         ['Brussels', 'Rocket'])
+        self.assertEqual(teams[0].members, {'11', '12'})
+        self.assertEqual(teams[1].members, {'12', '13', '14'})
+        self.assertEqual(len(self.requests), 4)
+        self.auth.create_api_token.assert_called_once_with()
+
+    def test_renew_token(self):
+        """Test getting a new token when one is rejected."""
+        self.reject.add('token token-1')
+        teams = asyncio.run(self.gh.org_get_teams())
+        self.assertEqual(len(teams), 2)
+        self.assertEqual(self.auth.create_api_token.call_count, 2)
+
+    def test_error(self):
+        """Test that errors of GitHub are raised."""
+        self.reject.update(['token token-1', 'token token-2'])
+        with self.assertRaises(GithubAPIException) as e:
+            asyncio.run(self.gh.org_get_teams())
+        self.assertEqual(e.exception.data, {'message': 'Bad creds'})
+
+
+class TestLoopGithubInterface(TestCase):
+    """Test Case for LoopGithubInterface class."""
+
+    def test_interface(self):
+        """Test reading teams on the loop, and the rest synchronously."""
+        gh = mock.Mock()
+        async_gh = mock.Mock()
+
+        async def org_get_teams():
+            return ['team']
+        async_gh.org_get_teams = org_get_teams
+        interface = LoopGithubInterface(gh, async_gh, start_loop(self))
+        self.assertEqual(interface.org_get_teams(), ['team'])
+        interface.org_add_member('steve')
+        gh.org_add_member.assert_called_once_with('steve')
+        gh.org_get_teams.assert_not_called()
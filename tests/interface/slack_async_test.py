@@ -0,0 +1,64 @@
+"""Test posting responses on an event loop."""
+import httpx
+import json
+
+from interface.slack_async import AsyncResponsePoster
+from tests.util import start_loop
+from unittest import mock, TestCase
+
+
+class TestAsyncResponsePoster(TestCase):
+    """Test Case for AsyncResponsePoster class."""
+
+    def setUp(self):
+        """Set up a poster to a fake Slack."""
+        self.metrics = mock.Mock()
+        self.statuses = []
+        self.posted = []
+
+        def handle(request: httpx.Request) -> httpx.Response:
+            self.posted.append(json.loads(request.content))
+            status = self.statuses.pop(0) if self.statuses else 200
+            if isinstance(status, Exception):
+                raise status
+            return httpx.Response(status, headers={'Retry-After': '0'})
+
+        bridge = start_loop(self)
+        self.poster = AsyncResponsePoster(
+            bridge, self.metrics,
+            httpx.AsyncClient(transport=httpx.MockTransport(handle)))
+        self.addCleanup(lambda: bridge.run(self.poster.aclose()))
+        self.url = 'https://hooks.slack.com/commands/1'
+
+    def test_post(self):
+        """Test posting a response."""
+        self.assertTrue(self.poster.post(self.url, {'text': 'hi'}, 'help'))
+        self.assertEqual(self.posted, [{'text': 'hi'}])
+        self.metrics.submit_response_mstime.assert_called_once_with(
+            'help', mock.ANY, True)
+
+    def test_retry(self):
+        """Test retrying after server errors."""
+        self.statuses = [503, 429]
+        self.assertTrue(self.poster.post(self.url, {'text': 'hi'}))
+        self.assertEqual(len(self.posted), 3)
+
+    def test_retry_unsent(self):
+        """Test retrying posts that could not be sent."""
+        self.poster.BACKOFF = 0
+        self.statuses = [httpx.ConnectError('refused'),
+                         httpx.ConnectTimeout('timed out')]
+        self.assertTrue(self.poster.post(self.url, {'text': 'hi'}))
+        self.assertEqual(len(self.posted), 3)
+
+    def test_no_retry_sent(self):
+        """Test that posts failing once sent are not posted again."""
+        self.statuses = [httpx.ReadTimeout('timed out')]
+        self.assertFalse(self.poster.post(self.url, {'text': 'hi'}))
+        self.assertEqual(len(self.posted), 1)
+
+    def test_no_retry_client_error(self):
+        """Test that responses rejected by Slack are not retried."""
+        self.statuses = [404]
+        self.assertFalse(self.poster.post(self.url, {'text': 'hi'}))
+        self.assertEqual(len(self.posted), 1)
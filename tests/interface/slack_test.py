@@ -1,5 +1,13 @@
 """Test Bot Class."""
-from interface.slack import Bot, SlackAPIError
+import hashlib
+import hmac
+import time
+
+from interface.slack import Bot, ResponsePoster, SlackAPIError, \
+    SlackDirectory, verify_signature
+from requests import ConnectionError
+from requests.exceptions import ConnectTimeout, ReadTimeout
+from urllib3.exceptions import MaxRetryError, NewConnectionError
 from slack import WebClient
 from unittest import mock, TestCase
 
@@ -98,10 +106,43 @@ class TestBot(TestCase):
     def test_get_channels(self):
         """Test get_channel_names() method."""
         resp = {'ok': True, 'channels': [{'name': 'happy'}]}
-        self.mock_sc.conversations_list = mock.MagicMock(return_values=resp)
+        self.mock_sc.conversations_list = mock.MagicMock(return_value=resp)
         names = self.bot.get_channel_names()
 
-        self.assertEqual(len(names), 0)
+        self.assertEqual(names, ['happy'])
+
+    def test_get_channels_paginated(self):
+        """Test reading every page of channels, once."""
+        self.mock_sc.conversations_list.side_effect = [
+            {'ok': True, 'channels': [{'name': 'a'}],
+             'response_metadata': {'next_cursor': 'abc'}},
+            {'ok': True, 'channels': [{'name': 'b'}],
+             'response_metadata': {'next_cursor': ''}},
+        ]
+        self.assertEqual(self.bot.get_channel_names(), ['a', 'b'])
+        self.assertEqual(self.bot.get_channel_names(), ['a', 'b'])
+        self.mock_sc.conversations_list.assert_has_calls([
+            mock.call(limit=Bot.PAGE_SIZE),
+            mock.call(limit=Bot.PAGE_SIZE, cursor='abc')])
+        self.assertEqual(self.mock_sc.conversations_list.call_count, 2)
+
+    def test_get_channels_exclude_archived(self):
+        """Test leaving archived channels out."""
+        self.mock_sc.conversations_list.return_value = \
+            {'ok': True, 'channels': []}
+        self.bot.get_channels(exclude_archived=True)
+        self.mock_sc.conversations_list.assert_called_once_with(
+            limit=Bot.PAGE_SIZE, exclude_archived=True)
+
+    def test_channels_invalidated(self):
+        """Test reading channels again once Slack says they changed."""
+        self.mock_sc.conversations_list.return_value = \
+            {'ok': True, 'channels': []}
+        self.bot.get_channels()
+        self.bot.directory.invalidate({'type': 'channel_created',
+                                       'channel': {'id': 'C1'}})
+        self.bot.get_channels()
+        self.assertEqual(self.mock_sc.conversations_list.call_count, 2)
 
     def test_get_channel_users(self):
         """Test the bot method get_channel_users()."""
@@ -114,9 +155,27 @@ class TestBot(TestCase):
                                                            ]}
         assert self.bot.get_channel_users("C1234441") == ids
         self.mock_sc.conversations_members.assert_called_with(
-            channel="C1234441"
+            channel="C1234441",
+            limit=Bot.PAGE_SIZE
         )
 
+    def test_get_channel_users_cached(self):
+        """Test reading members once, until they change."""
+        self.mock_sc.conversations_members.return_value = \
+            {'ok': True, 'members': ['U1']}
+        self.bot.get_channel_users('C1')
+        self.bot.get_channel_users('C1')
+        self.assertEqual(self.mock_sc.conversations_members.call_count, 1)
+
+        self.bot.directory.invalidate({'type': 'member_joined_channel',
+                                       'user': 'U2', 'channel': 'C2'})
+        self.bot.get_channel_users('C1')
+        self.assertEqual(self.mock_sc.conversations_members.call_count, 1)
+        self.bot.directory.invalidate({'type': 'member_joined_channel',
+                                       'user': 'U2', 'channel': 'C1'})
+        self.bot.get_channel_users('C1')
+        self.assertEqual(self.mock_sc.conversations_members.call_count, 2)
+
     def test_get_channel_users_failure(self):
         """Test get_channel_users() when Slack API call fails."""
         self.mock_sc.conversations_members =\
@@ -125,7 +184,8 @@ class TestBot(TestCase):
         with self.assertRaises(SlackAPIError):
             self.bot.get_channel_users('C1234441')
         self.mock_sc.conversations_members.assert_called_with(
-            channel='C1234441'
+            channel='C1234441',
+            limit=Bot.PAGE_SIZE
         )
 
     def test_create_same_channel_thrice(self):
@@ -143,3 +203,189 @@ class TestBot(TestCase):
             self.bot.create_channel(name)
         except SlackAPIError as e:
             assert e.error == "invalid_name"
+
+    def test_create_channel_lists_channels_again(self):
+        """Test that channels are read again once one is created."""
+        self.mock_sc.conversations_list.return_value = \
+            {'ok': True, 'channels': []}
+        self.mock_sc.channels_create.return_value = {"ok": True,
+                                                     "name": "rocket2"}
+        self.bot.get_channels()
+        self.bot.create_channel('rocket2')
+        self.bot.get_channels()
+        self.assertEqual(self.mock_sc.conversations_list.call_count, 2)
+
+
+class TestSlackDirectory(TestCase):
+    """Test Case for SlackDirectory class."""
+
+    def test_expire(self):
+        """Test fetching entries again once they are too old."""
+        directory = SlackDirectory(10)
+        fetch = mock.Mock(side_effect=[1, 2])
+        with mock.patch('interface.slack.time.monotonic') as monotonic:
+            monotonic.return_value = 100
+            self.assertEqual(directory.get(('user', 'U1'), fetch), 1)
+            monotonic.return_value = 109
+            self.assertEqual(directory.get(('user', 'U1'), fetch), 1)
+            monotonic.return_value = 110
+            self.assertEqual(directory.get(('user', 'U1'), fetch), 2)
+
+    def test_no_ttl(self):
+        """Test that nothing is kept without a TTL."""
+        directory = SlackDirectory(0)
+        fetch = mock.Mock(side_effect=[1, 2])
+        directory.get(('user', 'U1'), fetch)
+        self.assertEqual(directory.get(('user', 'U1'), fetch), 2)
+
+    def test_forget_while_fetching(self):
+        """Test that entries fetched before being forgotten are not kept."""
+        directory = SlackDirectory(10)
+
+        def fetch():
+            directory.forget(lambda k: True)
+            return 1
+        directory.get(('channels', False), fetch)
+        self.assertEqual(len(directory.entries), 0)
+
+    def test_size(self):
+        """Test forgetting the least recently used entries first."""
+        directory = SlackDirectory(10)
+        directory.SIZE = 2
+        directory.get(('user', 'U1'), lambda: 1)
+        directory.get(('user', 'U2'), lambda: 2)
+        directory.get(('user', 'U1'), lambda: 1)
+        directory.get(('user', 'U3'), lambda: 3)
+        self.assertEqual(list(directory.entries),
+                         [('user', 'U1'), ('user', 'U3')])
+
+
+class TestResponsePoster(TestCase):
+    """Test Case for ResponsePoster class."""
+
+    def setUp(self):
+        """Set up a poster with a mock session."""
+        self.metrics = mock.Mock()
+        self.poster = ResponsePoster(self.metrics)
+        self.poster.session = mock.Mock()
+        self.url = 'https://hooks.slack.com/commands/1'
+        sleep = mock.patch('interface.slack.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def response(self, status, headers={}):
+        """Return a response with the given status."""
+        return mock.Mock(ok=status < 400, status_code=status,
+                         headers=headers, text='')
+
+    def test_post(self):
+        """Test posting a response."""
+        self.poster.session.post.return_value = self.response(200)
+        self.assertTrue(self.poster.post(self.url, {'text': 'hi'}, 'help'))
+        self.poster.session.post.assert_called_once_with(
+            self.url, json={'text': 'hi'}, timeout=ResponsePoster.TIMEOUT)
+        self.metrics.submit_response_mstime.assert_called_once_with(
+            'help', mock.ANY, True)
+
+    def test_retry(self):
+        """Test retrying after server errors, with increasing waits."""
+        refused = ConnectionError(MaxRetryError(
+            None, self.url, NewConnectionError(None, 'refused')))
+        self.poster.session.post.side_effect = [
+            self.response(503), refused, ConnectTimeout(), self.response(200)]
+        self.assertTrue(self.poster.post(self.url, {'text': 'hi'}))
+        self.assertEqual(self.poster.session.post.call_count, 4)
+        self.assertEqual([c[0][0] for c in self.sleep.call_args_list],
+                         [0.5, 1.0, 2.0])
+
+    def test_no_retry_sent(self):
+        """Test that posts failing once sent are not posted again."""
+        for error in [ReadTimeout(), ConnectionError('reset')]:
+            self.poster.session.post.reset_mock()
+            self.poster.session.post.side_effect = error
+            self.assertFalse(self.poster.post(self.url, {'text': 'hi'}))
+            self.poster.session.post.assert_called_once()
+
+    def test_max_attempts(self):
+        """Test trying to post fewer times than by default."""
+        self.poster.session.post.return_value = self.response(503)
+        self.assertFalse(self.poster.post(self.url, {'text': 'hi'},
+                                          max_attempts=1))
+        self.poster.session.post.assert_called_once()
+        self.sleep.assert_not_called()
+
+    def test_retry_after(self):
+        """Test waiting as long as Slack asks to when rate limited."""
+        self.poster.session.post.side_effect = [
+            self.response(429, {'Retry-After': '3'}), self.response(200)]
+        self.assertTrue(self.poster.post(self.url, {'text': 'hi'}))
+        self.sleep.assert_called_once_with(3.0)
+
+    def test_give_up(self):
+        """Test giving up after too many failures."""
+        self.poster.session.post.return_value = self.response(500)
+        self.assertFalse(self.poster.post(self.url, {'text': 'hi'}, 'help'))
+        self.assertEqual(self.poster.session.post.call_count,
+                         ResponsePoster.MAX_ATTEMPTS)
+        self.metrics.submit_response_mstime.assert_called_once_with(
+            'help', mock.ANY, False)
+
+    def test_no_retry_client_error(self):
+        """Test that responses rejected by Slack are not retried."""
+        self.poster.session.post.return_value = self.response(404)
+        self.assertFalse(self.poster.post(self.url, {'text': 'hi'}))
+        self.poster.session.post.assert_called_once()
+
+    def test_split_long_response(self):
+        """Test that long responses are posted in several parts."""
+        self.poster.session.post.return_value = self.response(200)
+        text = 'line\n' * (ResponsePoster.MAX_TEXT_LENGTH // 2)
+        resp = {'text': text, 'response_type': 'ephemeral',
+                'attachments': [{'text': 'a'}]}
+        self.assertTrue(self.poster.post(self.url, resp))
+        messages = [c[1]['json'] for c in
+                    self.poster.session.post.call_args_list]
+        self.assertEqual(len(messages), 3)
+        self.assertEqual(''.join(m['text'] for m in messages), text)
+        self.assertTrue(all(m['response_type'] == 'ephemeral'
+                            for m in messages))
+        self.assertEqual([('attachments' in m) for m in messages],
+                         [True, False, False])
+
+    def test_split_too_many_posts(self):
+        """Test that at most MAX_POSTS posts are made."""
+        self.poster.session.post.return_value = self.response(200)
+        text = 'x' * ResponsePoster.MAX_TEXT_LENGTH * 10
+        self.poster.post(self.url, {'text': text})
+        self.assertEqual(self.poster.session.post.call_count,
+                         ResponsePoster.MAX_POSTS)
+
+
+class TestVerifySignature(TestCase):
+    """Test the verification of requests from Slack."""
+
+    def sign(self, timestamp: str, body: bytes) -> str:
+        """Sign a request like Slack does."""
+        return 'v0=' + hmac.new(b'secret', f'v0:{timestamp}:'.encode() + body,
+                                hashlib.sha256).hexdigest()
+
+    def test_verify(self):
+        """Test that signed requests are verified."""
+        now = str(int(time.time()))
+        body = b'text=help'
+        self.assertTrue(verify_signature('secret', now, body,
+                                         self.sign(now, body)))
+        self.assertFalse(verify_signature('secret', now, b'text=team',
+                                          self.sign(now, body)))
+        self.assertFalse(verify_signature('other', now, body,
+                                          self.sign(now, body)))
+        self.assertFalse(verify_signature('secret', None, body, None))
+
+    def test_old_request(self):
+        """Test that old requests are rejected, as possible replays."""
+        old = str(int(time.time()) - 10 * 60)
+        body = b'text=help'
+        self.assertFalse(verify_signature('secret', old, body,
+                                          self.sign(old, body)))
+        self.assertFalse(verify_signature('secret', 'soon', body,
+                                          self.sign('soon', body)))
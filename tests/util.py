@@ -1,5 +1,10 @@
 """Some important (and often-used) utility functions."""
+import asyncio
+import threading
+
 from app.model import User, Team, Permissions
+from unittest import TestCase
+from utils.aio import LoopBridge
 
 
 def create_test_admin(slack_id: str) -> User:
@@ -63,3 +68,32 @@ def create_test_team(tid: str,
     t.platform = 'slack'
     t.add_member('abc_123')
     return t
+
+
+def start_loop(test: TestCase) -> LoopBridge:
+    """
+    Run an event loop in a thread, until the end of a test.
+
+    :param test: the test using the loop
+    :return: a bridge to the loop
+    """
+    loop = asyncio.new_event_loop()
+    bridge = LoopBridge(timeout=5)
+    attached = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        bridge.attach(loop)
+        attached.set()
+        loop.run_forever()
+        loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    attached.wait()
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    test.addCleanup(stop)
+    return bridge
@@ -0,0 +1,59 @@
+"""Test running coroutines from threads."""
+import asyncio
+
+from tests.util import start_loop
+from unittest import TestCase
+from utils.aio import LoopBridge, SyncProxy
+
+
+class AsyncClient:
+    """Client with a coroutine method."""
+
+    name = 'client'
+
+    async def double(self, n: int) -> int:
+        """Return twice ``n``, on the loop."""
+        await asyncio.sleep(0)
+        return n * 2
+
+    async def fail(self):
+        """Raise an error."""
+        raise ValueError('failed')
+
+
+class TestLoopBridge(TestCase):
+    """Test the bridge to an event loop."""
+
+    def test_run(self):
+        """Test running coroutines, and raising their errors."""
+        bridge = start_loop(self)
+        client = AsyncClient()
+        self.assertEqual(bridge.run(client.double(2)), 4)
+        with self.assertRaises(ValueError):
+            bridge.run(client.fail())
+
+    def test_run_without_loop(self):
+        """Test that nothing is run without a loop."""
+        with self.assertRaises(RuntimeError):
+            LoopBridge().run(AsyncClient().double(2))
+
+    def test_run_on_loop(self):
+        """Test that the loop never waits for itself."""
+        bridge = start_loop(self)
+
+        async def nested():
+            return bridge.run(AsyncClient().double(2))
+        with self.assertRaises(RuntimeError):
+            bridge.run(nested())
+
+
+class TestSyncProxy(TestCase):
+    """Test the synchronous stand-in for asynchronous clients."""
+
+    def test_proxy(self):
+        """Test calling coroutine methods, and other attributes."""
+        proxy = SyncProxy(AsyncClient(), start_loop(self))
+        self.assertEqual(proxy.double(3), 6)
+        self.assertEqual(proxy.name, 'client')
+        with self.assertRaises(ValueError):
+            proxy.fail()
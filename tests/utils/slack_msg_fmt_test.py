@@ -1,6 +1,6 @@
 """Test slack message formatting utility class."""
 from utils.slack_msg_fmt import \
-    wrap_slack_code, wrap_code_block, wrap_quote, wrap_emph
+    wrap_slack_code, wrap_code_block, wrap_quote, wrap_emph, split_message
 from unittest import TestCase
 
 
@@ -26,3 +26,30 @@ class TestGithubInterface(TestCase):
         """Test emph formatting."""
         emph = 'THIS IS VERY IMPORTANT!!!\nPLEASE READ IT!!!'
         assert wrap_emph(emph) == f"*{emph}*"
+
+    def test_split_message_short(self):
+        """Test that short messages are left as is."""
+        assert split_message('hello\nworld', 100) == ['hello\nworld']
+
+    def test_split_message_lines(self):
+        """Test that long messages are split at line breaks."""
+        text = ''.join(f'line {i}\n' for i in range(100))
+        parts = split_message(text, 100)
+        assert len(parts) > 1
+        assert all(len(p) <= 100 for p in parts)
+        assert all(p.endswith('\n') for p in parts)
+        assert ''.join(parts) == text
+
+    def test_split_message_long_line(self):
+        """Test that lines longer than the maximum are split too."""
+        parts = split_message('x' * 250, 100)
+        assert all(len(p) <= 100 for p in parts)
+        assert ''.join(parts) == 'x' * 250
+
+    def test_split_message_code_block(self):
+        """Test that code blocks cut in two stay code blocks."""
+        text = wrap_code_block('\n'.join(f'code {i}' for i in range(50)))
+        parts = split_message(text, 100)
+        assert len(parts) > 2
+        assert all(len(p) <= 100 for p in parts)
+        assert all(p.count('```') == 2 for p in parts)
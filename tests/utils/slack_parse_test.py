@@ -108,3 +108,27 @@ class TestSlackParseHelpers(TestCase):
     def test_escape_normal_email(self):
         email = 'robert@bobheadxi.dev'
         self.assertEqual(util.escape_email(email), email)
+
+    def test_normalize_command(self):
+        """Test normalizing punctuation and escaped IDs at once."""
+        cmd = 'user edit —username <@U1234|user> —name “Steven ‘U’”'
+        self.assertEqual(util.normalize_command(cmd),
+                         'user edit --username U1234 --name "Steven \'U\'"')
+        self.assertEqual(util.normalize_command('team list'), 'team list')
+
+    def test_normalize_command_matches_passes(self):
+        """Test that normalizing does the same as the separate passes."""
+        for cmd in ['foo <@U1234|a—b> “x”', '<#C1234|general> — ’',
+                    'export emails --team "a b"']:
+            expected = ''.join(map(util.regularize_char, cmd))
+            expected = util.ios_dash(util.escaped_id_to_id(expected))
+            self.assertEqual(util.normalize_command(cmd), expected)
+
+    def test_split_command(self):
+        """Test splitting commands, with quoted arguments."""
+        self.assertEqual(util.split_command('team create "a b" --lead U1'),
+                         ('team', 'create', 'a b', '--lead', 'U1'))
+        self.assertIs(util.split_command('team list'),
+                      util.split_command('team list'))
+        with self.assertRaises(ValueError):
+            util.split_command('team create "a b')
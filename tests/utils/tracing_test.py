@@ -0,0 +1,134 @@
+"""Test the tracing of calls to external services."""
+import asyncio
+import json
+import utils.tracing as tracing
+from unittest import mock, TestCase
+
+
+@tracing.trace_methods('fake')
+class FakeClient:
+    def call(self, x):
+        return x
+
+    def fail(self):
+        raise ValueError
+
+    @property
+    def prop(self):
+        return 'prop'
+
+    @staticmethod
+    def static():
+        return 'static'
+
+    def _private(self):
+        return 'private'
+
+    async def wait(self, seconds):
+        await asyncio.sleep(seconds)
+        return seconds
+
+
+class TestTracing(TestCase):
+    """Test traces and spans."""
+
+    def setUp(self):
+        self.client = FakeClient()
+
+    def test_no_trace(self):
+        """Test that calls outside of a trace are not recorded."""
+        self.assertEqual(self.client.call(1), 1)
+        self.assertIsNone(tracing.current_trace.get())
+
+    def test_trace(self):
+        """Test that calls in a trace are counted and timed."""
+        with tracing.trace('team add') as t:
+            self.client.call(1)
+            self.client.call(2)
+            with self.assertRaises(ValueError):
+                self.client.fail()
+            self.assertEqual(self.client.prop, 'prop')
+            self.assertEqual(self.client.static(), 'static')
+            self.assertEqual(self.client._private(), 'private')
+        self.assertIsNone(tracing.current_trace.get())
+        self.assertIsNotNone(t.duration_ms)
+
+        trace = t.to_dict()
+        self.assertEqual(trace['trace'], 'team add')
+        self.assertEqual(set(trace['spans']), {'fake.call', 'fake.fail'})
+        self.assertEqual(trace['spans']['fake.call']['count'], 2)
+        self.assertEqual(trace['spans']['fake.call']['errors'], 0)
+        self.assertEqual(trace['spans']['fake.fail']['errors'], 1)
+        self.assertGreaterEqual(trace['spans']['fake.call']['total_ms'],
+                                trace['spans']['fake.call']['max_ms'])
+
+    def test_nested(self):
+        """Test that nested traces add up in the outer trace."""
+        with tracing.trace('outer') as outer:
+            self.client.call(1)
+            tracing.count('Read Capacity Units', 1)
+            with tracing.trace('inner') as inner:
+                self.client.call(2)
+                tracing.count('Read Capacity Units', 2)
+        self.assertEqual(inner.spans['fake.call'].count, 1)
+        self.assertEqual(outer.spans['fake.call'].count, 2)
+        self.assertEqual(outer.counters['Read Capacity Units'], 3)
+
+    def test_coroutine(self):
+        """Test that coroutines are timed until they finish."""
+        async def run():
+            with tracing.trace('team refresh') as t:
+                await self.client.wait(0.01)
+            return t
+        t = asyncio.run(run())
+        self.assertEqual(t.spans['fake.wait'].count, 1)
+        self.assertGreaterEqual(t.spans['fake.wait'].total_ms, 10)
+
+    def test_emf(self):
+        """Test that traces are turned into embedded metrics."""
+        with tracing.trace('team add') as t:
+            self.client.call(1)
+        emf = t.to_emf()
+        directive = emf['_aws']['CloudWatchMetrics'][0]
+        self.assertEqual(directive['Namespace'], 'Rocket 2')
+        self.assertEqual(directive['Dimensions'], [['Command type']])
+        self.assertEqual(emf['Command type'], 'team add')
+        # Every metric has a value
+        for metric in directive['Metrics']:
+            self.assertIn(metric['Name'], emf)
+        self.assertEqual(emf['fake.call Calls'], 1)
+
+    def test_count(self):
+        """Test that counters are added up in the current trace only."""
+        tracing.count('Read Capacity Units', 1)
+        with tracing.trace('membership.added', tracing.EVENT) as t:
+            tracing.count('Read Capacity Units', 0.5)
+            tracing.count('Read Capacity Units', 1)
+        self.assertEqual(t.to_dict()['counters'],
+                         {'Read Capacity Units': 1.5})
+
+        emf = t.to_emf()
+        directive = emf['_aws']['CloudWatchMetrics'][0]
+        self.assertEqual(directive['Dimensions'], [['Event type']])
+        self.assertEqual(emf['Event type'], 'membership.added')
+        self.assertIn({'Name': 'Read Capacity Units', 'Unit': 'Count'},
+                      directive['Metrics'])
+        self.assertEqual(emf['Read Capacity Units'], 1.5)
+
+    @mock.patch('utils.tracing.logger')
+    def test_export(self, mock_logger):
+        """Test that traces are logged in the given format."""
+        with tracing.trace('team add') as t:
+            self.client.call(1)
+
+        tracing.export(t, 'json')
+        line = json.loads(mock_logger.info.call_args[0][0])
+        self.assertEqual(line['spans']['fake.call']['count'], 1)
+
+        tracing.export(t, 'emf')
+        line = json.loads(mock_logger.info.call_args[0][0])
+        self.assertIn('_aws', line)
+
+        mock_logger.reset_mock()
+        tracing.export(t, 'none')
+        mock_logger.info.assert_not_called()
@@ -0,0 +1,98 @@
+"""
+Call asynchronous clients from the synchronous code handling requests.
+
+Commands and webhooks are handled by synchronous code, in threads. In the
+ASGI server (see :mod:`app.asgi`), the clients they use can do their I/O on
+the event loop of the server instead: a :class:`LoopBridge` runs coroutines
+on that loop, and waits for them from the calling thread, while a
+:class:`SyncProxy` makes an asynchronous client look like a synchronous one,
+so that code written for the latter can be handed the former.
+"""
+import asyncio
+import inspect
+import threading
+
+from functools import wraps
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class LoopBridge:
+    """Event loop that threads can run coroutines on."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        Initialize a bridge, without a loop until one is attached.
+
+        :param timeout: seconds to wait for a coroutine before giving up
+        """
+        self.timeout = timeout
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[int] = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """
+        Run coroutines on ``loop`` from now on.
+
+        Must be called from the thread running the loop.
+        """
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+
+    def detach(self):
+        """Stop running coroutines, once the loop is stopping."""
+        self.loop = None
+        self.loop_thread = None
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """
+        Run a coroutine on the loop, and wait for its result.
+
+        :return: the result of the coroutine
+        :raises: whatever the coroutine raises; RuntimeError if no loop is
+                 attached, or if called from the thread of the loop, which
+                 would wait for itself forever
+        """
+        loop = self.loop
+        if loop is None or threading.get_ident() == self.loop_thread:
+            # Never awaited, but not worth a warning
+            coro.close()
+            if loop is None:
+                raise RuntimeError("No event loop to run coroutines on")
+            raise RuntimeError("Cannot wait for a coroutine on its own loop")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return future.result(self.timeout)
+
+
+class SyncProxy:
+    """
+    Synchronous stand-in for an asynchronous client.
+
+    Coroutine methods of the client are run on the loop of a bridge, and their
+    results returned; other attributes are returned as they are.
+    """
+
+    def __init__(self, client: Any, bridge: LoopBridge):
+        """
+        Initialize the stand-in.
+
+        :param client: the asynchronous client
+        :param bridge: bridge to the loop to run coroutines on
+        """
+        self.client = client
+        self.bridge = bridge
+
+    def __getattr__(self, attr: str) -> Any:
+        """Look up an attribute of the client."""
+        if attr in ('client', 'bridge'):
+            # Only missing while the object is being copied or unpickled
+            raise AttributeError(attr)
+        value = getattr(self.client, attr)
+        if not inspect.iscoroutinefunction(value):
+            return value
+
+        @wraps(value)
+        def call(*args, **kwargs):
+            return self.bridge.run(value(*args, **kwargs))
+        return call
@@ -19,3 +19,39 @@ def wrap_quote(str):
 def wrap_emph(str):
     """Format emph."""
     return f"*{str}*"
+
+
+def split_message(text, max_length):
+    """
+    Split the text of a message into parts of at most ``max_length``.
+
+    Text is split at line breaks where possible. Code blocks cut in two are
+    closed at the end of one part and opened again at the start of the next.
+
+    :param text: text of the message
+    :param max_length: maximum number of characters in a part
+    :return: list of parts, in order
+    """
+    fence = '```'
+    size = max_length - 2 * len(fence)
+    pieces = []
+    piece = ''
+    for line in text.splitlines(keepends=True):
+        if piece and len(piece) + len(line) > size:
+            pieces.append(piece)
+            piece = ''
+        while len(line) > size:
+            pieces.append(line[:size])
+            line = line[size:]
+        piece += line
+    if piece:
+        pieces.append(piece)
+
+    parts = []
+    in_code = False
+    for piece in pieces:
+        part = fence + piece if in_code else piece
+        if piece.count(fence) % 2 == 1:
+            in_code = not in_code
+        parts.append(part + fence if in_code else part)
+    return parts
@@ -1,7 +1,20 @@
 """The following are a few functions to help in handling command."""
 import re
+import shlex
 from app.model import Permissions, User, Team
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Apple platforms replace quotes and double-hyphens with "smart" punctuation,
+# which argparse does not understand
+SMART_PUNCTUATION = str.maketrans({
+    '‘': "'",
+    '’': "'",
+    '“': '"',
+    '”': '"',
+    '—': '--',
+})
+ESCAPED_ID = re.compile(r"<[#@](\w+)\|[^>]+>")
 
 
 def regularize_char(c: str) -> str:
@@ -35,9 +48,7 @@ def escaped_id_to_id(s: str) -> str:
     :param s: string to convert
     :return: string where all instances of escaped ID is replaced with IDs
     """
-    return re.sub(r"<[#@](\w+)\|[^>]+>",
-                  r"\1",
-                  s)
+    return ESCAPED_ID.sub(r"\1", s)
 
 
 def ios_dash(s: str) -> str:
@@ -58,6 +69,38 @@ def ios_dash(s: str) -> str:
     return s.replace("—", "--")
 
 
+def normalize_command(s: str) -> str:
+    """
+    Prepare the text of a command for parsing.
+
+    Does what :func:`regularize_char`, :func:`escaped_id_to_id` and
+    :func:`ios_dash` do, with a single pass over the characters (and one more
+    only if the text contains an escaped ID).
+
+    :param s: text of the command, as sent by Slack
+    :return: text with ascii punctuation and unescaped IDs
+    """
+    s = s.translate(SMART_PUNCTUATION)
+    if '<' in s:
+        s = ESCAPED_ID.sub(r"\1", s)
+    return s
+
+
+@lru_cache(maxsize=1024)
+def split_command(s: str) -> Tuple[str, ...]:
+    """
+    Split a command into arguments, like a shell would.
+
+    Results are cached, since the same commands (like ``team list``) are sent
+    over and over; the returned tuple must not be modified.
+
+    :param s: normalized text of the command
+    :raises: ValueError if quotes are not closed
+    :return: the arguments of the command
+    """
+    return tuple(shlex.split(s))
+
+
 def check_permissions(user: User, team: Optional[Team]) -> bool:
     """
     Check if given user is admin or team lead.
@@ -0,0 +1,310 @@
+"""
+Time the calls made to external services while handling a request.
+
+A trace is started around the handling of each command (see
+:func:`trace`). While it is running, every call to a method wrapped with
+:func:`span` or :func:`trace_methods` is timed, and its count and latency
+are added up in the trace under the name of the span, like ``db.query`` or
+``github.org_add_member``. Once the command is handled, the trace is written
+to the ``rocket2.trace`` log as one JSON line (see :func:`export`), either as
+is or in the CloudWatch embedded metric format (EMF), which CloudWatch Logs
+turns into metrics.
+
+Traces also add up counters, like the DynamoDB capacity units consumed by a
+command (see :func:`count`).
+
+Outside of a trace, wrapped methods only cost a lookup of the current trace.
+"""
+import inspect
+import json
+import logging
+import threading
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, \
+    Type, TypeVar
+
+C = TypeVar('C')
+F = TypeVar('F', bound=Callable[..., Any])
+
+# Formats traces can be exported in
+FORMATS = ('json', 'emf')
+# Namespace and dimensions of the metrics exported in EMF, as submitted by
+# :class:`interface.cloudwatch_metrics.CWMetrics`
+NAMESPACE = 'Rocket 2'
+COMMAND = 'Command type'
+EVENT = 'Event type'
+
+logger = logging.getLogger('rocket2.trace')
+
+
+class SpanStats:
+    """Number of calls to a span, and how long they took."""
+
+    __slots__ = ('count', 'errors', 'total_ms', 'max_ms')
+
+    def __init__(self):
+        """Initialize stats of a span that was never called."""
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the stats as a dictionary, with times in milliseconds."""
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total_ms, 3),
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+class Trace:
+    """Stats of every span called, and counters, while handling a request."""
+
+    def __init__(self, name: str = '', dimension: str = COMMAND):
+        """
+        Start a trace.
+
+        :param name: name of what is traced, like ``team add``; can be set
+                     later, once it is known
+        :param dimension: dimension of the metrics of the trace, like
+                          ``Command type``
+        """
+        self.name = name
+        self.dimension = dimension
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, float] = {}
+        self.start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        # Other threads can record spans too, if they run in a copy of the
+        # context of the request (see contextvars.copy_context)
+        self.lock = threading.Lock()
+
+    def record(self, span_name: str, ms: float, failed: bool = False):
+        """
+        Add a call to a span.
+
+        :param span_name: name of the span, like ``db.query``
+        :param ms: milliseconds the call took
+        :param failed: whether the call raised an exception
+        """
+        with self.lock:
+            stats = self.spans.get(span_name)
+            if stats is None:
+                stats = self.spans[span_name] = SpanStats()
+            stats.count += 1
+            stats.errors += failed
+            stats.total_ms += ms
+            if ms > stats.max_ms:
+                stats.max_ms = ms
+
+    def add(self, counter: str, amount: float):
+        """
+        Add to a counter.
+
+        :param counter: name of the counter, like ``Read Capacity Units``
+        :param amount: amount to add
+        """
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def merge(self, other: 'Trace'):
+        """
+        Add the spans and counters of another trace to this one.
+
+        :param other: the trace to add
+        """
+        with other.lock:
+            spans = list(other.spans.items())
+            counters = list(other.counters.items())
+        with self.lock:
+            for name, theirs in spans:
+                ours = self.spans.get(name)
+                if ours is None:
+                    ours = self.spans[name] = SpanStats()
+                ours.count += theirs.count
+                ours.errors += theirs.errors
+                ours.total_ms += theirs.total_ms
+                ours.max_ms = max(ours.max_ms, theirs.max_ms)
+            for name, n in counters:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def finish(self):
+        """Record how long the trace took."""
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the trace as a dictionary, with times in milliseconds."""
+        with self.lock:
+            spans = {name: stats.to_dict()
+                     for name, stats in sorted(self.spans.items())}
+            counters = {name: round(n, 3)
+                        for name, n in sorted(self.counters.items())}
+        return {
+            'trace': self.name,
+            'duration_ms': round(self.duration_ms or 0.0, 3),
+            'spans': spans,
+            'counters': counters,
+        }
+
+    def to_emf(self) -> Dict[str, Any]:
+        """
+        Return the trace in the CloudWatch embedded metric format.
+
+        Every span becomes two metrics, like ``db.query Time`` (total
+        milliseconds) and ``db.query Calls``, and every counter becomes a
+        metric of its own. The name of the trace is the value of its
+        dimension.
+
+        See https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html # noqa
+        """
+        trace = self.to_dict()
+        metrics = [{'Name': 'Traced Time', 'Unit': 'Milliseconds'}]
+        emf: Dict[str, Any] = {
+            self.dimension: self.name,
+            'Traced Time': trace['duration_ms'],
+        }
+        for name, stats in trace['spans'].items():
+            metrics.append({'Name': f'{name} Time', 'Unit': 'Milliseconds'})
+            metrics.append({'Name': f'{name} Calls', 'Unit': 'Count'})
+            emf[f'{name} Time'] = stats['total_ms']
+            emf[f'{name} Calls'] = stats['count']
+        for name, n in trace['counters'].items():
+            metrics.append({'Name': name, 'Unit': 'Count'})
+            emf[name] = n
+        emf['_aws'] = {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [[self.dimension]],
+                'Metrics': metrics,
+            }],
+        }
+        # Kept out of the metrics, but searchable in CloudWatch Logs
+        emf['spans'] = trace['spans']
+        return emf
+
+
+current_trace: ContextVar[Optional[Trace]] = \
+    ContextVar('current_trace', default=None)
+
+
+@contextmanager
+def trace(name: str = '', dimension: str = COMMAND) -> Iterator[Trace]:
+    """
+    Trace the calls made in this block, by this thread.
+
+    A trace started inside another one adds its spans and counters to the
+    outer one once it finishes.
+
+    :param name: name of what is traced
+    :param dimension: dimension of the metrics of the trace
+    :return: the trace, finished when the block exits
+    """
+    t = Trace(name, dimension)
+    token = current_trace.set(t)
+    try:
+        yield t
+    finally:
+        current_trace.reset(token)
+        t.finish()
+        outer = current_trace.get()
+        if outer is not None:
+            outer.merge(t)
+
+
+def count(counter: str, amount: float):
+    """
+    Add to a counter of the current trace, if any.
+
+    :param counter: name of the counter, like ``Read Capacity Units``
+    :param amount: amount to add
+    """
+    t = current_trace.get()
+    if t is not None:
+        t.add(counter, amount)
+
+
+def span(name: str) -> Callable[[F], F]:
+    """
+    Record the calls to the decorated function in the current trace.
+
+    Coroutine functions are timed until their coroutine finishes.
+
+    :param name: name of the span, like ``db.query``
+    """
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                t = current_trace.get()
+                if t is None:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                failed = True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    t.record(name, (time.perf_counter() - start) * 1000,
+                             failed)
+            return async_wrapper  # type: ignore
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            t = current_trace.get()
+            if t is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                t.record(name, (time.perf_counter() - start) * 1000, failed)
+        return wrapper  # type: ignore
+    return decorator
+
+
+def trace_methods(prefix: str,
+                  names: Optional[Iterable[str]] = None) \
+        -> Callable[[Type[C]], Type[C]]:
+    """
+    Record the calls to methods of the decorated class in the current trace.
+
+    Spans are named after the prefix and the method, like ``db.query``.
+
+    :param prefix: prefix of the names of the spans
+    :param names: names of the methods to trace; defaults to every public
+                  method defined by the class
+    """
+    def decorator(cls: Type[C]) -> Type[C]:
+        methods = set(names) if names is not None else \
+            {n for n in vars(cls) if not n.startswith('_')}
+        for n, f in list(vars(cls).items()):
+            # Properties, static and class methods are left alone
+            if n in methods and inspect.isfunction(f):
+                setattr(cls, n, span(f'{prefix}.{n}')(f))
+        return cls
+    return decorator
+
+
+def export(t: Trace, fmt: str):
+    """
+    Write a trace to the ``rocket2.trace`` log, as one line of JSON.
+
+    :param t: the trace to write
+    :param fmt: ``json`` for the trace as is, ``emf`` for the CloudWatch
+                embedded metric format, or anything else to skip writing
+    """
+    if fmt == 'json':
+        logger.info(json.dumps(t.to_dict()))
+    elif fmt == 'emf':
+        logger.info(json.dumps(t.to_emf()))